@@ -1,28 +1,84 @@
 import asyncio
+from telegram import Update
 from telegram.ext import ApplicationBuilder
 from app.core.config import get_settings
-from app.bot.handlers import setup_handlers
-from app.db.database import engine, Base, SessionLocal
+from app.bot.dispatcher import setup_dispatcher
+from app.bot.webhook import webhook_queue
+from app.db.database import engine
+from app.db.models import Base
+from app.services.notifications import notification_outbox
 from app.services.scheduler import schedule_jobs
 
 settings = get_settings()
 
-async def main():
+def webhook_enabled() -> bool:
+    """
+    Indica se os updates chegam por webhook (em vez de polling).
+    """
+    mode = settings.WEBHOOK_CONFIG["mode"]
+    if mode == "auto":
+        return bool(settings.TELEGRAM_WEBHOOK_URL)
+    return mode == "webhook"
+
+async def start_notifications(application) -> None:
+    """
+    Inicia os workers da fila de notificações com o Bot da Application.
+    """
+    await notification_outbox.start(application.bot)
+
+async def stop_notifications(application) -> None:
+    await notification_outbox.stop()
+
+def build_application():
     # Criar tabelas do banco de dados
     Base.metadata.create_all(bind=engine)
-    
-    # Configurar o bot
-    application = ApplicationBuilder().token(settings.TELEGRAM_BOT_TOKEN).build()
-    
-    # Configurar handlers
-    setup_handlers(application)
-    
+
+    # Configurar o bot e os handlers (chats diferentes em paralelo, cada chat em ordem)
+    builder = (
+        ApplicationBuilder()
+        .token(settings.TELEGRAM_BOT_TOKEN)
+        .post_init(start_notifications)
+        .post_shutdown(stop_notifications)
+    )
+    application = setup_dispatcher(builder)
+
     # Configurar tarefas agendadas
-    db = SessionLocal()
-    schedule_jobs(application, db)
-    
+    schedule_jobs(application)
+    return application
+
+async def start_webhook(application) -> None:
+    """
+    Inicia a Application sem polling e registra o webhook no Telegram.
+
+    Os updates passam a ser recebidos pelo endpoint do FastAPI (app.main).
+    """
+    if not settings.TELEGRAM_WEBHOOK_SECRET:
+        raise RuntimeError("TELEGRAM_WEBHOOK_SECRET é obrigatório no modo webhook")
+    await application.initialize()
+    await application.start()
+    await webhook_queue.start(application)
+    await start_notifications(application)
+    await application.bot.set_webhook(
+        url=settings.TELEGRAM_WEBHOOK_URL,
+        secret_token=settings.TELEGRAM_WEBHOOK_SECRET,
+        max_connections=settings.WEBHOOK_CONFIG["max_connections"],
+        allowed_updates=Update.ALL_TYPES
+    )
+
+async def stop_webhook(application) -> None:
+    """
+    Processa os updates já recebidos e encerra a Application.
+    """
+    await webhook_queue.stop()
+    await stop_notifications(application)
+    await application.stop()
+    await application.shutdown()
+
+async def main():
+    application = build_application()
+
     # Iniciar o bot
     await application.run_polling()
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    asyncio.run(main())
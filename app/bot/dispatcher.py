@@ -0,0 +1,141 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Dict, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from app.bot.handlers import setup_handlers
+from app.core.config import settings
+
+logger = logging.getLogger('julliuz_bot')
+
+def chat_key(update: object) -> Optional[int]:
+    """
+    Chave de ordenação de um update: o chat ou, sem chat, o usuário.
+
+    Returns:
+        ID do chat/usuário ou None quando o update não tem ordem a preservar
+    """
+    if not isinstance(update, Update):
+        return None
+    if update.effective_chat is not None:
+        return update.effective_chat.id
+    if update.effective_user is not None:
+        return update.effective_user.id
+    return None
+
+class _ChatSlot:
+    """Lock de um chat e quantos updates dele estão no dispatcher."""
+    __slots__ = ("lock", "pending")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.pending = 0
+
+class PerChatUpdateProcessor(BaseUpdateProcessor):
+    """
+    Processa updates de chats diferentes em paralelo, até `max_concurrent`
+    handlers ao mesmo tempo, preservando a ordem de chegada dentro de cada
+    chat.
+
+    O semáforo do BaseUpdateProcessor limita quantos updates o dispatcher
+    aceita (rodando ou aguardando). O limite de handlers em execução só é
+    aplicado depois que o update obtém a vez no seu chat: updates enfileirados
+    atrás de um handler lento não ocupam as vagas dos outros chats.
+    """
+    def __init__(self, max_concurrent: Optional[int] = None, max_pending: Optional[int] = None):
+        """
+        Inicializa o dispatcher.
+
+        Args:
+            max_concurrent: Número máximo de handlers executando ao mesmo tempo
+            max_pending: Número máximo de updates aceitos (rodando ou aguardando)
+        """
+        config = settings.DISPATCHER_CONFIG
+        self.max_concurrent = max_concurrent or config["max_concurrent_updates"]
+        super().__init__(max(max_pending or config["max_pending_updates"], self.max_concurrent))
+        self._running = asyncio.Semaphore(self.max_concurrent)
+        self._chats: Dict[int, _ChatSlot] = {}
+        self.in_flight = 0
+        self.waiting = 0
+        self.processed = 0
+        self.max_in_flight = 0
+
+    async def do_process_update(self, update: object, coroutine: "Awaitable[Any]") -> None:
+        key = chat_key(update)
+        slot = None
+        if key is not None:
+            slot = self._chats.get(key)
+            if slot is None:
+                slot = self._chats[key] = _ChatSlot()
+            slot.pending += 1
+
+        self.waiting += 1
+        started = False
+        try:
+            if slot is not None:
+                await slot.lock.acquire()
+            try:
+                async with self._running:
+                    self.waiting -= 1
+                    started = True
+                    self.in_flight += 1
+                    self.max_in_flight = max(self.max_in_flight, self.in_flight)
+                    try:
+                        await coroutine
+                    finally:
+                        self.in_flight -= 1
+                        self.processed += 1
+            finally:
+                if slot is not None:
+                    slot.lock.release()
+        finally:
+            if not started:
+                # Cancelado antes de rodar: descarta a corrotina sem executá-la
+                self.waiting -= 1
+                coroutine.close()
+            if slot is not None:
+                slot.pending -= 1
+                if not slot.pending:
+                    del self._chats[key]
+
+    async def initialize(self) -> None:
+        """Nada a alocar: locks e semáforos são criados sob demanda."""
+
+    async def shutdown(self) -> None:
+        if self.in_flight or self.waiting:
+            logger.warning(f"Dispatcher encerrado com {self.in_flight} updates em execução e {self.waiting} aguardando")
+
+    def chat_pending(self, chat_id: int) -> int:
+        """
+        Número de updates de um chat no dispatcher (em execução ou aguardando).
+        """
+        slot = self._chats.get(chat_id)
+        return slot.pending if slot is not None else 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "active_chats": len(self._chats),
+            "max_concurrent": self.max_concurrent,
+            "max_pending": self.max_concurrent_updates,
+            "max_in_flight": self.max_in_flight,
+            "processed": self.processed
+        }
+
+def setup_dispatcher(builder, processor: Optional[PerChatUpdateProcessor] = None):
+    """
+    Monta a Application com o dispatcher por chat e registra os handlers.
+
+    Args:
+        builder: ApplicationBuilder já com token e demais opções
+        processor: Dispatcher a usar (padrão: um novo com DISPATCHER_CONFIG)
+
+    Returns:
+        Application configurada
+    """
+    application = builder.concurrent_updates(processor or PerChatUpdateProcessor()).build()
+    setup_handlers(application)
+    return application
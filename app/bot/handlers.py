@@ -1,10 +1,17 @@
+import math
 from telegram import Update
 from telegram.ext import ContextTypes, CommandHandler
-from app.services.transaction import add_transaction_to_db
-from app.services.user import get_or_create_user
+from app.bot.streaming import stream_to_message
+from app.db.database import AsyncSessionLocal
+from app.services.ai import stream_ai_response
+from app.services.ai_scheduler import PRIORITY_COMMAND
+from app.services.ingestion import transaction_ingestor
+from app.services.preferences import update_user_preferences_async
+from app.services.rate_limit import command_limiter, message_limiter
+from app.services.user import get_user_identity_async
 
 async def start(update, context):
-    user = get_or_create_user(update.effective_user)
+    await get_user_identity_async(update.effective_user)
     await context.bot.send_message(chat_id=update.effective_chat.id, text="Bem-vindo ao Julliuz Bot!")
 
 async def add_transaction(update, context):
@@ -18,11 +25,51 @@ async def add_transaction(update, context):
         category = args[1]
         description = " ".join(args[2:]) if len(args) > 2 else None
 
-        add_transaction_to_db(update.effective_user.id, value, category, description)
+        user = await get_user_identity_async(update.effective_user)
+        await transaction_ingestor.submit(user.id, value, category, description)
         await context.bot.send_message(chat_id=update.effective_chat.id, text="Transação adicionada com sucesso!")
     except Exception as e:
         await context.bot.send_message(chat_id=update.effective_chat.id, text=f"Erro ao adicionar transação: {e}")
 
+async def _reply_with_ai(update, context, question: str, priority: int):
+    limiter = command_limiter if priority == PRIORITY_COMMAND else message_limiter
+    limit = limiter.check(update.effective_user.id)
+    if not limit.allowed:
+        await context.bot.send_message(
+            chat_id=update.effective_chat.id,
+            text=f"Muitas mensagens seguidas. Tente novamente em {math.ceil(limit.retry_after)}s."
+        )
+        return
+
+    user = await get_user_identity_async(update.effective_user)
+    await stream_to_message(
+        context.bot,
+        update.effective_chat.id,
+        stream_ai_response(question, user, use_cache=user.ai_cache_enabled, priority=priority)
+    )
+
+async def ask(update, context):
+    question = " ".join(context.args or [])
+    if not question:
+        await context.bot.send_message(chat_id=update.effective_chat.id, text="Uso: /ask <pergunta>")
+        return
+    await _reply_with_ai(update, context, question, PRIORITY_COMMAND)
+
+async def ai_cache_setting(update, context):
+    args = context.args or []
+    if len(args) != 1 or args[0].lower() not in ("on", "off"):
+        await context.bot.send_message(chat_id=update.effective_chat.id, text="Uso: /ai_cache <on|off>")
+        return
+
+    enabled = args[0].lower() == "on"
+    user = await get_user_identity_async(update.effective_user)
+    async with AsyncSessionLocal() as db:
+        await update_user_preferences_async(db, user.id, ai_cache_enabled=enabled)
+    status = "ativado" if enabled else "desativado"
+    await context.bot.send_message(chat_id=update.effective_chat.id, text=f"Cache de respostas da IA {status}.")
+
 def setup_handlers(application):
     application.add_handler(CommandHandler("start", start))
-    application.add_handler(CommandHandler("add_transaction", add_transaction))
\ No newline at end of file
+    application.add_handler(CommandHandler("add_transaction", add_transaction))
+    application.add_handler(CommandHandler("ask", ask))
+    application.add_handler(CommandHandler("ai_cache", ai_cache_setting))
\ No newline at end of file
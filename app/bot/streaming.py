@@ -0,0 +1,72 @@
+import asyncio
+import logging
+import time
+from typing import AsyncIterable
+
+from telegram.error import BadRequest, RetryAfter
+
+logger = logging.getLogger('julliuz_bot')
+
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+
+async def _edit(bot, chat_id: int, message_id: int, text: str) -> None:
+    try:
+        await bot.edit_message_text(chat_id=chat_id, message_id=message_id, text=text)
+    except RetryAfter as e:
+        await asyncio.sleep(e.retry_after)
+        await bot.edit_message_text(chat_id=chat_id, message_id=message_id, text=text)
+    except BadRequest as e:
+        if "not modified" not in str(e).lower():
+            raise
+
+async def stream_to_message(
+    bot,
+    chat_id: int,
+    chunks: AsyncIterable[str],
+    placeholder: str = "…",
+    min_interval: float = 1.0
+) -> str:
+    """
+    Envia uma resposta em streaming editando progressivamente uma mensagem.
+
+    As edições são espaçadas por `min_interval` segundos para respeitar os
+    limites do Telegram. Textos maiores que o limite de uma mensagem
+    continuam em uma nova mensagem.
+
+    Args:
+        bot: Instância do bot do Telegram
+        chat_id: Chat de destino
+        chunks: Trechos de texto, na ordem em que são gerados
+        placeholder: Texto exibido até o primeiro trecho chegar
+        min_interval: Intervalo mínimo entre edições, em segundos
+
+    Returns:
+        Texto completo enviado
+    """
+    message = await bot.send_message(chat_id=chat_id, text=placeholder)
+    full_text = ""
+    current = ""
+    shown = placeholder
+    last_edit = time.monotonic()
+
+    async for chunk in chunks:
+        full_text += chunk
+        current += chunk
+
+        while len(current) > TELEGRAM_MAX_MESSAGE_LENGTH:
+            head, current = current[:TELEGRAM_MAX_MESSAGE_LENGTH], current[TELEGRAM_MAX_MESSAGE_LENGTH:]
+            if head != shown:
+                await _edit(bot, chat_id, message.message_id, head)
+            # A nova mensagem também respeita o limite; o restante fica para a próxima volta
+            shown = current[:TELEGRAM_MAX_MESSAGE_LENGTH] or placeholder
+            message = await bot.send_message(chat_id=chat_id, text=shown)
+            last_edit = time.monotonic()
+
+        if current.strip() and current != shown and time.monotonic() - last_edit >= min_interval:
+            await _edit(bot, chat_id, message.message_id, current)
+            shown = current
+            last_edit = time.monotonic()
+
+    if current.strip() and current != shown:
+        await _edit(bot, chat_id, message.message_id, current)
+    return full_text
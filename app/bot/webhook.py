@@ -0,0 +1,176 @@
+import asyncio
+import hmac
+import logging
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from fastapi import APIRouter, Header, HTTPException, Request, Response
+from telegram import Update
+
+from app.core.config import settings
+
+logger = logging.getLogger('julliuz_bot')
+
+class UpdateQueueFullError(Exception):
+    """A fila de updates do webhook está cheia."""
+
+def verify_secret(received: Optional[str], expected: str) -> bool:
+    """
+    Compara o cabeçalho X-Telegram-Bot-Api-Secret-Token com o segredo
+    configurado em tempo constante. Sem segredo configurado nada é aceito.
+    """
+    if not expected or received is None:
+        return False
+    return hmac.compare_digest(received.encode(), expected.encode())
+
+class WebhookUpdateQueue:
+    """
+    Fila limitada entre o endpoint do webhook e a Application do PTB.
+
+    O endpoint só valida e enfileira o update, respondendo ao Telegram na
+    hora; um despachante retira os updates da fila e inicia cada um em sua
+    própria task, entregando-o a `Application.process_update` pelo update
+    processor da Application (que mantém a ordem dentro de cada chat). O
+    número de updates despachados é limitado pelo semáforo do processor, não
+    por workers presos a um update: vários updates de um chat lento aguardam
+    a vez do chat sem atrasar os outros chats. Com a fila cheia o endpoint
+    responde 503 e o Telegram reenvia o update mais tarde.
+    """
+    def __init__(self, max_size: Optional[int] = None, workers: Optional[int] = None):
+        """
+        Inicializa a fila.
+
+        Args:
+            max_size: Número máximo de updates aguardando processamento
+            workers: Número de updates despachados ao mesmo tempo quando a
+                Application não tem update processor
+        """
+        config = settings.WEBHOOK_CONFIG
+        self.max_size = max_size or config["queue_size"]
+        self.workers = workers or config["workers"]
+        self.application = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._updates: Set[asyncio.Task] = set()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.received = 0
+        self.processed = 0
+        self.rejected = 0
+        self.errors = 0
+        self.latency = 0.0
+        self.max_latency = 0.0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self, application) -> None:
+        """
+        Inicia o despachante. A Application já deve estar inicializada.
+        """
+        if self.running:
+            return
+        self.application = application
+        processor = getattr(application, "update_processor", None)
+        limit = processor.max_concurrent_updates if processor is not None else self.workers
+        self._slots = asyncio.Semaphore(limit)
+        self._queue = asyncio.Queue(self.max_size)
+        self._tasks = [asyncio.create_task(self._dispatch())]
+
+    def submit(self, data: Dict[str, Any]) -> Update:
+        """
+        Enfileira um update recebido pelo webhook.
+
+        Raises:
+            UpdateQueueFullError: A fila está cheia
+        """
+        update = Update.de_json(data, self.application.bot)
+        try:
+            self._queue.put_nowait((update, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise UpdateQueueFullError(f"Fila de updates cheia ({self.max_size})")
+        self.received += 1
+        return update
+
+    async def _dispatch(self) -> None:
+        while True:
+            # A vaga é obtida antes de retirar o update: sem vagas, a fila enche e o endpoint responde 503
+            await self._slots.acquire()
+            update, received_at = await self._queue.get()
+            task = asyncio.create_task(self._process(update, received_at))
+            self._updates.add(task)
+            task.add_done_callback(self._updates.discard)
+
+    async def _process(self, update: Update, received_at: float) -> None:
+        try:
+            processor = getattr(self.application, "update_processor", None)
+            if processor is not None:
+                await processor.process_update(update, self.application.process_update(update))
+            else:
+                await self.application.process_update(update)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Erro ao processar update {update.update_id}: {e}")
+        finally:
+            latency = time.perf_counter() - received_at
+            self.processed += 1
+            self.latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            self._slots.release()
+            self._queue.task_done()
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        Aguarda os updates enfileirados (até `timeout`) e encerra o despachante.
+        """
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self._queue.qsize()} updates descartados ao encerrar o webhook")
+        tasks = self._tasks + list(self._updates)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_size": self.max_size,
+            "workers": self.workers,
+            "in_flight": len(self._updates),
+            "received": self.received,
+            "processed": self.processed,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "avg_latency": self.latency / self.processed if self.processed else 0.0,
+            "max_latency": self.max_latency
+        }
+
+# Instância global da fila de updates do webhook
+webhook_queue = WebhookUpdateQueue()
+
+router = APIRouter()
+
+@router.post(settings.WEBHOOK_CONFIG["path"])
+async def telegram_webhook(
+    request: Request,
+    x_telegram_bot_api_secret_token: Optional[str] = Header(None)
+) -> Response:
+    """
+    Recebe updates do Telegram no modo webhook.
+    """
+    if not webhook_queue.running:
+        raise HTTPException(status_code=404)
+    if not verify_secret(x_telegram_bot_api_secret_token, settings.TELEGRAM_WEBHOOK_SECRET):
+        raise HTTPException(status_code=403)
+    try:
+        webhook_queue.submit(await request.json())
+    except UpdateQueueFullError:
+        raise HTTPException(status_code=503)
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400)
+    return Response(status_code=200)
@@ -11,10 +11,55 @@ class Settings(BaseSettings):
     # Telegram
     TELEGRAM_BOT_TOKEN: str  # Obrigatório
     TELEGRAM_WEBHOOK_URL: str = ""
+    TELEGRAM_WEBHOOK_SECRET: str = ""
+    WEBHOOK_CONFIG: dict = {
+        # "auto" usa webhook quando TELEGRAM_WEBHOOK_URL está definido
+        "mode": os.getenv("BOT_UPDATE_MODE", "auto"),
+        "path": os.getenv("WEBHOOK_PATH", "/telegram/webhook"),
+        "queue_size": int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000")),
+        "workers": int(os.getenv("WEBHOOK_WORKERS", "8")),
+        "max_connections": int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40"))
+    }
+    DISPATCHER_CONFIG: dict = {
+        # Handlers rodando ao mesmo tempo (chats diferentes)
+        "max_concurrent_updates": int(os.getenv("BOT_MAX_CONCURRENT_UPDATES", "32")),
+        # Updates aceitos pelo dispatcher, rodando ou aguardando a vez do chat
+        "max_pending_updates": int(os.getenv("BOT_MAX_PENDING_UPDATES", "1000"))
+    }
 
     # Ollama
     OLLAMA_BASE_URL: str = "http://localhost:11434"
     OLLAMA_MODEL: str = "gemma:latest"
+    OLLAMA_CONFIG: dict = {
+        "max_connections": int(os.getenv("OLLAMA_MAX_CONNECTIONS", "8")),
+        "max_concurrency": int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4")),
+        "keepalive_timeout": float(os.getenv("OLLAMA_KEEPALIVE_TIMEOUT", "60")),
+        "connect_timeout": float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5")),
+        "read_timeout": float(os.getenv("OLLAMA_READ_TIMEOUT", "60")),
+        "total_timeout": float(os.getenv("OLLAMA_TOTAL_TIMEOUT", "180")),
+        "options": {
+            "temperature": float(os.getenv("OLLAMA_TEMPERATURE", "0.7")),
+            "top_p": float(os.getenv("OLLAMA_TOP_P", "0.9")),
+            "num_predict": int(os.getenv("OLLAMA_NUM_PREDICT", "500"))
+        }
+    }
+    AI_CACHE_CONFIG: dict = {
+        "enabled": os.getenv("AI_CACHE_ENABLED", "true").lower() == "true",
+        "max_entries": int(os.getenv("AI_CACHE_MAX_ENTRIES", "2000")),
+        "ttl": int(os.getenv("AI_CACHE_TTL", "86400")),
+        "threshold": float(os.getenv("AI_CACHE_SIMILARITY_THRESHOLD", "0.7")),
+        "num_perm": int(os.getenv("AI_CACHE_NUM_PERM", "64")),
+        "bands": int(os.getenv("AI_CACHE_BANDS", "16")),
+        "min_words": int(os.getenv("AI_CACHE_MIN_WORDS", "2"))
+    }
+    AI_SCHEDULER_CONFIG: dict = {
+        "max_in_flight": int(os.getenv("AI_MAX_IN_FLIGHT", "2"))
+    }
+    AI_CONVERSATION_CONFIG: dict = {
+        "max_users": int(os.getenv("AI_CONVERSATION_MAX_USERS", "1000")),
+        "ttl": int(os.getenv("AI_CONVERSATION_TTL", "1800")),
+        "max_context_tokens": int(os.getenv("AI_CONVERSATION_MAX_CONTEXT_TOKENS", "4096"))
+    }
 
     # Database
     DATABASE_URL: str = (
@@ -54,6 +99,13 @@ class Settings(BaseSettings):
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
+    REDIS_POOL_CONFIG: dict = {
+        "max_connections": int(os.getenv("REDIS_MAX_CONNECTIONS", "50")),
+        "pool_timeout": float(os.getenv("REDIS_POOL_TIMEOUT", "5")),
+        "socket_timeout": float(os.getenv("REDIS_SOCKET_TIMEOUT", "2")),
+        "connect_timeout": float(os.getenv("REDIS_CONNECT_TIMEOUT", "2")),
+        "health_check_interval": int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))
+    }
 
     # Logging configuration
     LOG_CONFIG: dict = {
@@ -90,7 +142,10 @@ class Settings(BaseSettings):
         "rate_limit": {
             "enabled": os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true",
             "max_requests": int(os.getenv("RATE_LIMIT_MAX_REQUESTS", "60")),
-            "time_window": int(os.getenv("RATE_LIMIT_TIME_WINDOW", "60"))
+            "time_window": int(os.getenv("RATE_LIMIT_TIME_WINDOW", "60")),
+            "mode": os.getenv("RATE_LIMIT_MODE", "sliding_window"),
+            "sync_interval": float(os.getenv("RATE_LIMIT_SYNC_INTERVAL", "1.0")),
+            "local_max_keys": int(os.getenv("RATE_LIMIT_LOCAL_MAX_KEYS", "100000"))
         },
         "ssl": {
             "enabled": os.getenv("SSL_ENABLED", "true").lower() == "true",
@@ -104,11 +159,88 @@ class Settings(BaseSettings):
         "max_workers": int(os.getenv("MAX_WORKERS", "4")),
         "timeout": int(os.getenv("REQUEST_TIMEOUT", "30")),
         "retry_attempts": int(os.getenv("RETRY_ATTEMPTS", "3")),
-        "retry_delay": int(os.getenv("RETRY_DELAY", "5"))
+        "retry_delay": int(os.getenv("RETRY_DELAY", "5")),
+        "ocr_queue_size": int(os.getenv("OCR_QUEUE_SIZE", "16"))
+    }
+
+    # Transaction ingestion configuration
+    INGESTION_CONFIG: dict = {
+        "max_batch_size": int(os.getenv("INGESTION_MAX_BATCH_SIZE", "500")),
+        "max_delay_ms": float(os.getenv("INGESTION_MAX_DELAY_MS", "5"))
+    }
+
+    # User identity cache configuration
+    USER_CACHE_CONFIG: dict = {
+        "enabled": os.getenv("USER_CACHE_ENABLED", "true").lower() == "true",
+        "local_max_entries": int(os.getenv("USER_CACHE_LOCAL_MAX_ENTRIES", "10000")),
+        "local_ttl": int(os.getenv("USER_CACHE_LOCAL_TTL", "60")),
+        "ttl": int(os.getenv("USER_CACHE_TTL", "3600"))
+    }
+
+    # Report cache configuration
+    REPORT_CACHE_CONFIG: dict = {
+        "enabled": os.getenv("REPORT_CACHE_ENABLED", "true").lower() == "true",
+        "local_max_entries": int(os.getenv("REPORT_CACHE_LOCAL_MAX_ENTRIES", "256")),
+        "ttl": int(os.getenv("REPORT_CACHE_TTL", "86400"))
+    }
+
+    # Bulk message fan-out configuration (Telegram allows ~30 msg/s, ~1 msg/s per chat)
+    FANOUT_CONFIG: dict = {
+        "global_rate": float(os.getenv("FANOUT_GLOBAL_RATE", "25")),
+        "per_chat_interval": float(os.getenv("FANOUT_PER_CHAT_INTERVAL", "1.0")),
+        "concurrency": int(os.getenv("FANOUT_CONCURRENCY", "20")),
+        "max_retries": int(os.getenv("FANOUT_MAX_RETRIES", "3")),
+        "retry_base_delay": float(os.getenv("FANOUT_RETRY_BASE_DELAY", "1.0"))
+    }
+
+    # Notification outbox configuration (Redis-backed queue drained by async workers)
+    NOTIFICATION_CONFIG: dict = {
+        "key_prefix": os.getenv("NOTIFICATION_KEY_PREFIX", "outbox"),
+        "workers": int(os.getenv("NOTIFICATION_WORKERS", "4")),
+        "batch_size": int(os.getenv("NOTIFICATION_BATCH_SIZE", "50")),
+        "global_rate": float(os.getenv("NOTIFICATION_GLOBAL_RATE", "25")),
+        "per_chat_interval": float(os.getenv("NOTIFICATION_PER_CHAT_INTERVAL", "1.0")),
+        "max_attempts": int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", "5")),
+        "retry_base_delay": float(os.getenv("NOTIFICATION_RETRY_BASE_DELAY", "1.0")),
+        "retry_max_delay": float(os.getenv("NOTIFICATION_RETRY_MAX_DELAY", "300")),
+        "lease": float(os.getenv("NOTIFICATION_LEASE", "120")),
+        "poll_interval": float(os.getenv("NOTIFICATION_POLL_INTERVAL", "1.0")),
+        "dedup_ttl": int(os.getenv("NOTIFICATION_DEDUP_TTL", "172800")),
+        "connection_pool_size": int(os.getenv("NOTIFICATION_CONNECTION_POOL_SIZE", "16"))
+    }
+
+    # Bill reminders configuration
+    REMINDER_CONFIG: dict = {
+        "chunk_size": int(os.getenv("REMINDER_CHUNK_SIZE", "1000")),
+        "checkpoint_ttl": int(os.getenv("REMINDER_CHECKPOINT_TTL", "172800"))
+    }
+
+    # Spending alerts configuration (evaluated on each transaction commit)
+    ALERT_CONFIG: dict = {
+        "enabled": os.getenv("ALERTS_ENABLED", "true").lower() == "true",
+        "index_max_users": int(os.getenv("ALERT_INDEX_MAX_USERS", "10000")),
+        "index_ttl": int(os.getenv("ALERT_INDEX_TTL", "300")),
+        "fired_ttl": int(os.getenv("ALERT_FIRED_TTL", "3456000")),
+        "fired_local_max": int(os.getenv("ALERT_FIRED_LOCAL_MAX", "100000")),
+        "max_pending": int(os.getenv("ALERT_MAX_PENDING", "10000"))
     }
 
     # OCR configuration
     TESSERACT_CMD: str = "/usr/bin/tesseract"
+    OCR_PREPROCESSING_CONFIG: dict = {
+        "enabled": os.getenv("OCR_PREPROCESSING_ENABLED", "true").lower() == "true",
+        "target_dpi": int(os.getenv("OCR_TARGET_DPI", "300")),
+        "receipt_width_mm": float(os.getenv("OCR_RECEIPT_WIDTH_MM", "80")),
+        "crop": os.getenv("OCR_CROP_ENABLED", "true").lower() == "true",
+        "crop_margin": int(os.getenv("OCR_CROP_MARGIN", "0")),
+        "binarize": os.getenv("OCR_BINARIZE_ENABLED", "true").lower() == "true"
+    }
+    OCR_CACHE_CONFIG: dict = {
+        "enabled": os.getenv("OCR_CACHE_ENABLED", "true").lower() == "true",
+        "max_entries": int(os.getenv("OCR_CACHE_MAX_ENTRIES", "2048")),
+        "ttl": int(os.getenv("OCR_CACHE_TTL", "604800")),
+        "perceptual": os.getenv("OCR_CACHE_PERCEPTUAL", "false").lower() == "true"
+    }
 
     # Email configuration
     EMAIL_HOST: Optional[str] = None
@@ -116,6 +248,15 @@ class Settings(BaseSettings):
     EMAIL_HOST_USER: Optional[str] = None
     EMAIL_HOST_PASSWORD: Optional[str] = None
     EMAIL_USE_TLS: bool = True
+    EMAIL_CONFIG: dict = {
+        "pool_size": int(os.getenv("EMAIL_POOL_SIZE", "4")),
+        "idle_timeout": float(os.getenv("EMAIL_IDLE_TIMEOUT", "60")),
+        "timeout": float(os.getenv("EMAIL_TIMEOUT", "30")),
+        "max_retries": int(os.getenv("EMAIL_MAX_RETRIES", "3")),
+        "retry_base_delay": float(os.getenv("EMAIL_RETRY_BASE_DELAY", "1.0")),
+        "digest_window": float(os.getenv("EMAIL_DIGEST_WINDOW", "60")),
+        "queue_size": int(os.getenv("EMAIL_QUEUE_SIZE", "10000"))
+    }
 
     class Config:
         env_file = ".env"
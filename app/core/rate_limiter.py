@@ -1,44 +1,60 @@
+import asyncio
 from redis import Redis
-import time
 from typing import Optional
 from functools import wraps
-import logging
+
+from app.services.rate_limit import RateLimiter as RedisRateLimiter
+from app.services.redis_client import AsyncRedisClient
 
 class RateLimiter:
-    def __init__(self, redis_client: Redis, max_requests: int = 60, time_window: int = 60):
+    def __init__(
+        self,
+        redis_client: Redis,
+        max_requests: int = 60,
+        time_window: int = 60,
+        mode: Optional[str] = None,
+        async_client: Optional[AsyncRedisClient] = None
+    ):
         self.redis = redis_client
         self.max_requests = max_requests
         self.time_window = time_window
+        # Uma verificação atômica (script Lua) por chamada, em vez de INCR + EXPIRE em janela fixa
+        self.limiter = RedisRateLimiter(
+            "api", max_requests, time_window, mode=mode, redis_client=redis_client, async_client=async_client
+        )
 
     def is_rate_limited(self, key: str) -> bool:
-        current = time.time()
-        window_key = f"{key}:{int(current // self.time_window)}"
-        
-        try:
-            count = self.redis.incr(window_key)
-            if count == 1:
-                self.redis.expire(window_key, self.time_window)
-            
-            return count > self.max_requests
-        except Exception as e:
-            logging.getLogger('julliuz_bot').error(f"Erro no rate limiter: {str(e)}")
-            return False
+        return not self.limiter.check(key).allowed
+
+    async def is_rate_limited_async(self, key: str) -> bool:
+        return not (await self.limiter.check_async(key)).allowed
 
 def rate_limit(limiter: RateLimiter, key_prefix: str = "user"):
     def decorator(func):
-        @wraps(func)
-        async def wrapper(*args, **kwargs):
+        def limit_key(args, kwargs) -> str:
             # Extrair user_id dos argumentos
             user_id = kwargs.get('user_id') or args[0].user.id if args else None
-            
+
             if not user_id:
                 raise ValueError("User ID não encontrado para rate limiting")
-            
-            key = f"{key_prefix}:{user_id}"
-            
-            if limiter.is_rate_limited(key):
+
+            return f"{key_prefix}:{user_id}"
+
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                # No event loop, a verificação não bloqueia: usa o cliente assíncrono
+                if await limiter.is_rate_limited_async(limit_key(args, kwargs)):
+                    raise Exception("Limite de requisições excedido")
+
+                return await func(*args, **kwargs)
+            return wrapper
+
+        @wraps(func)
+        def sync_wrapper(*args, **kwargs):
+            if limiter.is_rate_limited(limit_key(args, kwargs)):
                 raise Exception("Limite de requisições excedido")
-            
-            return await func(*args, **kwargs)
-        return wrapper
-    return decorator 
\ No newline at end of file
+
+            return func(*args, **kwargs)
+        return sync_wrapper
+    return decorator
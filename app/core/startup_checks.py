@@ -95,18 +95,9 @@ def test_dependencias_externas_ausentes(func, cmd):
         with pytest.raises(SystemExit):
             func()
 
-def test_redis_retry(monkeypatch):
-    call_count = {"count": 0}
-    def fail_then_succeed(*args, **kwargs):
-        call_count["count"] += 1
-        if call_count["count"] < 3:
-            raise Exception("Redis down")
-        import redis
-        return mock.Mock(spec=redis.Redis)
-    with mock.patch("redis.Redis.from_url", side_effect=fail_then_succeed):
-        conn = get_redis_connection()
-        assert conn is not None
-        assert call_count["count"] == 3
+def test_redis_clients_share_one_pool():
+    conn = get_redis_connection()
+    assert get_redis_connection() is conn
 
 def test_ocr_retry(monkeypatch):
     with mock.patch("pytesseract.image_to_string", side_effect=Exception("Tesseract error")):
@@ -1,9 +1,23 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Date, Boolean, ForeignKey, Enum, UniqueConstraint, Index, JSON
 from sqlalchemy.orm import relationship, declarative_base
 from datetime import datetime
+import enum
 
 Base = declarative_base()
 
+class TransactionCategory(str, enum.Enum):
+    FOOD = "food"
+    TRANSPORT = "transport"
+    HOUSING = "housing"
+    HEALTH = "health"
+    EDUCATION = "education"
+    LEISURE = "leisure"
+    SHOPPING = "shopping"
+    BILLS = "bills"
+    SALARY = "salary"
+    INVESTMENT = "investment"
+    OTHER = "other"
+
 class User(Base):
     __tablename__ = "users"
 
@@ -20,12 +34,107 @@ class User(Base):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Relatórios e agregados: user_id + tipo + período
+        Index("ix_transactions_user_type_date", "user_id", "type", "date"),
+        # Alertas e tendências por categoria: user_id + categoria + tipo + período
+        Index("ix_transactions_user_category_type_date", "user_id", "category", "type", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     amount = Column(Float)
     category = Column(String)
     description = Column(String)
+    type = Column(String, default="expense")
     date = Column(DateTime, default=datetime.utcnow)
 
-    user = relationship("User", back_populates="transactions")
\ No newline at end of file
+    user = relationship("User", back_populates="transactions")
+
+class SpendingAggregate(Base):
+    """Totais mensais por usuário, categoria e tipo, mantidos junto com as transações."""
+    __tablename__ = "spending_aggregates"
+    __table_args__ = (
+        UniqueConstraint("user_id", "category", "month", "type", name="uq_spending_aggregates_key"),
+        Index("ix_spending_aggregates_user_type_month", "user_id", "type", "month"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    category = Column(String, nullable=False, default="")
+    month = Column(Date, nullable=False)
+    type = Column(String, nullable=False, default="expense")
+    total = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
+
+class Alert(Base):
+    __tablename__ = "alerts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    type = Column(String)
+    category = Column(Enum(TransactionCategory), nullable=True)
+    threshold = Column(Float)
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class Receipt(Base):
+    __tablename__ = "receipts"
+    __table_args__ = (
+        Index("ix_receipts_user_date", "user_id", "date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    file_id = Column(String)
+    amount = Column(Float)
+    category = Column(Enum(TransactionCategory), nullable=True)
+    description = Column(String)
+    ocr_data = Column(JSON, default=dict)
+    is_processed = Column(Boolean, default=False)
+    date = Column(DateTime, default=datetime.utcnow)
+
+class UserPreference(Base):
+    __tablename__ = "user_preferences"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), unique=True, index=True)
+    currency = Column(String, default="R$")
+    date_format = Column(String, default="DD/MM/YYYY")
+    language = Column(String, default="pt-BR")
+    notifications_enabled = Column(Boolean, default=True)
+    dark_mode = Column(Boolean, default=False)
+    ai_cache_enabled = Column(Boolean, default=True)
+    chart_preferences = Column(JSON, default=lambda: {"type": "bar", "period": "month"})
+
+class FixedBill(Base):
+    __tablename__ = "fixed_bills"
+    __table_args__ = (
+        # Lembretes: contas ativas a vencer, percorridas por usuário
+        Index("ix_fixed_bills_active_user_due_day", "is_active", "user_id", "due_day"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    name = Column(String, nullable=False)
+    amount = Column(Float, nullable=False)
+    due_day = Column(Integer, nullable=False)
+    category = Column(Enum(TransactionCategory), nullable=True)
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class FinancialGoal(Base):
+    __tablename__ = "financial_goals"
+    __table_args__ = (
+        # Resumo semanal: metas em aberto, percorridas por usuário
+        Index("ix_financial_goals_completed_user", "is_completed", "user_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    name = Column(String, nullable=False)
+    target_amount = Column(Float, nullable=False)
+    current_amount = Column(Float, nullable=False, default=0.0)
+    deadline = Column(Date, nullable=False)
+    is_completed = Column(Boolean, default=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -1,20 +1,36 @@
 from fastapi import FastAPI
 from app.core.config import get_settings
-from app.bot.bot import main as bot_main
+from app.bot.bot import main as bot_main, build_application, start_webhook, stop_webhook, webhook_enabled
+from app.bot.webhook import router as webhook_router
 import asyncio
 import logging
 from app.core.startup_checks import run_startup_checks, setup_logging
+from app.services.email import email_service
 
 settings = get_settings()
 app = FastAPI(title="Julliuz Finance Bot")
+app.include_router(webhook_router)
 
 @app.on_event("startup")
 async def startup_event():
     logging.info("Iniciando Julliuz Finance Bot...")
-    asyncio.create_task(bot_main())
+    if webhook_enabled():
+        # Updates chegam pelo endpoint do webhook, na fila de webhook_queue
+        app.state.application = build_application()
+        await start_webhook(app.state.application)
+    else:
+        asyncio.create_task(bot_main())
     run_startup_checks()
     logger = setup_logging(settings.LOG_FILE, settings.LOG_LEVEL)
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    application = getattr(app.state, "application", None)
+    if application is not None:
+        await stop_webhook(application)
+    # Envia os emails pendentes (e resumos em aberto) antes de fechar as sessões SMTP
+    await asyncio.to_thread(email_service.close, 30)
+
 @app.get("/")
 async def root():
     return {"status": "online", "message": "Julliuz Finance Bot está rodando!"}
@@ -1,2 +1 @@
 # Pacote de serviços do Julliuz Bot 
-from .redis_client import get_redis_connection, safe_redis_ping 
\ No newline at end of file
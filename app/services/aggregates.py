@@ -0,0 +1,471 @@
+from sqlalchemy import event, func, select, delete, inspect
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from app.db.models import SpendingAggregate, Transaction
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger("julliuz_bot")
+
+# Chave do agregado: (user_id, categoria, mês, tipo)
+AggregateKey = Tuple[int, str, date, str]
+
+DEFAULT_TYPE = "expense"
+
+def month_start(value: datetime) -> date:
+    """
+    Retorna o primeiro dia do mês da data informada.
+    """
+    return date(value.year, value.month, 1)
+
+def next_month(value: date) -> date:
+    if value.month == 12:
+        return date(value.year + 1, 1, 1)
+    return date(value.year, value.month + 1, 1)
+
+def aggregate_key(user_id: int, category: Optional[str], when: datetime, transaction_type: Optional[str]) -> AggregateKey:
+    return (
+        user_id,
+        _category_value(category),
+        month_start(when),
+        transaction_type or DEFAULT_TYPE
+    )
+
+def _category_value(category: Any) -> str:
+    if category is None:
+        return ""
+    return getattr(category, "value", category)
+
+def _add_delta(deltas: Dict[AggregateKey, List[float]], key: AggregateKey, amount: float, count: int) -> None:
+    if key[0] is None:
+        return
+    entry = deltas.setdefault(key, [0.0, 0])
+    entry[0] += amount or 0.0
+    entry[1] += count
+
+def deltas_for_rows(rows: Iterable[Dict[str, Any]]) -> Dict[AggregateKey, List[float]]:
+    """
+    Calcula os deltas do agregado para linhas inseridas via Core (ex: INSERT em lote).
+    """
+    deltas: Dict[AggregateKey, List[float]] = {}
+    for row in rows:
+        key = aggregate_key(row["user_id"], row.get("category"), row["date"], row.get("type"))
+        _add_delta(deltas, key, row["amount"], 1)
+    return deltas
+
+TRACKED_COLUMNS = ("user_id", "category", "date", "type", "amount")
+
+def _old_values(session: Session, obj: Transaction) -> Dict[str, Any]:
+    """
+    Valores persistidos de uma transação antes das alterações da sessão.
+    """
+    state = inspect(obj)
+    values = {}
+    missing = False
+    for name in TRACKED_COLUMNS:
+        history = state.attrs[name].history
+        if history.deleted:
+            values[name] = history.deleted[0]
+        elif history.added:
+            # Atributo expirado alterado sem histórico: lê o valor antigo do banco
+            missing = True
+        else:
+            values[name] = getattr(obj, name)
+
+    if missing and obj.id is not None:
+        table = Transaction.__table__
+        row = session.connection().execute(
+            select(*(table.c[name] for name in TRACKED_COLUMNS)).where(table.c.id == obj.id)
+        ).mappings().first()
+        if row is not None:
+            values.update(row)
+    return values
+
+def _add_old_delta(deltas: Dict[AggregateKey, List[float]], old: Dict[str, Any]) -> None:
+    if old.get("date") is None:
+        return
+    key = aggregate_key(old["user_id"], old["category"], old["date"], old["type"])
+    _add_delta(deltas, key, -(old["amount"] or 0.0), -1)
+
+def collect_session_deltas(session: Session) -> Dict[AggregateKey, List[float]]:
+    """
+    Calcula os deltas do agregado para as transações novas, alteradas e removidas da sessão.
+    """
+    deltas: Dict[AggregateKey, List[float]] = {}
+
+    for obj in session.new:
+        if isinstance(obj, Transaction):
+            # Fixa os defaults antes do flush para que o mês do agregado seja o mesmo da linha
+            if obj.date is None:
+                obj.date = datetime.utcnow()
+            if obj.type is None:
+                obj.type = DEFAULT_TYPE
+            _add_delta(deltas, aggregate_key(obj.user_id, obj.category, obj.date, obj.type), obj.amount, 1)
+
+    for obj in session.dirty:
+        if isinstance(obj, Transaction) and session.is_modified(obj):
+            _add_old_delta(deltas, _old_values(session, obj))
+            _add_delta(deltas, aggregate_key(obj.user_id, obj.category, obj.date, obj.type), obj.amount, 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Transaction):
+            _add_old_delta(deltas, _old_values(session, obj))
+
+    return {key: value for key, value in deltas.items() if value[0] or value[1]}
+
+def _upsert_statement(dialect_name: str):
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+
+    stmt = insert(SpendingAggregate)
+    return stmt.on_conflict_do_update(
+        index_elements=["user_id", "category", "month", "type"],
+        set_={
+            "total": SpendingAggregate.total + stmt.excluded.total,
+            "count": SpendingAggregate.count + stmt.excluded.count
+        }
+    )
+
+def apply_deltas(connection: Connection, deltas: Dict[AggregateKey, List[float]]) -> Dict[AggregateKey, float]:
+    """
+    Aplica os deltas ao agregado na mesma transação da conexão informada.
+
+    Returns:
+        Total de cada chave alterada após a aplicação (ex.: gasto do mês até agora)
+    """
+    if not deltas:
+        return {}
+
+    rows = [
+        {
+            "user_id": user_id,
+            "category": category,
+            "month": month,
+            "type": transaction_type,
+            "total": total,
+            "count": count
+        }
+        for (user_id, category, month, transaction_type), (total, count) in deltas.items()
+    ]
+
+    stmt = _upsert_statement(connection.dialect.name)
+    if stmt is not None:
+        result = connection.execute(
+            stmt.returning(
+                SpendingAggregate.user_id,
+                SpendingAggregate.category,
+                SpendingAggregate.month,
+                SpendingAggregate.type,
+                SpendingAggregate.total,
+                sort_by_parameter_order=True
+            ),
+            rows
+        )
+        return {(row[0], row[1], _as_month(row[2]), row[3]): float(row[4]) for row in result}
+
+    # Fallback genérico: UPDATE e, se nada foi atualizado, INSERT
+    table = SpendingAggregate.__table__
+    totals = {}
+    for row in rows:
+        where = (
+            table.c.user_id == row["user_id"],
+            table.c.category == row["category"],
+            table.c.month == row["month"],
+            table.c.type == row["type"]
+        )
+        result = connection.execute(
+            table.update().where(*where).values(
+                total=table.c.total + row["total"],
+                count=table.c.count + row["count"]
+            )
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert(), row)
+        key = (row["user_id"], row["category"], row["month"], row["type"])
+        totals[key] = float(connection.execute(select(table.c.total).where(*where)).scalar() or 0.0)
+    return totals
+
+# Funções chamadas com os deltas (e, se pedido, os totais) de cada commit que alterou transações
+_commit_listeners: List[Tuple[Callable[..., None], bool]] = []
+
+def register_commit_listener(listener: Callable[..., None], with_totals: bool = False) -> None:
+    """
+    Registra uma função chamada após o commit de transações, com os deltas aplicados.
+
+    Args:
+        listener: Chamada como listener(deltas) ou, com with_totals, listener(deltas, totals)
+        with_totals: Passa também o total de cada chave após o commit
+    """
+    # Igualdade, não identidade: cada acesso a um método gera um novo objeto ligado
+    if all(registered != listener for registered, _ in _commit_listeners):
+        _commit_listeners.append((listener, with_totals))
+
+def unregister_commit_listener(listener: Callable[..., None]) -> None:
+    """
+    Remove um listener registrado com register_commit_listener (ex.: ao fim de um teste).
+    """
+    _commit_listeners[:] = [entry for entry in _commit_listeners if entry[0] != listener]
+
+def notify_commit(deltas: Dict[AggregateKey, List[float]], totals: Optional[Dict[AggregateKey, float]] = None) -> None:
+    """
+    Notifica os listeners sobre deltas já gravados (usado também pelos INSERTs em lote).
+    """
+    if not deltas:
+        return
+    for listener, with_totals in list(_commit_listeners):
+        try:
+            if with_totals:
+                listener(deltas, totals or {})
+            else:
+                listener(deltas)
+        except Exception as e:
+            logger.error(f"Erro no listener do agregado de gastos: {e}")
+
+def _merge_deltas(target: Dict[AggregateKey, List[float]], deltas: Dict[AggregateKey, List[float]]) -> None:
+    for key, (total, count) in deltas.items():
+        entry = target.setdefault(key, [0.0, 0])
+        entry[0] += total
+        entry[1] += count
+
+@event.listens_for(Session, "before_flush")
+def _maintain_aggregates(session: Session, flush_context, instances) -> None:
+    deltas = collect_session_deltas(session)
+    if deltas:
+        totals = apply_deltas(session.connection(), deltas)
+        _merge_deltas(session.info.setdefault("aggregate_deltas", {}), deltas)
+        session.info.setdefault("aggregate_totals", {}).update(totals)
+
+@event.listens_for(Session, "after_commit")
+def _notify_aggregates(session: Session) -> None:
+    deltas = session.info.pop("aggregate_deltas", None)
+    totals = session.info.pop("aggregate_totals", None)
+    if deltas:
+        notify_commit(deltas, totals)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_aggregates(session: Session) -> None:
+    session.info.pop("aggregate_deltas", None)
+    session.info.pop("aggregate_totals", None)
+
+def get_month_total(
+    db: Session,
+    user_id: int,
+    category: Optional[str],
+    transaction_type: str = DEFAULT_TYPE,
+    when: Optional[datetime] = None
+) -> float:
+    """
+    Obtém o total do mês para uma categoria a partir do agregado.
+    """
+    month = month_start(when or datetime.now())
+    total = db.query(SpendingAggregate.total).filter(
+        SpendingAggregate.user_id == user_id,
+        SpendingAggregate.category == _category_value(category),
+        SpendingAggregate.month == month,
+        SpendingAggregate.type == transaction_type
+    ).scalar()
+    return float(total or 0.0)
+
+def get_monthly_totals(
+    db: Session,
+    user_id: int,
+    start_date: datetime,
+    end_date: datetime,
+    transaction_type: str = DEFAULT_TYPE,
+    category: Optional[str] = None
+) -> List[Tuple[date, float]]:
+    """
+    Obtém os totais mensais (meses completos) entre duas datas a partir do agregado.
+    """
+    query = db.query(
+        SpendingAggregate.month,
+        func.sum(SpendingAggregate.total)
+    ).filter(
+        SpendingAggregate.user_id == user_id,
+        SpendingAggregate.type == transaction_type,
+        SpendingAggregate.month >= month_start(start_date),
+        SpendingAggregate.month <= month_start(end_date)
+    )
+    if category is not None:
+        query = query.filter(SpendingAggregate.category == _category_value(category))
+
+    result = query.group_by(SpendingAggregate.month).order_by(SpendingAggregate.month).all()
+    return [(row[0], float(row[1])) for row in result if row[1]]
+
+def get_category_totals(
+    db: Session,
+    user_id: int,
+    start_date: datetime,
+    end_date: datetime,
+    transaction_type: str = DEFAULT_TYPE
+) -> Dict[str, float]:
+    """
+    Obtém os totais por categoria em um período.
+
+    Meses inteiramente contidos no período vêm do agregado; apenas as
+    pontas parciais do período consultam a tabela de transações.
+    """
+    first_full = month_start(start_date)
+    if datetime(first_full.year, first_full.month, 1) < start_date:
+        first_full = next_month(first_full)
+    last_full_stop = month_start(end_date)
+
+    totals: Dict[str, float] = {}
+
+    def add_raw(start: datetime, end: datetime, inclusive_end: bool) -> None:
+        upper = Transaction.date <= end if inclusive_end else Transaction.date < end
+        rows = db.query(
+            Transaction.category,
+            func.sum(Transaction.amount)
+        ).filter(
+            Transaction.user_id == user_id,
+            Transaction.type == transaction_type,
+            Transaction.date >= start,
+            upper
+        ).group_by(Transaction.category).all()
+        for category, total in rows:
+            key = _category_value(category)
+            totals[key] = totals.get(key, 0.0) + float(total or 0.0)
+
+    if first_full >= last_full_stop:
+        add_raw(start_date, end_date, inclusive_end=True)
+    else:
+        add_raw(start_date, datetime(first_full.year, first_full.month, 1), inclusive_end=False)
+        rows = db.query(
+            SpendingAggregate.category,
+            func.sum(SpendingAggregate.total)
+        ).filter(
+            SpendingAggregate.user_id == user_id,
+            SpendingAggregate.type == transaction_type,
+            SpendingAggregate.month >= first_full,
+            SpendingAggregate.month < last_full_stop
+        ).group_by(SpendingAggregate.category).all()
+        for category, total in rows:
+            totals[category] = totals.get(category, 0.0) + float(total or 0.0)
+        add_raw(datetime(last_full_stop.year, last_full_stop.month, 1), end_date, inclusive_end=True)
+
+    return {category: total for category, total in totals.items() if total}
+
+def _raw_totals_query(db: Session, user_id: Optional[int] = None):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        month = func.date_trunc("month", Transaction.date)
+    else:
+        month = func.strftime("%Y-%m-01", Transaction.date)
+
+    query = db.query(
+        Transaction.user_id,
+        func.coalesce(Transaction.category, ""),
+        month.label("month"),
+        func.coalesce(Transaction.type, DEFAULT_TYPE),
+        func.sum(Transaction.amount),
+        func.count(Transaction.id)
+    ).filter(
+        Transaction.date.isnot(None),
+        Transaction.user_id.isnot(None)
+    )
+    if user_id is not None:
+        query = query.filter(Transaction.user_id == user_id)
+    return query.group_by(
+        Transaction.user_id,
+        func.coalesce(Transaction.category, ""),
+        month,
+        func.coalesce(Transaction.type, DEFAULT_TYPE)
+    )
+
+def _as_month(value: Any) -> date:
+    if isinstance(value, str):
+        return datetime.strptime(value[:10], "%Y-%m-%d").date()
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+def _raw_totals(db: Session, user_id: Optional[int] = None) -> Dict[AggregateKey, Tuple[float, int]]:
+    return {
+        (row[0], row[1], _as_month(row[2]), row[3]): (float(row[4] or 0.0), int(row[5]))
+        for row in _raw_totals_query(db, user_id).yield_per(10000)
+    }
+
+def rebuild_aggregates(db: Session, user_id: Optional[int] = None, batch_size: int = 5000) -> int:
+    """
+    Recalcula o agregado a partir da tabela de transações.
+
+    Args:
+        db: Sessão do banco de dados
+        user_id: Limita o rebuild a um usuário (opcional)
+        batch_size: Tamanho dos lotes de INSERT
+
+    Returns:
+        Número de linhas gravadas no agregado
+    """
+    try:
+        stmt = delete(SpendingAggregate)
+        if user_id is not None:
+            stmt = stmt.where(SpendingAggregate.user_id == user_id)
+        db.execute(stmt)
+
+        written = 0
+        batch = []
+        for (uid, category, month, transaction_type), (total, count) in _raw_totals(db, user_id).items():
+            batch.append({
+                "user_id": uid,
+                "category": category,
+                "month": month,
+                "type": transaction_type,
+                "total": total,
+                "count": count
+            })
+            if len(batch) >= batch_size:
+                db.execute(SpendingAggregate.__table__.insert(), batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            db.execute(SpendingAggregate.__table__.insert(), batch)
+            written += len(batch)
+
+        db.commit()
+        logger.info(f"Agregado de gastos recalculado: {written} linhas")
+        return written
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Erro ao recalcular agregado de gastos: {e}")
+        raise
+
+def check_aggregates(db: Session, user_id: Optional[int] = None, tolerance: float = 0.005) -> List[Dict[str, Any]]:
+    """
+    Compara o agregado com as somas da tabela de transações.
+
+    Returns:
+        Lista de divergências (vazia se o agregado estiver consistente)
+    """
+    raw = _raw_totals(db, user_id)
+
+    query = db.query(SpendingAggregate)
+    if user_id is not None:
+        query = query.filter(SpendingAggregate.user_id == user_id)
+    stored = {
+        (row.user_id, row.category, row.month, row.type): (row.total, row.count)
+        for row in query.yield_per(10000)
+    }
+
+    mismatches = []
+    for key in raw.keys() | stored.keys():
+        expected_total, expected_count = raw.get(key, (0.0, 0))
+        actual_total, actual_count = stored.get(key, (0.0, 0))
+        if abs(expected_total - actual_total) > tolerance or expected_count != actual_count:
+            mismatches.append({
+                "user_id": key[0],
+                "category": key[1],
+                "month": key[2],
+                "type": key[3],
+                "expected_total": expected_total,
+                "actual_total": actual_total,
+                "expected_count": expected_count,
+                "actual_count": actual_count
+            })
+    return mismatches
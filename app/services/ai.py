@@ -1,7 +1,13 @@
-import aiohttp
+import hashlib
+import json
+import time
+from typing import Any, AsyncIterator, Dict, Tuple
 from app.core.config import get_settings
 from app.db.models import User
-import json
+from app.services.ai_cache import ai_cache
+from app.services.ai_scheduler import PRIORITY_CHAT, ai_scheduler
+from app.services.conversation_store import conversation_store
+from app.services.ollama_client import OllamaError, ollama_client
 
 settings = get_settings()
 
@@ -19,43 +25,158 @@ Características:
 - Referências à série
 """
 
-async def get_ai_response(message: str, user: User) -> str:
-    system_prompt = f"""
-    {JULIUS_PERSONALITY}
-    
-    Contexto do usuário:
-    - Nome: {user.first_name}
-    - Username: {user.username}
-    - Data de registro: {user.created_at}
-    
-    Regras:
-    1. Mantenha o tom sarcástico do Julius
-    2. Use referências da série quando apropriado
-    3. Dê conselhos financeiros práticos
-    4. Seja direto e honesto
-    5. Use analogias com situações da série
-    6. Mantenha um equilíbrio entre humor e seriedade
-    """
-    
+JULIUS_RULES = """
+Regras:
+1. Mantenha o tom sarcástico do Julius
+2. Use referências da série quando apropriado
+3. Dê conselhos financeiros práticos
+4. Seja direto e honesto
+5. Use analogias com situações da série
+6. Mantenha um equilíbrio entre humor e seriedade
+"""
+
+# Prefixo idêntico para todos os usuários: o Ollama reaproveita o cache de
+# avaliação do prompt enquanto o início do texto não muda.
+JULIUS_SYSTEM_PROMPT = f"{JULIUS_PERSONALITY}\n{JULIUS_RULES}"
+
+def build_system_prompt(user: User) -> str:
+    return f"""{JULIUS_SYSTEM_PROMPT}
+Contexto do usuário:
+- Nome: {user.first_name}
+- Username: {user.username}
+- Data de registro: {user.created_at}
+"""
+
+def build_request(message: str, user: User, personalized: bool = True) -> Dict[str, Any]:
+    """
+    Monta o corpo da geração para a próxima mensagem do usuário.
+
+    No primeiro turno envia a persona como `system`; nos seguintes, apenas a
+    mensagem nova junto com o `context` da conversa, cujos tokens o Ollama
+    não precisa avaliar de novo. Com `personalized=False` a persona vai sem
+    os dados do usuário, para que a resposta possa ser compartilhada pelo
+    cache com outros usuários.
+    """
+    context = conversation_store.get_context(user.id)
+    if context:
+        return {"prompt": message, "context": context}
+    if not personalized:
+        return {"prompt": message, "system": JULIUS_SYSTEM_PROMPT}
+    return {"prompt": message, "system": build_system_prompt(user)}
+
+def error_message(error: Exception) -> str:
+    if isinstance(error, OllamaError):
+        return f"Ah, claro! A IA está de mau humor. Erro: {error}"
+    return f"Ah, claro! A IA decidiu tirar uma soneca. Erro: {str(error)}"
+
+def request_key(request: Dict[str, Any]) -> str:
+    """
+    Chave que identifica pedidos de geração idênticos.
+    """
+    return hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode()).hexdigest()
+
+def _cacheable(request: Dict[str, Any]) -> bool:
+    # Respostas dadas dentro de uma conversa dependem dos turnos anteriores, e
+    # só a persona sem dados do usuário pode ser servida a outros usuários
+    return "context" not in request and request.get("system") == JULIUS_SYSTEM_PROMPT
+
+def _prepare(message: str, user: User, use_cache: bool) -> Tuple[Dict[str, Any], bool]:
+    shared = use_cache and ai_cache.enabled
+    request = build_request(message, user, personalized=not shared)
+    return request, shared and _cacheable(request)
+
+async def get_ai_response(
+    message: str,
+    user: User,
+    use_cache: bool = True,
+    priority: int = PRIORITY_CHAT
+) -> str:
+    """
+    Gera a resposta do Julius para a mensagem do usuário.
+
+    Perguntas iguais ou quase iguais a outras recentes são respondidas pelo
+    cache semântico, a menos que o usuário tenha desativado o cache ou já
+    esteja no meio de uma conversa. Respostas cacheáveis são geradas com a
+    persona sem dados pessoais, já que podem ser servidas a outros usuários. A
+    geração passa pelo escalonador: pedidos idênticos em andamento são
+    agrupados e comandos têm prioridade sobre conversa.
+    """
+    request, cacheable = _prepare(message, user, use_cache)
+    if cacheable:
+        cached = ai_cache.get(message)
+        if cached is not None:
+            return cached
+
+    # Só pedidos com o mesmo corpo são agrupados; como respostas cacheáveis
+    # usam a persona sem dados pessoais, a mesma pergunta de usuários
+    # diferentes no primeiro turno também cai na mesma geração
+    key = request_key(request)
+    generated: Dict[str, Any] = {}
+
+    async def generate():
+        response = await ollama_client.generate(stats=generated, **request)
+        generated["owner"] = True
+        return response
+
+    start = time.perf_counter()
+    try:
+        response = await ai_scheduler.run(key, user.id, priority, generate)
+    except Exception as e:
+        conversation_store.reset(user.id)
+        return error_message(e)
+    if generated.get("owner"):
+        # Só quem gerou guarda o context; pedidos agrupados não são donos dele
+        conversation_store.update(user.id, generated.get("context"))
+        if cacheable:
+            ai_cache.set(message, response, time.perf_counter() - start)
+    return response or "Ah, claro! A IA decidiu ficar quieta hoje."
+
+async def stream_ai_response(
+    message: str,
+    user: User,
+    use_cache: bool = True,
+    priority: int = PRIORITY_CHAT
+) -> AsyncIterator[str]:
+    """
+    Gera a resposta do Julius em trechos, conforme o modelo produz os tokens.
+    A vaga no escalonador fica reservada durante todo o streaming; pedidos
+    idênticos em andamento são agrupados, e quem chega depois recebe os
+    trechos já gerados e acompanha o restante da mesma geração.
+    Em caso de falha, emite a mensagem de erro no lugar da resposta.
+    """
+    request, cacheable = _prepare(message, user, use_cache)
+    if cacheable:
+        cached = ai_cache.get(message)
+        if cached is not None:
+            yield cached
+            return
+
+    generated: Dict[str, Any] = {}
+
+    async def generate():
+        async for chunk in ollama_client.stream(stats=generated, **request):
+            yield chunk
+        generated["owner"] = True
+
+    chunks = []
+    start = time.perf_counter()
+    # Fechado explicitamente: se quem consome desistir, a geração compartilhada
+    # deixa de contar com este pedido na hora
+    shared = ai_scheduler.stream(request_key(request), user.id, priority, generate)
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{settings.OLLAMA_BASE_URL}/api/generate",
-                json={
-                    "model": settings.OLLAMA_MODEL,
-                    "prompt": f"{system_prompt}\n\nUsuário: {message}\n\nJulius:",
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.7,
-                        "top_p": 0.9,
-                        "max_tokens": 500
-                    }
-                }
-            ) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    return result.get("response", "Ah, claro! A IA decidiu ficar quieta hoje.")
-                else:
-                    return f"Ah, claro! A IA está de mau humor. Erro: {response.status}"
+        async for chunk in shared:
+            chunks.append(chunk)
+            yield chunk
     except Exception as e:
-        return f"Ah, claro! A IA decidiu tirar uma soneca. Erro: {str(e)}" 
\ No newline at end of file
+        conversation_store.reset(user.id)
+        yield ("\n\n" if chunks else "") + error_message(e)
+        return
+    finally:
+        await shared.aclose()
+    if generated.get("owner"):
+        # Só quem gerou guarda o context; pedidos agrupados não são donos dele
+        conversation_store.update(user.id, generated.get("context"))
+        if cacheable:
+            ai_cache.set(message, "".join(chunks), time.perf_counter() - start)
+    if not chunks:
+        yield "Ah, claro! A IA decidiu ficar quieta hoje."
@@ -0,0 +1,257 @@
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+MERSENNE_PRIME = (1 << 31) - 1
+WORD_RE = re.compile(r'[a-z0-9]+')
+NUMBER_RE = re.compile(r'\d+')
+STOPWORDS = frozenset({
+    "a", "o", "as", "os", "um", "uma", "de", "da", "do", "das", "dos", "e", "em", "no", "na",
+    "nos", "nas", "para", "pra", "por", "com", "que", "eu", "me", "meu", "minha", "se",
+    "julius", "voce", "vc", "ai", "la", "ne", "tipo", "entao"
+})
+# Palavras que invertem o sentido da pergunta (já sem acentos)
+NEGATIONS = frozenset({"nao", "nunca", "sem", "nem", "jamais"})
+
+def normalize_question(text: str) -> str:
+    """
+    Normaliza uma pergunta para comparação: minúsculas, sem acentos,
+    pontuação e palavras vazias.
+    """
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(word for word in WORD_RE.findall(text) if word not in STOPWORDS)
+
+def negations(normalized: str) -> List[str]:
+    """
+    Palavras de negação de uma pergunta normalizada, em ordem.
+    """
+    return [word for word in normalized.split() if word in NEGATIONS]
+
+class MinHasher:
+    """
+    Assinaturas MinHash de trigramas de caracteres, calculadas com NumPy.
+    """
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, MERSENNE_PRIME, size=(num_perm, 1), dtype=np.int64)
+        self.b = rng.integers(0, MERSENNE_PRIME, size=(num_perm, 1), dtype=np.int64)
+
+    @staticmethod
+    def shingles(text: str, size: int = 3) -> Set[str]:
+        padded = f" {text} "
+        return {padded[i:i + size] for i in range(max(1, len(padded) - size + 1))}
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.fromiter(
+            (
+                int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'little') % MERSENNE_PRIME
+                for shingle in self.shingles(text)
+            ),
+            dtype=np.int64
+        )
+        return ((self.a * hashes[None, :] + self.b) % MERSENNE_PRIME).min(axis=1)
+
+class SemanticCache:
+    """
+    Cache de respostas da IA para perguntas iguais ou quase iguais.
+
+    As perguntas são normalizadas; a busca tenta primeiro a igualdade exata
+    do texto normalizado e depois candidatos vindos de um índice LSH sobre
+    assinaturas MinHash, aceitando o mais parecido acima do limiar de
+    similaridade e com os mesmos números e negações. As entradas têm TTL e o total é
+    limitado por LRU.
+    """
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl: Optional[int] = None,
+        threshold: Optional[float] = None,
+        num_perm: Optional[int] = None,
+        bands: Optional[int] = None,
+        min_words: Optional[int] = None,
+        enabled: Optional[bool] = None
+    ):
+        """
+        Inicializa o cache.
+
+        Args:
+            max_entries: Número máximo de respostas guardadas
+            ttl: Tempo de vida das respostas, em segundos
+            threshold: Similaridade de Jaccard estimada mínima para um hit aproximado
+            num_perm: Número de permutações do MinHash
+            bands: Número de bandas do LSH (deve dividir num_perm)
+            min_words: Perguntas normalizadas mais curtas não são cacheadas
+            enabled: Liga/desliga o cache
+        """
+        config = settings.AI_CACHE_CONFIG
+        self.enabled = config["enabled"] if enabled is None else enabled
+        self.max_entries = max_entries or config["max_entries"]
+        self.ttl = ttl or config["ttl"]
+        self.threshold = threshold or config["threshold"]
+        self.min_words = config["min_words"] if min_words is None else min_words
+        self.hasher = MinHasher(num_perm or config["num_perm"])
+        self.bands = bands or config["bands"]
+        self.rows = self.hasher.num_perm // self.bands
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._exact: Dict[str, int] = {}
+        self._index: Dict[Tuple[int, bytes], Set[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits_exact = 0
+        self.hits_similar = 0
+        self.misses = 0
+        self.generation_time = 0.0
+        self.generations = 0
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        bands = signature.reshape(self.bands, self.rows)
+        return [(band, bands[band].tobytes()) for band in range(self.bands)]
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        if self._exact.get(entry["question"]) == entry_id:
+            del self._exact[entry["question"]]
+        for key in entry["bands"]:
+            ids = self._index.get(key)
+            if ids is not None:
+                ids.discard(entry_id)
+                if not ids:
+                    del self._index[key]
+
+    def _alive(self, entry_id: int, now: float) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(entry_id)
+        if entry is None:
+            return None
+        if entry["expires_at"] <= now:
+            self._remove(entry_id)
+            return None
+        return entry
+
+    def get(self, question: str) -> Optional[str]:
+        """
+        Procura uma resposta para a pergunta (ou para uma quase idêntica).
+
+        Returns:
+            Resposta em cache ou None
+        """
+        if not self.enabled:
+            return None
+        normalized = normalize_question(question)
+        if len(normalized.split()) < self.min_words:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            entry_id = self._exact.get(normalized)
+            entry = self._alive(entry_id, now) if entry_id is not None else None
+            if entry is not None:
+                self.hits_exact += 1
+                self._entries.move_to_end(entry_id)
+                return entry["answer"]
+
+            signature = self.hasher.signature(normalized)
+            numbers = NUMBER_RE.findall(normalized)
+            negated = negations(normalized)
+            candidates = set()
+            for key in self._band_keys(signature):
+                candidates.update(self._index.get(key, ()))
+
+            best_id, best_score = None, self.threshold
+            for candidate_id in candidates:
+                candidate = self._alive(candidate_id, now)
+                # "Posso gastar 100?" e "Posso gastar 5000?" não são a mesma pergunta
+                # e "Devo investir?" não é "Não devo investir?"
+                if candidate is None or candidate["numbers"] != numbers or candidate["negations"] != negated:
+                    continue
+                score = float(np.mean(candidate["signature"] == signature))
+                if score >= best_score:
+                    best_id, best_score = candidate_id, score
+
+            if best_id is None:
+                self.misses += 1
+                return None
+            self.hits_similar += 1
+            self._entries.move_to_end(best_id)
+            return self._entries[best_id]["answer"]
+
+    def set(self, question: str, answer: str, generation_time: Optional[float] = None) -> None:
+        """
+        Armazena a resposta gerada para uma pergunta.
+
+        Args:
+            question: Pergunta original
+            answer: Resposta do modelo
+            generation_time: Tempo gasto na geração (usado na estimativa de economia)
+        """
+        if generation_time is not None:
+            self.generation_time += generation_time
+            self.generations += 1
+        if not self.enabled or not answer:
+            return
+        normalized = normalize_question(question)
+        if len(normalized.split()) < self.min_words:
+            return
+
+        signature = self.hasher.signature(normalized)
+        bands = self._band_keys(signature)
+        with self._lock:
+            previous = self._exact.get(normalized)
+            if previous is not None:
+                self._remove(previous)
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = {
+                "question": normalized,
+                "answer": answer,
+                "signature": signature,
+                "numbers": NUMBER_RE.findall(normalized),
+                "negations": negations(normalized),
+                "bands": bands,
+                "expires_at": time.monotonic() + self.ttl
+            }
+            self._exact[normalized] = entry_id
+            for key in bands:
+                self._index.setdefault(key, set()).add(entry_id)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._exact.clear()
+            self._index.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Taxa de acerto e estimativa do tempo de geração economizado.
+        """
+        hits = self.hits_exact + self.hits_similar
+        lookups = hits + self.misses
+        avg_generation = self.generation_time / self.generations if self.generations else 0.0
+        return {
+            "size": len(self._entries),
+            "hits_exact": self.hits_exact,
+            "hits_similar": self.hits_similar,
+            "misses": self.misses,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "avg_generation_time": avg_generation,
+            "latency_saved": hits * avg_generation
+        }
+
+# Instância global do cache de respostas da IA
+ai_cache = SemanticCache()
@@ -0,0 +1,261 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Hashable, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger('julliuz_bot')
+
+PRIORITY_COMMAND = 0
+PRIORITY_CHAT = 1
+
+class _SharedStream:
+    """
+    Trechos de uma geração transmitida, compartilhados pelos pedidos agrupados.
+    """
+    __slots__ = ("chunks", "updated", "task", "readers")
+
+    def __init__(self):
+        self.chunks: List[Any] = []
+        self.updated = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.readers = 0
+
+    def notify(self) -> None:
+        updated, self.updated = self.updated, asyncio.Event()
+        updated.set()
+
+class AIScheduler:
+    """
+    Escalonador das gerações enviadas ao Ollama.
+
+    Limita quantas gerações rodam ao mesmo tempo e decide quem é o próximo:
+    filas de maior prioridade (respostas de comandos) passam na frente das
+    de menor (conversa livre) e, dentro de cada fila, os usuários são
+    atendidos em rodízio, para que um usuário com muitas mensagens não
+    bloqueie os demais. Pedidos idênticos em andamento são agrupados em uma
+    única geração, tanto nas respostas completas (`run`) quanto nas
+    transmitidas em trechos (`stream`).
+    """
+    def __init__(self, max_in_flight: Optional[int] = None, lanes: int = 2):
+        """
+        Inicializa o escalonador.
+
+        Args:
+            max_in_flight: Número máximo de gerações simultâneas
+            lanes: Número de filas de prioridade (0 é a mais prioritária)
+        """
+        self.max_in_flight = max_in_flight or settings.AI_SCHEDULER_CONFIG["max_in_flight"]
+        self._lanes: List["OrderedDict[Hashable, Deque[asyncio.Future]]"] = [OrderedDict() for _ in range(lanes)]
+        self._coalesced: Dict[Hashable, List[Any]] = {}
+        self._streams: Dict[Hashable, _SharedStream] = {}
+        self.in_flight = 0
+        self.granted = 0
+        self.coalesced = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def queue_depth(self, lane: Optional[int] = None) -> int:
+        lanes = self._lanes if lane is None else [self._lanes[lane]]
+        return sum(len(waiters) for queue in lanes for waiters in queue.values())
+
+    def _next_waiter(self) -> Optional[asyncio.Future]:
+        for queue in self._lanes:
+            while queue:
+                user_id, waiters = next(iter(queue.items()))
+                waiter = waiters.popleft()
+                if waiters:
+                    # Rodízio: o usuário volta para o fim da fila
+                    queue.move_to_end(user_id)
+                else:
+                    del queue[user_id]
+                if not waiter.done():
+                    return waiter
+        return None
+
+    def _dispatch(self) -> None:
+        while self.in_flight < self.max_in_flight:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._dispatch()
+
+    async def acquire(self, user_id: Hashable, priority: int = PRIORITY_CHAT) -> None:
+        """
+        Aguarda uma vaga para gerar. Deve ser seguido de `release()`.
+        """
+        waiter = asyncio.get_running_loop().create_future()
+        lane = self._lanes[min(max(priority, 0), len(self._lanes) - 1)]
+        lane.setdefault(user_id, deque()).append(waiter)
+        enqueued_at = time.perf_counter()
+        self._dispatch()
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # A vaga foi concedida junto com o cancelamento
+                self._release()
+            raise
+
+        waited = time.perf_counter() - enqueued_at
+        self.granted += 1
+        self.wait_time += waited
+        self.max_wait_time = max(self.max_wait_time, waited)
+
+    def release(self) -> None:
+        self._release()
+
+    @asynccontextmanager
+    async def slot(self, user_id: Hashable, priority: int = PRIORITY_CHAT) -> AsyncIterator[None]:
+        """
+        Reserva uma vaga durante o bloco (ex.: enquanto a resposta é transmitida).
+        """
+        await self.acquire(user_id, priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def run(
+        self,
+        key: Hashable,
+        user_id: Hashable,
+        priority: int,
+        factory: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Executa uma geração respeitando o limite e agrupando pedidos idênticos.
+
+        Args:
+            key: Identifica pedidos idênticos (ex.: o corpo da requisição)
+            user_id: Usuário dono do pedido (para o rodízio)
+            priority: Fila de prioridade
+            factory: Função que inicia a geração
+
+        Returns:
+            Resultado da geração (compartilhado entre os pedidos agrupados)
+
+        A geração só é cancelada quando todos os pedidos agrupados desistem.
+        """
+        entry = self._coalesced.get(key)
+        if entry is None or entry[0].cancelled():
+            # A geração roda em uma task própria: cancelar quem a iniciou não
+            # cancela os pedidos agrupados a ela
+            task = asyncio.ensure_future(self._generate(user_id, priority, factory))
+            entry = self._coalesced[key] = [task, 0]
+            task.add_done_callback(lambda _, entry=entry: self._forget(key, entry))
+        else:
+            self.coalesced += 1
+        task = entry[0]
+        entry[1] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if entry[1] == 1 and not task.done():
+                # Ninguém mais aguarda esta geração; um novo pedido não deve
+                # se juntar a ela enquanto o cancelamento não termina
+                task.cancel()
+                self._forget(key, entry)
+            raise
+        finally:
+            entry[1] -= 1
+
+    async def _generate(self, user_id: Hashable, priority: int, factory: Callable[[], Awaitable[Any]]) -> Any:
+        async with self.slot(user_id, priority):
+            return await factory()
+
+    def _forget(self, key: Hashable, entry: List[Any]) -> None:
+        if self._coalesced.get(key) is entry:
+            del self._coalesced[key]
+
+    async def stream(
+        self,
+        key: Hashable,
+        user_id: Hashable,
+        priority: int,
+        factory: Callable[[], AsyncIterator[Any]]
+    ) -> AsyncIterator[Any]:
+        """
+        Como `run`, para gerações transmitidas em trechos.
+
+        A vaga fica reservada durante toda a transmissão. Pedidos idênticos
+        em andamento recebem os trechos já gerados e, depois, os novos,
+        conforme chegam; a geração só é cancelada quando todos desistem.
+
+        Args:
+            key: Identifica pedidos idênticos (ex.: o corpo da requisição)
+            user_id: Usuário dono do pedido (para o rodízio)
+            priority: Fila de prioridade
+            factory: Função que inicia a geração e devolve os trechos
+        """
+        shared = self._streams.get(key)
+        if shared is None or shared.task.cancelled():
+            shared = self._streams[key] = _SharedStream()
+            shared.task = asyncio.ensure_future(self._pump(shared, user_id, priority, factory))
+            shared.task.add_done_callback(lambda _, shared=shared: self._forget_stream(key, shared))
+        else:
+            self.coalesced += 1
+        shared.readers += 1
+        position = 0
+        try:
+            while True:
+                if position < len(shared.chunks):
+                    position += 1
+                    yield shared.chunks[position - 1]
+                elif shared.task.done():
+                    shared.task.result()
+                    return
+                else:
+                    await shared.updated.wait()
+        finally:
+            shared.readers -= 1
+            if not shared.readers and not shared.task.done():
+                shared.task.cancel()
+                self._forget_stream(key, shared)
+
+    async def _pump(
+        self,
+        shared: _SharedStream,
+        user_id: Hashable,
+        priority: int,
+        factory: Callable[[], AsyncIterator[Any]]
+    ) -> None:
+        try:
+            async with self.slot(user_id, priority):
+                chunks = factory()
+                try:
+                    async for chunk in chunks:
+                        shared.chunks.append(chunk)
+                        shared.notify()
+                finally:
+                    await chunks.aclose()
+        finally:
+            shared.notify()
+
+    def _forget_stream(self, key: Hashable, shared: _SharedStream) -> None:
+        if self._streams.get(key) is shared:
+            del self._streams[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queue_depth": self.queue_depth(),
+            "queue_depth_by_lane": [self.queue_depth(lane) for lane in range(len(self._lanes))],
+            "granted": self.granted,
+            "coalesced": self.coalesced,
+            "avg_wait_time": self.wait_time / self.granted if self.granted else 0.0,
+            "max_wait_time": self.max_wait_time
+        }
+
+# Instância global do escalonador de gerações da IA
+ai_scheduler = AIScheduler()
@@ -1,9 +1,22 @@
+import asyncio
+import logging
+from bisect import bisect_right
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.models import Alert, TransactionCategory, Transaction, User
-from datetime import datetime
-from typing import List, Optional
-from sqlalchemy import func
-from app.services.notifications import send_telegram_notification
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal, SessionLocal
+from app.db.models import Alert, SpendingAggregate, TransactionCategory, User
+from app.services.aggregates import AggregateKey, DEFAULT_TYPE, month_start, register_commit_listener
+from app.services.notifications import send_telegram_notification, send_telegram_notification_async
+from app.services.redis_client import AsyncRedisClient, async_redis, get_redis_connection
+
+logger = logging.getLogger('julliuz_bot')
 
 def create_alert(
     db: Session,
@@ -22,6 +35,7 @@ def create_alert(
     db.add(alert)
     db.commit()
     db.refresh(alert)
+    alert_engine.invalidate(user_id)
     return alert
 
 def get_user_alerts(db: Session, user_id: int) -> List[Alert]:
@@ -49,6 +63,7 @@ def update_alert(
             alert.is_active = is_active
         db.commit()
         db.refresh(alert)
+        alert_engine.invalidate(user_id, alert_id)
     return alert
 
 def delete_alert(db: Session, alert_id: int, user_id: int) -> bool:
@@ -60,26 +75,24 @@ def delete_alert(db: Session, alert_id: int, user_id: int) -> bool:
     if alert:
         db.delete(alert)
         db.commit()
+        alert_engine.invalidate(user_id)
         return True
     return False
 
-def check_alerts(db: Session, user_id: int) -> List[dict]:
-    alerts = get_user_alerts(db, user_id)
+def _month_expenses_query(user_id: int, when: Optional[datetime] = None):
+    return select(SpendingAggregate.category, SpendingAggregate.total).where(
+        SpendingAggregate.user_id == user_id,
+        SpendingAggregate.month == month_start(when or datetime.now()),
+        SpendingAggregate.type == DEFAULT_TYPE
+    )
+
+def _triggered_alerts(alerts: List[Alert], user: Optional[User], totals: Dict[str, float]) -> List[dict]:
     triggered_alerts = []
-    user = db.query(User).filter(User.id == user_id).first()
-    telegram_id = user.telegram_id if user else None
-    
     for alert in alerts:
         if alert.type == "limit":
             # Verificar limite de gastos por categoria
             if alert.category:
-                total = db.query(func.sum(Transaction.amount)).filter(
-                    Transaction.user_id == user_id,
-                    Transaction.category == alert.category,
-                    Transaction.type == "expense",
-                    Transaction.date >= datetime.now().replace(day=1)
-                ).scalar() or 0
-                
+                total = totals.get(alert.category.value, 0.0)
                 if total >= alert.threshold:
                     triggered_alerts.append({
                         "type": "limit",
@@ -87,13 +100,7 @@ def check_alerts(db: Session, user_id: int) -> List[dict]:
                         "current": total,
                         "threshold": alert.threshold
                     })
-                    # Notificação Telegram
-                    if telegram_id:
-                        send_telegram_notification(
-                            telegram_id,
-                            f"🔔 Alerta: Limite de gastos atingido em {alert.category.value}!\nGasto: R${total:.2f} / Limite: R${alert.threshold:.2f}"
-                        )
-        
+
         elif alert.type == "low_balance":
             # Verificar saldo baixo
             if user and user.balance <= alert.threshold:
@@ -102,11 +109,518 @@ def check_alerts(db: Session, user_id: int) -> List[dict]:
                     "current": user.balance,
                     "threshold": alert.threshold
                 })
-                # Notificação Telegram
-                if telegram_id:
-                    send_telegram_notification(
-                        telegram_id,
-                        f"🔔 Alerta: Seu saldo está baixo!\nSaldo atual: R${user.balance:.2f} / Limite: R${alert.threshold:.2f}"
-                    )
+    return triggered_alerts
+
+def _low_balance_notifications(alerts: List[Alert], user: Optional[User], month: date) -> List[Tuple[int, Tuple[int, str, str]]]:
+    """
+    Pares (id do alerta, notificação) dos alertas de saldo baixo disparados.
+    """
+    if not user or not user.telegram_id:
+        return []
+    return [
+        (alert.id, (
+            user.telegram_id,
+            f"🔔 Alerta: Seu saldo está baixo!\nSaldo atual: R${user.balance:.2f} / Limite: R${alert.threshold:.2f}",
+            f"alert:{alert.id}:{month.strftime('%Y-%m')}"
+        ))
+        for alert in alerts
+        if alert.type == "low_balance" and user.balance <= alert.threshold
+    ]
+
+def check_alerts(db: Session, user_id: int) -> List[dict]:
+    """
+    Lista os alertas do usuário que estão disparados agora.
+
+    Lê os totais do mês de todas as categorias em uma única consulta ao
+    agregado. Os alertas de saldo baixo disparados são enfileirados na fila
+    de notificações, no máximo uma vez por mês; os de limite são avaliados
+    e notificados pelo AlertEngine a cada commit de transações.
+    """
+    alerts = get_user_alerts(db, user_id)
+    user = db.query(User).filter(User.id == user_id).first()
+    totals = {category: float(total or 0.0) for category, total in db.execute(_month_expenses_query(user_id))}
+    month = month_start(datetime.now())
+    for alert_id, notification in _low_balance_notifications(alerts, user, month):
+        if alert_engine._claim_sync(alert_id, month):
+            send_telegram_notification(*notification)
+    return _triggered_alerts(alerts, user, totals)
+
+async def create_alert_async(
+    db: AsyncSession,
+    user_id: int,
+    alert_type: str,
+    threshold: float,
+    category: Optional[TransactionCategory] = None
+) -> Alert:
+    alert = Alert(
+        user_id=user_id,
+        type=alert_type,
+        category=category,
+        threshold=threshold,
+        is_active=True
+    )
+    db.add(alert)
+    await db.commit()
+    await db.refresh(alert)
+    alert_engine.invalidate(user_id)
+    return alert
+
+async def get_user_alerts_async(db: AsyncSession, user_id: int) -> List[Alert]:
+    result = await db.execute(select(Alert).where(
+        Alert.user_id == user_id,
+        Alert.is_active == True
+    ))
+    return list(result.scalars().all())
+
+async def update_alert_async(
+    db: AsyncSession,
+    alert_id: int,
+    user_id: int,
+    threshold: Optional[float] = None,
+    is_active: Optional[bool] = None
+) -> Optional[Alert]:
+    result = await db.execute(select(Alert).where(
+        Alert.id == alert_id,
+        Alert.user_id == user_id
+    ))
+    alert = result.scalars().first()
     
-    return triggered_alerts 
\ No newline at end of file
+    if alert:
+        if threshold is not None:
+            alert.threshold = threshold
+        if is_active is not None:
+            alert.is_active = is_active
+        await db.commit()
+        await db.refresh(alert)
+        alert_engine.invalidate(user_id, alert_id)
+        await alert_engine.join()
+    return alert
+
+async def delete_alert_async(db: AsyncSession, alert_id: int, user_id: int) -> bool:
+    result = await db.execute(select(Alert).where(
+        Alert.id == alert_id,
+        Alert.user_id == user_id
+    ))
+    alert = result.scalars().first()
+    
+    if alert:
+        await db.delete(alert)
+        await db.commit()
+        alert_engine.invalidate(user_id)
+        return True
+    return False
+
+async def check_alerts_async(db: AsyncSession, user_id: int) -> List[dict]:
+    """
+    Versão assíncrona de check_alerts.
+    """
+    alerts = await get_user_alerts_async(db, user_id)
+    user = await db.get(User, user_id)
+    result = await db.execute(_month_expenses_query(user_id))
+    totals = {category: float(total or 0.0) for category, total in result}
+    month = month_start(datetime.now())
+    for alert_id, notification in _low_balance_notifications(alerts, user, month):
+        if await alert_engine._claim(alert_id, month):
+            await send_telegram_notification_async(*notification)
+    return _triggered_alerts(alerts, user, totals)
+
+class _UserAlerts:
+    """
+    Alertas de limite ativos de um usuário, por categoria, com os valores
+    de limite ordenados para busca binária.
+    """
+    __slots__ = ("telegram_id", "limits", "seen")
+
+    def __init__(self, telegram_id: Optional[int], rows: List[Tuple[int, str, float]]):
+        self.telegram_id = telegram_id
+        self.limits: Dict[str, Tuple[List[float], List[int]]] = {}
+        for alert_id, category, threshold in sorted(rows, key=lambda row: (row[1], row[2], row[0])):
+            thresholds, alert_ids = self.limits.setdefault(category, ([], []))
+            thresholds.append(threshold)
+            alert_ids.append(alert_id)
+        # Maior total já avaliado por (categoria, mês)
+        self.seen: Dict[Tuple[str, date], float] = {}
+
+class AlertEngine:
+    """
+    Avaliação de alertas de limite dirigida pelos commits de transações.
+
+    O agregado de gastos entrega, a cada commit, o total do mês de cada
+    categoria alterada. Só os alertas dessa categoria são avaliados: os
+    limites ficam ordenados por usuário e categoria, e uma busca binária
+    separa os que foram cruzados desde o último total visto, então o custo
+    por commit é proporcional aos alertas tocados, não a todos os alertas
+    do usuário. Cada alerta dispara no máximo uma vez por mês (SET NX no
+    Redis, com um conjunto local como fallback) e as notificações vão para
+    a fila de notificações, fora do caminho do commit. Commits síncronos
+    feitos fora de qualquer event loop (ex.: scripts) são avaliados na hora,
+    com a sessão e o cliente Redis síncronos.
+    """
+    def __init__(
+        self,
+        session_factory=None,
+        notifier: Optional[Callable[[int, str, str], Awaitable[bool]]] = None,
+        async_client: Optional[AsyncRedisClient] = None,
+        redis_client=None,
+        sync_session_factory=None,
+        sync_notifier: Optional[Callable[[int, str, str], bool]] = None,
+        index_max_users: Optional[int] = None,
+        index_ttl: Optional[float] = None,
+        fired_ttl: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        enabled: Optional[bool] = None
+    ):
+        """
+        Inicializa o motor de alertas.
+
+        Args:
+            session_factory: Fábrica de AsyncSession (padrão: AsyncSessionLocal)
+            notifier: Corrotina notifier(telegram_id, texto, chave de deduplicação)
+                (padrão: send_telegram_notification_async, que enfileira na fila de notificações)
+            async_client: Fachada assíncrona do Redis (padrão: async_redis)
+            redis_client: Cliente Redis síncrono, usado fora do event loop (padrão: get_redis_connection())
+            sync_session_factory: Fábrica de Session usada fora do event loop (padrão: SessionLocal)
+            sync_notifier: Versão síncrona de notifier, usada fora do event loop
+                (padrão: send_telegram_notification)
+            index_max_users: Usuários mantidos no índice de alertas em memória
+            index_ttl: Tempo de vida do índice de cada usuário, em segundos
+            fired_ttl: Tempo de vida da marca de alerta disparado, em segundos
+            max_pending: Limite de eventos aguardando avaliação
+            enabled: Liga/desliga a avaliação nos commits
+        """
+        config = settings.ALERT_CONFIG
+        self.session_factory = session_factory or AsyncSessionLocal
+        self.notifier = notifier or send_telegram_notification_async
+        self.async_redis = async_client or async_redis
+        self._redis = redis_client
+        self.sync_session_factory = sync_session_factory or SessionLocal
+        self.sync_notifier = sync_notifier or send_telegram_notification
+        self.fired_ttl = fired_ttl or config["fired_ttl"]
+        self.max_pending = max_pending or config["max_pending"]
+        self.enabled = config["enabled"] if enabled is None else enabled
+        self.index = LRUCache(
+            max_size=index_max_users or config["index_max_users"],
+            ttl=index_ttl if index_ttl is not None else config["index_ttl"]
+        )
+        self._generation = 0
+        # Fallback sem Redis: limitado e expirando junto com a marca no Redis
+        self._fired_local = LRUCache(max_size=config["fired_local_max"], ttl=self.fired_ttl)
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._worker_task: Optional[asyncio.Task] = None
+        self._sends = set()
+        self.events = 0
+        self.dropped = 0
+        self.evaluated = 0
+        self.fired = 0
+        self.index_loads = 0
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = get_redis_connection()
+        return self._redis
+
+    def invalidate(self, user_id: int, alert_id: Optional[int] = None) -> None:
+        """
+        Descarta o índice de alertas do usuário (após criar, alterar ou remover alertas).
+
+        Args:
+            user_id: ID do usuário
+            alert_id: Alerta alterado; sua marca de disparo do mês é removida
+                para que o novo limite possa disparar
+        """
+        self._generation += 1
+        self.index.delete(user_id)
+        if alert_id is None:
+            return
+        key = self._fired_key(alert_id, month_start(datetime.now()))
+        self._fired_local.delete(key)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is not None:
+            task = loop.create_task(self._reset_fired_async(key))
+            self._sends.add(task)
+            task.add_done_callback(self._sends.discard)
+            return
+        try:
+            self.redis.delete(key)
+        except Exception as e:
+            logger.warning(f"Falha ao limpar a marca de disparo do alerta {alert_id}: {e}")
+
+    async def _reset_fired_async(self, key: str) -> None:
+        try:
+            await self.async_redis.client.delete(key)
+        except Exception as e:
+            logger.warning(f"Falha ao limpar a marca de disparo {key}: {e}")
+
+    def on_commit(self, deltas: Dict[AggregateKey, List[float]], totals: Dict[AggregateKey, float]) -> None:
+        """
+        Listener do agregado: enfileira os gastos do mês atual que aumentaram.
+        """
+        if not self.enabled:
+            return
+        month = month_start(datetime.now())
+        events = []
+        for key, (amount, _) in deltas.items():
+            user_id, category, key_month, transaction_type = key
+            if transaction_type != DEFAULT_TYPE or key_month != month or amount <= 0 or key not in totals:
+                continue
+            user = self.index.get(user_id)
+            if user is not None and category not in user.limits:
+                continue
+            events.append((user_id, category, month, totals[key]))
+        if events:
+            self._submit(events)
+
+    def _submit(self, events: List[Tuple[int, str, date, float]]) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is not None:
+            self._enqueue(events)
+        elif self._loop is not None and self._loop.is_running():
+            # Commit feito em outra thread: entrega ao loop do worker
+            self._loop.call_soon_threadsafe(self._enqueue, events)
+        else:
+            # Commit síncrono sem event loop (ex.: scripts): avalia aqui mesmo,
+            # sem criar um loop descartável sobre os pools assíncronos compartilhados
+            self.events += len(events)
+            for event in events:
+                try:
+                    self.evaluate_sync(*event)
+                except Exception as e:
+                    logger.error(f"Erro ao avaliar alertas: {e}")
+
+    def _enqueue(self, events: List[Tuple[int, str, date, float]]) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._worker_task = None
+        for event in events:
+            try:
+                self._queue.put_nowait(event)
+                self.events += 1
+            except asyncio.QueueFull:
+                self.dropped += 1
+                logger.warning("Fila de avaliação de alertas cheia; evento descartado")
+        if self._worker_task is None or self._worker_task.done():
+            self._worker_task = loop.create_task(self._worker())
+
+    async def _worker(self) -> None:
+        # Esvazia a fila e termina; o próximo commit inicia outro worker
+        queue = self._queue
+        while not queue.empty():
+            event = queue.get_nowait()
+            try:
+                await self.evaluate(*event)
+            except Exception as e:
+                logger.error(f"Erro ao avaliar alertas: {e}")
+            finally:
+                queue.task_done()
+
+    async def join(self) -> None:
+        """
+        Aguarda a avaliação dos eventos enfileirados e o envio das notificações.
+        """
+        if self._queue is not None:
+            await self._queue.join()
+        if self._sends:
+            await asyncio.gather(*self._sends, return_exceptions=True)
+
+    async def close(self) -> None:
+        await self.join()
+        if self._worker_task is not None:
+            self._worker_task.cancel()
+            self._worker_task = None
+
+    @staticmethod
+    def _index_query(user_id: int):
+        limit_alert = and_(
+            Alert.user_id == User.id,
+            Alert.is_active == True,
+            Alert.type == "limit",
+            Alert.category.isnot(None)
+        )
+        return (
+            select(User.telegram_id, Alert.id, Alert.category, Alert.threshold)
+            .select_from(User)
+            .outerjoin(Alert, limit_alert)
+            .where(User.id == user_id)
+        )
+
+    async def _user_alerts(self, user_id: int) -> _UserAlerts:
+        user = self.index.get(user_id)
+        if user is not None:
+            return user
+
+        generation = self._generation
+        async with self.session_factory() as session:
+            rows = (await session.execute(self._index_query(user_id))).all()
+        return self._index_user(user_id, rows, generation)
+
+    def _user_alerts_sync(self, user_id: int) -> _UserAlerts:
+        user = self.index.get(user_id)
+        if user is not None:
+            return user
+
+        generation = self._generation
+        with self.sync_session_factory() as session:
+            rows = session.execute(self._index_query(user_id)).all()
+        return self._index_user(user_id, rows, generation)
+
+    def _index_user(self, user_id: int, rows, generation: int) -> _UserAlerts:
+        self.index_loads += 1
+        telegram_id = rows[0][0] if rows else None
+        user = _UserAlerts(telegram_id, [
+            (alert_id, category.value, float(threshold or 0.0))
+            for _, alert_id, category, threshold in rows if alert_id is not None
+        ])
+        # Não guarda um índice lido antes de uma invalidação concorrente
+        if generation == self._generation:
+            self.index.set(user_id, user)
+        return user
+
+    def _fired_key(self, alert_id: int, month: date) -> str:
+        return f"alert:fired:{alert_id}:{month.strftime('%Y-%m')}"
+
+    async def _claim(self, alert_id: int, month: date) -> bool:
+        """
+        Marca o alerta como disparado no mês; False se já havia disparado.
+        """
+        key = self._fired_key(alert_id, month)
+        try:
+            return bool(await self.async_redis.client.set(key, 1, nx=True, ex=self.fired_ttl))
+        except Exception as e:
+            logger.warning(f"Redis indisponível para deduplicar alertas: {e}")
+        return self._claim_local(key)
+
+    def _claim_sync(self, alert_id: int, month: date) -> bool:
+        """
+        Versão síncrona de _claim, usada fora do event loop.
+        """
+        key = self._fired_key(alert_id, month)
+        try:
+            return bool(self.redis.set(key, 1, nx=True, ex=self.fired_ttl))
+        except Exception as e:
+            logger.warning(f"Redis indisponível para deduplicar alertas: {e}")
+        return self._claim_local(key)
+
+    def _claim_local(self, key: str) -> bool:
+        if key in self._fired_local:
+            return False
+        self._fired_local.set(key, True)
+        return True
+
+    def _crossed(self, user: _UserAlerts, category: str, month: date, total: float) -> List[Tuple[int, float]]:
+        """
+        Alertas (id, limite) da categoria cruzados desde o último total avaliado.
+        """
+        limits = user.limits.get(category)
+        if not limits:
+            return []
+        thresholds, alert_ids = limits
+
+        seen = user.seen.get((category, month))
+        if seen is not None and total <= seen:
+            return []
+        user.seen[(category, month)] = total
+
+        start = bisect_right(thresholds, seen) if seen is not None else 0
+        end = bisect_right(thresholds, total)
+        self.evaluated += 1
+        return list(zip(alert_ids[start:end], thresholds[start:end]))
+
+    def _fire(
+        self,
+        user: _UserAlerts,
+        alert_id: int,
+        category: str,
+        month: date,
+        total: float,
+        threshold: float
+    ) -> Tuple[dict, Optional[Tuple[int, str, str]]]:
+        """
+        Alerta disparado e, se o usuário tem Telegram, a notificação
+        (telegram_id, texto, chave de deduplicação) a enfileirar.
+        """
+        self.fired += 1
+        triggered = {
+            "type": "limit",
+            "alert_id": alert_id,
+            "category": category,
+            "current": total,
+            "threshold": threshold
+        }
+        if not user.telegram_id:
+            return triggered, None
+        return triggered, (
+            user.telegram_id,
+            f"🔔 Alerta: Limite de gastos atingido em {category}!\nGasto: R${total:.2f} / Limite: R${threshold:.2f}",
+            f"alert:{alert_id}:{month.strftime('%Y-%m')}"
+        )
+
+    async def evaluate(self, user_id: int, category: str, month: date, total: float) -> List[dict]:
+        """
+        Avalia os alertas de limite de uma categoria com o total do mês.
+
+        Args:
+            user_id: ID do usuário
+            category: Categoria alterada (valor do enum)
+            month: Primeiro dia do mês do total
+            total: Gasto do mês na categoria após o commit
+
+        Returns:
+            Alertas disparados agora
+        """
+        user = await self._user_alerts(user_id)
+        triggered = []
+        for alert_id, threshold in self._crossed(user, category, month, total):
+            if not await self._claim(alert_id, month):
+                continue
+            alert, notification = self._fire(user, alert_id, category, month, total, threshold)
+            triggered.append(alert)
+            if notification is not None:
+                task = asyncio.ensure_future(self.notifier(*notification))
+                self._sends.add(task)
+                task.add_done_callback(self._sends.discard)
+        return triggered
+
+    def evaluate_sync(self, user_id: int, category: str, month: date, total: float) -> List[dict]:
+        """
+        Versão síncrona de evaluate, para commits feitos fora do event loop.
+        """
+        user = self._user_alerts_sync(user_id)
+        triggered = []
+        for alert_id, threshold in self._crossed(user, category, month, total):
+            if not self._claim_sync(alert_id, month):
+                continue
+            alert, notification = self._fire(user, alert_id, category, month, total, threshold)
+            triggered.append(alert)
+            if notification is not None:
+                self.sync_notifier(*notification)
+        return triggered
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Contadores de eventos, avaliações, disparos e cargas do índice.
+        """
+        return {
+            "events": self.events,
+            "dropped": self.dropped,
+            "evaluated": self.evaluated,
+            "fired": self.fired,
+            "index_loads": self.index_loads,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "index": self.index.stats()
+        }
+
+# Instância global do motor de alertas
+alert_engine = AlertEngine()
+
+# Avalia os alertas de limite a cada commit que altera transações
+register_commit_listener(alert_engine.on_commit, with_totals=True)
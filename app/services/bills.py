@@ -1,3 +1,5 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.db.models import FixedBill, TransactionCategory
 from datetime import datetime
@@ -91,4 +93,97 @@ def get_due_bills(db: Session, user_id: int) -> List[FixedBill]:
     current_day = today.day
     
     bills = get_user_bills(db, user_id)
-    return [bill for bill in bills if bill.due_day >= current_day] 
\ No newline at end of file
+    return [bill for bill in bills if bill.due_day >= current_day]
+
+async def create_fixed_bill_async(
+    db: AsyncSession,
+    user_id: int,
+    name: str,
+    amount: float,
+    due_day: int,
+    category: TransactionCategory
+) -> FixedBill:
+    bill = FixedBill(
+        user_id=user_id,
+        name=name,
+        amount=amount,
+        due_day=due_day,
+        category=category,
+        is_active=True
+    )
+    
+    db.add(bill)
+    await db.commit()
+    await db.refresh(bill)
+    
+    return bill
+
+async def get_user_bills_async(
+    db: AsyncSession,
+    user_id: int,
+    active_only: bool = True
+) -> List[FixedBill]:
+    query = select(FixedBill).where(FixedBill.user_id == user_id)
+    
+    if active_only:
+        query = query.where(FixedBill.is_active == True)
+    
+    result = await db.execute(query.order_by(FixedBill.due_day))
+    return list(result.scalars().all())
+
+async def update_bill_async(
+    db: AsyncSession,
+    bill_id: int,
+    user_id: int,
+    name: Optional[str] = None,
+    amount: Optional[float] = None,
+    due_day: Optional[int] = None,
+    category: Optional[TransactionCategory] = None,
+    is_active: Optional[bool] = None
+) -> Optional[FixedBill]:
+    result = await db.execute(select(FixedBill).where(
+        FixedBill.id == bill_id,
+        FixedBill.user_id == user_id
+    ))
+    bill = result.scalars().first()
+    
+    if not bill:
+        return None
+    
+    if name is not None:
+        bill.name = name
+    if amount is not None:
+        bill.amount = amount
+    if due_day is not None:
+        bill.due_day = due_day
+    if category is not None:
+        bill.category = category
+    if is_active is not None:
+        bill.is_active = is_active
+    
+    await db.commit()
+    await db.refresh(bill)
+    
+    return bill
+
+async def delete_bill_async(db: AsyncSession, bill_id: int, user_id: int) -> bool:
+    result = await db.execute(select(FixedBill).where(
+        FixedBill.id == bill_id,
+        FixedBill.user_id == user_id
+    ))
+    bill = result.scalars().first()
+    
+    if not bill:
+        return False
+    
+    bill.is_active = False
+    await db.commit()
+    
+    return True
+
+async def get_due_bills_async(db: AsyncSession, user_id: int) -> List[FixedBill]:
+    today = datetime.utcnow()
+    current_day = today.day
+    
+    bills = await get_user_bills_async(db, user_id)
+    return [bill for bill in bills if bill.due_day >= current_day]
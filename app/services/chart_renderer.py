@@ -0,0 +1,122 @@
+import io
+import threading
+from typing import Dict, Tuple
+
+import numpy as np
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import logging
+
+logger = logging.getLogger("julliuz_bot")
+
+class ChartRenderer:
+    """
+    Renderizador de gráficos sem o estado global do pyplot.
+
+    Usa a API orientada a objetos com o backend Agg e mantém um template
+    de figura por tipo de gráfico em cada thread, que é limpo e reutilizado
+    a cada renderização. Pode ser chamado a partir de um pool de threads.
+    """
+    def __init__(self, dpi: int = 100, max_pie_slices: int = 8):
+        """
+        Inicializa o renderizador.
+
+        Args:
+            dpi: Resolução das imagens geradas
+            max_pie_slices: Número máximo de fatias antes de agrupar em "Outros"
+        """
+        self.dpi = dpi
+        self.max_pie_slices = max_pie_slices
+        self._local = threading.local()
+
+    def _template(self, kind: str, figsize: Tuple[float, float]) -> Tuple[Figure, Axes]:
+        templates = getattr(self._local, "templates", None)
+        if templates is None:
+            templates = self._local.templates = {}
+
+        key = (kind, figsize)
+        if key not in templates:
+            figure = Figure(figsize=figsize, dpi=self.dpi)
+            FigureCanvasAgg(figure)
+            templates[key] = (figure, figure.add_subplot())
+
+        figure, axes = templates[key]
+        axes.clear()
+        return figure, axes
+
+    def _to_png(self, figure: Figure) -> bytes:
+        figure.tight_layout()
+        buffer = io.BytesIO()
+        figure.savefig(buffer, format="png")
+        return buffer.getvalue()
+
+    @staticmethod
+    def prepare_bar_data(data: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Converte os dados do gráfico de barras em arrays NumPy.
+        """
+        labels = np.fromiter(data.keys(), dtype=object, count=len(data))
+        values = np.fromiter(data.values(), dtype=float, count=len(data))
+        return labels, values
+
+    def prepare_pie_data(self, data: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ordena as fatias, descarta valores não positivos e agrupa o excedente em "Outros".
+        """
+        labels, values = self.prepare_bar_data(data)
+        positive = values > 0
+        labels, values = labels[positive], values[positive]
+
+        order = np.argsort(values)[::-1]
+        labels, values = labels[order], values[order]
+
+        if values.size > self.max_pie_slices:
+            keep = self.max_pie_slices - 1
+            labels = np.append(labels[:keep], "Outros")
+            values = np.append(values[:keep], values[keep:].sum())
+        return labels, values
+
+    def render_bar(self, data: Dict[str, float], title: str, xlabel: str, ylabel: str) -> bytes:
+        """
+        Renderiza um gráfico de barras.
+
+        Returns:
+            Bytes da imagem PNG
+        """
+        figure, axes = self._template("bar", (10, 6))
+        labels, values = self.prepare_bar_data(data)
+        axes.bar(np.arange(values.size), values, tick_label=labels.astype(str))
+        axes.set_title(title)
+        axes.set_xlabel(xlabel)
+        axes.set_ylabel(ylabel)
+        axes.tick_params(axis="x", labelrotation=45)
+        return self._to_png(figure)
+
+    def render_pie(self, data: Dict[str, float], title: str) -> bytes:
+        """
+        Renderiza um gráfico de pizza.
+
+        Returns:
+            Bytes da imagem PNG
+        """
+        figure, axes = self._template("pie", (8, 8))
+        labels, values = self.prepare_pie_data(data)
+        if values.size:
+            axes.pie(values, labels=labels.astype(str), autopct="%1.1f%%")
+        else:
+            axes.text(0.5, 0.5, "Sem dados no período", ha="center", va="center")
+            axes.set_axis_off()
+        axes.set_title(title)
+        return self._to_png(figure)
+
+def as_photo(png: bytes, name: str = "chart.png") -> io.BytesIO:
+    """
+    Embala os bytes PNG em um BytesIO pronto para `send_photo`.
+    """
+    photo = io.BytesIO(png)
+    photo.name = name
+    return photo
+
+# Instância global do renderizador de gráficos
+chart_renderer = ChartRenderer()
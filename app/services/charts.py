@@ -1,11 +1,11 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.db.models import Transaction, TransactionCategory
+from app.db.models import TransactionCategory
+from app.services.aggregates import get_category_totals, get_monthly_totals
+from app.services.preferences import get_user_preferences
+from app.services.report_cache import report_cache
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
-import matplotlib.pyplot as plt
-import io
-import base64
+from typing import Dict, List, Any, Optional
+from app.services.chart_renderer import chart_renderer
 import logging
 
 logger = logging.getLogger("julliuz_bot")
@@ -15,7 +15,7 @@ def generate_bar_chart(
     title: str,
     xlabel: str,
     ylabel: str
-) -> str:
+) -> bytes:
     """
     Gera um gráfico de barras a partir dos dados fornecidos.
     
@@ -26,25 +26,10 @@ def generate_bar_chart(
         ylabel: Rótulo do eixo Y
         
     Returns:
-        String com o gráfico em base64
+        Bytes da imagem PNG (use `as_photo` para enviar com `send_photo`)
     """
     try:
-        plt.figure(figsize=(10, 6))
-        plt.bar(data.keys(), data.values())
-        plt.title(title)
-        plt.xlabel(xlabel)
-        plt.ylabel(ylabel)
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        
-        # Converte o gráfico para base64
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png')
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.getvalue()).decode()
-        plt.close()
-        
-        return image_base64
+        return chart_renderer.render_bar(data, title, xlabel, ylabel)
     except Exception as e:
         logger.error(f"Erro ao gerar gráfico de barras: {e}")
         raise
@@ -52,7 +37,7 @@ def generate_bar_chart(
 def generate_pie_chart(
     data: Dict[str, float],
     title: str
-) -> str:
+) -> bytes:
     """
     Gera um gráfico de pizza a partir dos dados fornecidos.
     
@@ -61,22 +46,10 @@ def generate_pie_chart(
         title: Título do gráfico
         
     Returns:
-        String com o gráfico em base64
+        Bytes da imagem PNG (use `as_photo` para enviar com `send_photo`)
     """
     try:
-        plt.figure(figsize=(8, 8))
-        plt.pie(data.values(), labels=data.keys(), autopct='%1.1f%%')
-        plt.title(title)
-        plt.tight_layout()
-        
-        # Converte o gráfico para base64
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png')
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.getvalue()).decode()
-        plt.close()
-        
-        return image_base64
+        return chart_renderer.render_pie(data, title)
     except Exception as e:
         logger.error(f"Erro ao gerar gráfico de pizza: {e}")
         raise
@@ -91,22 +64,7 @@ def get_category_spending(
     Obtém os gastos por categoria para um usuário em um período.
     """
     try:
-        result = db.query(
-            TransactionCategory.name,
-            func.sum(Transaction.amount).label('total')
-        ).join(
-            Transaction,
-            Transaction.category_id == TransactionCategory.id
-        ).filter(
-            Transaction.user_id == user_id,
-            Transaction.date >= start_date,
-            Transaction.date <= end_date,
-            Transaction.type == 'expense'
-        ).group_by(
-            TransactionCategory.name
-        ).all()
-        
-        return {row[0]: float(row[1]) for row in result}
+        return get_category_totals(db, user_id, start_date, end_date, "expense")
     except Exception as e:
         logger.error(f"Erro ao obter gastos por categoria: {e}")
         raise
@@ -123,18 +81,11 @@ def get_monthly_spending(
         end_date = datetime.now()
         start_date = end_date - timedelta(days=30*months)
         
-        result = db.query(
-            func.date_trunc('month', Transaction.date).label('month'),
-            func.sum(Transaction.amount).label('total')
-        ).filter(
-            Transaction.user_id == user_id,
-            Transaction.type == "expense",
-            Transaction.date.between(start_date, end_date)
-        ).group_by('month').order_by('month').all()
+        result = get_monthly_totals(db, user_id, start_date, end_date, "expense")
         
         return {
-            row[0].strftime('%b/%Y'): float(row[1])
-            for row in result
+            month.strftime('%b/%Y'): total
+            for month, total in result
         }
     except Exception as e:
         logger.error(f"Erro ao obter gastos mensais: {e}")
@@ -153,19 +104,11 @@ def get_spending_trend(
         end_date = datetime.now()
         start_date = end_date - timedelta(days=30*months)
         
-        result = db.query(
-            func.date_trunc('month', Transaction.date).label('month'),
-            func.sum(Transaction.amount).label('total')
-        ).filter(
-            Transaction.user_id == user_id,
-            Transaction.type == "expense",
-            Transaction.category == category,
-            Transaction.date.between(start_date, end_date)
-        ).group_by('month').order_by('month').all()
+        result = get_monthly_totals(db, user_id, start_date, end_date, "expense", category)
         
         return {
-            row[0].strftime('%b/%Y'): float(row[1])
-            for row in result
+            month.strftime('%b/%Y'): total
+            for month, total in result
         }
     except Exception as e:
         logger.error(f"Erro ao obter tendência de gastos: {e}")
@@ -226,4 +169,31 @@ def generate_spending_report(
         }
     except Exception as e:
         logger.error(f"Erro ao gerar relatório de gastos: {e}")
-        raise 
\ No newline at end of file
+        raise 
+
+def get_spending_report(
+    db: Session,
+    user_id: int,
+    period: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Obtém o relatório de gastos usando o cache de relatórios renderizados.
+    
+    Args:
+        db: Sessão do banco de dados
+        user_id: ID do usuário
+        period: Período do relatório (padrão: preferência do usuário)
+        
+    Returns:
+        Dicionário com os gráficos e totais
+    """
+    preferences = get_user_preferences(db, user_id)
+    chart_preferences = (preferences.chart_preferences if preferences else None) or {}
+    period = period or chart_preferences.get("period", "month")
+    
+    return report_cache.get_or_render(
+        user_id,
+        period,
+        chart_preferences,
+        lambda: generate_spending_report(db, user_id, period)
+    )
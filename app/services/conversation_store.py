@@ -0,0 +1,86 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+class ConversationStore:
+    """
+    Estado de conversa com a IA por usuário.
+
+    Guarda o `context` devolvido pelo Ollama ao fim de cada geração, para que
+    a próxima mensagem do usuário reaproveite os tokens já avaliados (persona,
+    regras e turnos anteriores) em vez de reenviar o prompt completo. O número
+    de usuários é limitado por LRU, sessões inativas expiram pelo TTL e
+    contextos longos demais são descartados, recomeçando a conversa.
+    """
+    def __init__(
+        self,
+        max_users: Optional[int] = None,
+        ttl: Optional[int] = None,
+        max_context_tokens: Optional[int] = None
+    ):
+        """
+        Inicializa o armazenamento.
+
+        Args:
+            max_users: Número máximo de conversas mantidas
+            ttl: Tempo de inatividade, em segundos, até a conversa expirar
+            max_context_tokens: Tamanho máximo do context reaproveitado
+        """
+        config = settings.AI_CONVERSATION_CONFIG
+        self.max_context_tokens = max_context_tokens or config["max_context_tokens"]
+        self.sessions = LRUCache(max_users or config["max_users"], ttl or config["ttl"])
+        self._lock = threading.Lock()
+        self.reused = 0
+        self.started = 0
+        self.truncated = 0
+
+    def get_context(self, user_id: int) -> Optional[List[int]]:
+        """
+        Obtém o context da conversa do usuário, se houver um válido.
+        """
+        state = self.sessions.get(user_id)
+        with self._lock:
+            if state is None:
+                self.started += 1
+                return None
+            self.reused += 1
+        return state["context"]
+
+    def update(self, user_id: int, context: Optional[List[int]]) -> None:
+        """
+        Registra o context devolvido pelo Ollama ao fim de uma geração.
+        """
+        if not context:
+            return
+        if len(context) > self.max_context_tokens:
+            self.sessions.delete(user_id)
+            with self._lock:
+                self.truncated += 1
+            return
+        state = self.sessions.get(user_id) or {"turns": 0}
+        self.sessions.set(user_id, {
+            "context": list(context),
+            "turns": state["turns"] + 1,
+            "updated_at": time.time()
+        })
+
+    def reset(self, user_id: int) -> None:
+        """
+        Encerra a conversa do usuário (o próximo turno reenvia a persona).
+        """
+        self.sessions.delete(user_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self.sessions),
+            "reused": self.reused,
+            "started": self.started,
+            "truncated": self.truncated,
+            "evictions": self.sessions.evictions
+        }
+
+# Instância global das conversas com a IA
+conversation_store = ConversationStore()
@@ -1,13 +1,514 @@
+import asyncio
+import html
+import queue
+import re
 import smtplib
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from app.core.config import settings
 import logging
 
 logger = logging.getLogger("julliuz_bot")
 
+class EmailQueueFullError(Exception):
+    """Fila de envio de emails cheia; o chamador deve tentar novamente mais tarde."""
+
+def build_message(
+    from_email: str,
+    to_email: str,
+    subject: str,
+    body: str,
+    html_body: Optional[str] = None
+) -> MIMEMultipart:
+    """
+    Monta a mensagem com o corpo em texto plano e, opcionalmente, em HTML.
+    """
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = subject
+    msg['From'] = from_email
+    msg['To'] = to_email
+    msg.attach(MIMEText(body, 'plain'))
+    if html_body:
+        msg.attach(MIMEText(html_body, 'html'))
+    return msg
+
+class SMTPPool:
+    """
+    Pool de sessões SMTP já autenticadas, reutilizadas entre mensagens.
+
+    Cada sessão faz conexão, STARTTLS e login uma única vez; depois de
+    usada volta ao pool. Sessões ociosas por mais de `idle_timeout` são
+    descartadas (servidores derrubam conexões paradas) e no máximo `size`
+    sessões ficam abertas ao mesmo tempo. Thread-safe.
+    """
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: Optional[bool] = None,
+        size: Optional[int] = None,
+        idle_timeout: Optional[float] = None,
+        timeout: Optional[float] = None,
+        factory: Callable[..., smtplib.SMTP] = smtplib.SMTP
+    ):
+        """
+        Inicializa o pool.
+
+        Args:
+            host: Servidor SMTP (padrão: settings.EMAIL_HOST)
+            port: Porta do servidor (padrão: settings.EMAIL_PORT)
+            username: Usuário do login (padrão: settings.EMAIL_HOST_USER)
+            password: Senha do login (padrão: settings.EMAIL_HOST_PASSWORD)
+            use_tls: Usa STARTTLS (padrão: settings.EMAIL_USE_TLS)
+            size: Número máximo de sessões abertas
+            idle_timeout: Tempo máximo de uma sessão parada no pool, em segundos
+            timeout: Timeout de socket das sessões, em segundos
+            factory: Construtor da sessão (ex.: smtplib.SMTP)
+        """
+        config = settings.EMAIL_CONFIG
+        self.host = host or settings.EMAIL_HOST
+        self.port = port or settings.EMAIL_PORT
+        self.username = username or settings.EMAIL_HOST_USER
+        self.password = password or settings.EMAIL_HOST_PASSWORD
+        self.use_tls = settings.EMAIL_USE_TLS if use_tls is None else use_tls
+        self.size = size or config["pool_size"]
+        self.idle_timeout = idle_timeout or config["idle_timeout"]
+        self.timeout = timeout or config["timeout"]
+        self.factory = factory
+        self._idle: deque = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self.connects = 0
+        self.reused = 0
+        self.discarded = 0
+
+    @property
+    def configured(self) -> bool:
+        return all([self.host, self.port, self.username, self.password])
+
+    def _connect(self) -> smtplib.SMTP:
+        conn = self.factory(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                conn.starttls()
+            conn.login(self.username, self.password)
+        except BaseException:
+            self._close(conn)
+            raise
+        self.connects += 1
+        return conn
+
+    @staticmethod
+    def _close(conn: smtplib.SMTP) -> None:
+        try:
+            conn.quit()
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def acquire(self) -> smtplib.SMTP:
+        """
+        Retira uma sessão do pool (ou abre uma nova), aguardando vaga se
+        todas as `size` sessões estiverem em uso.
+        """
+        self._slots.acquire()
+        try:
+            now = time.monotonic()
+            while True:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    conn, last_used = self._idle.pop()
+                if now - last_used <= self.idle_timeout:
+                    self.reused += 1
+                    return conn
+                self.discarded += 1
+                self._close(conn)
+            return self._connect()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn: smtplib.SMTP, broken: bool = False) -> None:
+        """
+        Devolve a sessão ao pool; sessões com erro de conexão são fechadas.
+        """
+        if broken:
+            self.discarded += 1
+            self._close(conn)
+        else:
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+        self._slots.release()
+
+    def close(self) -> None:
+        """
+        Encerra (QUIT) as sessões ociosas.
+        """
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn, _ in idle:
+            self._close(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "connects": self.connects,
+            "reused": self.reused,
+            "discarded": self.discarded
+        }
+
+class _Email:
+    __slots__ = ("to_email", "subject", "body", "html_body", "futures", "attempts")
+
+    def __init__(self, to_email: str, subject: str, body: str, html_body: Optional[str], futures: List[Future]):
+        self.to_email = to_email
+        self.subject = subject
+        self.body = body
+        self.html_body = html_body
+        self.futures = futures
+        self.attempts = 0
+
+_BODY_RE = re.compile(r"<body[^>]*>(.*?)</body\s*>", re.IGNORECASE | re.DOTALL)
+_DOCUMENT_TAG_RE = re.compile(r"<!DOCTYPE[^>]*>|</?html[^>]*>|<head[^>]*>.*?</head\s*>", re.IGNORECASE | re.DOTALL)
+
+def _html_fragment(part: _Email) -> str:
+    """
+    Conteúdo do <body> do HTML da mensagem (ou o texto em <pre>, sem HTML).
+    """
+    if not part.html_body:
+        return f"<pre>{html.escape(part.body)}</pre>"
+    match = _BODY_RE.search(part.html_body)
+    if match:
+        return match.group(1).strip()
+    return _DOCUMENT_TAG_RE.sub("", part.html_body).strip()
+
+def _combine(parts: List[_Email]) -> _Email:
+    """
+    Junta as mensagens de um resumo em um único email.
+
+    O HTML do resumo é um único documento com o conteúdo do <body> de cada
+    mensagem, separados por <hr>.
+    """
+    if len(parts) == 1:
+        return parts[0]
+    first = parts[0]
+    html_body = None
+    if any(part.html_body for part in parts):
+        html_body = f"<html><body>{'<hr>'.join(_html_fragment(part) for part in parts)}</body></html>"
+    return _Email(
+        first.to_email,
+        f"{first.subject} (+{len(parts) - 1})",
+        "\n\n".join(part.body for part in parts),
+        html_body,
+        [future for part in parts for future in part.futures]
+    )
+
+def _retryable(error: Exception) -> bool:
+    # SMTPException é subclasse de OSError: respostas do servidor vêm antes
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return False
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, OSError)
+
+def _broken(error: Exception) -> bool:
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return False
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code == 421
+    return True
+
+_STOP = object()
+
+class EmailService:
+    """
+    Envio assíncrono de emails por threads de trabalho e um pool SMTP.
+
+    Os chamadores apenas enfileiram (submit devolve um Future); as threads
+    enviam pelas sessões do SMTPPool, sem reconectar e autenticar a cada
+    mensagem. Mensagens com `digest_key` para o mesmo destinatário que
+    chegam dentro de `digest_window` segundos viram um único email (ex.:
+    vários alertas do monitoramento). Falhas temporárias (conexão caída,
+    respostas 4xx) são retentadas até `max_retries` vezes com backoff;
+    respostas 5xx falham na hora.
+    """
+    def __init__(
+        self,
+        pool: Optional[SMTPPool] = None,
+        workers: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        retry_base_delay: Optional[float] = None,
+        digest_window: Optional[float] = None,
+        max_queue: Optional[int] = None,
+        from_email: Optional[str] = None
+    ):
+        """
+        Inicializa o serviço de email.
+
+        Args:
+            pool: Pool de sessões SMTP (padrão: SMTPPool())
+            workers: Número de threads de envio (padrão: o tamanho do pool)
+            max_retries: Tentativas extras por email após falhas temporárias
+            retry_base_delay: Espera base do backoff, em segundos
+            digest_window: Janela de agrupamento dos resumos, em segundos
+            max_queue: Emails aguardando envio antes de recusar novos
+            from_email: Remetente (padrão: o usuário do pool)
+        """
+        config = settings.EMAIL_CONFIG
+        self.pool = pool or SMTPPool()
+        self.workers = workers or self.pool.size
+        self.max_retries = config["max_retries"] if max_retries is None else max_retries
+        self.retry_base_delay = config["retry_base_delay"] if retry_base_delay is None else retry_base_delay
+        self.digest_window = config["digest_window"] if digest_window is None else digest_window
+        self.from_email = from_email or self.pool.username
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue or config["queue_size"])
+        self._digests: Dict[Tuple[str, str], Tuple[float, List[_Email]]] = {}
+        self._digest_parts = 0
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._start_lock = threading.Lock()
+        self._stopping = False
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.digested = 0
+        self.rejected = 0
+
+    def _ensure_started(self) -> None:
+        if self._threads:
+            return
+        with self._start_lock:
+            if self._threads:
+                return
+            self._stopping = False
+            threads = [
+                threading.Thread(target=self._worker, name=f"email-worker-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            threads.append(threading.Thread(target=self._flusher, name="email-digest", daemon=True))
+            for thread in threads:
+                thread.start()
+            self._threads = threads
+
+    def submit(
+        self,
+        to_email: str,
+        subject: str,
+        body: str,
+        html_body: Optional[str] = None,
+        digest_key: Optional[str] = None
+    ) -> Future:
+        """
+        Enfileira um email.
+
+        Args:
+            to_email: Email do destinatário
+            subject: Assunto do email
+            body: Corpo do email em texto plano
+            html_body: Corpo do email em HTML (opcional)
+            digest_key: Agrupa com outros emails da mesma chave para o destinatário
+
+        Returns:
+            Future com True se o email foi enviado, False caso contrário
+
+        Raises:
+            EmailQueueFullError: Fila de envio cheia
+        """
+        future: Future = Future()
+        if not self.pool.configured:
+            logger.warning("Configurações de email não encontradas")
+            future.set_result(False)
+            return future
+
+        self._ensure_started()
+        email = _Email(to_email, subject, body, html_body, [future])
+        if digest_key is not None and self.digest_window > 0:
+            with self._cond:
+                self._check_capacity()
+                key = (to_email, digest_key)
+                due, parts = self._digests.setdefault(key, (time.monotonic() + self.digest_window, []))
+                parts.append(email)
+                self._digest_parts += 1
+                self._cond.notify()
+            return future
+        with self._cond:
+            self._check_capacity()
+        try:
+            self._queue.put_nowait(email)
+        except queue.Full:
+            self.rejected += 1
+            raise EmailQueueFullError(f"Fila de emails cheia ({self._queue.maxsize} pendentes)")
+        return future
+
+    def _check_capacity(self) -> None:
+        # Partes aguardando o resumo contam para o mesmo limite da fila
+        if self._queue.maxsize > 0 and self._digest_parts + self._queue.qsize() >= self._queue.maxsize:
+            self.rejected += 1
+            raise EmailQueueFullError(f"Fila de emails cheia ({self._queue.maxsize} pendentes)")
+
+    def send(
+        self,
+        to_email: str,
+        subject: str,
+        body: str,
+        html_body: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> bool:
+        """
+        Envia um email e aguarda o resultado (bloqueante).
+        """
+        try:
+            return self.submit(to_email, subject, body, html_body).result(timeout)
+        except Exception as e:
+            logger.error(f"Erro ao enviar email: {e}")
+            return False
+
+    async def send_async(
+        self,
+        to_email: str,
+        subject: str,
+        body: str,
+        html_body: Optional[str] = None
+    ) -> bool:
+        """
+        Envia um email sem bloquear o event loop.
+        """
+        try:
+            return await asyncio.wrap_future(self.submit(to_email, subject, body, html_body))
+        except EmailQueueFullError as e:
+            logger.error(f"Erro ao enviar email: {e}")
+            return False
+
+    def _worker(self) -> None:
+        while True:
+            email = self._queue.get()
+            try:
+                if email is _STOP:
+                    return
+                self._deliver(email)
+            finally:
+                self._queue.task_done()
+
+    def _deliver(self, email: _Email) -> None:
+        msg = build_message(self.from_email, email.to_email, email.subject, email.body, email.html_body)
+        while True:
+            try:
+                conn = self.pool.acquire()
+                try:
+                    conn.send_message(msg)
+                except Exception as e:
+                    # Recusas do servidor (exceto 421) mantêm a sessão utilizável
+                    self.pool.release(conn, broken=_broken(e))
+                    raise
+                self.pool.release(conn)
+                self.sent += 1
+                logger.info(f"Email enviado com sucesso para {email.to_email}")
+                result = True
+                break
+            except Exception as e:
+                if _retryable(e) and email.attempts < self.max_retries:
+                    email.attempts += 1
+                    self.retries += 1
+                    time.sleep(min(self.retry_base_delay * 2 ** (email.attempts - 1), 30))
+                    continue
+                self.failed += 1
+                logger.error(f"Erro ao enviar email para {email.to_email}: {e}")
+                result = False
+                break
+        for future in email.futures:
+            if not future.done():
+                future.set_result(result)
+
+    def _pop_digests(self, force: bool = False) -> List[_Email]:
+        now = time.monotonic()
+        due = [key for key, (deadline, _) in self._digests.items() if force or deadline <= now]
+        emails = []
+        for key in due:
+            _, parts = self._digests.pop(key)
+            self._digest_parts -= len(parts)
+            self.digested += len(parts)
+            emails.append(_combine(parts))
+        return emails
+
+    def _flusher(self) -> None:
+        while True:
+            with self._cond:
+                if self._stopping:
+                    return
+                if self._digests:
+                    timeout = max(0.0, min(deadline for deadline, _ in self._digests.values()) - time.monotonic())
+                else:
+                    timeout = None
+                self._cond.wait(timeout)
+                emails = self._pop_digests()
+            for email in emails:
+                self._queue.put(email)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Envia os resumos pendentes e aguarda a fila esvaziar.
+
+        Returns:
+            False se a fila não esvaziou dentro de `timeout`
+        """
+        with self._cond:
+            emails = self._pop_digests(force=True)
+        for email in emails:
+            self._queue.put(email)
+        if timeout is None:
+            self._queue.join()
+            return True
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Envia o que estiver pendente, para as threads e fecha as sessões SMTP.
+        """
+        if self._threads:
+            self.flush(timeout)
+            with self._cond:
+                self._stopping = True
+                self._cond.notify_all()
+            for _ in range(self.workers):
+                self._queue.put(_STOP)
+            for thread in self._threads:
+                thread.join(timeout)
+            self._threads = []
+        self.pool.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "retries": self.retries,
+            "digested": self.digested,
+            "rejected": self.rejected,
+            "pending": self._queue.qsize(),
+            "digests_pending": len(self._digests),
+            "workers": self.workers,
+            "pool": self.pool.stats()
+        }
+
+# Instância global do serviço de email
+email_service = EmailService()
+
 def send_email(
     to_email: str,
     subject: str,
@@ -16,92 +517,66 @@ def send_email(
 ) -> bool:
     """
     Envia um email para o destinatário especificado.
-    
+
     Args:
         to_email: Email do destinatário
         subject: Assunto do email
         body: Corpo do email em texto plano
         html_body: Corpo do email em HTML (opcional)
-        
+
     Returns:
         True se o email foi enviado com sucesso, False caso contrário
     """
-    try:
-        # Verifica se as configurações de email estão disponíveis
-        if not all([
-            settings.EMAIL_HOST,
-            settings.EMAIL_PORT,
-            settings.EMAIL_HOST_USER,
-            settings.EMAIL_HOST_PASSWORD
-        ]):
-            logger.warning("Configurações de email não encontradas")
-            return False
-        
-        # Cria a mensagem
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = subject
-        msg['From'] = settings.EMAIL_HOST_USER
-        msg['To'] = to_email
-        
-        # Adiciona o corpo em texto plano
-        msg.attach(MIMEText(body, 'plain'))
-        
-        # Adiciona o corpo em HTML se fornecido
-        if html_body:
-            msg.attach(MIMEText(html_body, 'html'))
-        
-        # Conecta ao servidor SMTP
-        with smtplib.SMTP(settings.EMAIL_HOST, settings.EMAIL_PORT) as server:
-            if settings.EMAIL_USE_TLS:
-                server.starttls()
-            
-            # Faz login
-            server.login(settings.EMAIL_HOST_USER, settings.EMAIL_HOST_PASSWORD)
-            
-            # Envia o email
-            server.send_message(msg)
-            
-            logger.info(f"Email enviado com sucesso para {to_email}")
-            return True
-            
-    except Exception as e:
-        logger.error(f"Erro ao enviar email: {e}")
-        return False
+    return email_service.send(to_email, subject, body, html_body)
+
+async def send_email_async(
+    to_email: str,
+    subject: str,
+    body: str,
+    html_body: Optional[str] = None
+) -> bool:
+    """
+    Versão assíncrona de send_email (não bloqueia o event loop).
+    """
+    return await email_service.send_async(to_email, subject, body, html_body)
 
 def send_alert_email(
     to_email: str,
     alert_type: str,
     message: str,
-    details: Optional[Dict[str, Any]] = None
+    details: Optional[Dict[str, Any]] = None,
+    digest_key: Optional[str] = None
 ) -> bool:
     """
     Envia um email de alerta para o usuário.
-    
+
     Args:
         to_email: Email do usuário
         alert_type: Tipo do alerta
         message: Mensagem do alerta
         details: Detalhes adicionais (opcional)
-        
+        digest_key: Agrupa com outros alertas da mesma chave em um único
+            email, sem aguardar o envio (opcional)
+
     Returns:
-        True se o email foi enviado com sucesso, False caso contrário
+        True se o email foi enviado (ou enfileirado, com digest_key), False caso contrário
     """
     try:
         subject = f"Alerta Financeiro - {alert_type}"
-        
+
         # Cria o corpo do email
         body = f"""
         Alerta Financeiro
-        
+
         Tipo: {alert_type}
         Mensagem: {message}
         """
-        
+
         if details:
             body += "\nDetalhes:\n"
             for key, value in details.items():
                 body += f"{key}: {value}\n"
-        
+
         # Cria o corpo HTML
         html_body = f"""
         <html>
@@ -113,9 +588,12 @@ def send_alert_email(
             </body>
         </html>
         """
-        
+
+        if digest_key is not None:
+            future = email_service.submit(to_email, subject, body, html_body, digest_key=digest_key)
+            return not future.done() or future.result()
         return send_email(to_email, subject, body, html_body)
-        
+
     except Exception as e:
         logger.error(f"Erro ao enviar email de alerta: {e}")
-        return False 
\ No newline at end of file
+        return False
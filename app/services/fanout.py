@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import random
+from datetime import timedelta
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
+
+from app.core.config import settings
+
+logger = logging.getLogger('julliuz_bot')
+
+def retry_after_seconds(error: RetryAfter) -> float:
+    """
+    Tempo de espera pedido pelo Telegram (int ou timedelta, conforme a versão do PTB).
+    """
+    retry_after = error.retry_after
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+class Pacer:
+    """
+    Espaça os envios para respeitar o limite global do bot e o intervalo
+    mínimo entre mensagens de um mesmo chat. Um RetryAfter pausa todos os
+    envios até o prazo pedido pelo Telegram.
+    """
+    def __init__(self, global_rate: float, per_chat_interval: float):
+        self.interval = 1.0 / global_rate
+        self.per_chat_interval = per_chat_interval
+        self._next = 0.0
+        self._paused_until = 0.0
+        self._chat_next: Dict[int, float] = {}
+
+    async def wait(self, chat_id: int) -> None:
+        loop = asyncio.get_running_loop()
+        chat_slot = self._chat_next.get(chat_id, 0.0)
+        self._chat_next[chat_id] = max(loop.time(), chat_slot) + self.per_chat_interval
+        if chat_slot > loop.time():
+            await asyncio.sleep(chat_slot - loop.time())
+        while True:
+            now = loop.time()
+            if self._paused_until > now:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+            if slot > now:
+                await asyncio.sleep(slot - now)
+            # Uma pausa iniciada enquanto aguardava invalida a vaga
+            if self._paused_until <= loop.time():
+                return
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, asyncio.get_running_loop().time() + seconds)
+
+class MessageFanout:
+    """
+    Envia muitas mensagens do bot concorrentemente, dentro dos limites do
+    Telegram: uma taxa global de mensagens por segundo e um intervalo
+    mínimo por chat. Um RetryAfter (flood control) pausa todos os envios
+    pelo tempo pedido e a mensagem é reenviada; falhas de rede são
+    retentadas com backoff, e chats que bloquearam o bot são ignorados.
+    """
+    def __init__(
+        self,
+        global_rate: Optional[float] = None,
+        per_chat_interval: Optional[float] = None,
+        concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        retry_base_delay: Optional[float] = None
+    ):
+        """
+        Inicializa o fan-out.
+
+        Args:
+            global_rate: Mensagens por segundo no total
+            per_chat_interval: Intervalo mínimo entre mensagens para o mesmo chat, em segundos
+            concurrency: Número máximo de envios em andamento
+            max_retries: Tentativas extras por mensagem (RetryAfter e falhas de rede)
+            retry_base_delay: Espera base do backoff após falhas de rede, em segundos
+        """
+        config = settings.FANOUT_CONFIG
+        self.global_rate = global_rate or config["global_rate"]
+        self.per_chat_interval = config["per_chat_interval"] if per_chat_interval is None else per_chat_interval
+        self.concurrency = concurrency or config["concurrency"]
+        self.max_retries = config["max_retries"] if max_retries is None else max_retries
+        self.retry_base_delay = config["retry_base_delay"] if retry_base_delay is None else retry_base_delay
+        self.sent = 0
+        self.failed = 0
+        self.blocked = 0
+        self.retries = 0
+        self.flood_waits = 0
+
+    async def send_all(self, bot, messages: Iterable[Tuple[int, str]]) -> Dict[str, int]:
+        """
+        Envia as mensagens e aguarda todas terminarem.
+
+        Args:
+            bot: Bot do PTB (ou objeto com send_message assíncrono)
+            messages: Pares (chat_id, texto)
+
+        Returns:
+            Contagem de enviadas, falhas e bloqueadas nesta chamada
+        """
+        pacer = Pacer(self.global_rate, self.per_chat_interval)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        counts = {"sent": 0, "failed": 0, "blocked": 0}
+
+        async def send(chat_id: int, text: str) -> None:
+            async with semaphore:
+                counts[await self._send(bot, pacer, chat_id, text)] += 1
+
+        await asyncio.gather(*(send(chat_id, text) for chat_id, text in messages))
+        self.sent += counts["sent"]
+        self.failed += counts["failed"]
+        self.blocked += counts["blocked"]
+        return counts
+
+    async def _send(self, bot, pacer: Pacer, chat_id: int, text: str) -> str:
+        attempt = 0
+        while True:
+            await pacer.wait(chat_id)
+            try:
+                await bot.send_message(chat_id=chat_id, text=text)
+                return "sent"
+            except RetryAfter as e:
+                delay = retry_after_seconds(e)
+                self.flood_waits += 1
+                pacer.pause(delay)
+                logger.warning(f"Flood control do Telegram: pausando envios por {delay:g}s")
+                error = e
+            except Forbidden:
+                # Usuário bloqueou o bot ou removeu o chat
+                return "blocked"
+            except BadRequest as e:
+                logger.error(f"Mensagem recusada para {chat_id}: {e}")
+                return "failed"
+            except NetworkError as e:
+                error = e
+                if attempt < self.max_retries:
+                    await asyncio.sleep(min(self.retry_base_delay * 2 ** attempt, 30) * random.uniform(0.5, 1.5))
+            except Exception as e:
+                logger.error(f"Erro ao enviar mensagem para {chat_id}: {e}")
+                return "failed"
+            if attempt >= self.max_retries:
+                logger.error(f"Erro ao enviar mensagem para {chat_id} após {attempt + 1} tentativas: {error}")
+                return "failed"
+            attempt += 1
+            self.retries += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "blocked": self.blocked,
+            "retries": self.retries,
+            "flood_waits": self.flood_waits,
+            "global_rate": self.global_rate,
+            "concurrency": self.concurrency
+        }
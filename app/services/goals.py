@@ -1,14 +1,207 @@
-def create_goal(*args, **kwargs):
-    pass
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-def get_user_goals(*args, **kwargs):
-    pass
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
-def update_goal_progress(*args, **kwargs):
-    pass
+from app.db.models import FinancialGoal, User
 
-def delete_goal(*args, **kwargs):
-    pass
+# Índices de status devolvidos por goal_progress_arrays
+STATUS_LABELS = ("💪 CONTINUE", "👍 NO CAMINHO", "🎯 QUASE LÁ", "⚠️ ATRASADA")
 
-def get_goal_progress(*args, **kwargs):
-    pass 
\ No newline at end of file
+def create_goal(
+    db: Session,
+    user_id: int,
+    name: str,
+    target_amount: float,
+    deadline: date,
+    current_amount: float = 0.0
+) -> FinancialGoal:
+    goal = FinancialGoal(
+        user_id=user_id,
+        name=name,
+        target_amount=target_amount,
+        current_amount=current_amount,
+        deadline=deadline,
+        is_completed=current_amount >= target_amount
+    )
+
+    db.add(goal)
+    db.commit()
+    db.refresh(goal)
+
+    return goal
+
+def get_user_goals(
+    db: Session,
+    user_id: int,
+    include_completed: bool = False
+) -> List[FinancialGoal]:
+    query = db.query(FinancialGoal).filter(FinancialGoal.user_id == user_id)
+
+    if not include_completed:
+        query = query.filter(FinancialGoal.is_completed == False)
+
+    return query.order_by(FinancialGoal.deadline).all()
+
+def update_goal_progress(
+    db: Session,
+    goal_id: int,
+    user_id: int,
+    amount: float
+) -> Optional[FinancialGoal]:
+    goal = db.query(FinancialGoal).filter(
+        FinancialGoal.id == goal_id,
+        FinancialGoal.user_id == user_id
+    ).first()
+
+    if not goal:
+        return None
+
+    goal.current_amount += amount
+    goal.is_completed = goal.current_amount >= goal.target_amount
+    db.commit()
+    db.refresh(goal)
+
+    return goal
+
+def delete_goal(db: Session, goal_id: int, user_id: int) -> bool:
+    goal = db.query(FinancialGoal).filter(
+        FinancialGoal.id == goal_id,
+        FinancialGoal.user_id == user_id
+    ).first()
+
+    if not goal:
+        return False
+
+    db.delete(goal)
+    db.commit()
+
+    return True
+
+async def get_user_goals_async(
+    db: AsyncSession,
+    user_id: int,
+    include_completed: bool = False
+) -> List[FinancialGoal]:
+    query = select(FinancialGoal).where(FinancialGoal.user_id == user_id)
+
+    if not include_completed:
+        query = query.where(FinancialGoal.is_completed == False)
+
+    result = await db.execute(query.order_by(FinancialGoal.deadline))
+    return list(result.scalars().all())
+
+def goal_progress_arrays(
+    target: Sequence[float],
+    current: Sequence[float],
+    deadline: Sequence[int],
+    today: Optional[date] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Calcula as métricas de progresso de várias metas de uma vez.
+
+    Args:
+        target: Valores-alvo das metas
+        current: Valores já guardados
+        deadline: Prazos como ordinais de data (date.toordinal())
+        today: Dia de referência (padrão: hoje, UTC)
+
+    Returns:
+        Arrays progress (%), remaining, days_left, daily_needed e status
+        (índice em STATUS_LABELS)
+    """
+    today = today or datetime.utcnow().date()
+    target = np.asarray(target, dtype=np.float64)
+    current = np.asarray(current, dtype=np.float64)
+    days_left = np.asarray(deadline, dtype=np.int64) - today.toordinal()
+
+    # Meta sem valor-alvo conta como concluída
+    progress = np.divide(current * 100, target, out=np.full_like(current, 100.0), where=target > 0)
+    remaining = np.maximum(target - current, 0.0)
+    daily_needed = np.divide(remaining, days_left, out=remaining.copy(), where=days_left > 0)
+    status = np.select([days_left <= 0, progress >= 80, progress >= 50], [3, 2, 1], 0)
+    return {
+        "progress": progress,
+        "remaining": remaining,
+        "days_left": days_left,
+        "daily_needed": daily_needed,
+        "status": status
+    }
+
+def get_goal_progress(goal: FinancialGoal, today: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Métricas de progresso de uma meta (mesmo cálculo de goal_progress_arrays).
+    """
+    metrics = goal_progress_arrays([goal.target_amount], [goal.current_amount or 0.0], [goal.deadline.toordinal()], today)
+    return {name: values[0].item() for name, values in metrics.items()}
+
+def open_goals_query(after_user_id: int, limit: int):
+    """
+    Metas em aberto dos próximos `limit` usuários ativos com id maior que
+    `after_user_id`, em uma única consulta paginada por usuário.
+    """
+    open_goals = (User.is_active == True, FinancialGoal.is_completed == False)
+    users = (
+        select(FinancialGoal.user_id)
+        .join(User, User.id == FinancialGoal.user_id)
+        .where(*open_goals, FinancialGoal.user_id > after_user_id)
+        .group_by(FinancialGoal.user_id)
+        .order_by(FinancialGoal.user_id)
+        .limit(limit)
+        .subquery()
+    )
+    return (
+        select(
+            User.id, User.telegram_id, User.first_name, FinancialGoal.name,
+            FinancialGoal.target_amount, FinancialGoal.current_amount, FinancialGoal.deadline
+        )
+        .join(users, users.c.user_id == User.id)
+        .join(FinancialGoal, FinancialGoal.user_id == User.id)
+        .where(*open_goals)
+        .order_by(User.id, FinancialGoal.id)
+    )
+
+def render_goal_digest(rows, today: Optional[date] = None) -> List[Tuple[int, int, str]]:
+    """
+    Monta o resumo semanal de metas de um lote de linhas de open_goals_query,
+    calculando as métricas de todas as metas do lote de uma vez.
+
+    Returns:
+        Tuplas (user_id, telegram_id, texto), uma por usuário
+    """
+    count = len(rows)
+    if not count:
+        return []
+    user_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=count)
+    metrics = goal_progress_arrays(
+        np.fromiter((row[4] for row in rows), dtype=np.float64, count=count),
+        np.fromiter((row[5] or 0.0 for row in rows), dtype=np.float64, count=count),
+        np.fromiter((row[6].toordinal() for row in rows), dtype=np.int64, count=count),
+        today
+    )
+    progress = metrics["progress"].tolist()
+    remaining = metrics["remaining"].tolist()
+    days_left = metrics["days_left"].tolist()
+    daily_needed = metrics["daily_needed"].tolist()
+    status = metrics["status"].tolist()
+
+    bounds = [0, *(np.flatnonzero(np.diff(user_ids)) + 1).tolist(), count]
+    messages = []
+    for start, end in zip(bounds, bounds[1:]):
+        user_id, telegram_id, first_name = rows[start][:3]
+        parts = [f"📊 {first_name}, aqui está o progresso das suas metas:\n\n"]
+        for i in range(start, end):
+            _, _, _, name, target, current, _ = rows[i]
+            parts.append(
+                f"{STATUS_LABELS[status[i]]} - {name}\n"
+                f"Meta: R${target:.2f}\n"
+                f"Atual: R${current or 0.0:.2f} ({progress[i]:.1f}%)\n"
+                f"Faltam: R${remaining[i]:.2f} em {days_left[i]} dias\n"
+                f"Necessário por dia: R${daily_needed[i]:.2f}\n\n"
+            )
+        parts.append("Use /goals para mais detalhes.")
+        messages.append((user_id, telegram_id, "".join(parts)))
+    return messages
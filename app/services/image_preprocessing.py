@@ -0,0 +1,134 @@
+import io
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from app.core.config import settings
+
+logger = logging.getLogger('julliuz_bot')
+
+MM_PER_INCH = 25.4
+
+def otsu_threshold(gray: np.ndarray) -> int:
+    """
+    Calcula o limiar de Otsu de uma imagem em tons de cinza.
+
+    Args:
+        gray: Array uint8 da imagem
+
+    Returns:
+        Limiar que maximiza a variância entre as classes claro/escuro
+    """
+    histogram = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    total = histogram.sum()
+    if total == 0:
+        return 127
+
+    levels = np.arange(256, dtype=np.float64)
+    weight_dark = np.cumsum(histogram)
+    weight_light = total - weight_dark
+    sum_dark = np.cumsum(histogram * levels)
+    mean_dark = np.divide(sum_dark, weight_dark, out=np.zeros(256), where=weight_dark > 0)
+    mean_light = np.divide(
+        sum_dark[-1] - sum_dark, weight_light, out=np.zeros(256), where=weight_light > 0
+    )
+    between = weight_dark * weight_light * (mean_dark - mean_light) ** 2
+    return int(np.argmax(between))
+
+def detect_receipt_region(gray: np.ndarray, margin: int = 0) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Detecta a área do papel (clara) sobre o fundo da foto.
+
+    Seleciona as colunas com bastante pixel claro e, dentro delas, as linhas
+    com bastante pixel claro.
+
+    Args:
+        gray: Array uint8 da imagem
+        margin: Pixels extras mantidos em volta da região
+
+    Returns:
+        Caixa (left, top, right, bottom) ou None se nada foi detectado
+    """
+    paper = gray > otsu_threshold(gray)
+    if paper.all() or not paper.any():
+        return None
+
+    column_fill = paper.mean(axis=0)
+    columns = np.flatnonzero(column_fill >= column_fill.max() / 2)
+    left, right = columns[0], columns[-1] + 1
+
+    row_fill = paper[:, left:right].mean(axis=1)
+    rows = np.flatnonzero(row_fill >= row_fill.max() / 2)
+    top, bottom = rows[0], rows[-1] + 1
+
+    height, width = gray.shape
+    return (
+        max(int(left) - margin, 0),
+        max(int(top) - margin, 0),
+        min(int(right) + margin, width),
+        min(int(bottom) + margin, height)
+    )
+
+class ImagePreprocessor:
+    """
+    Prepara fotos de comprovantes para o Tesseract.
+
+    Corrige a orientação EXIF, converte para tons de cinza, recorta o papel,
+    reduz a resolução para o DPI alvo (considerando a largura de uma bobina
+    de comprovante) e binariza com Otsu. Imagens menores nunca são ampliadas.
+    """
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Inicializa o pré-processador.
+
+        Args:
+            config: Configuração (padrão: settings.OCR_PREPROCESSING_CONFIG)
+        """
+        config = {**settings.OCR_PREPROCESSING_CONFIG, **(config or {})}
+        self.enabled = config["enabled"]
+        self.crop = config["crop"]
+        self.crop_margin = config["crop_margin"]
+        self.binarize = config["binarize"]
+        self.target_width = int(config["receipt_width_mm"] / MM_PER_INCH * config["target_dpi"])
+
+    def preprocess(self, image: Image.Image) -> Image.Image:
+        """
+        Aplica o pré-processamento a uma imagem.
+
+        Args:
+            image: Imagem original
+
+        Returns:
+            Imagem em tons de cinza (ou binarizada) pronta para o OCR
+        """
+        if not self.enabled:
+            return image
+
+        image = ImageOps.exif_transpose(image).convert('L')
+
+        if self.crop:
+            box = detect_receipt_region(np.asarray(image), self.crop_margin)
+            if box is not None:
+                image = image.crop(box)
+
+        if image.width > self.target_width:
+            height = max(1, round(image.height * self.target_width / image.width))
+            image = image.resize((self.target_width, height), Image.Resampling.BILINEAR, reducing_gap=2.0)
+
+        if self.binarize:
+            gray = np.asarray(image)
+            binary = np.where(gray > otsu_threshold(gray), 255, 0).astype(np.uint8)
+            image = Image.fromarray(binary, mode='L')
+
+        return image
+
+    def open(self, image_data: bytes) -> Image.Image:
+        """
+        Abre os bytes de uma imagem e aplica o pré-processamento.
+        """
+        return self.preprocess(Image.open(io.BytesIO(image_data)))
+
+# Instância global do pré-processador de imagens
+image_preprocessor = ImagePreprocessor()
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.db.models import Transaction
+from app.services.aggregates import apply_deltas, deltas_for_rows, notify_commit
+# Registra a invalidação de relatórios em cache
+from app.services import alerts, report_cache  # noqa: F401
+
+logger = logging.getLogger('julliuz_bot')
+
+class TransactionIngestor:
+    """
+    Fila de ingestão de transações com group commit.
+
+    Agrupa as transações recebidas durante alguns milissegundos (ou até
+    atingir o tamanho máximo do lote), grava tudo com um único INSERT em
+    lote e um único commit (junto com o agregado de gastos), e resolve o future de cada chamador com o id
+    da transação ou com o erro correspondente.
+    """
+    def __init__(
+        self,
+        session_factory=None,
+        max_batch_size: Optional[int] = None,
+        max_delay_ms: Optional[float] = None
+    ):
+        """
+        Inicializa a fila de ingestão.
+
+        Args:
+            session_factory: Fábrica de AsyncSession (padrão: AsyncSessionLocal)
+            max_batch_size: Número máximo de transações por lote
+            max_delay_ms: Tempo máximo de espera para completar um lote
+        """
+        config = settings.INGESTION_CONFIG
+        self.session_factory = session_factory or AsyncSessionLocal
+        self.max_batch_size = max_batch_size or config["max_batch_size"]
+        self.max_delay = (max_delay_ms if max_delay_ms is not None else config["max_delay_ms"]) / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def submit(
+        self,
+        user_id: int,
+        amount: float,
+        category: str,
+        description: Optional[str] = None,
+        transaction_type: str = "expense"
+    ) -> int:
+        """
+        Enfileira uma transação e aguarda o commit do lote.
+
+        Returns:
+            ID da transação criada
+        """
+        self._ensure_worker()
+        future = self._loop.create_future()
+        row = {
+            "user_id": user_id,
+            "amount": amount,
+            "category": category,
+            "description": description,
+            "type": transaction_type,
+            "date": datetime.utcnow()
+        }
+        await self._queue.put((row, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch_size:
+                if self._queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = self._queue.get_nowait()
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        rows = [row for row, _ in batch]
+        try:
+            async with self.session_factory() as session:
+                result = await session.scalars(
+                    insert(Transaction).returning(Transaction.id, sort_by_parameter_order=True),
+                    rows
+                )
+                ids = result.all()
+                deltas = deltas_for_rows(rows)
+                totals = await session.run_sync(lambda sync_session: apply_deltas(sync_session.connection(), deltas))
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"Falha no lote de {len(batch)} transações, gravando individualmente: {e}")
+            await self._flush_individually(batch)
+            return
+
+        notify_commit(deltas, totals)
+        await report_cache.report_cache.join()
+
+        for (_, future), transaction_id in zip(batch, ids):
+            if not future.done():
+                future.set_result(transaction_id)
+
+    async def _flush_individually(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        # Isola as linhas com erro para que cada chamador receba o próprio resultado
+        for row, future in batch:
+            try:
+                async with self.session_factory() as session:
+                    transaction_id = await session.scalar(
+                        insert(Transaction).returning(Transaction.id),
+                        row
+                    )
+                    deltas = deltas_for_rows([row])
+                    totals = await session.run_sync(lambda sync_session: apply_deltas(sync_session.connection(), deltas))
+                    await session.commit()
+                notify_commit(deltas, totals)
+                await report_cache.report_cache.join()
+                if not future.done():
+                    future.set_result(transaction_id)
+            except Exception as e:
+                logger.error(f"Erro ao gravar transação do usuário {row['user_id']}: {e}")
+                if not future.done():
+                    future.set_exception(e)
+
+    async def close(self) -> None:
+        """
+        Grava as transações pendentes e encerra o worker.
+        """
+        if self._worker is None or self._worker.done():
+            return
+        await self._queue.put(None)
+        await self._worker
+        self._worker = None
+
+# Instância global da fila de ingestão de transações
+transaction_ingestor = TransactionIngestor()
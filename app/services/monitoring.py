@@ -1,9 +1,11 @@
 import psutil
 import platform
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, Optional
 
+from app.core.config import settings
 from app.services.email import send_alert_email
+from app.services.notifications import send_telegram_notification
 
 import logging
 
@@ -116,6 +118,7 @@ class SystemMonitor:
     def send_alerts(self, admin_email: str) -> None:
         """
         Envia alertas por email se algum recurso estiver acima do limite.
+        Os alertas da mesma verificação seguem em um único email (resumo).
         
         Args:
             admin_email: Email do administrador
@@ -133,7 +136,8 @@ class SystemMonitor:
                     {
                         'Limite': f"{self.cpu_threshold}%",
                         'Uso Atual': f"{info['cpu']['percent']}%"
-                    }
+                    },
+                    digest_key="monitoring"
                 )
                 
             if not status['memory']:
@@ -146,7 +150,8 @@ class SystemMonitor:
                         'Uso Atual': f"{info['memory']['percent']}%",
                         'Memória Total': f"{info['memory']['total'] / (1024**3):.2f} GB",
                         'Memória Disponível': f"{info['memory']['available'] / (1024**3):.2f} GB"
-                    }
+                    },
+                    digest_key="monitoring"
                 )
                 
             if not status['disk']:
@@ -159,11 +164,51 @@ class SystemMonitor:
                         'Uso Atual': f"{info['disk']['percent']}%",
                         'Espaço Total': f"{info['disk']['total'] / (1024**3):.2f} GB",
                         'Espaço Livre': f"{info['disk']['free'] / (1024**3):.2f} GB"
-                    }
+                    },
+                    digest_key="monitoring"
                 )
                 
         except Exception as e:
             logger.error(f"Erro ao enviar alertas: {e}")
 
+    def send_telegram_alerts(self, admin_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Enfileira alertas no Telegram para os administradores se algum
+        recurso estiver acima do limite (no máximo um por recurso por hora).
+
+        Args:
+            admin_ids: IDs do Telegram dos administradores (padrão: settings.ADMIN_IDS)
+
+        Returns:
+            Número de notificações enfileiradas
+        """
+        admin_ids = list(settings.ADMIN_IDS if admin_ids is None else admin_ids)
+        if not admin_ids:
+            return 0
+        try:
+            info = self.get_system_info()
+            status = self.check_resources()
+            limits = {
+                'cpu': ("CPU", self.cpu_threshold),
+                'memory': ("Memória", self.memory_threshold),
+                'disk': ("Disco", self.disk_threshold)
+            }
+            hour = datetime.now().strftime("%Y-%m-%dT%H")
+
+            queued = 0
+            for resource, ok in status.items():
+                if ok:
+                    continue
+                label, threshold = limits[resource]
+                message = f"⚠️ Alerta de {label}: uso em {info[resource]['percent']}% (limite: {threshold}%)"
+                for admin_id in admin_ids:
+                    if send_telegram_notification(admin_id, message, f"monitoring:{resource}:{admin_id}:{hour}"):
+                        queued += 1
+            return queued
+
+        except Exception as e:
+            logger.error(f"Erro ao enviar alertas: {e}")
+            return 0
+
 # Instância global do monitor do sistema
 system_monitor = SystemMonitor() 
\ No newline at end of file
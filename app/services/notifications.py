@@ -1,17 +1,502 @@
+import asyncio
+import json
+import random
+import uuid
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
 from telegram import Bot
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
+from telegram.request import HTTPXRequest
+
+from app.core.cache import LRUCache
 from app.core.config import settings
+from app.services.fanout import Pacer, retry_after_seconds
+from app.services.redis_client import AsyncRedisClient, async_redis, get_redis_connection
 import logging
 
 logger = logging.getLogger('julliuz_bot')
 
+_bot: Optional[Bot] = None
+
 def get_bot() -> Bot:
-    return Bot(token=settings.BOT_TOKEN)
-
-def send_telegram_notification(telegram_id: int, message: str) -> bool:
-    try:
-        get_bot().send_message(chat_id=telegram_id, text=message)
-        logger.info(f"Notificação enviada para {telegram_id}")
-        return True
-    except Exception as e:
-        logger.error(f"Erro ao enviar notificação Telegram: {e}")
-        return False
+    """
+    Retorna o Bot compartilhado pelo processo (um único pool HTTP para as notificações).
+    """
+    global _bot
+    if _bot is None:
+        _bot = Bot(
+            token=settings.BOT_TOKEN,
+            request=HTTPXRequest(connection_pool_size=settings.NOTIFICATION_CONFIG["connection_pool_size"])
+        )
+    return _bot
+
+# Reivindica até ARGV[1] mensagens da fila com um lease de ARGV[2] ms. Antes,
+# devolve à fila as mensagens com lease vencido (worker que caiu no meio do
+# envio) e as retentativas cujo prazo chegou — tudo no relógio do servidor.
+CLAIM_SCRIPT = """
+local batch_size = tonumber(ARGV[1])
+local lease = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+for _, key in ipairs({KEYS[3], KEYS[2]}) do
+    local due = redis.call('ZRANGEBYSCORE', key, '-inf', now, 'LIMIT', 0, batch_size)
+    for _, payload in ipairs(due) do
+        redis.call('ZREM', key, payload)
+        redis.call('RPUSH', KEYS[1], payload)
+    end
+end
+
+local batch = {}
+for i = 1, batch_size do
+    local payload = redis.call('LPOP', KEYS[1])
+    if not payload then
+        break
+    end
+    redis.call('ZADD', KEYS[3], now + lease, payload)
+    batch[#batch + 1] = payload
+end
+return batch
+"""
+
+# Conclui um lote: ARGV traz trios (payload reivindicado, novo payload, atraso
+# em ms). Atraso >= 0 agenda uma retentativa, -1 move para a fila de mortas e
+# -2 apenas remove (entregue ou descartada).
+SETTLE_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+for i = 1, #ARGV, 3 do
+    redis.call('ZREM', KEYS[1], ARGV[i])
+    local delay = tonumber(ARGV[i + 2])
+    if delay >= 0 then
+        redis.call('ZADD', KEYS[2], now + delay, ARGV[i + 1])
+    elseif delay == -1 then
+        redis.call('RPUSH', KEYS[3], ARGV[i + 1])
+    end
+end
+return #ARGV / 3
+"""
+
+DONE = -2
+DEAD = -1
+
+class NotificationOutbox:
+    """
+    Fila persistente de notificações do bot, drenada por workers assíncronos.
+
+    As notificações ficam no Redis (lista de prontas, ZSET de retentativas
+    agendadas e ZSET de mensagens em envio com lease); um worker que cai no
+    meio de um lote não perde mensagens, que voltam à fila quando o lease
+    vence (entrega pelo menos uma vez). Os workers reivindicam lotes em uma
+    única ida ao Redis, enviam pelo Bot compartilhado dentro dos limites do
+    Telegram (taxa global, intervalo por chat, pausa no RetryAfter) e
+    concluem o lote em outra ida. Falhas de rede são retentadas com backoff
+    exponencial com jitter; uma chave de deduplicação opcional impede que a
+    mesma notificação seja enfileirada duas vezes. Sem Redis, as
+    notificações ficam em uma fila em memória do processo.
+    """
+    def __init__(
+        self,
+        async_client: Optional[AsyncRedisClient] = None,
+        bot=None,
+        key_prefix: Optional[str] = None,
+        workers: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        global_rate: Optional[float] = None,
+        per_chat_interval: Optional[float] = None,
+        concurrency: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        retry_base_delay: Optional[float] = None,
+        retry_max_delay: Optional[float] = None,
+        lease: Optional[float] = None,
+        poll_interval: Optional[float] = None,
+        dedup_ttl: Optional[int] = None,
+        redis_client=None
+    ):
+        """
+        Inicializa a fila de notificações.
+
+        Args:
+            async_client: Fachada assíncrona do Redis (padrão: async_redis)
+            bot: Bot usado nos envios (padrão: o da Application em start(), ou get_bot())
+            key_prefix: Prefixo das chaves no Redis
+            workers: Número de workers de envio
+            batch_size: Mensagens reivindicadas por worker a cada ida ao Redis
+            global_rate: Mensagens por segundo no total
+            per_chat_interval: Intervalo mínimo entre mensagens para o mesmo chat, em segundos
+            concurrency: Envios em andamento no total (padrão: o tamanho do pool HTTP do Bot)
+            max_attempts: Tentativas por mensagem antes de ir para a fila de mortas
+            retry_base_delay: Espera base do backoff, em segundos
+            retry_max_delay: Espera máxima do backoff, em segundos
+            lease: Tempo para concluir um lote antes de ele voltar à fila, em segundos
+            poll_interval: Intervalo de consulta à fila quando ociosa, em segundos
+            dedup_ttl: Tempo de vida das chaves de deduplicação, em segundos
+            redis_client: Cliente Redis síncrono para submit() fora do event loop
+        """
+        config = settings.NOTIFICATION_CONFIG
+        self.async_redis = async_client or async_redis
+        self.bot = bot
+        self.key_prefix = key_prefix or config["key_prefix"]
+        self.workers = workers or config["workers"]
+        self.batch_size = batch_size or config["batch_size"]
+        self.global_rate = global_rate or config["global_rate"]
+        self.per_chat_interval = config["per_chat_interval"] if per_chat_interval is None else per_chat_interval
+        self.concurrency = concurrency or config["connection_pool_size"]
+        self.max_attempts = max_attempts or config["max_attempts"]
+        self.retry_base_delay = config["retry_base_delay"] if retry_base_delay is None else retry_base_delay
+        self.retry_max_delay = retry_max_delay or config["retry_max_delay"]
+        self.lease = lease or config["lease"]
+        self.poll_interval = poll_interval or config["poll_interval"]
+        self.dedup_ttl = dedup_ttl or config["dedup_ttl"]
+        self._redis = redis_client
+        self.ready_key = f"{self.key_prefix}:ready"
+        self.delayed_key = f"{self.key_prefix}:delayed"
+        self.inflight_key = f"{self.key_prefix}:inflight"
+        self.dead_key = f"{self.key_prefix}:dead"
+
+        self.pacer: Optional[Pacer] = None
+        self._sending: Optional[asyncio.Semaphore] = None
+        self._local: deque = deque()
+        self._local_dedup = LRUCache(max_size=100_000, ttl=self.dedup_ttl)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._submits = set()
+        self._stopping = False
+        self.queued = 0
+        self.duplicates = 0
+        self.sent = 0
+        self.failed = 0
+        self.blocked = 0
+        self.retries = 0
+        self.flood_waits = 0
+        self.batches = 0
+        self.local_fallbacks = 0
+        self.lost = 0
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = get_redis_connection()
+        return self._redis
+
+    def _dedup_key(self, dedup_key: str) -> str:
+        return f"{self.key_prefix}:dedup:{dedup_key}"
+
+    @staticmethod
+    def _payload(chat_id: int, text: str, dedup_key: Optional[str]) -> str:
+        return json.dumps({
+            "id": uuid.uuid4().hex,
+            "chat_id": chat_id,
+            "text": text,
+            "dedup": dedup_key,
+            "attempts": 0
+        }, ensure_ascii=False)
+
+    def _wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _enqueue_local(self, items: List[Tuple[int, str, Optional[str]]]) -> Dict[str, int]:
+        counts = {"queued": 0, "duplicates": 0}
+        for chat_id, text, dedup_key in items:
+            if dedup_key is not None:
+                if dedup_key in self._local_dedup:
+                    counts["duplicates"] += 1
+                    continue
+                self._local_dedup.set(dedup_key, True)
+            self._local.append(self._payload(chat_id, text, dedup_key))
+            counts["queued"] += 1
+        return counts
+
+    async def enqueue_many(self, items: Iterable[Tuple[int, str, Optional[str]]]) -> Dict[str, int]:
+        """
+        Enfileira várias notificações em duas idas ao Redis.
+
+        Args:
+            items: Trios (chat_id, texto, chave de deduplicação ou None)
+
+        Returns:
+            Contagem de enfileiradas e de duplicadas (ignoradas)
+        """
+        items = list(items)
+        if not items:
+            return {"queued": 0, "duplicates": 0}
+        try:
+            keyed = [item for item in items if item[2] is not None]
+            claimed = []
+            if keyed:
+                pipe = self.async_redis.pipeline()
+                for _, _, dedup_key in keyed:
+                    pipe.set(self._dedup_key(dedup_key), 1, nx=True, ex=self.dedup_ttl)
+                claimed = await pipe.execute()
+            fresh = {}
+            for (_, _, dedup_key), ok in zip(keyed, claimed):
+                fresh.setdefault(dedup_key, ok)
+            payloads = [
+                self._payload(chat_id, text, dedup_key)
+                for chat_id, text, dedup_key in items
+                if dedup_key is None or fresh.pop(dedup_key, None)
+            ]
+            if payloads:
+                await self.async_redis.client.rpush(self.ready_key, *payloads)
+            counts = {"queued": len(payloads), "duplicates": len(items) - len(payloads)}
+        except Exception as e:
+            logger.warning(f"Redis indisponível para a fila de notificações; usando fila local: {e}")
+            self.local_fallbacks += 1
+            counts = self._enqueue_local(items)
+        self.queued += counts["queued"]
+        self.duplicates += counts["duplicates"]
+        if counts["queued"]:
+            self._wake()
+        return counts
+
+    async def enqueue(self, chat_id: int, text: str, dedup_key: Optional[str] = None) -> bool:
+        """
+        Enfileira uma notificação.
+
+        Args:
+            chat_id: Chat de destino (telegram_id do usuário)
+            text: Texto da mensagem
+            dedup_key: Chave de deduplicação (ex.: "alert:12:2024-03")
+
+        Returns:
+            False se a chave de deduplicação já havia sido enfileirada
+        """
+        counts = await self.enqueue_many([(chat_id, text, dedup_key)])
+        return counts["queued"] == 1
+
+    def submit(self, chat_id: int, text: str, dedup_key: Optional[str] = None) -> bool:
+        """
+        Enfileira uma notificação a partir de código síncrono.
+
+        No event loop, agenda o enqueue; em outra thread, entrega ao loop dos
+        workers ou grava direto no Redis pelo cliente síncrono. Sem Redis, só
+        usa a fila em memória se este processo tiver workers para drená-la.
+
+        Returns:
+            False se a notificação é duplicada ou não pôde ser enfileirada
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is not None:
+            task = loop.create_task(self.enqueue(chat_id, text, dedup_key))
+            self._submits.add(task)
+            task.add_done_callback(self._submits.discard)
+            return True
+        if self._loop is not None and self._loop.is_running():
+            asyncio.run_coroutine_threadsafe(self.enqueue(chat_id, text, dedup_key), self._loop)
+            return True
+        try:
+            if dedup_key is not None and not self.redis.set(self._dedup_key(dedup_key), 1, nx=True, ex=self.dedup_ttl):
+                self.duplicates += 1
+                return False
+            self.redis.rpush(self.ready_key, self._payload(chat_id, text, dedup_key))
+            self.queued += 1
+            return True
+        except Exception as e:
+            if not self._tasks:
+                # Ninguém neste processo (ex.: scripts) drenaria a fila local
+                logger.error(f"Redis indisponível para a fila de notificações; notificação para {chat_id} descartada: {e}")
+                self.lost += 1
+                return False
+            logger.warning(f"Redis indisponível para a fila de notificações; usando fila local: {e}")
+            self.local_fallbacks += 1
+            counts = self._enqueue_local([(chat_id, text, dedup_key)])
+            self.queued += counts["queued"]
+            self.duplicates += counts["duplicates"]
+            return counts["queued"] == 1
+
+    async def _claim(self) -> Tuple[List[str], bool]:
+        try:
+            batch = await self.async_redis.script(CLAIM_SCRIPT)(
+                keys=[self.ready_key, self.delayed_key, self.inflight_key],
+                args=[self.batch_size, int(self.lease * 1000)],
+                client=self.async_redis.client
+            )
+            if batch:
+                return [p.decode() if isinstance(p, bytes) else p for p in batch], False
+        except Exception as e:
+            if not self._local:
+                raise
+            logger.warning(f"Redis indisponível para a fila de notificações: {e}")
+        batch = []
+        while self._local and len(batch) < self.batch_size:
+            batch.append(self._local.popleft())
+        return batch, True
+
+    async def _settle(self, outcomes: List[Tuple[str, str, int]], local: bool) -> None:
+        if local:
+            loop = asyncio.get_running_loop()
+            for _, payload, delay in outcomes:
+                if delay >= 0:
+                    loop.call_later(delay / 1000, self._local.append, payload)
+                elif delay == DEAD:
+                    logger.error(f"Notificação descartada após falha: {payload}")
+            return
+        args = []
+        for claimed, payload, delay in outcomes:
+            args.extend((claimed, payload, delay))
+        await self.async_redis.script(SETTLE_SCRIPT)(
+            keys=[self.inflight_key, self.delayed_key, self.dead_key],
+            args=args,
+            client=self.async_redis.client
+        )
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.retry_base_delay * 2 ** attempts, self.retry_max_delay)
+        return delay * random.uniform(0.5, 1.5)
+
+    async def _deliver(self, claimed: str) -> Tuple[str, str, int]:
+        message = json.loads(claimed)
+        chat_id = message["chat_id"]
+        try:
+            # Não passa do pool HTTP: requisições além dele só esperam na fila do httpx
+            async with self._sending:
+                await self.pacer.wait(chat_id)
+                await self.bot.send_message(chat_id=chat_id, text=message["text"])
+            self.sent += 1
+            logger.debug(f"Notificação enviada para {chat_id}")
+            return claimed, "", DONE
+        except RetryAfter as e:
+            wait = retry_after_seconds(e)
+            self.flood_waits += 1
+            self.pacer.pause(wait)
+            logger.warning(f"Flood control do Telegram: pausando notificações por {wait:g}s")
+            error, delay = e, wait + random.uniform(0, self.retry_base_delay)
+        except Forbidden:
+            # Usuário bloqueou o bot ou removeu o chat
+            self.blocked += 1
+            return claimed, "", DONE
+        except BadRequest as e:
+            error, delay = e, None
+        except NetworkError as e:
+            error, delay = e, self._backoff(message["attempts"])
+        except Exception as e:
+            error, delay = e, None
+
+        message["attempts"] += 1
+        message["error"] = str(error)
+        if delay is None or message["attempts"] >= self.max_attempts:
+            self.failed += 1
+            logger.error(f"Erro ao enviar notificação para {chat_id} após {message['attempts']} tentativa(s): {error}")
+            return claimed, json.dumps(message, ensure_ascii=False), DEAD
+        self.retries += 1
+        return claimed, json.dumps(message, ensure_ascii=False), int(delay * 1000)
+
+    async def process_batch(self) -> int:
+        """
+        Reivindica, envia e conclui um lote de notificações.
+
+        Returns:
+            Número de notificações processadas (0 se a fila estava vazia)
+        """
+        if self.bot is None:
+            self.bot = get_bot()
+        if self.pacer is None:
+            self.pacer = Pacer(self.global_rate, self.per_chat_interval)
+            self._sending = asyncio.Semaphore(self.concurrency)
+        batch, local = await self._claim()
+        if not batch:
+            return 0
+        outcomes = await asyncio.gather(*(self._deliver(claimed) for claimed in batch))
+        await self._settle(outcomes, local)
+        self.batches += 1
+        return len(batch)
+
+    async def _worker(self) -> None:
+        while not self._stopping:
+            self._wakeup.clear()
+            try:
+                processed = await self.process_batch()
+            except Exception as e:
+                logger.error(f"Erro no worker de notificações: {e}")
+                processed = 0
+            if not processed and not self._stopping:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def start(self, bot=None) -> None:
+        """
+        Inicia os workers no event loop atual.
+
+        Args:
+            bot: Bot usado nos envios (ex.: application.bot; padrão: get_bot())
+        """
+        if self._tasks:
+            return
+        self.bot = bot or self.bot or get_bot()
+        self.pacer = Pacer(self.global_rate, self.per_chat_interval)
+        self._sending = asyncio.Semaphore(self.concurrency)
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Fila de notificações iniciada com {self.workers} workers")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        Para os workers, esperando os lotes em andamento até `timeout` segundos.
+
+        Lotes interrompidos voltam à fila quando o lease vence.
+        """
+        if self._submits:
+            await asyncio.gather(*self._submits, return_exceptions=True)
+        self._stopping = True
+        self._wake()
+        tasks, self._tasks = self._tasks, []
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        self._loop = None
+        self._wakeup = None
+
+    async def backlog(self) -> Dict[str, int]:
+        """
+        Tamanho das filas no Redis (prontas, agendadas, em envio e mortas).
+        """
+        ready, delayed, inflight, dead = await self.async_redis.execute_many([
+            ("llen", [self.ready_key]),
+            ("zcard", [self.delayed_key]),
+            ("zcard", [self.inflight_key]),
+            ("llen", [self.dead_key])
+        ])
+        return {"ready": ready, "delayed": delayed, "inflight": inflight, "dead": dead, "local": len(self._local)}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self.queued,
+            "duplicates": self.duplicates,
+            "sent": self.sent,
+            "failed": self.failed,
+            "blocked": self.blocked,
+            "retries": self.retries,
+            "flood_waits": self.flood_waits,
+            "batches": self.batches,
+            "local_fallbacks": self.local_fallbacks,
+            "lost": self.lost,
+            "workers": len(self._tasks),
+            "concurrency": self.concurrency
+        }
+
+# Instância global da fila de notificações
+notification_outbox = NotificationOutbox()
+
+def send_telegram_notification(telegram_id: int, message: str, dedup_key: Optional[str] = None) -> bool:
+    """
+    Enfileira uma notificação (pode ser chamada de código síncrono).
+    """
+    return notification_outbox.submit(telegram_id, message, dedup_key)
+
+async def send_telegram_notification_async(telegram_id: int, message: str, dedup_key: Optional[str] = None) -> bool:
+    """
+    Enfileira uma notificação; o envio é feito pelos workers da fila.
+    """
+    return await notification_outbox.enqueue(telegram_id, message, dedup_key)
@@ -1,12 +1,12 @@
 import pytesseract
-from PIL import Image
-import io
-import re
 from typing import Dict, Optional, Tuple
 import logging
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
 from app.core.config import settings
+from app.services.image_preprocessing import image_preprocessor
+from app.services.ocr_pool import ocr_pool
+from app.services.receipt_parser import parse_receipt
 
 logger = logging.getLogger('julliuz_bot')
 
@@ -28,52 +28,54 @@ def process_image(image_data: bytes) -> Dict[str, str]:
         # Configura o caminho do Tesseract
         pytesseract.pytesseract.tesseract_cmd = settings.TESSERACT_CMD
         
-        # Abre a imagem
-        image = Image.open(io.BytesIO(image_data))
+        # Abre a imagem e prepara para o OCR (recorte, escala e binarização)
+        image = image_preprocessor.open(image_data)
         
         # Extrai o texto usando OCR
         text = pytesseract.image_to_string(image, lang='por')
         
-        # Extrai as informações usando expressões regulares
-        amount = extract_amount(text)
-        date = extract_date(text)
-        description = extract_description(text)
-        
-        return {
-            'amount': amount,
-            'date': date,
-            'description': description
-        }
+        # Extrai as informações com o motor de extração de comprovantes
+        return extract_fields(text)
     except Exception as e:
         logger.error(f"Erro ao processar imagem: {e}")
         raise
 
+async def process_image_async(image_data: bytes, timeout: Optional[float] = None) -> Dict[str, str]:
+    """
+    Versão assíncrona de `process_image`, executada no pool de processos de OCR.
+    
+    Não bloqueia o event loop: sem retries com sleep, com timeout por job e
+    backpressure quando a fila do pool está cheia (OCRQueueFullError).
+    """
+    text = await ocr_pool.submit(image_data, timeout=timeout)
+    return extract_fields(text)
+
 def extract_amount(text: str) -> str:
     """
     Extrai o valor monetário do texto.
     """
-    # Procura por padrões como R$ 123,45 ou 123,45
-    pattern = r'R?\$?\s*(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)'
-    match = re.search(pattern, text)
-    return match.group(1) if match else ""
+    return parse_receipt(text).amount_text
 
 def extract_date(text: str) -> str:
     """
     Extrai a data do texto.
     """
-    # Procura por padrões como DD/MM/AAAA ou DD/MM/AA
-    pattern = r'\d{2}/\d{2}/(?:\d{4}|\d{2})'
-    match = re.search(pattern, text)
-    return match.group(0) if match else ""
+    return parse_receipt(text).date or ""
 
 def extract_description(text: str) -> str:
     """
     Extrai a descrição do texto.
     """
-    # Remove linhas que contêm valores monetários ou datas
-    lines = text.split('\n')
-    filtered_lines = [
-        line for line in lines
-        if not (re.search(r'R?\$?\s*\d', line) or re.search(r'\d{2}/\d{2}', line))
-    ]
-    return ' '.join(filtered_lines).strip() 
\ No newline at end of file
+    # Linhas sem valores monetários, datas ou outros números
+    return ' '.join(parse_receipt(text).text_lines)
+
+def extract_fields(text: str) -> Dict[str, str]:
+    """
+    Extrai valor, data e descrição com uma única passada sobre o texto.
+    """
+    extraction = parse_receipt(text)
+    return {
+        'amount': extraction.amount_text,
+        'date': extraction.date or "",
+        'description': ' '.join(extraction.text_lines)
+    }
@@ -0,0 +1,186 @@
+import copy
+import hashlib
+import io
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+logger = logging.getLogger('julliuz_bot')
+
+def dhash(image_data: bytes, hash_size: int = 8) -> Optional[str]:
+    """
+    Calcula o hash perceptual (dHash) de uma imagem.
+
+    Reencodes ou recompressões da mesma foto geram o mesmo hash, ao
+    contrário do sha256 dos bytes.
+
+    Args:
+        image_data: Bytes da imagem
+        hash_size: Lado da grade de comparação (hash de hash_size² bits)
+
+    Returns:
+        Hash em hexadecimal ou None se a imagem não puder ser decodificada
+    """
+    try:
+        image = Image.open(io.BytesIO(image_data))
+        # Para JPEG, decodifica direto em resolução reduzida
+        image.draft('L', (hash_size * 8, hash_size * 8))
+        pixels = np.asarray(
+            image.convert('L').resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR),
+            dtype=np.int16
+        )
+    except Exception as e:
+        logger.warning(f"Não foi possível calcular o dHash da imagem: {e}")
+        return None
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    return np.packbits(bits).tobytes().hex()
+
+class OCRCache:
+    """
+    Cache dos resultados de OCR de comprovantes.
+
+    Cada resultado é indexado pelo `file_unique_id` do Telegram (quando
+    disponível), pelo sha256 dos bytes e pelo dHash da imagem, sempre
+    dentro do escopo do usuário: um comprovante nunca é servido a outro
+    usuário. A consulta vai da chave mais barata para a mais cara, então
+    um comprovante reencaminhado é resolvido sem sequer ler a imagem.
+
+    Um hit pelo dHash (64 bits) só é aceito se o dHash fino da imagem
+    (CONFIRM_HASH_SIZE², 1024 bits) também for idêntico; comprovantes
+    diferentes do mesmo modelo costumam colidir no hash curto.
+    """
+    CONFIRM_HASH_SIZE = 32
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl: Optional[int] = None,
+        enabled: Optional[bool] = None,
+        perceptual: Optional[bool] = None
+    ):
+        """
+        Inicializa o cache de OCR.
+
+        Args:
+            max_entries: Número máximo de chaves no LRU
+            ttl: Tempo de vida das entradas em segundos
+            enabled: Liga/desliga o cache
+            perceptual: Usa também o dHash da imagem como chave
+        """
+        config = settings.OCR_CACHE_CONFIG
+        self.enabled = config["enabled"] if enabled is None else enabled
+        self.perceptual = config["perceptual"] if perceptual is None else perceptual
+        self.entries = LRUCache(max_entries or config["max_entries"], ttl or config["ttl"])
+        self.hits: Dict[str, int] = {"file_id": 0, "sha256": 0, "dhash": 0}
+        self.misses = 0
+        self.unconfirmed = 0
+        self.lookup_time = 0.0
+
+    def _keys(self, image_data: Optional[bytes], file_unique_id: Optional[str]) -> List[Tuple[str, Callable[[], Optional[str]]]]:
+        keys = []
+        if file_unique_id:
+            keys.append(("file_id", lambda: file_unique_id))
+        if image_data:
+            keys.append(("sha256", lambda: hashlib.sha256(image_data).hexdigest()))
+            if self.perceptual:
+                keys.append(("dhash", lambda: dhash(image_data)))
+        return keys
+
+    def get(
+        self,
+        image_data: Optional[bytes] = None,
+        file_unique_id: Optional[str] = None,
+        user_id: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Procura um resultado de OCR em cache.
+
+        Args:
+            image_data: Bytes da imagem
+            file_unique_id: `file_unique_id` da foto no Telegram
+            user_id: ID do usuário dono do comprovante
+
+        Returns:
+            Cópia do resultado armazenado ou None
+        """
+        if not self.enabled:
+            return None
+
+        start = time.perf_counter()
+        try:
+            missed = []
+            for kind, compute in self._keys(image_data, file_unique_id):
+                value = compute()
+                if value is None:
+                    continue
+                key = (kind, user_id, value)
+                entry = self.entries.get(key)
+                if entry is not None:
+                    result, confirm = entry
+                    if confirm is not None and dhash(image_data, self.CONFIRM_HASH_SIZE) != confirm:
+                        self.unconfirmed += 1
+                        continue
+                    self.hits[kind] += 1
+                    # Preenche as chaves mais baratas para o próximo reenvio
+                    for missed_key in missed:
+                        self.entries.set(missed_key, (result, None))
+                    return copy.deepcopy(result)
+                missed.append(key)
+            self.misses += 1
+            return None
+        finally:
+            self.lookup_time += time.perf_counter() - start
+
+    def set(
+        self,
+        result: Dict[str, Any],
+        image_data: Optional[bytes] = None,
+        file_unique_id: Optional[str] = None,
+        user_id: Optional[int] = None
+    ) -> None:
+        """
+        Armazena um resultado de OCR em todas as chaves disponíveis.
+
+        Resultados com erro não são armazenados.
+        """
+        if not self.enabled or "error" in result:
+            return
+        stored = copy.deepcopy(result)
+        for kind, compute in self._keys(image_data, file_unique_id):
+            value = compute()
+            if value is None:
+                continue
+            confirm = None
+            if kind == "dhash":
+                confirm = dhash(image_data, self.CONFIRM_HASH_SIZE)
+                if confirm is None:
+                    continue
+            self.entries.set((kind, user_id, value), (stored, confirm))
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Contadores de hit/miss por tipo de chave.
+        """
+        hits = sum(self.hits.values())
+        lookups = hits + self.misses
+        return {
+            "hits": hits,
+            "hits_by_key": dict(self.hits),
+            "misses": self.misses,
+            "unconfirmed": self.unconfirmed,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "lookup_time_avg": self.lookup_time / lookups if lookups else 0.0,
+            "size": len(self.entries)
+        }
+
+# Instância global do cache de OCR
+ocr_cache = OCRCache()
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional, Tuple
+
+import pytesseract
+
+from app.core.config import settings
+from app.services.image_preprocessing import image_preprocessor
+
+logger = logging.getLogger('julliuz_bot')
+
+class OCRQueueFullError(Exception):
+    """Fila do pool de OCR cheia; o chamador deve tentar novamente mais tarde."""
+
+def run_tesseract(image_data: bytes, tesseract_cmd: str, lang: str, timeout: float) -> str:
+    """
+    Executa o Tesseract em um processo do pool.
+
+    O pré-processamento da imagem também roda no worker. O timeout é
+    repassado ao pytesseract, que encerra o processo do Tesseract quando
+    ele estoura, liberando o worker.
+    """
+    pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    image = image_preprocessor.open(image_data)
+    return pytesseract.image_to_string(image, lang=lang, timeout=timeout or 0)
+
+class OCRWorkerPool:
+    """
+    Pool de processos limitado para OCR de comprovantes.
+
+    O event loop do bot apenas aguarda o resultado; o Tesseract roda em
+    processos separados. Um job ocupa uma vaga até o processo terminá-lo,
+    mesmo depois de um timeout. Quando há mais jobs pendentes que `max_pending`,
+    novos envios falham com OCRQueueFullError (ou aguardam uma vaga, se
+    `wait=True`). Se um processo morre (segfault, OOM), o pool quebrado é
+    descartado e o próximo job usa um novo.
+    """
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        timeout: Optional[float] = None,
+        worker: Callable[..., str] = run_tesseract,
+        lang: str = 'por'
+    ):
+        """
+        Inicializa o pool de OCR.
+
+        Args:
+            max_workers: Número de processos (padrão: PERFORMANCE_CONFIG["max_workers"])
+            max_pending: Jobs aceitos ao mesmo tempo, incluindo os em execução
+            timeout: Tempo máximo por job em segundos
+            worker: Função executada nos processos (deve ser importável)
+            lang: Idioma do Tesseract
+        """
+        config = settings.PERFORMANCE_CONFIG
+        self.max_workers = max_workers or config["max_workers"]
+        self.max_pending = max_pending or config.get("ocr_queue_size", self.max_workers * 4)
+        self.timeout = timeout or config["timeout"]
+        self.worker = worker
+        self.lang = lang
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._loop is not loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.max_pending)
+        return self._slots
+
+    async def submit(
+        self,
+        image_data: bytes,
+        timeout: Optional[float] = None,
+        wait: bool = False
+    ) -> str:
+        """
+        Envia uma imagem para OCR e aguarda o texto extraído.
+
+        Args:
+            image_data: Bytes da imagem
+            timeout: Tempo máximo do job (padrão: o do pool)
+            wait: Aguarda uma vaga em vez de falhar quando a fila está cheia
+
+        Returns:
+            Texto reconhecido pelo Tesseract
+
+        Raises:
+            OCRQueueFullError: Fila cheia e `wait=False`
+            asyncio.TimeoutError: O job excedeu o timeout
+        """
+        timeout = timeout or self.timeout
+        slots = self._semaphore()
+        if slots.locked() and not wait:
+            self.rejected += 1
+            raise OCRQueueFullError(f"Fila de OCR cheia ({self.max_pending} jobs pendentes)")
+
+        await slots.acquire()
+        self.pending += 1
+        loop = asyncio.get_running_loop()
+        try:
+            executor, job = self._submit_job(image_data, timeout)
+        except BaseException:
+            self._release(slots)
+            self.failed += 1
+            raise
+        # A vaga só é liberada quando o processo termina o job, mesmo que o
+        # chamador desista antes (timeout ou cancelamento)
+        job.add_done_callback(lambda _: self._release_threadsafe(loop, slots))
+        try:
+            text = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(job)), timeout)
+            self.completed += 1
+            return text
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            job.cancel()
+            logger.warning(f"OCR excedeu o tempo limite de {timeout}s")
+            raise
+        except asyncio.CancelledError:
+            # Só cancela jobs que ainda não começaram a rodar
+            job.cancel()
+            raise
+        except BrokenProcessPool:
+            self.failed += 1
+            self._discard(executor)
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+
+    def _submit_job(self, image_data: bytes, timeout: float) -> Tuple[ProcessPoolExecutor, Future]:
+        args = (self.worker, image_data, settings.TESSERACT_CMD, self.lang, timeout)
+        executor = self.executor
+        try:
+            return executor, executor.submit(*args)
+        except BrokenProcessPool:
+            # Um worker morreu desde o último job: tenta uma vez em um pool novo
+            self._discard(executor)
+            executor = self.executor
+            return executor, executor.submit(*args)
+
+    def _discard(self, executor: ProcessPoolExecutor) -> None:
+        """
+        Descarta um pool quebrado, se ele ainda for o atual.
+        """
+        if executor is self._executor:
+            logger.warning("Pool de OCR quebrado (processo encerrado); um novo será criado")
+            self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _release(self, slots: asyncio.Semaphore) -> None:
+        self.pending -= 1
+        slots.release()
+
+    def _release_threadsafe(self, loop: asyncio.AbstractEventLoop, slots: asyncio.Semaphore) -> None:
+        try:
+            loop.call_soon_threadsafe(self._release, slots)
+        except RuntimeError:
+            # Event loop já encerrado
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out
+        }
+
+    def shutdown(self) -> None:
+        """
+        Encerra os processos do pool, cancelando jobs que ainda não começaram.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+# Instância global do pool de OCR
+ocr_pool = OCRWorkerPool()
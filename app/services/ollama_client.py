@@ -0,0 +1,178 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+import aiohttp
+
+from app.core.config import settings
+
+logger = logging.getLogger('julliuz_bot')
+
+class OllamaError(Exception):
+    """Erro retornado pelo servidor Ollama."""
+
+class OllamaClient:
+    """
+    Cliente HTTP de longa duração para o Ollama.
+
+    Mantém uma única `aiohttp.ClientSession` com pool de conexões keep-alive
+    e limita o número de gerações simultâneas. As respostas de
+    `/api/generate` são consumidas em streaming (NDJSON), permitindo mostrar
+    os tokens ao usuário conforme chegam.
+    """
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        model: Optional[str] = None,
+        config: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Inicializa o cliente.
+
+        Args:
+            base_url: URL do servidor (padrão: settings.OLLAMA_BASE_URL)
+            model: Modelo usado nas gerações (padrão: settings.OLLAMA_MODEL)
+            config: Sobrescreve chaves de settings.OLLAMA_CONFIG
+        """
+        config = {**settings.OLLAMA_CONFIG, **(config or {})}
+        self.base_url = (base_url or settings.OLLAMA_BASE_URL).rstrip('/')
+        self.model = model or settings.OLLAMA_MODEL
+        self.max_connections = config["max_connections"]
+        self.max_concurrency = config["max_concurrency"]
+        self.keepalive_timeout = config["keepalive_timeout"]
+        self.options = dict(config["options"])
+        self.timeout = aiohttp.ClientTimeout(
+            total=config["total_timeout"],
+            sock_connect=config["connect_timeout"],
+            sock_read=config["read_timeout"]
+        )
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.requests = 0
+        self.errors = 0
+        self.active = 0
+        self.first_token_time = 0.0
+        self.prompt_eval_count = 0
+        self.prompt_eval_duration = 0.0
+        self.last_stats: Dict[str, Any] = {}
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.max_connections,
+                    keepalive_timeout=self.keepalive_timeout
+                ),
+                timeout=self.timeout
+            )
+        return self._session
+
+    async def stream(
+        self,
+        prompt: str,
+        options: Optional[Dict[str, Any]] = None,
+        stats: Optional[Dict[str, Any]] = None,
+        **payload: Any
+    ) -> AsyncIterator[str]:
+        """
+        Gera uma resposta em streaming.
+
+        Args:
+            prompt: Prompt enviado ao modelo
+            options: Opções do modelo (mescladas com as padrão)
+            stats: Dicionário preenchido com o último chunk (context, prompt_eval_count...)
+            **payload: Campos extras do corpo de /api/generate (ex.: system, context)
+
+        Yields:
+            Trechos de texto conforme o modelo os gera
+
+        Raises:
+            OllamaError: O servidor respondeu com erro
+            aiohttp.ClientError / asyncio.TimeoutError: Falha de rede ou timeout
+        """
+        session = self._ensure_session()
+        body = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": True,
+            "options": {**self.options, **(options or {})},
+            **payload
+        }
+
+        async with self._slots:
+            self.active += 1
+            self.requests += 1
+            start = time.perf_counter()
+            first_token = True
+            try:
+                async with session.post(f"{self.base_url}/api/generate", json=body) as response:
+                    if response.status != 200:
+                        raise OllamaError(f"HTTP {response.status}: {await response.text()}")
+                    async for line in response.content:
+                        if not line.strip():
+                            continue
+                        chunk = json.loads(line)
+                        if "error" in chunk:
+                            raise OllamaError(chunk["error"])
+                        if chunk.get("done"):
+                            self._record(chunk, stats)
+                        text = chunk.get("response")
+                        if text:
+                            if first_token:
+                                self.first_token_time += time.perf_counter() - start
+                                first_token = False
+                            yield text
+                        if chunk.get("done"):
+                            break
+            except Exception:
+                self.errors += 1
+                raise
+            finally:
+                self.active -= 1
+
+    def _record(self, final_chunk: Dict[str, Any], stats: Optional[Dict[str, Any]]) -> None:
+        self.last_stats = {k: v for k, v in final_chunk.items() if k != "response"}
+        self.prompt_eval_count += final_chunk.get("prompt_eval_count", 0)
+        self.prompt_eval_duration += final_chunk.get("prompt_eval_duration", 0) / 1e9
+        if stats is not None:
+            stats.update(self.last_stats)
+
+    async def generate(
+        self,
+        prompt: str,
+        options: Optional[Dict[str, Any]] = None,
+        stats: Optional[Dict[str, Any]] = None,
+        **payload: Any
+    ) -> str:
+        """
+        Gera uma resposta completa (consumindo o streaming internamente).
+        """
+        return "".join([chunk async for chunk in self.stream(prompt, options, stats, **payload)])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "active": self.active,
+            "max_concurrency": self.max_concurrency,
+            "avg_time_to_first_token": self.first_token_time / self.requests if self.requests else 0.0,
+            "prompt_eval_tokens": self.prompt_eval_count,
+            "prompt_eval_seconds": self.prompt_eval_duration
+        }
+
+    async def close(self) -> None:
+        """
+        Fecha a sessão HTTP e as conexões do pool.
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+# Instância global do cliente Ollama
+ollama_client = OllamaClient()
@@ -1,5 +1,8 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.db.models import UserPreference
+from app.services import user_cache  # noqa: F401
 from typing import Optional, Dict, Any
 
 def get_user_preferences(db: Session, user_id: int) -> Optional[UserPreference]:
@@ -13,7 +16,8 @@ def create_user_preferences(
     language: str = "pt-BR",
     notifications_enabled: bool = True,
     dark_mode: bool = False,
-    chart_preferences: Dict[str, Any] = None
+    chart_preferences: Dict[str, Any] = None,
+    ai_cache_enabled: bool = True
 ) -> UserPreference:
     preferences = UserPreference(
         user_id=user_id,
@@ -22,7 +26,8 @@ def create_user_preferences(
         language=language,
         notifications_enabled=notifications_enabled,
         dark_mode=dark_mode,
-        chart_preferences=chart_preferences or {"type": "bar", "period": "month"}
+        chart_preferences=chart_preferences or {"type": "bar", "period": "month"},
+        ai_cache_enabled=ai_cache_enabled
     )
     db.add(preferences)
     db.commit()
@@ -37,7 +42,8 @@ def update_user_preferences(
     language: Optional[str] = None,
     notifications_enabled: Optional[bool] = None,
     dark_mode: Optional[bool] = None,
-    chart_preferences: Optional[Dict[str, Any]] = None
+    chart_preferences: Optional[Dict[str, Any]] = None,
+    ai_cache_enabled: Optional[bool] = None
 ) -> Optional[UserPreference]:
     preferences = get_user_preferences(db, user_id)
     
@@ -50,7 +56,8 @@ def update_user_preferences(
             language or "pt-BR",
             notifications_enabled or True,
             dark_mode or False,
-            chart_preferences
+            chart_preferences,
+            True if ai_cache_enabled is None else ai_cache_enabled
         )
     
     if currency is not None:
@@ -65,7 +72,84 @@ def update_user_preferences(
         preferences.dark_mode = dark_mode
     if chart_preferences is not None:
         preferences.chart_preferences = chart_preferences
+    if ai_cache_enabled is not None:
+        preferences.ai_cache_enabled = ai_cache_enabled
     
     db.commit()
     db.refresh(preferences)
-    return preferences 
\ No newline at end of file
+    return preferences
+
+async def get_user_preferences_async(db: AsyncSession, user_id: int) -> Optional[UserPreference]:
+    result = await db.execute(select(UserPreference).where(UserPreference.user_id == user_id))
+    return result.scalars().first()
+
+async def create_user_preferences_async(
+    db: AsyncSession,
+    user_id: int,
+    currency: str = "R$",
+    date_format: str = "DD/MM/YYYY",
+    language: str = "pt-BR",
+    notifications_enabled: bool = True,
+    dark_mode: bool = False,
+    chart_preferences: Dict[str, Any] = None,
+    ai_cache_enabled: bool = True
+) -> UserPreference:
+    preferences = UserPreference(
+        user_id=user_id,
+        currency=currency,
+        date_format=date_format,
+        language=language,
+        notifications_enabled=notifications_enabled,
+        dark_mode=dark_mode,
+        chart_preferences=chart_preferences or {"type": "bar", "period": "month"},
+        ai_cache_enabled=ai_cache_enabled
+    )
+    db.add(preferences)
+    await db.commit()
+    await db.refresh(preferences)
+    return preferences
+
+async def update_user_preferences_async(
+    db: AsyncSession,
+    user_id: int,
+    currency: Optional[str] = None,
+    date_format: Optional[str] = None,
+    language: Optional[str] = None,
+    notifications_enabled: Optional[bool] = None,
+    dark_mode: Optional[bool] = None,
+    chart_preferences: Optional[Dict[str, Any]] = None,
+    ai_cache_enabled: Optional[bool] = None
+) -> Optional[UserPreference]:
+    preferences = await get_user_preferences_async(db, user_id)
+    
+    if not preferences:
+        return await create_user_preferences_async(
+            db,
+            user_id,
+            currency or "R$",
+            date_format or "DD/MM/YYYY",
+            language or "pt-BR",
+            notifications_enabled or True,
+            dark_mode or False,
+            chart_preferences,
+            True if ai_cache_enabled is None else ai_cache_enabled
+        )
+    
+    if currency is not None:
+        preferences.currency = currency
+    if date_format is not None:
+        preferences.date_format = date_format
+    if language is not None:
+        preferences.language = language
+    if notifications_enabled is not None:
+        preferences.notifications_enabled = notifications_enabled
+    if dark_mode is not None:
+        preferences.dark_mode = dark_mode
+    if chart_preferences is not None:
+        preferences.chart_preferences = chart_preferences
+    if ai_cache_enabled is not None:
+        preferences.ai_cache_enabled = ai_cache_enabled
+    
+    await db.commit()
+    await db.refresh(preferences)
+    return preferences
@@ -1,107 +1,546 @@
-from typing import Optional
+import asyncio
+import logging
+import threading
+import time
+from array import array
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-from app.core.redis import get_redis
-import logging
+from app.core.config import settings
+from app.services.redis_client import AsyncRedisClient, async_redis, get_redis_connection
 
 logger = logging.getLogger("julliuz_bot")
 
+MODES = ("sliding_window", "token_bucket")
+
+# Janela deslizante (log): um ZSET com o instante, em ms, de cada requisição
+# aceita. Remove o que saiu da janela, conta e registra — tudo no servidor.
+# Retorna {permitido, restantes, ms até zerar a janela, ms até a próxima vaga}.
+SLIDING_WINDOW_SCRIPT = """
+local key = KEYS[1]
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+local count = redis.call('ZCARD', key)
+local allowed = 0
+local retry = 0
+
+if cost > 0 and count + cost <= limit then
+    for i = 1, cost do
+        redis.call('ZADD', key, now, now .. ':' .. (count + i))
+    end
+    redis.call('PEXPIRE', key, window)
+    count = count + cost
+    allowed = 1
+elseif cost > limit then
+    retry = -1
+elseif cost > 0 then
+    -- A vaga abre quando a (count + cost - limit)-ésima entrada mais antiga expira
+    local entry = redis.call('ZRANGE', key, count + cost - limit - 1, count + cost - limit - 1, 'WITHSCORES')
+    retry = tonumber(entry[2]) + window - now
+end
+
+local reset = 0
+if count > 0 then
+    local newest = redis.call('ZRANGE', key, -1, -1, 'WITHSCORES')
+    reset = tonumber(newest[2]) + window - now
+end
+return {allowed, limit - count, reset, retry}
+"""
+
+# Balde de fichas: um HASH com as fichas restantes e o instante da última
+# atualização; o balde é reabastecido continuamente à taxa limit/window.
+TOKEN_BUCKET_SCRIPT = """
+local key = KEYS[1]
+local capacity = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local rate = capacity / window
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local state = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local retry = 0
+if cost > capacity then
+    retry = -1
+elseif cost > 0 and tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+elseif cost > 0 then
+    retry = math.ceil((cost - tokens) / rate)
+end
+
+if cost > 0 then
+    redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', now)
+    redis.call('PEXPIRE', key, window)
+end
+return {allowed, math.floor(tokens), math.ceil((capacity - tokens) / rate), retry}
+"""
+
+@dataclass
+class RateLimitResult:
+    """
+    Resultado de uma verificação de rate limit.
+
+    reset_after é o tempo, em segundos, até o limite estar totalmente
+    disponível de novo; retry_after é o tempo até a próxima requisição ser
+    aceita (0 se esta foi aceita, -1 se o custo excede o limite).
+    """
+    allowed: bool
+    remaining: int
+    reset_after: float
+    retry_after: float
+
 class RateLimiter:
     """
-    Classe para gerenciar rate limiting usando Redis.
+    Rate limiter atômico no Redis.
+
+    Cada verificação executa um único script Lua no servidor (uma ida e
+    volta), que decide, registra e devolve permitido/restantes/reset, sem a
+    corrida entre leitura e escrita de implementações com GET + INCR. Suporta
+    janela deslizante (log de requisições) e balde de fichas.
     """
     def __init__(
         self,
         key_prefix: str,
         max_requests: int,
-        time_window: int
+        time_window: float,
+        mode: Optional[str] = None,
+        redis_client=None,
+        async_client: Optional[AsyncRedisClient] = None
     ):
         """
         Inicializa o rate limiter.
-        
+
         Args:
             key_prefix: Prefixo para as chaves no Redis
             max_requests: Número máximo de requisições permitidas
             time_window: Janela de tempo em segundos
+            mode: "sliding_window" ou "token_bucket" (padrão: SECURITY_CONFIG)
+            redis_client: Cliente Redis síncrono (padrão: get_redis_connection())
+            async_client: Fachada assíncrona (padrão: async_redis)
         """
-        self.redis = get_redis()
         self.key_prefix = key_prefix
         self.max_requests = max_requests
         self.time_window = time_window
+        self.mode = mode or settings.SECURITY_CONFIG["rate_limit"]["mode"]
+        if self.mode not in MODES:
+            raise ValueError(f"Modo de rate limit inválido: {self.mode}")
+        self._window_ms = max(1, int(time_window * 1000))
+        self._redis = redis_client
+        self.async_redis = async_client or async_redis
+        self._script = None
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = get_redis_connection()
+        return self._redis
+
+    @property
+    def source(self) -> str:
+        return SLIDING_WINDOW_SCRIPT if self.mode == "sliding_window" else TOKEN_BUCKET_SCRIPT
+
+    @property
+    def script(self):
+        if self._script is None:
+            # register_script usa EVALSHA e reenvia o código se o cache do servidor não o tiver
+            self._script = self.redis.register_script(self.source)
+        return self._script
+
+    def _key(self, identifier) -> str:
+        return f"rate_limit:{self.mode}:{self.key_prefix}:{identifier}"
+
+    @staticmethod
+    def _result(raw) -> RateLimitResult:
+        allowed, remaining, reset_ms, retry_ms = raw
+        return RateLimitResult(
+            allowed=bool(allowed),
+            remaining=max(0, int(remaining)),
+            reset_after=int(reset_ms) / 1000,
+            retry_after=int(retry_ms) / 1000 if retry_ms >= 0 else -1.0
+        )
+
+    def check(self, identifier, cost: int = 1) -> RateLimitResult:
+        """
+        Consome `cost` requisições do limite do identificador, se houver.
+
+        Args:
+            identifier: ID do usuário (ou outra chave)
+            cost: Requisições consumidas; 0 apenas consulta o estado
+
+        Returns:
+            RateLimitResult (em caso de erro no Redis, a requisição é permitida)
+        """
+        try:
+            return self._result(self.script(
+                keys=[self._key(identifier)],
+                args=[self.max_requests, self._window_ms, cost]
+            ))
+        except Exception as e:
+            logger.error(f"Erro ao verificar rate limit: {e}")
+            return RateLimitResult(True, self.max_requests, 0.0, 0.0)
+
+    def check_many(self, items: Iterable[Tuple[Any, int]]) -> List[RateLimitResult]:
+        """
+        Verifica vários identificadores em um único pipeline.
+
+        Args:
+            items: Pares (identificador, custo)
+
+        Returns:
+            Um RateLimitResult por item, na mesma ordem
+
+        Raises:
+            redis.RedisError: Ao contrário de `check`, erros do Redis são propagados
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        for identifier, cost in items:
+            self.script(keys=[self._key(identifier)], args=[self.max_requests, self._window_ms, cost], client=pipe)
+        return [self._result(raw) for raw in pipe.execute()]
+
+    async def check_async(self, identifier, cost: int = 1) -> RateLimitResult:
+        """
+        Versão assíncrona de `check`, usando a fachada compartilhada.
+        """
+        try:
+            return self._result(await self.async_redis.script(self.source)(
+                keys=[self._key(identifier)],
+                args=[self.max_requests, self._window_ms, cost],
+                client=self.async_redis.client
+            ))
+        except Exception as e:
+            logger.error(f"Erro ao verificar rate limit: {e}")
+            return RateLimitResult(True, self.max_requests, 0.0, 0.0)
+
+    async def check_many_async(self, items: Iterable[Tuple[Any, int]]) -> List[RateLimitResult]:
+        """
+        Versão assíncrona de `check_many` (erros do Redis são propagados).
+        """
+        script = self.async_redis.script(self.source)
+        pipe = self.async_redis.pipeline()
+        for identifier, cost in items:
+            await script(keys=[self._key(identifier)], args=[self.max_requests, self._window_ms, cost], client=pipe)
+        return [self._result(raw) for raw in await pipe.execute()]
 
     def is_allowed(self, user_id: int) -> bool:
         """
         Verifica se o usuário pode fazer uma nova requisição.
-        
+
         Args:
             user_id: ID do usuário
-            
+
         Returns:
             True se a requisição é permitida, False caso contrário
         """
-        try:
-            key = f"{self.key_prefix}:{user_id}"
-            
-            # Obtém o número de requisições
-            count = self.redis.get(key)
-            if count is None:
-                # Primeira requisição
-                self.redis.setex(key, self.time_window, 1)
-                return True
-            
-            count = int(count)
-            if count >= self.max_requests:
-                return False
-            
-            # Incrementa o contador
-            self.redis.incr(key)
-            return True
-            
-        except Exception as e:
-            logger.error(f"Erro ao verificar rate limit: {e}")
-            return True  # Em caso de erro, permite a requisição
+        return self.check(user_id).allowed
 
     def get_remaining(self, user_id: int) -> int:
         """
         Obtém o número de requisições restantes.
-        
+
         Args:
             user_id: ID do usuário
-            
+
         Returns:
             Número de requisições restantes
         """
-        try:
-            key = f"{self.key_prefix}:{user_id}"
-            count = self.redis.get(key)
-            if count is None:
-                return self.max_requests
-            return max(0, self.max_requests - int(count))
-        except Exception as e:
-            logger.error(f"Erro ao obter requisições restantes: {e}")
-            return self.max_requests
+        return self.check(user_id, cost=0).remaining
 
     def get_reset_time(self, user_id: int) -> Optional[datetime]:
         """
         Obtém o tempo até o reset do rate limit.
-        
+
         Args:
             user_id: ID do usuário
-            
+
         Returns:
             Data e hora do reset ou None se não houver limite
         """
+        result = self.check(user_id, cost=0)
+        if result.reset_after <= 0:
+            return None
+        return datetime.now() + timedelta(seconds=result.reset_after)
+
+class LocalTokenBuckets:
+    """
+    Baldes de fichas em memória, um por identificador.
+
+    O estado fica em arrays compactos (fichas, instante do último
+    reabastecimento e consumo ainda não sincronizado: 16 bytes por
+    identificador), indexados por um dicionário identificador → posição.
+    Ao atingir o limite de identificadores, descarta os baldes cheios (que
+    equivalem a não ter estado) e, se não bastar, os parados há mais tempo.
+    """
+    def __init__(self, capacity: int, time_window: float, max_keys: int):
+        """
+        Inicializa os baldes.
+
+        Args:
+            capacity: Fichas de um balde cheio (requisições permitidas em rajada)
+            time_window: Tempo, em segundos, para reabastecer um balde vazio
+            max_keys: Número máximo de identificadores acompanhados
+        """
+        self.capacity = float(capacity)
+        self.rate = capacity / time_window
+        self.max_keys = max_keys
+        self._slots: Dict[Any, int] = {}
+        self._keys: List[Any] = []
+        self._free: List[int] = []
+        self._tokens = array('f')
+        self._updated = array('d')
+        self._pending = array('I')
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def _slot(self, key: Any, now: float) -> int:
+        slot = self._slots.get(key)
+        if slot is not None:
+            return slot
+        if len(self._slots) >= self.max_keys:
+            self._evict(now)
+        if self._free:
+            slot = self._free.pop()
+            self._keys[slot] = key
+            self._tokens[slot] = self.capacity
+            self._updated[slot] = now
+            self._pending[slot] = 0
+        else:
+            slot = len(self._keys)
+            self._keys.append(key)
+            self._tokens.append(self.capacity)
+            self._updated.append(now)
+            self._pending.append(0)
+        self._slots[key] = slot
+        return slot
+
+    def _evict(self, now: float) -> None:
+        # Libera ao menos 10% das posições para não varrer tudo a cada novo identificador
+        target = max(1, self.max_keys // 10)
+        victims = [
+            key for key, slot in self._slots.items()
+            if self._pending[slot] == 0
+            and self._tokens[slot] + (now - self._updated[slot]) * self.rate >= self.capacity
+        ]
+        if len(victims) < target:
+            chosen = set(victims)
+            idle = sorted(
+                (key for key in self._slots if key not in chosen),
+                key=lambda key: self._updated[self._slots[key]]
+            )
+            victims.extend(idle[:target - len(victims)])
+        for key in victims:
+            slot = self._slots.pop(key)
+            self._keys[slot] = None
+            self._free.append(slot)
+        self.evictions += len(victims)
+
+    def consume(self, key: Any, cost: int = 1) -> Tuple[bool, float]:
+        """
+        Consome fichas do balde do identificador, se houver.
+
+        Returns:
+            (permitido, fichas restantes)
+        """
+        now = time.monotonic()
+        with self._lock:
+            slot = self._slot(key, now)
+            tokens = min(self.capacity, self._tokens[slot] + (now - self._updated[slot]) * self.rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+                self._pending[slot] += cost
+            self._tokens[slot] = tokens
+            self._updated[slot] = now
+            return allowed, tokens
+
+    def drain_pending(self) -> List[Tuple[Any, int]]:
+        """
+        Retira o consumo acumulado desde a última sincronização.
+        """
+        with self._lock:
+            pending = []
+            for key, slot in self._slots.items():
+                if self._pending[slot]:
+                    pending.append((key, self._pending[slot]))
+                    self._pending[slot] = 0
+            return pending
+
+    def clamp(self, key: Any, remaining: int) -> None:
+        """
+        Limita o balde ao que resta no limite global (descontando o consumo
+        local ocorrido desde que o lote foi enviado).
+        """
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is not None:
+                self._tokens[slot] = min(self._tokens[slot], max(0, remaining - self._pending[slot]))
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+class TwoTierRateLimiter:
+    """
+    Rate limiter em dois níveis.
+
+    Cada requisição é decidida por um balde de fichas local, sem ida ao
+    Redis. Em segundo plano, o consumo acumulado é enviado ao Redis em lotes
+    (um pipeline do script de balde de fichas) e as fichas restantes no
+    limite global ajustam os baldes locais, mantendo os processos
+    coordenados. Sem Redis, o limite continua valendo localmente.
+    """
+    def __init__(
+        self,
+        key_prefix: str,
+        max_requests: int,
+        time_window: float,
+        redis_limiter: Optional[RateLimiter] = None,
+        sync_interval: Optional[float] = None,
+        max_keys: Optional[int] = None
+    ):
+        """
+        Inicializa o rate limiter.
+
+        Args:
+            key_prefix: Prefixo para as chaves no Redis
+            max_requests: Número máximo de requisições permitidas
+            time_window: Janela de tempo em segundos
+            redis_limiter: Limitador global (padrão: RateLimiter em modo token_bucket)
+            sync_interval: Intervalo, em segundos, entre sincronizações com o Redis
+            max_keys: Número máximo de identificadores nos baldes locais
+        """
+        config = settings.SECURITY_CONFIG["rate_limit"]
+        self.key_prefix = key_prefix
+        self.max_requests = max_requests
+        self.time_window = time_window
+        self.remote = redis_limiter or RateLimiter(key_prefix, max_requests, time_window, mode="token_bucket")
+        self.local = LocalTokenBuckets(max_requests, time_window, max_keys or config["local_max_keys"])
+        self.sync_interval = sync_interval or config["sync_interval"]
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.redis_available = True
+        self.decisions = 0
+        self.denied = 0
+        self.syncs = 0
+        self.sync_errors = 0
+
+    def _ensure_sync_task(self) -> None:
         try:
-            key = f"{self.key_prefix}:{user_id}"
-            ttl = self.redis.ttl(key)
-            if ttl < 0:
-                return None
-            return datetime.now() + timedelta(seconds=ttl)
-        except Exception as e:
-            logger.error(f"Erro ao obter tempo de reset: {e}")
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._task = loop.create_task(self._run())
+
+    def check(self, identifier, cost: int = 1) -> RateLimitResult:
+        """
+        Consome `cost` requisições do limite do identificador, se houver.
+
+        Args:
+            identifier: ID do usuário (ou outra chave)
+            cost: Requisições consumidas; 0 apenas consulta o estado
+
+        Returns:
+            RateLimitResult
+        """
+        self._ensure_sync_task()
+        allowed, tokens = self.local.consume(identifier, cost)
+        self.decisions += 1
+        if allowed:
+            retry_after = 0.0
+        elif cost > self.max_requests:
+            retry_after = -1.0
+        else:
+            retry_after = (cost - tokens) / self.local.rate
+        if not allowed:
+            self.denied += 1
+        return RateLimitResult(
+            allowed=allowed,
+            remaining=int(tokens),
+            reset_after=(self.local.capacity - tokens) / self.local.rate,
+            retry_after=retry_after
+        )
+
+    def is_allowed(self, user_id: int) -> bool:
+        return self.check(user_id).allowed
+
+    def get_remaining(self, user_id: int) -> int:
+        return self.check(user_id, cost=0).remaining
+
+    def get_reset_time(self, user_id: int) -> Optional[datetime]:
+        result = self.check(user_id, cost=0)
+        if result.reset_after <= 0:
             return None
+        return datetime.now() + timedelta(seconds=result.reset_after)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            await self.sync()
+
+    async def sync(self) -> int:
+        """
+        Envia ao Redis o consumo acumulado e ajusta os baldes locais.
+
+        Returns:
+            Número de identificadores sincronizados
+        """
+        pending = self.local.drain_pending()
+        if not pending:
+            return 0
+        try:
+            results = await self.remote.check_many_async(pending)
+        except Exception as e:
+            self.sync_errors += 1
+            if self.redis_available:
+                logger.warning(f"Redis indisponível para rate limit, aplicando apenas o limite local: {e}")
+            self.redis_available = False
+            return 0
+
+        if not self.redis_available:
+            logger.info("Redis disponível novamente para rate limit")
+        self.redis_available = True
+        self.syncs += 1
+        for (identifier, _), result in zip(pending, results):
+            self.local.clamp(identifier, result.remaining)
+        return len(pending)
+
+    async def close(self) -> None:
+        """
+        Encerra a sincronização periódica, enviando o consumo pendente.
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        await self.sync()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tracked_keys": len(self.local),
+            "decisions": self.decisions,
+            "denied": self.denied,
+            "syncs": self.syncs,
+            "sync_errors": self.sync_errors,
+            "redis_available": self.redis_available,
+            "evictions": self.local.evictions
+        }
 
 # Instâncias de rate limiter para diferentes endpoints
-message_limiter = RateLimiter("message", 30, 60)  # 30 mensagens por minuto
-command_limiter = RateLimiter("command", 60, 60)  # 60 comandos por minuto
-alert_limiter = RateLimiter("alert", 10, 3600)    # 10 alertas por hora 
\ No newline at end of file
+message_limiter = TwoTierRateLimiter("message", 30, 60)  # 30 mensagens por minuto
+command_limiter = TwoTierRateLimiter("command", 60, 60)  # 60 comandos por minuto
+alert_limiter = RateLimiter("alert", 10, 3600)    # 10 alertas por hora
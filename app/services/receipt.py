@@ -1,49 +1,47 @@
+import asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.db.models import Receipt, TransactionCategory
+from app.services.image_preprocessing import image_preprocessor
+from app.services.ocr_cache import ocr_cache
+from app.services.ocr_pool import ocr_pool
+from app.services.receipt_parser import parse_receipt
 from typing import Optional, Dict, Any
 import pytesseract
-from PIL import Image
-import io
-import re
 import json
 
-def process_receipt_image(image_data: bytes) -> Dict[str, Any]:
-    """Processa a imagem do comprovante usando OCR"""
+def process_receipt_image(
+    image_data: bytes,
+    file_unique_id: Optional[str] = None,
+    user_id: Optional[int] = None
+) -> Dict[str, Any]:
+    """Processa a imagem do comprovante usando OCR, reaproveitando resultados em cache do usuário"""
+    cached = ocr_cache.get(image_data, file_unique_id, user_id)
+    if cached is not None:
+        return cached
     try:
-        # Converter bytes para imagem
-        image = Image.open(io.BytesIO(image_data))
+        # Converter bytes para imagem já pré-processada
+        image = image_preprocessor.open(image_data)
         
         # Aplicar OCR
         text = pytesseract.image_to_string(image, lang='por')
         
-        # Extrair informações
-        amount = None
-        date = None
-        description = None
-        
-        # Procurar valor
-        amount_match = re.search(r'R\$\s*(\d+[,.]\d{2})', text)
-        if amount_match:
-            amount = float(amount_match.group(1).replace(',', '.'))
-        
-        # Procurar data
-        date_match = re.search(r'(\d{2}/\d{2}/\d{4})', text)
-        if date_match:
-            date = date_match.group(1)
-        
-        # Procurar descrição
-        description_match = re.search(r'([A-Za-z\s]+)\s*R\$\s*\d+[,.]\d{2}', text)
-        if description_match:
-            description = description_match.group(1).strip()
-        
-        return {
-            "amount": amount,
-            "date": date,
-            "description": description,
-            "raw_text": text
-        }
+        result = parse_receipt_text(text)
     except Exception as e:
         return {"error": str(e)}
+    ocr_cache.set(result, image_data, file_unique_id, user_id)
+    return result
+
+def parse_receipt_text(text: str) -> Dict[str, Any]:
+    """Extrai valor, data e descrição do texto do comprovante"""
+    extraction = parse_receipt(text)
+    return {
+        "amount": extraction.amount,
+        "date": extraction.date,
+        "description": extraction.description,
+        "raw_text": text
+    }
 
 def create_receipt(
     db: Session,
@@ -109,4 +107,91 @@ def delete_receipt(db: Session, receipt_id: int, user_id: int) -> bool:
         db.delete(receipt)
         db.commit()
         return True
-    return False 
\ No newline at end of file
+    return False
+
+async def process_receipt_image_async(
+    image_data: bytes,
+    file_unique_id: Optional[str] = None,
+    timeout: Optional[float] = None,
+    user_id: Optional[int] = None
+) -> Dict[str, Any]:
+    """Executa o OCR do comprovante no pool de processos, fora do event loop"""
+    # sha256/dHash da imagem também ficam fora do event loop
+    cached = await asyncio.to_thread(ocr_cache.get, image_data, file_unique_id, user_id)
+    if cached is not None:
+        return cached
+    try:
+        text = await ocr_pool.submit(image_data, timeout=timeout)
+        result = parse_receipt_text(text)
+    except Exception as e:
+        return {"error": str(e) or type(e).__name__}
+    await asyncio.to_thread(ocr_cache.set, result, image_data, file_unique_id, user_id)
+    return result
+
+async def create_receipt_async(
+    db: AsyncSession,
+    user_id: int,
+    file_id: str,
+    amount: float,
+    category: TransactionCategory,
+    description: str,
+    ocr_data: Dict[str, Any]
+) -> Receipt:
+    receipt = Receipt(
+        user_id=user_id,
+        file_id=file_id,
+        amount=amount,
+        category=category,
+        description=description,
+        ocr_data=ocr_data,
+        is_processed=True
+    )
+    db.add(receipt)
+    await db.commit()
+    await db.refresh(receipt)
+    return receipt
+
+async def get_user_receipts_async(db: AsyncSession, user_id: int) -> list[Receipt]:
+    result = await db.execute(select(Receipt).where(
+        Receipt.user_id == user_id
+    ).order_by(Receipt.date.desc()))
+    return list(result.scalars().all())
+
+async def get_receipt_async(db: AsyncSession, receipt_id: int, user_id: int) -> Optional[Receipt]:
+    result = await db.execute(select(Receipt).where(
+        Receipt.id == receipt_id,
+        Receipt.user_id == user_id
+    ))
+    return result.scalars().first()
+
+async def update_receipt_async(
+    db: AsyncSession,
+    receipt_id: int,
+    user_id: int,
+    amount: Optional[float] = None,
+    category: Optional[TransactionCategory] = None,
+    description: Optional[str] = None
+) -> Optional[Receipt]:
+    receipt = await get_receipt_async(db, receipt_id, user_id)
+    
+    if receipt:
+        if amount is not None:
+            receipt.amount = amount
+        if category is not None:
+            receipt.category = category
+        if description is not None:
+            receipt.description = description
+        
+        await db.commit()
+        await db.refresh(receipt)
+    
+    return receipt
+
+async def delete_receipt_async(db: AsyncSession, receipt_id: int, user_id: int) -> bool:
+    receipt = await get_receipt_async(db, receipt_id, user_id)
+    
+    if receipt:
+        await db.delete(receipt)
+        await db.commit()
+        return True
+    return False
@@ -0,0 +1,120 @@
+import re
+from dataclasses import dataclass, field
+from datetime import date
+from typing import List, Optional, Tuple
+
+# Padrões compilados uma única vez. A alternativa de data vem primeiro para
+# que "12.03.2024" nunca seja lido como valor.
+TOKEN_RE = re.compile(
+    r'(?P<date>\b(?P<day>\d{2})[/.-](?P<month>\d{2})[/.-](?P<year>\d{4}|\d{2})\b)'
+    r'|(?P<amount>(?P<currency>R\$\s*)?(?P<reais>\d{1,3}(?:\.\d{3})+|\d+),(?P<cents>\d{2})\b)'
+    r'|(?P<amount_dot>R\$\s*(?P<reais_dot>\d+)\.(?P<cents_dot>\d{2})\b)'
+)
+TOTAL_RE = re.compile(r'(?<![A-Za-z])(?:VALOR\s+)?TOTAL\b|VALOR\s+(?:PAGO|A\s+PAGAR)', re.IGNORECASE)
+DATE_LABEL_RE = re.compile(r'\b(?:DATA|EMISS[ÃA]O|DT)\b', re.IGNORECASE)
+DIGIT_RE = re.compile(r'\d')
+LABEL_STRIP_RE = re.compile(r'[\s:.\-=*]+$')
+
+@dataclass
+class ReceiptExtraction:
+    """
+    Resultado da extração de um texto de comprovante.
+    """
+    amount: Optional[float] = None
+    amount_text: str = ""
+    date: Optional[str] = None
+    dates: List[str] = field(default_factory=list)
+    description: Optional[str] = None
+    text_lines: List[str] = field(default_factory=list)
+    from_total: bool = False
+
+def parse_brl(reais: str, cents: str) -> float:
+    """
+    Converte as partes de um valor em reais ("1.234", "56") para float.
+    """
+    return int(reais.replace('.', '')) + int(cents) / 100
+
+def _normalize_date(day: str, month: str, year: str) -> Optional[str]:
+    if len(year) == 2:
+        year = f"20{year}"
+    try:
+        return date(int(year), int(month), int(day)).strftime('%d/%m/%Y')
+    except ValueError:
+        return None
+
+def parse_receipt(text: str) -> ReceiptExtraction:
+    """
+    Extrai valor, datas e descrição de um texto de comprovante em uma passada.
+
+    Cada linha é tokenizada uma única vez. O valor escolhido é o da última
+    linha de TOTAL (ou da linha seguinte, quando o valor vem abaixo do
+    rótulo); sem TOTAL, o maior valor com "R$" e, por fim, o maior valor.
+    A data preferida é a de uma linha com rótulo de data; senão, a primeira
+    data válida.
+
+    Args:
+        text: Texto reconhecido pelo OCR
+
+    Returns:
+        ReceiptExtraction com os campos encontrados
+    """
+    result = ReceiptExtraction()
+    total: Optional[Tuple[float, str, str]] = None
+    best_currency: Optional[Tuple[float, str, str]] = None
+    best_any: Optional[Tuple[float, str, str]] = None
+    labeled_date: Optional[str] = None
+    pending_total = False
+
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+
+        has_digit = DIGIT_RE.search(line) is not None
+        line_amounts = []
+        for match in (TOKEN_RE.finditer(line) if has_digit else ()):
+            if match.lastgroup == 'date':
+                normalized = _normalize_date(match['day'], match['month'], match['year'])
+                if normalized:
+                    result.dates.append(normalized)
+                    if labeled_date is None and DATE_LABEL_RE.search(line):
+                        labeled_date = normalized
+            elif match['amount']:
+                value = parse_brl(match['reais'], match['cents'])
+                amount_text = f"{match['reais']},{match['cents']}"
+                label = line[:match.start()]
+                line_amounts.append((value, amount_text, label, bool(match['currency'])))
+            else:
+                value = parse_brl(match['reais_dot'], match['cents_dot'])
+                amount_text = f"{match['reais_dot']},{match['cents_dot']}"
+                line_amounts.append((value, amount_text, line[:match.start()], True))
+
+        is_total = TOTAL_RE.search(line) is not None
+        if line_amounts:
+            value, amount_text, label, _ = line_amounts[-1]
+            if is_total or pending_total:
+                total = (value, amount_text, label)
+            for value, amount_text, label, has_currency in line_amounts:
+                if has_currency and (best_currency is None or value > best_currency[0]):
+                    best_currency = (value, amount_text, label)
+                if best_any is None or value > best_any[0]:
+                    best_any = (value, amount_text, label)
+            pending_total = False
+        else:
+            pending_total = is_total
+
+        if not has_digit:
+            result.text_lines.append(line)
+
+    chosen = total or best_currency or best_any
+    if chosen:
+        result.amount, result.amount_text, label = chosen
+        result.from_total = chosen is total
+        label = LABEL_STRIP_RE.sub('', TOTAL_RE.sub('', label.replace('R$', ''))).strip()
+        if label and not DIGIT_RE.search(label):
+            result.description = label
+    if result.description is None and result.text_lines:
+        result.description = result.text_lines[0]
+
+    result.date = labeled_date or (result.dates[0] if result.dates else None)
+    return result
@@ -1,19 +1,42 @@
+import asyncio
+import threading
+import time
+import weakref
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
 import redis
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+import redis.asyncio as aioredis
 import logging
 
 logger = logging.getLogger('julliuz_bot')
 
-@retry(
-    stop=stop_after_attempt(5),
-    wait=wait_exponential(multiplier=1, min=2, max=10),
-    retry=retry_if_exception_type(redis.exceptions.ConnectionError),
-    reraise=True
-)
+_sync_client: Optional[redis.Redis] = None
+_sync_lock = threading.Lock()
+
+def _pool_kwargs(config: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "max_connections": config["max_connections"],
+        "timeout": config["pool_timeout"],
+        "socket_timeout": config["socket_timeout"],
+        "socket_connect_timeout": config["connect_timeout"],
+        "health_check_interval": config["health_check_interval"]
+    }
+
 def get_redis_connection():
-    from app.core.config import get_settings
-    settings = get_settings()
-    return redis.Redis.from_url(settings.REDIS_URL)
+    """
+    Retorna o cliente Redis síncrono compartilhado pelo processo.
+
+    Todos os serviços usam o mesmo pool limitado; nenhuma conexão é aberta
+    até o primeiro comando.
+    """
+    global _sync_client
+    with _sync_lock:
+        if _sync_client is None:
+            from app.core.config import get_settings
+            settings = get_settings()
+            pool = redis.BlockingConnectionPool.from_url(settings.REDIS_URL, **_pool_kwargs(settings.REDIS_POOL_CONFIG))
+            _sync_client = redis.Redis(connection_pool=pool)
+        return _sync_client
 
 # Exemplo de uso seguro:
 def safe_redis_ping():
@@ -22,4 +45,198 @@ def safe_redis_ping():
         return r.ping()
     except redis.exceptions.ConnectionError as e:
         logger.error(f"Redis indisponível: {e}. Usando fallback/local cache.")
-        return False 
\ No newline at end of file
+        return False
+
+class _TrackedConnectionPool(aioredis.BlockingConnectionPool):
+    """
+    Pool bloqueante que informa à fachada as conexões criadas e em uso.
+    """
+    facade: Optional["AsyncRedisClient"] = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._checked_out = weakref.WeakSet()
+
+    def make_connection(self):
+        if self.facade is not None:
+            self.facade.connections_created += 1
+        return super().make_connection()
+
+    async def get_connection(self, command_name, *keys, **options):
+        connection = await super().get_connection(command_name, *keys, **options)
+        self._checked_out.add(connection)
+        if self.facade is not None:
+            self.facade.connections_in_use += 1
+        return connection
+
+    async def release(self, connection) -> None:
+        # Também chamado pelo pool para conexões que falharam ao conectar
+        if connection in self._checked_out:
+            self._checked_out.discard(connection)
+            if self.facade is not None:
+                self.facade.connections_in_use -= 1
+        await super().release(connection)
+
+class AsyncRedisClient:
+    """
+    Fachada assíncrona do Redis compartilhada pelos serviços.
+
+    Mantém um único pool de conexões limitado por event loop, criado no
+    primeiro uso (nunca na importação); com todas as conexões ocupadas, os
+    chamadores aguardam uma ser devolvida em vez de abrir novas. Oferece
+    pipelines para agrupar comandos em uma ida ao servidor, execução de
+    scripts Lua e um health check com o estado da última verificação.
+    """
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        config: Optional[Dict[str, Any]] = None,
+        client: Optional[aioredis.Redis] = None
+    ):
+        """
+        Inicializa a fachada.
+
+        Args:
+            url: URL do Redis (padrão: settings.REDIS_URL)
+            config: Sobrescreve chaves de settings.REDIS_POOL_CONFIG
+            client: Cliente já construído (ex.: testes); desativa o pool próprio
+        """
+        self.url = url
+        self._config = config or {}
+        self._client = client
+        self._external = client is not None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._scripts: Dict[str, Any] = {}
+        self.healthy: Optional[bool] = None
+        self.last_health_check = 0.0
+        self.latency: Optional[float] = None
+        self.connections_created = 0
+        self.connections_in_use = 0
+        self._closing = set()
+
+    @property
+    def client(self) -> aioredis.Redis:
+        if self._external:
+            return self._client
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._release()
+            from app.core.config import get_settings
+            settings = get_settings()
+            config = {**settings.REDIS_POOL_CONFIG, **self._config}
+            pool = _TrackedConnectionPool.from_url(self.url or settings.REDIS_URL, **_pool_kwargs(config))
+            pool.facade = self
+            self._client = aioredis.Redis(connection_pool=pool)
+            self._loop = loop
+            self._scripts.clear()
+        return self._client
+
+    def _release(self) -> None:
+        """
+        Fecha o pool criado em outro event loop antes de substituí-lo.
+
+        Se aquele loop ainda roda (em outra thread), o pool é fechado nele;
+        se já parou, o pool é desconectado a partir do loop atual e esvaziado.
+        """
+        client, loop = self._client, self._loop
+        self._client = self._loop = None
+        self._scripts.clear()
+        self.connections_created = self.connections_in_use = 0
+        if client is None:
+            return
+        pool = client.connection_pool
+        pool.facade = None
+        if loop is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            return
+        task = asyncio.get_running_loop().create_task(self._disconnect_stale(pool))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _disconnect_stale(pool) -> None:
+        try:
+            await pool.disconnect()
+        except Exception as e:
+            # Os transportes do loop encerrado não conseguem agendar o próprio
+            # fechamento; seus sockets são fechados quando forem coletados
+            logger.debug(f"Pool Redis de um event loop encerrado descartado: {e}")
+        pool.reset()
+
+    def pipeline(self, transaction: bool = False):
+        """
+        Cria um pipeline (os comandos vão ao servidor em uma única ida).
+        """
+        return self.client.pipeline(transaction=transaction)
+
+    async def execute_many(self, commands: Iterable[Tuple[str, Sequence[Any]]]) -> List[Any]:
+        """
+        Executa vários comandos em um único pipeline.
+
+        Args:
+            commands: Pares (nome do comando, argumentos), ex.: ("incr", ["chave"])
+
+        Returns:
+            Respostas na mesma ordem dos comandos
+        """
+        pipe = self.pipeline()
+        for name, args in commands:
+            getattr(pipe, name)(*args)
+        return await pipe.execute()
+
+    def script(self, source: str):
+        """
+        Registra (uma vez por pool) um script Lua executado via EVALSHA.
+        """
+        script = self._scripts.get(source)
+        if script is None:
+            script = self._scripts[source] = self.client.register_script(source)
+        return script
+
+    async def health_check(self, timeout: float = 1.0) -> bool:
+        """
+        Verifica se o Redis responde ao PING dentro do tempo limite.
+        """
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.client.ping(), timeout)
+            healthy = True
+            self.latency = time.perf_counter() - start
+        except Exception as e:
+            healthy = False
+            self.latency = None
+            if self.healthy is not False:
+                logger.warning(f"Redis indisponível: {e}")
+        if healthy and self.healthy is False:
+            logger.info("Redis disponível novamente")
+        self.healthy = healthy
+        self.last_health_check = time.time()
+        return healthy
+
+    def stats(self) -> Dict[str, Any]:
+        pool = None if self._client is None else self._client.connection_pool
+        return {
+            "healthy": self.healthy,
+            "latency": self.latency,
+            "last_health_check": self.last_health_check,
+            "max_connections": getattr(pool, "max_connections", None),
+            "connections_in_use": self.connections_in_use,
+            "connections_idle": self.connections_created - self.connections_in_use
+        }
+
+    async def close(self) -> None:
+        """
+        Fecha o pool de conexões.
+        """
+        if self._client is not None and not self._external:
+            if self._loop is asyncio.get_running_loop():
+                self._client.connection_pool.facade = None
+                await self._client.aclose()
+                self._client = self._loop = None
+                self.connections_created = self.connections_in_use = 0
+            else:
+                self._release()
+        self._scripts.clear()
+
+# Instância global da fachada assíncrona do Redis
+async_redis = AsyncRedisClient()
@@ -0,0 +1,279 @@
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.db.models import FixedBill, User
+from app.services.fanout import MessageFanout
+from app.services.goals import open_goals_query, render_goal_digest
+from app.services.notifications import NotificationOutbox, notification_outbox
+from app.services.redis_client import AsyncRedisClient, async_redis
+
+logger = logging.getLogger('julliuz_bot')
+
+def due_bills_query(day: int, after_user_id: int, limit: int):
+    """
+    Contas ativas a vencer (due_day >= day) dos próximos `limit` usuários
+    ativos com id maior que `after_user_id`, em uma única consulta.
+
+    A paginação é por usuário (keyset em users.id), então as contas de um
+    usuário nunca ficam divididas entre dois lotes.
+    """
+    due = (User.is_active == True, FixedBill.is_active == True, FixedBill.due_day >= day)
+    users = (
+        select(FixedBill.user_id)
+        .join(User, User.id == FixedBill.user_id)
+        .where(*due, FixedBill.user_id > after_user_id)
+        .group_by(FixedBill.user_id)
+        .order_by(FixedBill.user_id)
+        .limit(limit)
+        .subquery()
+    )
+    return (
+        select(User.id, User.telegram_id, User.first_name, FixedBill.name, FixedBill.amount, FixedBill.due_day)
+        .join(users, users.c.user_id == User.id)
+        .join(FixedBill, FixedBill.user_id == User.id)
+        .where(*due)
+        .order_by(User.id, FixedBill.due_day, FixedBill.id)
+    )
+
+def render_bill_reminders(rows) -> List[Tuple[int, int, str]]:
+    """
+    Monta as mensagens de lembrete de um lote de linhas de due_bills_query.
+
+    Returns:
+        Tuplas (user_id, telegram_id, texto), uma por usuário
+    """
+    messages = []
+    for user_id, bills in groupby(rows, key=itemgetter(0)):
+        bills = list(bills)
+        _, telegram_id, first_name = bills[0][:3]
+        total = sum(bill[4] for bill in bills)
+        lines = [
+            f"🚨 Ei, {first_name}! Você tem contas pra vencer!\n\n"
+            f"Total a pagar: R${total:.2f}\n\n"
+            "Detalhes:"
+        ]
+        lines.extend(f"- {name}: R${amount:.2f} (dia {due_day})" for *_, name, amount, due_day in bills)
+        lines.append("\nUse /bills para ver mais detalhes.")
+        messages.append((user_id, telegram_id, "\n".join(lines)))
+    return messages
+
+class ReminderCheckpoint:
+    """
+    Progresso de um job de lembretes no Redis: o último usuário cujo lote
+    foi concluído no dia, ou a marca de job concluído.
+
+    Sem Redis o job roda do início (pode reenviar um lote após reinício).
+    """
+    DONE = "done"
+
+    def __init__(self, name: str, async_client: Optional[AsyncRedisClient] = None, ttl: Optional[int] = None):
+        """
+        Inicializa o checkpoint.
+
+        Args:
+            name: Nome do job (parte da chave)
+            async_client: Fachada assíncrona do Redis (padrão: async_redis)
+            ttl: Tempo de vida da chave, em segundos
+        """
+        self.name = name
+        self.async_redis = async_client or async_redis
+        self.ttl = ttl or settings.REMINDER_CONFIG["checkpoint_ttl"]
+
+    def _key(self, day: date) -> str:
+        return f"reminders:{self.name}:{day.isoformat()}"
+
+    async def load(self, day: date) -> Tuple[int, bool]:
+        """
+        Returns:
+            (último user_id concluído, job do dia já concluído)
+        """
+        try:
+            value = await self.async_redis.client.get(self._key(day))
+        except Exception as e:
+            logger.warning(f"Redis indisponível para checkpoint de lembretes: {e}")
+            return 0, False
+        if value is None:
+            return 0, False
+        value = value.decode() if isinstance(value, bytes) else value
+        if value == self.DONE:
+            return 0, True
+        return int(value), False
+
+    async def _set(self, day: date, value: str) -> None:
+        try:
+            await self.async_redis.client.set(self._key(day), value, ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"Falha ao gravar checkpoint de lembretes: {e}")
+
+    async def save(self, day: date, user_id: int) -> None:
+        await self._set(day, str(user_id))
+
+    async def finish(self, day: date) -> None:
+        await self._set(day, self.DONE)
+
+class ChunkedReminderJob(ABC):
+    """
+    Job de mensagens periódicas a todos os usuários, processado em lotes.
+
+    Percorre os usuários em lotes (uma consulta por lote, buscando o
+    próximo lote enquanto o atual é enviado), monta as mensagens do lote de
+    uma vez e as envia pelo MessageFanout, dentro dos limites do Telegram,
+    ou as enfileira na fila de notificações (com uma chave de deduplicação
+    por usuário e dia, então um lote reprocessado não gera mensagens
+    repetidas). Ao fim de cada lote grava um checkpoint; um job reiniciado
+    no mesmo dia continua do lote seguinte. Subclasses definem `name`,
+    `query` e `render`.
+    """
+    name = ""
+    description = "mensagens"
+
+    def __init__(
+        self,
+        session_factory=None,
+        fanout: Optional[MessageFanout] = None,
+        checkpoint: Optional[ReminderCheckpoint] = None,
+        chunk_size: Optional[int] = None,
+        outbox: Optional[NotificationOutbox] = None
+    ):
+        """
+        Inicializa o job.
+
+        Args:
+            session_factory: Fábrica de AsyncSession (padrão: AsyncSessionLocal)
+            fanout: Envio concorrente das mensagens (padrão: MessageFanout())
+            checkpoint: Progresso do job (padrão: ReminderCheckpoint(name))
+            chunk_size: Usuários por lote
+            outbox: Fila de notificações; se informada, as mensagens são
+                enfileiradas nela em vez de enviadas pelo fanout
+        """
+        self.session_factory = session_factory or AsyncSessionLocal
+        self.fanout = fanout or MessageFanout()
+        self.checkpoint = checkpoint or ReminderCheckpoint(self.name)
+        self.chunk_size = chunk_size or settings.REMINDER_CONFIG["chunk_size"]
+        self.outbox = outbox
+        self.last_run: Dict[str, Any] = {}
+
+    @abstractmethod
+    def query(self, today: date, after_user_id: int, limit: int):
+        """
+        Consulta dos próximos `limit` usuários após `after_user_id`, com o
+        user_id na primeira coluna e as linhas ordenadas por usuário.
+        """
+
+    @abstractmethod
+    def render(self, rows, today: date) -> List[Tuple[int, int, str]]:
+        """
+        Monta as mensagens do lote: tuplas (user_id, telegram_id, texto).
+        """
+
+    async def _fetch(self, today: date, after_user_id: int):
+        async with self.session_factory() as session:
+            result = await session.execute(self.query(today, after_user_id, self.chunk_size))
+            return result.all()
+
+    async def _deliver(self, bot, messages: List[Tuple[int, int, str]], today: date) -> Dict[str, int]:
+        if self.outbox is not None:
+            return await self.outbox.enqueue_many(
+                (chat_id, text, f"{self.name}:{today.isoformat()}:{user_id}") for user_id, chat_id, text in messages
+            )
+        return await self.fanout.send_all(bot, ((chat_id, text) for _, chat_id, text in messages))
+
+    async def run(self, bot, today: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Envia as mensagens do dia, retomando do checkpoint se houver.
+
+        Args:
+            bot: Bot usado para enviar as mensagens
+            today: Dia de referência (padrão: hoje, UTC)
+
+        Returns:
+            Contagem de usuários, mensagens enviadas, falhas e bloqueadas
+            (ou enfileiradas e duplicadas, com a fila de notificações)
+        """
+        today = today or datetime.utcnow().date()
+        after_user_id, done = await self.checkpoint.load(today)
+        summary = {
+            "users": 0, "sent": 0, "failed": 0, "blocked": 0, "queued": 0, "duplicates": 0,
+            "chunks": 0, "resumed_after": after_user_id
+        }
+        if done:
+            logger.info(f"Job de {self.description} de {today} já concluído")
+            return summary
+        if after_user_id:
+            logger.info(f"Retomando {self.description} após o usuário {after_user_id}")
+
+        start = time.perf_counter()
+        rows = await self._fetch(today, after_user_id)
+        while rows:
+            last_user_id = rows[-1][0]
+            # Busca o próximo lote enquanto este é enviado
+            next_rows = asyncio.create_task(self._fetch(today, last_user_id))
+            try:
+                messages = self.render(rows, today)
+                counts = await self._deliver(bot, messages, today)
+            except BaseException:
+                # Deixa a consulta do próximo lote terminar antes de propagar o erro
+                await asyncio.gather(next_rows, return_exceptions=True)
+                raise
+            await self.checkpoint.save(today, last_user_id)
+            summary["users"] += len(messages)
+            summary["chunks"] += 1
+            for name, count in counts.items():
+                summary[name] += count
+            rows = await next_rows
+        await self.checkpoint.finish(today)
+
+        summary["elapsed"] = time.perf_counter() - start
+        self.last_run = summary
+        logger.info(f"Job de {self.description} concluído: {summary}")
+        return summary
+
+    async def resume(self, bot, today: Optional[date] = None) -> Optional[Dict[str, Any]]:
+        """
+        Retoma o job do dia se ele foi interrompido no meio (ex.: reinício do bot).
+        """
+        today = today or datetime.utcnow().date()
+        after_user_id, done = await self.checkpoint.load(today)
+        if done or not after_user_id:
+            return None
+        return await self.run(bot, today)
+
+class BillReminderJob(ChunkedReminderJob):
+    """
+    Job diário de lembretes de contas a vencer.
+    """
+    name = "bills"
+    description = "lembretes de contas"
+
+    def query(self, today: date, after_user_id: int, limit: int):
+        return due_bills_query(today.day, after_user_id, limit)
+
+    def render(self, rows, today: date) -> List[Tuple[int, int, str]]:
+        return render_bill_reminders(rows)
+
+class GoalDigestJob(ChunkedReminderJob):
+    """
+    Job semanal com o progresso das metas em aberto de cada usuário.
+    """
+    name = "goals"
+    description = "resumo de metas"
+
+    def query(self, today: date, after_user_id: int, limit: int):
+        return open_goals_query(after_user_id, limit)
+
+    def render(self, rows, today: date) -> List[Tuple[int, int, str]]:
+        return render_goal_digest(rows, today)
+
+# Instâncias globais dos jobs de mensagens periódicas
+bill_reminder_job = BillReminderJob(outbox=notification_outbox)
+goal_digest_job = GoalDigestJob(outbox=notification_outbox)
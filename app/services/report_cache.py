@@ -0,0 +1,241 @@
+import asyncio
+import copy
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.services.aggregates import register_commit_listener
+from app.services.redis_client import AsyncRedisClient, async_redis, get_redis_connection
+import logging
+
+logger = logging.getLogger("julliuz_bot")
+
+CHART_FIELDS = ("category_chart", "trend_chart")
+
+class ReportCache:
+    """
+    Cache de relatórios de gastos renderizados.
+
+    A chave combina usuário, período, preferências de gráfico, o dia atual
+    e uma versão dos dados do usuário, incrementada a cada commit que altera
+    suas transações. Entradas antigas nunca são servidas: a versão muda e
+    elas expiram pelo TTL (Redis) ou saem pelo LRU (memória).
+    """
+    def __init__(
+        self,
+        redis_client=None,
+        local_max_entries: Optional[int] = None,
+        ttl: Optional[int] = None,
+        enabled: Optional[bool] = None,
+        async_client: Optional[AsyncRedisClient] = None
+    ):
+        """
+        Inicializa o cache de relatórios.
+
+        Args:
+            redis_client: Cliente Redis síncrono (padrão: get_redis_connection())
+            local_max_entries: Tamanho do LRU em memória
+            ttl: Tempo de vida das entradas no Redis, em segundos
+            enabled: Liga/desliga o cache
+            async_client: Fachada assíncrona (padrão: async_redis)
+        """
+        config = settings.REPORT_CACHE_CONFIG
+        self.enabled = config["enabled"] if enabled is None else enabled
+        self.ttl = ttl or config["ttl"]
+        self.local = LRUCache(local_max_entries or config["local_max_entries"], self.ttl)
+        self._redis = redis_client
+        self.async_redis = async_client or async_redis
+        self._bump_tasks = set()
+        self._fallback_versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.hits_local = 0
+        self.hits_redis = 0
+        self.misses = 0
+        self.render_time = 0.0
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = get_redis_connection()
+        return self._redis
+
+    def _version_key(self, user_id: int) -> str:
+        return f"report:version:{user_id}"
+
+    def data_version(self, user_id: int) -> str:
+        """
+        Obtém a versão atual dos dados de um usuário.
+        """
+        fallback = self._fallback_versions.get(user_id, 0)
+        try:
+            version = self.redis.get(self._version_key(user_id))
+            return f"{int(version or 0)}.{fallback}"
+        except Exception as e:
+            logger.warning(f"Redis indisponível para versão de relatório: {e}")
+            return f"local.{fallback}"
+
+    def bump_versions(self, user_ids: Iterable[int]) -> None:
+        """
+        Invalida os relatórios em cache dos usuários informados.
+        """
+        user_ids = set(user_ids)
+        if not user_ids:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is not None:
+            # Commit feito no event loop (ex.: ingestão em lote): não bloqueia no Redis
+            task = loop.create_task(self._bump_versions_async(user_ids))
+            self._bump_tasks.add(task)
+            task.add_done_callback(self._bump_tasks.discard)
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for user_id in user_ids:
+                pipe.incr(self._version_key(user_id))
+            pipe.execute()
+        except Exception as e:
+            self._bump_fallback(user_ids, e)
+
+    async def join(self) -> None:
+        """
+        Aguarda as invalidações agendadas por commits feitos no event loop.
+
+        Caminhos de commit assíncronos devem chamar após o commit, para que
+        uma leitura logo em seguida já veja a nova versão.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            tasks = [task for task in self._bump_tasks if task.get_loop() is loop]
+            if not tasks:
+                return
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _bump_versions_async(self, user_ids: Iterable[int]) -> None:
+        try:
+            await self.async_redis.execute_many(("incr", [self._version_key(user_id)]) for user_id in user_ids)
+        except Exception as e:
+            self._bump_fallback(user_ids, e)
+
+    def _bump_fallback(self, user_ids: Iterable[int], error: Exception) -> None:
+        logger.warning(f"Falha ao invalidar relatórios no Redis, usando versão local: {error}")
+        with self._lock:
+            for user_id in user_ids:
+                self._fallback_versions[user_id] = self._fallback_versions.get(user_id, 0) + 1
+
+    def cache_key(
+        self,
+        user_id: int,
+        period: str,
+        chart_preferences: Optional[Dict[str, Any]],
+        version: str
+    ) -> str:
+        payload = json.dumps(
+            [period, chart_preferences or {}, version, datetime.now().date().isoformat()],
+            sort_keys=True,
+            default=str
+        )
+        return f"report:{user_id}:{hashlib.sha256(payload.encode()).hexdigest()[:32]}"
+
+    def _redis_get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            stored = self.redis.hgetall(key)
+        except Exception as e:
+            logger.warning(f"Erro ao ler relatório do Redis: {e}")
+            return None
+        if not stored:
+            return None
+        stored = {k.decode() if isinstance(k, bytes) else k: v for k, v in stored.items()}
+        report = json.loads(stored["meta"])
+        for field in CHART_FIELDS:
+            report[field] = stored.get(field)
+        return report
+
+    def _redis_set(self, key: str, report: Dict[str, Any]) -> None:
+        meta = {k: v for k, v in report.items() if k not in CHART_FIELDS}
+        mapping = {"meta": json.dumps(meta, default=str)}
+        for field in CHART_FIELDS:
+            if report.get(field) is not None:
+                mapping[field] = report[field]
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hset(key, mapping=mapping)
+            pipe.expire(key, self.ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Erro ao gravar relatório no Redis: {e}")
+
+    def get_or_render(
+        self,
+        user_id: int,
+        period: str,
+        chart_preferences: Optional[Dict[str, Any]],
+        render: Callable[[], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Retorna o relatório em cache ou renderiza e armazena um novo.
+
+        Args:
+            user_id: ID do usuário
+            period: Período do relatório
+            chart_preferences: Preferências de gráfico do usuário
+            render: Função que gera o relatório em caso de miss
+
+        Returns:
+            Cópia do relatório (gráficos em PNG e totais); alterá-la não afeta o cache
+        """
+        if not self.enabled:
+            return render()
+
+        version = self.data_version(user_id)
+        key = self.cache_key(user_id, period, chart_preferences, version)
+
+        report = self.local.get(key)
+        if report is not None:
+            self.hits_local += 1
+            return copy.deepcopy(report)
+
+        if not version.startswith("local."):
+            report = self._redis_get(key)
+            if report is not None:
+                self.hits_redis += 1
+                self.local.set(key, report)
+                return copy.deepcopy(report)
+
+        self.misses += 1
+        start = time.perf_counter()
+        report = render()
+        self.render_time += time.perf_counter() - start
+
+        self.local.set(key, report)
+        if not version.startswith("local."):
+            self._redis_set(key, report)
+        return copy.deepcopy(report)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Contadores de hit, miss e tempo de renderização.
+        """
+        lookups = self.hits_local + self.hits_redis + self.misses
+        return {
+            "hits_local": self.hits_local,
+            "hits_redis": self.hits_redis,
+            "misses": self.misses,
+            "hit_rate": (self.hits_local + self.hits_redis) / lookups if lookups else 0.0,
+            "render_time_total": self.render_time,
+            "render_time_avg": self.render_time / self.misses if self.misses else 0.0,
+            "local": self.local.stats()
+        }
+
+# Instância global do cache de relatórios
+report_cache = ReportCache()
+
+# Invalida os relatórios sempre que as transações de um usuário mudam
+register_commit_listener(lambda deltas: report_cache.bump_versions(key[0] for key in deltas))
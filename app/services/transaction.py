@@ -1,5 +1,7 @@
 from app.db.models import Transaction
-from app.db.database import SessionLocal
+from app.db.database import SessionLocal, AsyncSessionLocal
+# Registra os listeners do agregado de gastos e da invalidação de relatórios
+from app.services import aggregates, alerts, report_cache  # noqa: F401
 
 def add_transaction_to_db(user_id, amount, category, description=None):
     session = SessionLocal()
@@ -16,4 +18,21 @@ def add_transaction_to_db(user_id, amount, category, description=None):
         session.rollback()
         raise e
     finally:
-        session.close()
\ No newline at end of file
+        session.close()
+
+async def add_transaction_to_db_async(user_id, amount, category, description=None):
+    async with AsyncSessionLocal() as session:
+        try:
+            transaction = Transaction(
+                user_id=user_id,
+                amount=amount,
+                category=category,
+                description=description
+            )
+            session.add(transaction)
+            await session.commit()
+            # A invalidação dos relatórios é agendada no commit; aguarda antes de retornar
+            await report_cache.report_cache.join()
+        except Exception as e:
+            await session.rollback()
+            raise e
@@ -1,6 +1,11 @@
 from telegram import User as TelegramUser
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.db.database import AsyncSessionLocal
 from app.db.models import User
+from app.services.preferences import get_user_preferences_async
+from app.services.user_cache import UserIdentity, user_cache
 from datetime import datetime
 
 def get_or_create_user(db: Session, telegram_user: TelegramUser) -> User:
@@ -40,4 +45,65 @@ def deactivate_user(db: Session, telegram_id: int) -> bool:
         db.commit()
         return True
     
-    return False 
\ No newline at end of file
+    return False 
+
+async def get_or_create_user_async(db: AsyncSession, telegram_user: TelegramUser) -> User:
+    result = await db.execute(select(User).where(User.telegram_id == telegram_user.id))
+    user = result.scalars().first()
+    
+    if not user:
+        user = User(
+            telegram_id=telegram_user.id,
+            username=telegram_user.username,
+            first_name=telegram_user.first_name,
+            last_name=telegram_user.last_name,
+            created_at=datetime.utcnow()
+        )
+        db.add(user)
+        await db.commit()
+        await db.refresh(user)
+    
+    return user
+
+async def update_user_async(db: AsyncSession, telegram_user: TelegramUser) -> User:
+    user = await get_or_create_user_async(db, telegram_user)
+    
+    user.username = telegram_user.username
+    user.first_name = telegram_user.first_name
+    user.last_name = telegram_user.last_name
+    
+    await db.commit()
+    await db.refresh(user)
+    
+    return user
+
+async def deactivate_user_async(db: AsyncSession, telegram_id: int) -> bool:
+    result = await db.execute(select(User).where(User.telegram_id == telegram_id))
+    user = result.scalars().first()
+    
+    if user:
+        user.is_active = False
+        await db.commit()
+        return True
+    
+    return False
+
+async def get_user_identity_async(telegram_user: TelegramUser, session_factory=None) -> UserIdentity:
+    """
+    Obtém a identidade do usuário pelo cache, indo ao banco apenas em caso de miss.
+
+    Em caso de miss, busca (ou cria) o usuário e suas preferências e grava o
+    resultado no cache. Alterações em User/UserPreference invalidam a
+    entrada após o commit.
+    """
+    identity = await user_cache.get_async(telegram_user.id)
+    if identity is not None:
+        return identity
+
+    generation = user_cache.generation()
+    async with (session_factory or AsyncSessionLocal)() as db:
+        user = await get_or_create_user_async(db, telegram_user)
+        preferences = await get_user_preferences_async(db, user.id)
+        identity = UserIdentity.from_models(user, preferences)
+    await user_cache.set_async(identity, generation)
+    return identity
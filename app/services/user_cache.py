@@ -0,0 +1,288 @@
+import asyncio
+import json
+import logging
+import threading
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.db.models import User, UserPreference
+from app.services.redis_client import AsyncRedisClient, async_redis, get_redis_connection
+
+logger = logging.getLogger('julliuz_bot')
+
+@dataclass
+class UserIdentity:
+    """
+    Dados do usuário necessários no caminho dos comandos, sem sessão do banco.
+    """
+    id: int
+    telegram_id: int
+    username: Optional[str] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    created_at: Optional[datetime] = None
+    is_active: bool = True
+    ai_cache_enabled: bool = True
+    notifications_enabled: bool = True
+
+    @classmethod
+    def from_models(cls, user: User, preferences: Optional[UserPreference] = None) -> "UserIdentity":
+        identity = cls(
+            id=user.id,
+            telegram_id=user.telegram_id,
+            username=user.username,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            created_at=user.created_at,
+            is_active=user.is_active is not False
+        )
+        if preferences is not None:
+            identity.ai_cache_enabled = preferences.ai_cache_enabled is not False
+            identity.notifications_enabled = preferences.notifications_enabled is not False
+        return identity
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        if self.created_at is not None:
+            data["created_at"] = self.created_at.isoformat()
+        return json.dumps(data)
+
+    @classmethod
+    def from_json(cls, raw: Any) -> "UserIdentity":
+        data = json.loads(raw)
+        if data.get("created_at"):
+            data["created_at"] = datetime.fromisoformat(data["created_at"])
+        return cls(**data)
+
+class UserCache:
+    """
+    Cache read-through da identidade dos usuários, indexado pelo telegram_id.
+
+    Camada local (LRU com TTL curto) na frente do Redis (TTL longo). As
+    entradas são invalidadas após o commit de qualquer alteração em User ou
+    UserPreference; outros processos deixam de ver a entrada antiga quando
+    o TTL local expira.
+    """
+    def __init__(
+        self,
+        redis_client=None,
+        local_max_entries: Optional[int] = None,
+        local_ttl: Optional[int] = None,
+        ttl: Optional[int] = None,
+        enabled: Optional[bool] = None,
+        async_client: Optional[AsyncRedisClient] = None
+    ):
+        """
+        Inicializa o cache de usuários.
+
+        Args:
+            redis_client: Cliente Redis síncrono (padrão: get_redis_connection())
+            local_max_entries: Tamanho do LRU em memória
+            local_ttl: Tempo de vida das entradas locais, em segundos
+            ttl: Tempo de vida das entradas no Redis, em segundos
+            enabled: Liga/desliga o cache
+            async_client: Fachada assíncrona (padrão: async_redis)
+        """
+        config = settings.USER_CACHE_CONFIG
+        self.enabled = config["enabled"] if enabled is None else enabled
+        self.ttl = ttl or config["ttl"]
+        self.local = LRUCache(local_max_entries or config["local_max_entries"], local_ttl or config["local_ttl"])
+        self._redis = redis_client
+        self.async_redis = async_client or async_redis
+        self._lock = threading.Lock()
+        # Usuários cuja remoção no Redis ainda está em andamento
+        self._deleting: Dict[int, int] = {}
+        self._delete_tasks = set()
+        self._generation = 0
+        self.hits_local = 0
+        self.hits_redis = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = get_redis_connection()
+        return self._redis
+
+    def _key(self, telegram_id: int) -> str:
+        return f"user:identity:{telegram_id}"
+
+    def generation(self) -> int:
+        """
+        Contador de invalidações; passe-o para `set` ao ler do banco para não
+        gravar um valor que foi invalidado durante a leitura.
+        """
+        return self._generation
+
+    def get(self, telegram_id: int) -> Optional[UserIdentity]:
+        if not self.enabled:
+            return None
+
+        identity = self.local.get(telegram_id)
+        if identity is not None:
+            self.hits_local += 1
+            return identity
+
+        try:
+            raw = self.redis.get(self._key(telegram_id))
+        except Exception as e:
+            logger.warning(f"Redis indisponível para cache de usuários: {e}")
+            raw = None
+        if raw is not None:
+            identity = UserIdentity.from_json(raw)
+            self.local.set(telegram_id, identity)
+            self.hits_redis += 1
+            return identity
+
+        self.misses += 1
+        return None
+
+    async def get_async(self, telegram_id: int) -> Optional[UserIdentity]:
+        """
+        Versão assíncrona de `get`, usando a fachada compartilhada.
+        """
+        if not self.enabled:
+            return None
+
+        identity = self.local.get(telegram_id)
+        if identity is not None:
+            self.hits_local += 1
+            return identity
+
+        raw = None
+        if telegram_id not in self._deleting:
+            try:
+                raw = await self.async_redis.client.get(self._key(telegram_id))
+            except Exception as e:
+                logger.warning(f"Redis indisponível para cache de usuários: {e}")
+        if raw is not None:
+            identity = UserIdentity.from_json(raw)
+            self.local.set(telegram_id, identity)
+            self.hits_redis += 1
+            return identity
+
+        self.misses += 1
+        return None
+
+    def _set_local(self, identity: UserIdentity, generation: Optional[int]) -> bool:
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return False
+            self.local.set(identity.telegram_id, identity)
+            return True
+
+    def set(self, identity: UserIdentity, generation: Optional[int] = None) -> None:
+        if not self.enabled or not self._set_local(identity, generation):
+            return
+        try:
+            self.redis.set(self._key(identity.telegram_id), identity.to_json(), ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"Erro ao gravar usuário no Redis: {e}")
+
+    async def set_async(self, identity: UserIdentity, generation: Optional[int] = None) -> None:
+        if not self.enabled or not self._set_local(identity, generation):
+            return
+        try:
+            await self.async_redis.client.set(self._key(identity.telegram_id), identity.to_json(), ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"Erro ao gravar usuário no Redis: {e}")
+
+    def invalidate(self, telegram_ids: Iterable[int]) -> None:
+        telegram_ids = set(telegram_ids)
+        if not telegram_ids:
+            return
+        with self._lock:
+            self._generation += 1
+            for telegram_id in telegram_ids:
+                self.local.delete(telegram_id)
+            self.invalidations += len(telegram_ids)
+
+        keys = [self._key(telegram_id) for telegram_id in telegram_ids]
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is None:
+            try:
+                self.redis.delete(*keys)
+            except Exception as e:
+                logger.warning(f"Erro ao invalidar usuários no Redis: {e}")
+            return
+
+        # Dentro do event loop (commit de uma AsyncSession) a remoção é agendada
+        # para não bloquear; até terminar, get_async não lê essas chaves do Redis
+        for telegram_id in telegram_ids:
+            self._deleting[telegram_id] = self._deleting.get(telegram_id, 0) + 1
+        task = loop.create_task(self._delete_async(telegram_ids, keys))
+        self._delete_tasks.add(task)
+        task.add_done_callback(self._delete_tasks.discard)
+
+    async def _delete_async(self, telegram_ids: Iterable[int], keys: List[str]) -> None:
+        try:
+            await self.async_redis.client.delete(*keys)
+        except Exception as e:
+            logger.warning(f"Erro ao invalidar usuários no Redis: {e}")
+        finally:
+            for telegram_id in telegram_ids:
+                remaining = self._deleting.pop(telegram_id, 1) - 1
+                if remaining:
+                    self._deleting[telegram_id] = remaining
+
+    async def wait_invalidations(self) -> None:
+        """
+        Aguarda as remoções agendadas no Redis (ex.: antes de encerrar).
+        """
+        if self._delete_tasks:
+            await asyncio.gather(*self._delete_tasks)
+
+    def clear(self) -> None:
+        self.local.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits_local + self.hits_redis + self.misses
+        return {
+            "hits_local": self.hits_local,
+            "hits_redis": self.hits_redis,
+            "misses": self.misses,
+            "hit_rate": (self.hits_local + self.hits_redis) / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "local": self.local.stats()
+        }
+
+# Instância global do cache de usuários
+user_cache = UserCache()
+
+@event.listens_for(Session, "after_flush")
+def _collect_user_changes(session: Session, flush_context) -> None:
+    telegram_ids = set()
+    preference_user_ids = set()
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.telegram_id is not None:
+            telegram_ids.add(obj.telegram_id)
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, UserPreference) and obj.user_id is not None:
+            preference_user_ids.add(obj.user_id)
+    if preference_user_ids:
+        result = session.connection().execute(
+            select(User.telegram_id).where(User.id.in_(preference_user_ids))
+        )
+        telegram_ids.update(row[0] for row in result)
+    if telegram_ids:
+        session.info.setdefault("user_cache_invalidate", set()).update(telegram_ids)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_users(session: Session) -> None:
+    telegram_ids = session.info.pop("user_cache_invalidate", None)
+    if telegram_ids:
+        user_cache.invalidate(telegram_ids)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_user_changes(session: Session) -> None:
+    session.info.pop("user_cache_invalidate", None)
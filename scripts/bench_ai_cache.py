@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark do cache semântico de respostas da IA.
+
+Simula uma carga de perguntas frequentes com paráfrases e reporta a taxa de
+acerto, acertos errados (resposta de outra pergunta), custo da consulta e a
+latência de geração economizada.
+
+Uso:
+    PYTHONPATH=. python scripts/bench_ai_cache.py --questions 20000 --generation-time 3
+"""
+
+import argparse
+import random
+import time
+
+from app.services.ai_cache import SemanticCache
+
+TOPICS = {
+    "economizar": ["Como economizar dinheiro?", "Julius, como eu faço pra economizar dinheiro??", "como faço para economizar dinheiro"],
+    "parcelar": ["Vale a pena parcelar uma TV?", "vale a pena parcelar a tv", "Julius vale a pena parcelar uma tv?"],
+    "cartao": ["Devo pagar o cartão de crédito primeiro?", "devo pagar o cartao de credito primeiro", "Julius, devo pagar o cartão de crédito primeiro?"],
+    "investir": ["Como começar a investir?", "como comecar a investir", "Julius como eu começo a investir?"],
+    "reserva": ["Quanto guardar na reserva de emergência?", "quanto devo guardar na reserva de emergencia", "Quanto eu guardo na reserva de emergência?"],
+}
+
+VOCABULARY = (
+    "aluguel salario mercado gasolina viagem carro moto celular academia escola faculdade "
+    "presente festa restaurante roupa sapato geladeira fogao sofa plano saude dentista "
+    "seguro poupanca tesouro acao fundo cripto dolar emprestimo consignado juros multa "
+    "boleto fatura pix conta luz agua internet streaming assinatura mesada heranca bonus"
+).split()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--questions", type=int, default=20000)
+    parser.add_argument("--unique-ratio", type=float, default=0.3, help="Fração de perguntas únicas (sempre miss)")
+    parser.add_argument("--generation-time", type=float, default=3.0, help="Tempo médio de uma geração no Ollama (s)")
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cache = SemanticCache(max_entries=5000, ttl=3600)
+    wrong = 0
+    lookup_time = 0.0
+
+    for index in range(args.questions):
+        if rng.random() < args.unique_ratio:
+            words = rng.sample(VOCABULARY, rng.randint(3, 7))
+            topic, question = f"unica-{index}", " ".join(words) + f" {rng.randint(0, 5000)}?"
+        else:
+            topic = rng.choice(list(TOPICS))
+            question = rng.choice(TOPICS[topic])
+
+        start = time.perf_counter()
+        answer = cache.get(question)
+        lookup_time += time.perf_counter() - start
+        if answer is None:
+            cache.set(question, topic, generation_time=args.generation_time)
+        elif answer != topic:
+            wrong += 1
+
+    stats = cache.stats()
+    print(f"Perguntas: {args.questions}  entradas: {stats['size']}")
+    print(f"Taxa de acerto: {stats['hit_ratio']:.1%} (exatos {stats['hits_exact']}, aproximados {stats['hits_similar']})")
+    print(f"Acertos com resposta de outra pergunta: {wrong}")
+    print(f"Consulta média: {lookup_time / args.questions * 1e6:.1f} µs")
+    print(f"Latência economizada: {stats['latency_saved'] / 3600:.1f} h de geração")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark do reaproveitamento de context nas conversas com o Julius.
+
+Compara o prompt completo reenviado a cada mensagem (comportamento antigo)
+com a persona em `system` no primeiro turno e o `context` do Ollama nos
+seguintes. Reporta tokens de prompt avaliados e tempo até o primeiro token.
+Sem --base-url, usa o servidor falso de tests/ollama_stub.py.
+
+Uso:
+    PYTHONPATH=. python scripts/bench_ai_context.py --users 20 --turns 5
+"""
+
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+from app.services import ai
+from app.services.ai_cache import SemanticCache
+from app.services.conversation_store import ConversationStore
+from app.services.ollama_client import OllamaClient
+from tests.ollama_stub import OllamaStub
+
+MESSAGE = "Julius, vale a pena parcelar uma televisão nova em doze vezes?"
+
+async def first_token_latency(chunks) -> float:
+    start = time.perf_counter()
+    latency = None
+    async for _ in chunks:
+        if latency is None:
+            latency = time.perf_counter() - start
+    return latency or 0.0
+
+async def legacy_turn(client: OllamaClient, user) -> float:
+    prompt = f"{ai.build_system_prompt(user)}\n\nUsuário: {MESSAGE}\n\nJulius:"
+    return await first_token_latency(client.stream(prompt))
+
+async def context_turn(client: OllamaClient, user) -> float:
+    return await first_token_latency(ai.stream_ai_response(MESSAGE, user))
+
+async def run(name, turn, client, users, turns):
+    latencies = []
+    for _ in range(turns):
+        latencies.extend(await asyncio.gather(*(turn(client, user) for user in users)))
+    stats = client.stats()
+    print(
+        f"{name:>20}: tokens de prompt {stats['prompt_eval_tokens']:7d}  "
+        f"avaliação {stats['prompt_eval_seconds']:7.2f}s  "
+        f"primeiro token médio {sum(latencies) / len(latencies) * 1000:7.1f} ms"
+    )
+
+async def main(args):
+    stub = None
+    base_url = args.base_url
+    if base_url is None:
+        stub = OllamaStub(prompt_eval_delay=args.prompt_eval_delay)
+        base_url = await stub.start()
+
+    users = [
+        SimpleNamespace(id=i, first_name=f"Usuário {i}", username=f"user{i}", created_at=None)
+        for i in range(args.users)
+    ]
+
+    legacy = OllamaClient(base_url=base_url, model=args.model)
+    await run("prompt completo", legacy_turn, legacy, users, args.turns)
+    await legacy.close()
+
+    client = OllamaClient(base_url=base_url, model=args.model)
+    ai.ollama_client = client
+    ai.conversation_store = ConversationStore()
+    ai.ai_cache = SemanticCache(enabled=False)
+    await run("context reutilizado", context_turn, client, users, args.turns)
+    await client.close()
+
+    if stub is not None:
+        await stub.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url")
+    parser.add_argument("--model", default="gemma:latest")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--prompt-eval-delay", type=float, default=0.0005, help="Custo simulado por token (stub)")
+    asyncio.run(main(parser.parse_args()))
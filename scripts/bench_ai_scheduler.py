@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Teste de carga do escalonador de gerações da IA.
+
+Dispara conversas longas e comandos curtos de vários usuários contra um
+Ollama falso com geração lenta e reporta a latência por fila, a
+profundidade máxima da fila e quantos pedidos foram agrupados.
+
+Uso:
+    PYTHONPATH=. python scripts/bench_ai_scheduler.py --users 20 --chats 5 --commands 2
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from types import SimpleNamespace
+
+from app.services import ai
+from app.services.ai_cache import SemanticCache
+from app.services.ai_scheduler import PRIORITY_CHAT, PRIORITY_COMMAND, AIScheduler
+from app.services.conversation_store import ConversationStore
+from app.services.ollama_client import OllamaClient
+from tests.ollama_stub import OllamaStub
+
+def p95(values):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+async def main(args):
+    stub = OllamaStub(first_token_delay=args.first_token_delay, token_delay=args.token_delay, tokens=["tok "] * args.tokens)
+    await stub.start()
+    ai.ollama_client = OllamaClient(base_url=stub.url, model="gemma", config={"max_concurrency": 64, "max_connections": 64})
+    ai.ai_scheduler = scheduler = AIScheduler(max_in_flight=args.max_in_flight)
+    ai.conversation_store = ConversationStore()
+    ai.ai_cache = SemanticCache(enabled=False)
+
+    rng = random.Random(1)
+    users = [SimpleNamespace(id=i, first_name=f"Usuário {i}", username=None, created_at=None) for i in range(args.users)]
+    latencies = {PRIORITY_COMMAND: [], PRIORITY_CHAT: []}
+    max_depth = 0
+
+    async def request(user, message, priority, delay):
+        await asyncio.sleep(delay)
+        start = time.perf_counter()
+        await ai.get_ai_response(message, user, use_cache=True, priority=priority)
+        latencies[priority].append(time.perf_counter() - start)
+
+    async def monitor():
+        nonlocal max_depth
+        while True:
+            max_depth = max(max_depth, scheduler.queue_depth())
+            await asyncio.sleep(0.01)
+
+    jobs = []
+    for user in users:
+        for index in range(args.chats):
+            jobs.append(request(user, f"me conta uma história longa sobre dinheiro {index}", PRIORITY_CHAT, rng.random()))
+        for _ in range(args.commands):
+            # Perguntas de comando repetidas entre usuários são agrupadas
+            jobs.append(request(user, "qual o melhor jeito de economizar", PRIORITY_COMMAND, rng.random()))
+
+    watcher = asyncio.create_task(monitor())
+    start = time.perf_counter()
+    await asyncio.gather(*jobs)
+    elapsed = time.perf_counter() - start
+    watcher.cancel()
+    await ai.ollama_client.close()
+    await stub.stop()
+
+    stats = scheduler.stats()
+    print(f"Pedidos: {len(jobs)} em {elapsed:.1f}s; gerações no servidor: {stub.requests}; pico simultâneo: {stub.max_active}")
+    for name, priority in (("comandos", PRIORITY_COMMAND), ("conversa", PRIORITY_CHAT)):
+        values = latencies[priority]
+        print(f"{name:>9}: p50 {statistics.median(values):6.2f}s  p95 {p95(values):6.2f}s")
+    print(f"Fila máxima: {max_depth}  espera média: {stats['avg_wait_time']:.2f}s  agrupados: {stats['coalesced']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--chats", type=int, default=5)
+    parser.add_argument("--commands", type=int, default=2)
+    parser.add_argument("--max-in-flight", type=int, default=2)
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--first-token-delay", type=float, default=0.05)
+    parser.add_argument("--token-delay", type=float, default=0.005)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark da avaliação de alertas de limite com centenas de alertas por usuário.
+
+Popula um SQLite com `--users` usuários, cada um com `--alerts` alertas de
+limite espalhados pelas categorias de gasto, e reproduz `--transactions`
+gastos aleatórios, um commit por gasto. Mede o tempo por transação em três
+modos:
+
+    commit      só o commit (com o agregado), sem avaliar alertas
+    laço antigo commit + check_alerts antigo (todos os alertas do usuário,
+                uma consulta SUM por alerta de limite)
+    AlertEngine commit + avaliação dirigida pelo commit (só os alertas da
+                categoria alterada, deduplicados por mês)
+
+Uso:
+    PYTHONPATH=. python scripts/bench_alerts.py --users 200 --alerts 300 --transactions 1000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "bench")
+os.environ.setdefault("BOT_TOKEN", "bench")
+os.environ.setdefault("DB_PASSWORD", "bench")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+import fakeredis
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.models import Alert, Base, Transaction, TransactionCategory, User
+from app.services.aggregates import get_month_total, register_commit_listener
+from app.services.alerts import AlertEngine, alert_engine, get_user_alerts
+from app.services.redis_client import AsyncRedisClient
+
+EXPENSE_CATEGORIES = [c for c in TransactionCategory if c not in (TransactionCategory.SALARY, TransactionCategory.INVESTMENT)]
+
+class FakeNotifier:
+    def __init__(self):
+        self.sent = 0
+
+    async def __call__(self, telegram_id, text, dedup_key=None):
+        self.sent += 1
+        return True
+
+def populate(url: str, users: int, alerts: int, seed: int) -> None:
+    rng = random.Random(seed)
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "telegram_id": 10_000 + i, "first_name": f"User{i}", "is_active": True, "balance": 1000.0}
+            for i in range(1, users + 1)
+        ])
+        conn.execute(insert(Alert), [
+            {"user_id": i, "type": "limit", "category": rng.choice(EXPENSE_CATEGORIES),
+             "threshold": round(rng.uniform(50, 20_000), 2), "is_active": True}
+            for i in range(1, users + 1) for _ in range(alerts)
+        ])
+    engine.dispose()
+
+def legacy_check(db, user_id: int) -> int:
+    """O laço antigo de check_alerts para alertas de limite, sem o envio."""
+    triggered = 0
+    for alert in get_user_alerts(db, user_id):
+        if alert.type == "limit" and alert.category:
+            if get_month_total(db, user_id, alert.category, "expense") >= alert.threshold:
+                triggered += 1
+    return triggered
+
+def workload(users: int, transactions: int, seed: int):
+    rng = random.Random(seed)
+    return [
+        (rng.randint(1, users), rng.choice(EXPENSE_CATEGORIES), round(rng.uniform(5, 400), 2))
+        for _ in range(transactions)
+    ]
+
+async def replay(Session, transactions, mode: str, engine: AlertEngine) -> float:
+    start = time.perf_counter()
+    for user_id, category, amount in transactions:
+        async with Session() as db:
+            db.add(Transaction(user_id=user_id, amount=amount, category=category, type="expense", date=datetime.now()))
+            await db.commit()
+            if mode == "legacy":
+                await db.run_sync(legacy_check, user_id)
+        if mode == "engine":
+            await engine.join()
+    return time.perf_counter() - start
+
+async def main(args):
+    # O motor global não participa do benchmark
+    alert_engine.enabled = False
+
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_alerts.db')}"
+    populate(url, args.users, args.alerts, args.seed)
+    print(f"{args.users} usuários com {args.alerts} alertas cada, {args.transactions} transações por modo")
+
+    db_engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"))
+    Session = async_sessionmaker(bind=db_engine, expire_on_commit=False)
+    notifier = FakeNotifier()
+    engine = AlertEngine(
+        Session, notifier, enabled=False,
+        async_client=AsyncRedisClient(client=fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer()))
+    )
+    register_commit_listener(engine.on_commit, with_totals=True)
+
+    # Cada modo roda sobre a sua própria sequência de gastos, acumulando no mesmo mês
+    for i, mode in enumerate(["commit", "legacy", "engine"]):
+        engine.enabled = mode == "engine"
+        transactions = workload(args.users, args.transactions, args.seed + i)
+        elapsed = await replay(Session, transactions, mode, engine)
+        label = {"commit": "commit", "legacy": "laço antigo", "engine": "AlertEngine"}[mode]
+        print(f"{label:>12}: {elapsed:7.2f}s  {elapsed / args.transactions * 1000:7.2f} ms/transação")
+
+    stats = engine.stats()
+    print(f"{'':>12}  {notifier.sent} notificações, {stats['evaluated']} avaliações, "
+          f"{stats['index_loads']} cargas do índice, {stats['dropped']} eventos descartados")
+    await db_engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--alerts", type=int, default=300, help="Alertas de limite por usuário")
+    parser.add_argument("--transactions", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
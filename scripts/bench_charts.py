@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark do renderizador de gráficos.
+
+Renderiza N relatórios (pizza + barras) em um pool de threads e mostra
+gráficos/s e o pico de memória (RSS) do processo. Uso:
+
+    python scripts/bench_charts.py --reports 1000 --workers 4
+"""
+
+import argparse
+import random
+import resource
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.chart_renderer import ChartRenderer
+
+CATEGORIES = ["food", "transport", "housing", "health", "education", "leisure", "shopping", "bills"]
+MONTHS = ["Jan/2024", "Feb/2024", "Mar/2024", "Apr/2024", "May/2024", "Jun/2024"]
+
+def render_report(renderer: ChartRenderer, seed: int) -> int:
+    rng = random.Random(seed)
+    categories = {category: rng.uniform(10, 1000) for category in CATEGORIES}
+    months = {month: rng.uniform(500, 5000) for month in MONTHS}
+    pie = renderer.render_pie(categories, "Gastos por Categoria - Month")
+    bar = renderer.render_bar(months, "Tendência de Gastos", "Mês", "Valor (R$)")
+    return len(pie) + len(bar)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reports", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    renderer = ChartRenderer()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        total_bytes = sum(pool.map(lambda seed: render_report(renderer, seed), range(args.reports)))
+    elapsed = time.perf_counter() - start
+
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    charts = args.reports * 2
+    print(f"Relatórios: {args.reports} ({charts} gráficos) com {args.workers} threads")
+    print(f"Tempo total: {elapsed:.2f}s")
+    print(f"Gráficos/s: {charts / elapsed:.1f}")
+    print(f"PNG médio: {total_bytes / charts / 1024:.1f} KB")
+    print(f"Pico de RSS: {peak_rss_mb:.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Teste de carga do envio de emails contra um servidor SMTP local de depuração.
+
+Sobe um servidor SMTP mínimo (socketserver, uma thread por conexão) que
+aceita EHLO, AUTH PLAIN/LOGIN, MAIL, RCPT, DATA, RSET, NOOP e QUIT e
+descarta as mensagens, com latência configurável na abertura da conexão
+e no login (o custo de TCP + STARTTLS + AUTH de um servidor real) e em
+cada mensagem. Compara o envio antigo (conexão e login novos por email,
+um de cada vez) com o EmailService (pool de sessões e threads de envio).
+
+Uso:
+    PYTHONPATH=. python scripts/bench_email.py --messages 2000
+    PYTHONPATH=. python scripts/bench_email.py --messages 2000 --connect-latency 0.2 --pool-size 8 --legacy-messages 50
+"""
+
+import argparse
+import os
+import smtplib
+import socketserver
+import threading
+import time
+
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "bench")
+os.environ.setdefault("BOT_TOKEN", "bench")
+os.environ.setdefault("DB_PASSWORD", "bench")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+from app.services.email import EmailService, SMTPPool, build_message
+
+class SinkHandler(socketserver.StreamRequestHandler):
+    """Uma sessão SMTP: responde aos comandos e conta as mensagens recebidas."""
+    def reply(self, line: str) -> None:
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self) -> None:
+        stats = self.server.stats
+        time.sleep(self.server.connect_latency)
+        with stats["lock"]:
+            stats["connections"] += 1
+        self.reply("220 bench ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self.wfile.write(b"250-bench\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n")
+            elif verb == "AUTH":
+                time.sleep(self.server.auth_latency)
+                parts = command.split()
+                if parts[1].upper() == "LOGIN":
+                    # Usuário e senha em duas etapas (base64)
+                    for prompt in ("334 VXNlcm5hbWU6", "334 UGFzc3dvcmQ6"):
+                        self.reply(prompt)
+                        self.rfile.readline()
+                elif len(parts) == 2:
+                    self.reply("334 ")
+                    self.rfile.readline()
+                with stats["lock"]:
+                    stats["logins"] += 1
+                self.reply("235 Authentication successful")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                time.sleep(self.server.message_latency)
+                with stats["lock"]:
+                    stats["messages"] += 1
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self.reply("250 OK")
+            else:
+                self.reply("502 Command not implemented")
+
+class SinkServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+def start_server(port: int, connect_latency: float, auth_latency: float, message_latency: float) -> SinkServer:
+    server = SinkServer(("127.0.0.1", port), SinkHandler)
+    server.connect_latency = connect_latency
+    server.auth_latency = auth_latency
+    server.message_latency = message_latency
+    server.stats = {"lock": threading.Lock(), "connections": 0, "logins": 0, "messages": 0}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def reset(server: SinkServer) -> None:
+    for key in ("connections", "logins", "messages"):
+        server.stats[key] = 0
+
+def legacy(port: int, messages) -> float:
+    """Como o send_email antigo: conexão, login e QUIT para cada email."""
+    start = time.perf_counter()
+    for to_email, subject, body in messages:
+        with smtplib.SMTP("127.0.0.1", port, timeout=30) as conn:
+            conn.login("bench@test", "bench")
+            conn.send_message(build_message("bench@test", to_email, subject, body))
+    return time.perf_counter() - start
+
+def report(name: str, server: SinkServer, elapsed: float) -> None:
+    stats = server.stats
+    print(f"{name:>22}: {stats['messages']:6d} emails em {elapsed:7.2f}s ({stats['messages'] / elapsed:8.1f}/s)"
+          f"  conexões: {stats['connections']}  logins: {stats['logins']}")
+
+def main(args):
+    server = start_server(args.port, args.connect_latency, args.auth_latency, args.message_latency)
+    messages = [
+        (f"user{i % args.recipients}@test", f"Lembrete {i}", f"Conta {i} vence amanhã.\n" * 5)
+        for i in range(args.messages)
+    ]
+
+    if args.legacy_messages:
+        elapsed = legacy(args.port, messages[:args.legacy_messages])
+        report("conexão por email", server, elapsed)
+        reset(server)
+
+    pool = SMTPPool(host="127.0.0.1", port=args.port, username="bench@test", password="bench",
+                    use_tls=False, size=args.pool_size)
+    service = EmailService(pool, workers=args.pool_size, digest_window=args.digest_window)
+    start = time.perf_counter()
+    futures = [service.submit(*message) for message in messages]
+    delivered = sum(future.result() for future in futures)
+    elapsed = time.perf_counter() - start
+    service.close()
+    report("EmailService (pool)", server, elapsed)
+    print(f"{'':>22}  entregues: {delivered}/{len(messages)}  {service.stats()}")
+
+    if args.digest_window:
+        reset(server)
+        service = EmailService(SMTPPool(host="127.0.0.1", port=args.port, username="bench@test",
+                                        password="bench", use_tls=False, size=args.pool_size),
+                               workers=args.pool_size, digest_window=args.digest_window)
+        start = time.perf_counter()
+        futures = [service.submit(*message, digest_key="bench") for message in messages]
+        service.flush()
+        elapsed = time.perf_counter() - start
+        delivered = sum(future.result() for future in futures)
+        service.close()
+        report("resumo por destinatário", server, elapsed)
+        print(f"{'':>22}  avisos entregues: {delivered}/{len(messages)} em {server.stats['messages']} emails")
+    server.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--recipients", type=int, default=200)
+    parser.add_argument("--connect-latency", type=float, default=0.05, help="Latência simulada da conexão (s)")
+    parser.add_argument("--auth-latency", type=float, default=0.05, help="Latência simulada do login (s)")
+    parser.add_argument("--message-latency", type=float, default=0.005, help="Latência simulada por mensagem (s)")
+    parser.add_argument("--pool-size", type=int, default=4, help="Sessões SMTP e threads de envio")
+    parser.add_argument("--digest-window", type=float, default=0.5, help="Janela do resumo (s); 0 desativa")
+    parser.add_argument("--legacy-messages", type=int, default=100)
+    parser.add_argument("--port", type=int, default=8025)
+    main(parser.parse_args())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark do resumo semanal de metas com muitas metas em aberto.
+
+Popula um SQLite com `--goals` metas (padrão: 1 milhão) distribuídas
+entre usuários e roda o GoalDigestJob contra um bot falso, medindo metas/s
+e o pico de memória alocada pelo Python durante o job (tracemalloc), que
+deve depender do tamanho do lote e não do total de metas.
+
+Com --legacy roda também o laço antigo (todos os usuários em memória, uma
+consulta de metas por usuário e get_goal_progress meta a meta) sobre os
+primeiros --legacy-users usuários.
+
+Uso:
+    PYTHONPATH=. python scripts/bench_goals.py --goals 1000000 --chunk-size 1000
+    PYTHONPATH=. python scripts/bench_goals.py --goals 100000 --legacy
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "bench")
+os.environ.setdefault("BOT_TOKEN", "bench")
+os.environ.setdefault("DB_PASSWORD", "bench")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+import fakeredis
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Base, FinancialGoal, User
+from app.services.fanout import MessageFanout
+from app.services.goals import STATUS_LABELS, get_goal_progress
+from app.services.redis_client import AsyncRedisClient
+from app.services.reminders import GoalDigestJob, ReminderCheckpoint
+
+TODAY = date(2024, 3, 4)
+
+class FakeBot:
+    def __init__(self):
+        self.sent = 0
+        self.chars = 0
+
+    async def send_message(self, chat_id, text):
+        self.sent += 1
+        self.chars += len(text)
+
+def populate(url: str, goals: int, goals_per_user: int, seed: int) -> int:
+    rng = random.Random(seed)
+    users = -(-goals // goals_per_user)
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    batch = 50_000
+    with engine.begin() as conn:
+        for first in range(1, users + 1, batch):
+            conn.execute(insert(User), [
+                {"id": i, "telegram_id": 10_000 + i, "first_name": f"User{i}", "is_active": True}
+                for i in range(first, min(first + batch, users + 1))
+            ])
+        for first in range(0, goals, batch):
+            conn.execute(insert(FinancialGoal), [
+                {"user_id": i // goals_per_user + 1, "name": f"Meta {i % goals_per_user}",
+                 "target_amount": 1000.0, "current_amount": round(rng.uniform(0, 1100), 2),
+                 "deadline": TODAY + timedelta(days=rng.randint(-30, 365)), "is_completed": False}
+                for i in range(first, min(first + batch, goals))
+            ])
+    engine.dispose()
+    return users
+
+def legacy(url: str, limit: int) -> None:
+    """O laço antigo de scheduler.send_goal_updates, sem o envio."""
+    db = sessionmaker(bind=create_engine(url))()
+    start = time.perf_counter()
+    tracemalloc.start()
+    goals = 0
+    for user in db.query(User).filter(User.is_active == True).limit(limit).all():
+        message = f"📊 {user.first_name}, aqui está o progresso das suas metas:\n\n"
+        for goal in db.query(FinancialGoal).filter(
+            FinancialGoal.user_id == user.id, FinancialGoal.is_completed == False
+        ).all():
+            progress = get_goal_progress(goal, TODAY)
+            message += f"{STATUS_LABELS[progress['status']]} - {goal.name} ({progress['progress']:.1f}%)\n"
+            goals += 1
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    elapsed = time.perf_counter() - start
+    print(f"{'laço antigo':>12}: {goals:8d} metas em {elapsed:7.2f}s ({goals / elapsed:9.0f}/s)"
+          f"  pico de memória: {peak / 2**20:7.1f} MiB")
+    db.close()
+
+async def main(args):
+    path = os.path.join(tempfile.mkdtemp(), "bench_goals.db")
+    start = time.perf_counter()
+    users = populate(f"sqlite:///{path}", args.goals, args.goals_per_user, args.seed)
+    print(f"{args.goals} metas de {users} usuários geradas em {time.perf_counter() - start:.1f}s")
+
+    if args.legacy:
+        legacy(f"sqlite:///{path}", args.legacy_users)
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    checkpoint = ReminderCheckpoint(
+        "bench", async_client=AsyncRedisClient(client=fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer()))
+    )
+    fanout = MessageFanout(global_rate=1e9, per_chat_interval=0, concurrency=args.concurrency)
+    job = GoalDigestJob(async_sessionmaker(bind=engine), fanout, checkpoint, chunk_size=args.chunk_size)
+    bot = FakeBot()
+
+    tracemalloc.start()
+    summary = await job.run(bot, TODAY)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    elapsed = summary["elapsed"]
+    print(f"{'job em lotes':>12}: {args.goals:8d} metas em {elapsed:7.2f}s ({args.goals / elapsed:9.0f}/s)"
+          f"  pico de memória: {peak / 2**20:7.1f} MiB")
+    print(f"{'':>12}  {summary['sent']} mensagens ({bot.chars / 2**20:.0f} MiB de texto), {summary['chunks']} lotes")
+    await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--goals", type=int, default=1_000_000)
+    parser.add_argument("--goals-per-user", type=int, default=5)
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Usuários por lote")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--legacy", action="store_true")
+    parser.add_argument("--legacy-users", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
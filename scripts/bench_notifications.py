@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Teste de carga da fila de notificações contra uma Bot API falsa local.
+
+Sobe um servidor aiohttp que imita o sendMessage do Telegram: latência
+configurável, limite global de mensagens por segundo (acima dele responde
+429 com retry_after, como o flood control real) e uma fração de respostas
+502. Enfileira `--messages` notificações (com uma fração de chaves de
+deduplicação repetidas) e mede o tempo até a fila esvaziar, usando um Bot
+real do PTB com um único pool HTTP.
+
+Com --legacy envia também as primeiras --legacy-messages notificações do
+jeito antigo: um Bot novo (e um pool HTTP novo) por notificação, uma de
+cada vez.
+
+Uso:
+    PYTHONPATH=. python scripts/bench_notifications.py --messages 5000 --server-limit 1000 --rate 800
+    PYTHONPATH=. python scripts/bench_notifications.py --messages 2000 --server-limit 100 --rate 300 --legacy
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "bench")
+os.environ.setdefault("BOT_TOKEN", "bench")
+os.environ.setdefault("DB_PASSWORD", "bench")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+import fakeredis
+from aiohttp import web
+from telegram import Bot
+from telegram.request import HTTPXRequest
+
+from app.services.notifications import NotificationOutbox
+from app.services.redis_client import AsyncRedisClient
+
+TOKEN = "123456:bench"
+
+class FakeTelegramAPI:
+    """sendMessage com latência, flood control global e falhas 502 aleatórias."""
+    def __init__(self, latency: float, limit: int, error_rate: float, seed: int):
+        self.latency = latency
+        self.limit = limit
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.window = 0
+        self.window_count = 0
+        self.accepted = 0
+        self.flooded = 0
+        self.errors = 0
+        self.connections = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.delivered = set()
+
+    async def get_me(self, request: web.Request) -> web.Response:
+        return web.json_response({"ok": True, "result": {
+            "id": 123456, "is_bot": True, "first_name": "Bench", "username": "bench_bot"
+        }})
+
+    async def send_message(self, request: web.Request) -> web.Response:
+        self.connections.add(request.transport.get_extra_info("peername"))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            data = await request.post()
+            await asyncio.sleep(self.latency)
+            second = int(time.monotonic())
+            if second != self.window:
+                self.window, self.window_count = second, 0
+            if self.window_count >= self.limit:
+                self.flooded += 1
+                return web.json_response({
+                    "ok": False, "error_code": 429, "description": "Too Many Requests: retry after 1",
+                    "parameters": {"retry_after": 1}
+                }, status=429)
+            self.window_count += 1
+            if self.rng.random() < self.error_rate:
+                self.errors += 1
+                return web.json_response({"ok": False, "error_code": 502, "description": "Bad Gateway"}, status=502)
+            self.accepted += 1
+            chat_id = int(data["chat_id"])
+            self.delivered.add((chat_id, data["text"]))
+            return web.json_response({"ok": True, "result": {
+                "message_id": self.accepted, "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"}, "text": data["text"]
+            }})
+        finally:
+            self.in_flight -= 1
+
+async def start_server(api: FakeTelegramAPI, port: int) -> web.AppRunner:
+    app = web.Application()
+    app.router.add_post(f"/bot{TOKEN}/getMe", api.get_me)
+    app.router.add_post(f"/bot{TOKEN}/sendMessage", api.send_message)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+def make_bot(port: int, pool_size: int) -> Bot:
+    return Bot(TOKEN, base_url=f"http://127.0.0.1:{port}/bot", request=HTTPXRequest(connection_pool_size=pool_size))
+
+async def legacy(port: int, notifications) -> float:
+    """Um Bot (e um pool HTTP) novo por notificação, uma de cada vez."""
+    start = time.perf_counter()
+    for chat_id, text, _ in notifications:
+        bot = make_bot(port, 1)
+        try:
+            await bot.send_message(chat_id=chat_id, text=text)
+        except Exception:
+            pass
+        await bot.shutdown()
+    return time.perf_counter() - start
+
+async def main(args):
+    rng = random.Random(args.seed)
+    notifications = []
+    for i in range(args.messages):
+        # Parte das notificações repete uma chave já enfileirada (ex.: alerta disparado em dois processos)
+        key = rng.randrange(i) if i and rng.random() < args.duplicate_rate else i
+        notifications.append((1_000_000 + key % args.chats, f"Notificação {key}", f"bench:{key}"))
+    unique = len({key for _, _, key in notifications})
+
+    if args.legacy:
+        api = FakeTelegramAPI(args.latency, args.server_limit, 0.0, args.seed)
+        runner = await start_server(api, args.port)
+        elapsed = await legacy(args.port, notifications[:args.legacy_messages])
+        print(f"{'um Bot por envio':>18}: {api.accepted:6d} entregues em {elapsed:7.2f}s ({api.accepted / elapsed:7.0f}/s)"
+              f"  conexões: {len(api.connections)}")
+        await runner.cleanup()
+
+    api = FakeTelegramAPI(args.latency, args.server_limit, args.error_rate, args.seed)
+    runner = await start_server(api, args.port)
+    bot = make_bot(args.port, args.pool_size)
+    await bot.initialize()
+    outbox = NotificationOutbox(
+        async_client=AsyncRedisClient(client=fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())),
+        bot=bot, key_prefix="bench", workers=args.workers, batch_size=args.batch_size,
+        global_rate=args.rate, per_chat_interval=args.per_chat_interval, concurrency=args.pool_size,
+        retry_base_delay=0.2, poll_interval=0.05, max_attempts=8
+    )
+
+    start = time.perf_counter()
+    await outbox.start()
+    for first in range(0, len(notifications), 1000):
+        await outbox.enqueue_many(notifications[first:first + 1000])
+    enqueued = time.perf_counter() - start
+    while True:
+        backlog = await outbox.backlog()
+        if not (backlog["ready"] or backlog["delayed"] or backlog["inflight"] or backlog["local"]):
+            break
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - start
+    await outbox.stop()
+    await bot.shutdown()
+    await runner.cleanup()
+
+    stats = outbox.stats()
+    print(f"{'fila (outbox)':>18}: {len(api.delivered):6d} entregues em {elapsed:7.2f}s "
+          f"({len(api.delivered) / elapsed:7.0f}/s)  enfileiradas em {enqueued:.2f}s")
+    print(f"{'':>18}  únicas: {unique}  duplicadas ignoradas: {stats['duplicates']}  mortas: {backlog['dead']}")
+    print(f"{'':>18}  servidor: {api.flooded} respostas 429, {api.errors} respostas 502, "
+          f"{len(api.connections)} conexões, até {api.max_in_flight} requisições simultâneas")
+    print(f"{'':>18}  {stats}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--chats", type=int, default=2000)
+    parser.add_argument("--duplicate-rate", type=float, default=0.1, help="Fração de chaves de deduplicação repetidas")
+    parser.add_argument("--latency", type=float, default=0.02, help="Latência simulada da Bot API (s)")
+    parser.add_argument("--server-limit", type=int, default=1000, help="Mensagens/s aceitas pelo servidor antes do 429")
+    parser.add_argument("--error-rate", type=float, default=0.01, help="Fração de respostas 502")
+    parser.add_argument("--rate", type=float, default=800, help="Limite global de mensagens/s da fila")
+    parser.add_argument("--per-chat-interval", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--pool-size", type=int, default=16, help="Conexões HTTP do Bot compartilhado")
+    parser.add_argument("--legacy", action="store_true")
+    parser.add_argument("--legacy-messages", type=int, default=300)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark do pool de OCR sobre um diretório de comprovantes.
+
+Uso:
+    python scripts/bench_ocr.py caminho/para/comprovantes --workers 4 --repeat 3
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from pathlib import Path
+
+from app.services.ocr_pool import OCRWorkerPool
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tif", ".tiff"}
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def run(images, workers: int, timeout: float):
+    pool = OCRWorkerPool(max_workers=workers, max_pending=len(images), timeout=timeout)
+    latencies = []
+    errors = 0
+
+    async def ocr(image_data: bytes):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            await pool.submit(image_data, wait=True)
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(ocr(image) for image in images))
+    elapsed = time.perf_counter() - start
+    pool.shutdown()
+    return elapsed, latencies, errors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("directory", type=Path)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=1, help="Repete o conjunto de imagens N vezes")
+    parser.add_argument("--timeout", type=float, default=30)
+    args = parser.parse_args()
+
+    paths = sorted(p for p in args.directory.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+    if not paths:
+        raise SystemExit(f"Nenhuma imagem encontrada em {args.directory}")
+    images = [p.read_bytes() for p in paths] * args.repeat
+
+    elapsed, latencies, errors = asyncio.run(run(images, args.workers, args.timeout))
+    print(f"Comprovantes: {len(images)} ({len(paths)} arquivos) com {args.workers} processos")
+    print(f"Comprovantes/s: {len(images) / elapsed:.2f}")
+    print(f"Latência p50: {statistics.median(latencies):.3f}s  p95: {percentile(latencies, 95):.3f}s")
+    print(f"Erros: {errors}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark do cliente Ollama: tempo até o primeiro token e requisições/s.
+
+Compara uma sessão aiohttp nova por mensagem, sem streaming (comportamento
+antigo), com o cliente compartilhado em streaming. Sem --base-url, usa o
+servidor falso de tests/ollama_stub.py.
+
+Uso:
+    PYTHONPATH=. python scripts/bench_ollama.py --requests 200 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+
+from app.services.ollama_client import OllamaClient
+from tests.ollama_stub import OllamaStub
+
+async def per_request_session(base_url: str, model: str) -> float:
+    start = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        async with session.post(
+            f"{base_url}/api/generate",
+            json={"model": model, "prompt": "Quanto gastei?", "stream": False}
+        ) as response:
+            await response.read()
+    return time.perf_counter() - start
+
+async def pooled_stream(client: OllamaClient) -> float:
+    start = time.perf_counter()
+    first_token = None
+    async for _ in client.stream("Quanto gastei?"):
+        if first_token is None:
+            first_token = time.perf_counter() - start
+    return first_token
+
+async def run(name, make_call, total: int, concurrency: int):
+    slots = asyncio.Semaphore(concurrency)
+
+    async def call():
+        async with slots:
+            return await make_call()
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(call() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:>22}: {total / elapsed:7.1f} req/s  "
+        f"primeira resposta p50 {statistics.median(latencies) * 1000:7.1f} ms"
+    )
+
+async def main(args):
+    stub = None
+    base_url = args.base_url
+    if base_url is None:
+        stub = OllamaStub(first_token_delay=args.first_token_delay, token_delay=args.token_delay, tokens=["tok "] * 20)
+        base_url = await stub.start()
+
+    client = OllamaClient(base_url=base_url, model=args.model, config={
+        "max_concurrency": args.concurrency,
+        "max_connections": args.concurrency
+    })
+    await run("sessão por mensagem", lambda: per_request_session(base_url, args.model), args.requests, args.concurrency)
+    await run("cliente em streaming", lambda: pooled_stream(client), args.requests, args.concurrency)
+    await client.close()
+    if stub is not None:
+        print(f"Conexões TCP abertas no servidor falso: {stub.connections}")
+        await stub.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url")
+    parser.add_argument("--model", default="gemma:latest")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--first-token-delay", type=float, default=0.02)
+    parser.add_argument("--token-delay", type=float, default=0.005)
+    asyncio.run(main(parser.parse_args()))
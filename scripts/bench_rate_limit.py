@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark do rate limiter: checks/s e requisições aceitas além do limite.
+
+Compara a implementação antiga (GET seguido de SETEX/INCR, até três idas ao
+Redis) com o script Lua atômico, nos modos janela deslizante e balde de
+fichas, com várias threads disputando a mesma chave. Mede também o limitador
+em dois níveis: decisões/s nos baldes locais, custo de sincronizar um lote
+com o Redis e memória por usuário acompanhado.
+
+Uso:
+    PYTHONPATH=. python scripts/bench_rate_limit.py --threads 16 --checks 2000
+    PYTHONPATH=. python scripts/bench_rate_limit.py --redis-url redis://localhost:6379/1
+    PYTHONPATH=. python scripts/bench_rate_limit.py --users 1000000
+"""
+
+import argparse
+import asyncio
+import os
+import threading
+import time
+import tracemalloc
+
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "bench")
+os.environ.setdefault("BOT_TOKEN", "bench")
+os.environ.setdefault("DB_PASSWORD", "bench")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+
+import fakeredis
+import redis
+
+from app.services.rate_limit import LocalTokenBuckets, RateLimiter, TwoTierRateLimiter
+
+def legacy_is_allowed(client, key: str, max_requests: int, time_window: int) -> bool:
+    count = client.get(key)
+    if count is None:
+        client.setex(key, time_window, 1)
+        return True
+    if int(count) >= max_requests:
+        return False
+    client.incr(key)
+    return True
+
+def run(name: str, threads: int, checks: int, limit: int, check) -> None:
+    allowed = [0] * threads
+    barrier = threading.Barrier(threads)
+
+    def worker(index):
+        barrier.wait()
+        for i in range(checks):
+            # Metade das checagens numa chave disputada, metade em chaves próprias
+            key = "hot" if i % 2 else f"user{index}:{i // limit}"
+            if check(key) and key == "hot":
+                allowed[index] += 1
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    total = threads * checks
+    print(f"{name:>16}: {total / elapsed:10.0f} checks/s  aceitas na chave disputada: {sum(allowed)} (limite {limit})")
+
+def main(args):
+    client = redis.Redis.from_url(args.redis_url) if args.redis_url else fakeredis.FakeRedis()
+    client.flushdb()
+
+    run("GET + INCR", args.threads, args.checks, args.limit,
+        lambda key: legacy_is_allowed(client, f"legacy:{key}", args.limit, 60))
+
+    for mode in ("sliding_window", "token_bucket"):
+        limiter = RateLimiter("bench", args.limit, 60, mode=mode, redis_client=client)
+        run(mode, args.threads, args.checks, args.limit, limiter.is_allowed)
+
+    limiter = TwoTierRateLimiter(
+        "bench", args.limit, 60,
+        redis_limiter=RateLimiter("bench", args.limit, 60, mode="token_bucket", redis_client=client),
+        max_keys=args.users
+    )
+    run("dois níveis", args.threads, args.checks, args.limit, limiter.is_allowed)
+    start = time.perf_counter()
+    synced = asyncio.run(limiter.sync())
+    print(f"{'sincronização':>16}: {synced} chaves em {(time.perf_counter() - start) * 1000:.1f} ms (um pipeline)")
+
+    client.flushdb()
+    measure_local(args.users)
+
+def measure_local(users: int) -> None:
+    tracemalloc.start()
+    buckets = LocalTokenBuckets(30, 60, max_keys=users)
+    start = time.perf_counter()
+    for user_id in range(users):
+        buckets.consume(user_id)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for user_id in range(users):
+        buckets.consume(user_id)
+    hot = time.perf_counter() - start
+    print(f"{'baldes locais':>16}: {users} usuários, {current / users:.0f} bytes/usuário, "
+          f"{users / elapsed:,.0f} decisões/s (novos), {users / hot:,.0f} decisões/s (existentes)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--checks", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--redis-url")
+    main(parser.parse_args())
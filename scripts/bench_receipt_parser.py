@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark e acurácia do motor de extração de comprovantes.
+
+Compara o motor unificado (app.services.receipt_parser) com as expressões
+regulares antigas de ocr.py e receipt.py sobre um corpus sintético.
+
+Uso:
+    PYTHONPATH=. python scripts/bench_receipt_parser.py --size 5000
+"""
+
+import argparse
+import re
+import time
+
+from app.services.receipt_parser import parse_receipt
+from tests.receipt_corpus import corpus
+
+def legacy_ocr(text):
+    """Extração antiga de ocr.py (regex recompilada a cada chamada)."""
+    match = re.search(r'R?\$?\s*(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)', text)
+    amount = match.group(1) if match else ""
+    match = re.search(r'\d{2}/\d{2}/(?:\d{4}|\d{2})', text)
+    receipt_date = match.group(0) if match else ""
+    lines = [
+        line for line in text.split('\n')
+        if not (re.search(r'R?\$?\s*\d', line) or re.search(r'\d{2}/\d{2}', line))
+    ]
+    ' '.join(lines).strip()
+    try:
+        value = float(amount.replace('.', '').replace(',', '.')) if amount else None
+    except ValueError:
+        value = None
+    return value, receipt_date
+
+def legacy_receipt(text):
+    """Extração antiga de receipt.py."""
+    match = re.search(r'R\$\s*(\d+[,.]\d{2})', text)
+    amount = float(match.group(1).replace(',', '.')) if match else None
+    match = re.search(r'(\d{2}/\d{2}/\d{4})', text)
+    receipt_date = match.group(1) if match else None
+    re.search(r'([A-Za-z\s]+)\s*R\$\s*\d+[,.]\d{2}', text)
+    return amount, receipt_date
+
+def engine(text):
+    extraction = parse_receipt(text)
+    return extraction.amount, extraction.date
+
+def measure(name, extractor, samples):
+    amount_hits = date_hits = 0
+    start = time.perf_counter()
+    results = [extractor(text) for text, _, _ in samples]
+    elapsed = time.perf_counter() - start
+    for (amount, receipt_date), (_, expected_amount, expected_date) in zip(results, samples):
+        amount_hits += amount is not None and abs(amount - expected_amount) < 0.005
+        date_hits += receipt_date == expected_date
+    size = len(samples)
+    print(
+        f"{name:>10}: {elapsed / size * 1e6:8.1f} µs/texto  "
+        f"valor {amount_hits / size:6.1%}  data {date_hits / size:6.1%}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    samples = list(corpus(args.size, args.seed))
+    print(f"Corpus sintético: {len(samples)} textos")
+    measure("ocr.py", legacy_ocr, samples)
+    measure("receipt.py", legacy_receipt, samples)
+    measure("motor", engine, samples)
+
+if __name__ == "__main__":
+    main()
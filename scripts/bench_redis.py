@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark de comandos/s no Redis com corrotinas concorrentes.
+
+Compara o cliente síncrono chamado direto do event loop (bloqueia o loop a
+cada comando), o cliente síncrono em threads, a fachada assíncrona com um
+comando por ida ao servidor e a fachada com pipelines.
+
+Uso:
+    PYTHONPATH=. python scripts/bench_redis.py --redis-url redis://localhost:6379/1
+    PYTHONPATH=. python scripts/bench_redis.py --coroutines 100 --commands 200 --batch 20
+
+Sem --redis-url usa o fakeredis, que roda no próprio processo e não mede
+a latência de rede (os números servem só como teste de fumaça).
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "bench")
+os.environ.setdefault("BOT_TOKEN", "bench")
+os.environ.setdefault("DB_PASSWORD", "bench")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+
+import fakeredis
+import redis
+
+from app.services.redis_client import AsyncRedisClient
+
+async def measure(name: str, coroutines: int, commands: int, worker) -> None:
+    # Uma corrotina extra mede quanto o event loop atrasa (bloqueios)
+    lag = 0.0
+    done = asyncio.Event()
+
+    async def probe():
+        nonlocal lag
+        loop = asyncio.get_running_loop()
+        while not done.is_set():
+            start = loop.time()
+            await asyncio.sleep(0.01)
+            lag = max(lag, loop.time() - start - 0.01)
+
+    probe_task = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(coroutines)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+
+    total = coroutines * commands
+    print(f"{name:>22}: {total / elapsed:10.0f} comandos/s  atraso máx. do loop: {lag * 1000:7.1f} ms")
+
+async def main(args):
+    if args.redis_url:
+        sync_client = redis.Redis.from_url(args.redis_url)
+        facade = AsyncRedisClient(url=args.redis_url, config={"max_connections": args.max_connections})
+    else:
+        server = fakeredis.FakeServer()
+        sync_client = fakeredis.FakeRedis(server=server)
+        facade = AsyncRedisClient(client=fakeredis.aioredis.FakeRedis(server=server))
+    sync_client.flushdb()
+
+    async def sync_blocking(index):
+        for _ in range(args.commands):
+            sync_client.incr(f"bench:{index}")
+
+    async def sync_threads(index):
+        for _ in range(args.commands):
+            await asyncio.to_thread(sync_client.incr, f"bench:{index}")
+
+    async def async_single(index):
+        for _ in range(args.commands):
+            await facade.client.incr(f"bench:{index}")
+
+    async def async_pipelined(index):
+        for i in range(0, args.commands, args.batch):
+            size = min(args.batch, args.commands - i)
+            await facade.execute_many([("incr", [f"bench:{index}"])] * size)
+
+    await measure("síncrono no loop", args.coroutines, args.commands, sync_blocking)
+    await measure("síncrono em threads", args.coroutines, args.commands, sync_threads)
+    await measure("fachada assíncrona", args.coroutines, args.commands, async_single)
+    await measure(f"pipeline ({args.batch} cmds)", args.coroutines, args.commands, async_pipelined)
+
+    print(f"conexões: {facade.stats()}")
+    sync_client.flushdb()
+    await facade.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--coroutines", type=int, default=100)
+    parser.add_argument("--commands", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=20)
+    parser.add_argument("--max-connections", type=int, default=50)
+    parser.add_argument("--redis-url")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark do job de lembretes de contas contra um bot falso.
+
+Compara o laço antigo (uma consulta de contas por usuário e um
+send_message por vez) com o BillReminderJob (lotes por keyset, mensagens
+montadas em bloco e envio concorrente dentro dos limites do Telegram).
+O bot falso simula a latência da Bot API e, opcionalmente, respostas
+RetryAfter (flood control).
+
+Uso:
+    PYTHONPATH=. python scripts/bench_reminders.py --users 5000 --latency 0.02
+    PYTHONPATH=. python scripts/bench_reminders.py --users 20000 --rate 30 --skip-legacy
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "bench")
+os.environ.setdefault("BOT_TOKEN", "bench")
+os.environ.setdefault("DB_PASSWORD", "bench")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+import fakeredis
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from telegram.error import RetryAfter
+
+from app.db.models import Base, FixedBill, User
+from app.services.bills import get_due_bills
+from app.services.fanout import MessageFanout
+from app.services.redis_client import AsyncRedisClient
+from app.services.reminders import BillReminderJob, ReminderCheckpoint
+
+class FakeBot:
+    """send_message com latência fixa e um RetryAfter a cada `flood_every` envios."""
+    def __init__(self, latency: float, flood_every: int = 0, flood_wait: float = 0.5):
+        self.latency = latency
+        self.flood_every = flood_every
+        self.flood_wait = flood_wait
+        self.calls = 0
+        self.sent = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def send_message(self, chat_id, text):
+        self.calls += 1
+        if self.flood_every and self.calls % self.flood_every == 0:
+            raise RetryAfter(self.flood_wait)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        self.sent += 1
+
+def populate(url: str, users: int, seed: int) -> None:
+    rng = random.Random(seed)
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "telegram_id": 10_000 + i, "first_name": f"User{i}", "is_active": True}
+            for i in range(1, users + 1)
+        ])
+        conn.execute(insert(FixedBill), [
+            {"user_id": i, "name": f"Conta {j}", "amount": round(rng.uniform(20, 500), 2),
+             "due_day": rng.randint(1, 28), "is_active": True}
+            for i in range(1, users + 1) for j in range(rng.randint(0, 4))
+        ])
+    engine.dispose()
+
+async def legacy(url: str, bot: FakeBot) -> float:
+    """O laço original de scheduler.send_bill_reminders."""
+    db = sessionmaker(bind=create_engine(url))()
+    start = time.perf_counter()
+    for user in db.query(User).filter(User.is_active == True).all():
+        due_bills = get_due_bills(db, user.id)
+        if not due_bills:
+            continue
+        total = sum(bill.amount for bill in due_bills)
+        message = (
+            f"🚨 Ei, {user.first_name}! Você tem contas pra vencer!\n\n"
+            f"Total a pagar: R${total:.2f}\n\n"
+            "Detalhes:\n"
+        )
+        for bill in due_bills:
+            message += f"- {bill.name}: R${bill.amount:.2f} (dia {bill.due_day})\n"
+        message += "\nUse /bills para ver mais detalhes."
+        try:
+            await bot.send_message(chat_id=user.telegram_id, text=message)
+        except Exception:
+            pass
+    elapsed = time.perf_counter() - start
+    db.close()
+    return elapsed
+
+async def main(args):
+    path = os.path.join(tempfile.mkdtemp(), "bench_reminders.db")
+    populate(f"sqlite:///{path}", args.users, args.seed)
+
+    if not args.skip_legacy:
+        bot = FakeBot(args.latency)
+        elapsed = await legacy(f"sqlite:///{path}", bot)
+        print(f"{'laço antigo':>14}: {bot.sent:6d} mensagens em {elapsed:7.2f}s ({bot.sent / elapsed:7.0f}/s)")
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    checkpoint = ReminderCheckpoint(
+        "bench", async_client=AsyncRedisClient(client=fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer()))
+    )
+    fanout = MessageFanout(global_rate=args.rate, concurrency=args.concurrency)
+    job = BillReminderJob(async_sessionmaker(bind=engine), fanout, checkpoint, chunk_size=args.chunk_size)
+    bot = FakeBot(args.latency, args.flood_every)
+    summary = await job.run(bot)
+    elapsed = summary["elapsed"]
+    print(f"{'fan-out':>14}: {summary['sent']:6d} mensagens em {elapsed:7.2f}s ({summary['sent'] / elapsed:7.0f}/s)"
+          f"  lotes: {summary['chunks']}  envios simultâneos: {bot.max_in_flight}")
+    print(f"{'':>14}  {fanout.stats()}")
+    await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.01, help="Latência simulada da Bot API (s)")
+    parser.add_argument("--rate", type=float, default=1000, help="Limite global de mensagens/s (Telegram: ~30)")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--flood-every", type=int, default=0, help="Responde RetryAfter a cada N envios (0 = nunca)")
+    parser.add_argument("--skip-legacy", action="store_true")
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Gerador de carga: updates/s e latência ponta a ponta, webhook x polling.
+
+Sobe uma Bot API falsa local (getMe, getUpdates, setWebhook...) e mede o
+tempo entre a criação de cada update sintético e a execução do handler:
+
+- polling: os updates são entregues pelo getUpdates da API falsa e
+  consumidos pelo Updater do PTB;
+- webhook: os updates são enviados por POST ao endpoint do FastAPI (servido
+  pelo uvicorn), passam pela fila limitada e pelos workers.
+
+Sem --rate os updates são enviados o mais rápido possível (vazão máxima);
+com --rate chegam em ritmo fixo nos dois modos, o que torna as latências
+comparáveis.
+
+Uso:
+    PYTHONPATH=. python scripts/bench_webhook.py --updates 2000 --concurrency 50
+    PYTHONPATH=. python scripts/bench_webhook.py --rate 500 --handler-delay 0.05 --workers 16
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import time
+
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123:bench")
+os.environ.setdefault("BOT_TOKEN", "123:bench")
+os.environ.setdefault("DB_PASSWORD", "bench")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+
+import aiohttp
+import uvicorn
+from aiohttp import web
+from fastapi import FastAPI
+from telegram.ext import ApplicationBuilder, MessageHandler, filters
+
+from app.bot import webhook
+from app.bot.webhook import WebhookUpdateQueue
+from app.core.config import settings
+
+TOKEN = "123:bench"
+SECRET = "bench-secret"
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def make_update(update_id: int) -> dict:
+    chat_id = 1000 + update_id % 100
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Bench"},
+            "text": f"gastei {update_id}"
+        }
+    }
+
+class FakeBotAPI:
+    """
+    Bot API mínima: responde getMe, entrega updates no getUpdates (long
+    polling) e aceita qualquer outro método.
+    """
+    def __init__(self):
+        self.pending = []
+        self.arrived = asyncio.Event()
+
+    def push(self, updates) -> None:
+        self.pending.extend(updates)
+        self.arrived.set()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = dict(await request.post())
+        result = True
+        if method == "getMe":
+            result = {"id": 123, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+        elif method == "getUpdates":
+            offset = int(params.get("offset") or 0)
+            self.pending = [update for update in self.pending if update["update_id"] >= offset]
+            if not self.pending:
+                self.arrived.clear()
+                try:
+                    await asyncio.wait_for(self.arrived.wait(), float(params.get("timeout") or 0) or 0.01)
+                except asyncio.TimeoutError:
+                    pass
+            result = self.pending[:int(params.get("limit") or 100)]
+        return web.json_response({"ok": True, "result": result})
+
+    async def start(self, port: int) -> web.AppRunner:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        return runner
+
+async def pace(start: float, index: int, rate: float) -> None:
+    if rate:
+        delay = start + index / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+def build_application(api_port: int, sent_at: dict, latencies: list, done: asyncio.Event, total: int, args):
+    async def handler(update, context):
+        if args.handler_delay:
+            await asyncio.sleep(args.handler_delay)
+        latencies.append(time.perf_counter() - sent_at[update.update_id])
+        if len(latencies) == total:
+            done.set()
+
+    application = (
+        ApplicationBuilder()
+        .token(TOKEN)
+        .base_url(f"http://127.0.0.1:{api_port}/bot")
+        .concurrent_updates(args.workers)
+        .build()
+    )
+    application.add_handler(MessageHandler(filters.ALL, handler))
+    return application
+
+def report(name: str, total: int, elapsed: float, latencies: list) -> None:
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{name:>8}: {total / elapsed:8.0f} updates/s  latência p50 {statistics.median(latencies) * 1000:7.1f} ms"
+        f"  p95 {p95 * 1000:7.1f} ms  máx {latencies[-1] * 1000:7.1f} ms"
+    )
+
+async def bench_polling(api: FakeBotAPI, api_port: int, args) -> None:
+    sent_at, latencies, done = {}, [], asyncio.Event()
+    application = build_application(api_port, sent_at, latencies, done, args.updates, args)
+    await application.initialize()
+    await application.start()
+    await application.updater.start_polling(poll_interval=0, timeout=1)
+
+    start = time.perf_counter()
+    step = 1 if args.rate else args.concurrency
+    for first in range(0, args.updates, step):
+        await pace(start, first, args.rate)
+        batch = [make_update(update_id) for update_id in range(first, min(first + step, args.updates))]
+        now = time.perf_counter()
+        for update in batch:
+            sent_at[update["update_id"]] = now
+        api.push(batch)
+        await asyncio.sleep(0)
+    await done.wait()
+    report("polling", args.updates, time.perf_counter() - start, latencies)
+
+    await application.updater.stop()
+    await application.stop()
+    await application.shutdown()
+
+async def bench_webhook(api_port: int, args) -> None:
+    sent_at, latencies, done = {}, [], asyncio.Event()
+    application = build_application(api_port, sent_at, latencies, done, args.updates, args)
+    await application.initialize()
+    await application.start()
+
+    settings.TELEGRAM_WEBHOOK_SECRET = SECRET
+    webhook.webhook_queue = WebhookUpdateQueue(max_size=args.queue_size, workers=args.workers)
+    await webhook.webhook_queue.start(application)
+    app = FastAPI()
+    app.include_router(webhook.router)
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    url = f"http://127.0.0.1:{port}{settings.WEBHOOK_CONFIG['path']}"
+    next_id = iter(range(args.updates))
+    rejected = 0
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(connector=connector) as client:
+        async def post(update_id):
+            nonlocal rejected
+            sent_at[update_id] = time.perf_counter()
+            while True:
+                async with client.post(
+                    url, json=make_update(update_id), headers={"X-Telegram-Bot-Api-Secret-Token": SECRET}
+                ) as response:
+                    status = response.status
+                if status != 503:
+                    return
+                # Fila cheia: o Telegram reenviaria mais tarde
+                rejected += 1
+                await asyncio.sleep(0.01)
+
+        async def sender():
+            for update_id in next_id:
+                await post(update_id)
+
+        start = time.perf_counter()
+        if args.rate:
+            posts = []
+            for update_id in range(args.updates):
+                await pace(start, update_id, args.rate)
+                posts.append(asyncio.create_task(post(update_id)))
+            await asyncio.gather(*posts)
+        else:
+            await asyncio.gather(*(sender() for _ in range(args.concurrency)))
+        await done.wait()
+        report("webhook", args.updates, time.perf_counter() - start, latencies)
+    print(f"{'':>8}  recusados por fila cheia: {rejected}  fila: {webhook.webhook_queue.stats()}")
+
+    await webhook.webhook_queue.stop()
+    server.should_exit = True
+    await server_task
+    await application.stop()
+    await application.shutdown()
+
+async def main(args):
+    api = FakeBotAPI()
+    api_port = free_port()
+    runner = await api.start(api_port)
+    try:
+        await bench_polling(api, api_port, args)
+        await bench_webhook(api_port, args)
+    finally:
+        await runner.cleanup()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50, help="Conexões simultâneas do gerador de carga")
+    parser.add_argument("--workers", type=int, default=8, help="Updates processados simultaneamente")
+    parser.add_argument("--queue-size", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=0.0, help="Updates por segundo (0 = o mais rápido possível)")
+    parser.add_argument("--handler-delay", type=float, default=0.0, help="Tempo simulado de cada handler (s)")
+    asyncio.run(main(parser.parse_args()))
@@ -8,20 +8,39 @@ import sys
 from pathlib import Path
 
 from app.core.config import settings
-from app.db.database import Base, engine
-from app.db.models import (
-    User,
-    Transaction,
-    TransactionCategory,
-    TransactionType,
-    Bill,
-    FixedBill,
-    Goal,
-    Alert,
-    UserPreference,
-    Receipt
-)
-from sqlalchemy import text
+from app.db.database import SessionLocal, engine
+# Base em que os modelos são declarados (a de app.db.database não tem tabelas)
+from app.db.models import Base
+from app.services.aggregates import rebuild_aggregates
+from sqlalchemy import inspect, text
+
+def upgrade_schema(bind) -> bool:
+    """
+    Aplica em tabelas já existentes as alterações que o create_all não faz.
+
+    Idempotente: cada passo verifica o esquema antes de alterá-lo.
+
+    Returns:
+        True se o agregado mensal precisa ser recalculado
+    """
+    columns = {column["name"] for column in inspect(bind).get_columns("transactions")}
+    added_type = "type" not in columns
+    with bind.begin() as conn:
+        if added_type:
+            # Transações anteriores à coluna são todas despesas
+            conn.execute(text("ALTER TABLE transactions ADD COLUMN type VARCHAR DEFAULT 'expense'"))
+            conn.execute(text("UPDATE transactions SET type = 'expense' WHERE type IS NULL"))
+            print("Coluna transactions.type adicionada")
+        # Índices compostos dos relatórios e alertas (ver tests/test_query_plans.py)
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_transactions_user_type_date "
+            "ON transactions (user_id, type, date)"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_transactions_user_category_type_date "
+            "ON transactions (user_id, category, type, date)"
+        ))
+    return added_type
 
 def init_database():
     """
@@ -30,9 +49,22 @@ def init_database():
     try:
         print("Inicializando banco de dados...")
         
+        had_aggregates = inspect(engine).has_table("spending_aggregates")
+
         # Cria as tabelas
         Base.metadata.create_all(bind=engine)
         print("Tabelas criadas com sucesso")
+
+        # Atualiza tabelas criadas por versões anteriores
+        rebuild = upgrade_schema(engine) or not had_aggregates
+        if rebuild:
+            # Mesmo backfill de scripts/rebuild_aggregates.py
+            db = SessionLocal()
+            try:
+                written = rebuild_aggregates(db)
+            finally:
+                db.close()
+            print(f"Agregado mensal recalculado: {written} linhas")
         
         print("Banco de dados inicializado com sucesso!")
         
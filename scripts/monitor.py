@@ -8,6 +8,7 @@ import schedule
 from datetime import datetime
 
 from app.core.config import settings
+from app.services.email import email_service
 from app.services.monitoring import system_monitor
 from app.core.logging import setup_logging
 from app.core.startup_checks import run_startup_checks
@@ -33,7 +34,12 @@ def check_system():
         # Envia alertas se necessário
         if settings.EMAIL_HOST_USER:
             system_monitor.send_alerts(settings.EMAIL_HOST_USER)
-            
+
+        # Enfileira os alertas no Telegram para os administradores
+        queued = system_monitor.send_telegram_alerts()
+        if queued:
+            logger.info(f"{queued} alerta(s) enfileirado(s) no Telegram")
+
     except Exception as e:
         logger.error(f"Erro ao verificar sistema: {e}")
 
@@ -59,6 +65,9 @@ def main():
         logger.info("Monitoramento interrompido pelo usuário")
     except Exception as e:
         logger.error(f"Erro no monitoramento: {e}")
+    finally:
+        # Envia os resumos de alertas ainda aguardando a janela de agrupamento
+        email_service.close(30)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
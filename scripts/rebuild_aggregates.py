@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Script para recalcular (backfill) e verificar o agregado mensal de gastos.
+
+Uso:
+    python scripts/rebuild_aggregates.py            # recalcula tudo
+    python scripts/rebuild_aggregates.py --user-id 42
+    python scripts/rebuild_aggregates.py --check    # apenas verifica a consistência
+"""
+
+import argparse
+import sys
+
+from app.db.database import SessionLocal
+from app.services.aggregates import check_aggregates, rebuild_aggregates
+
+def main():
+    """
+    Função principal do script.
+    """
+    parser = argparse.ArgumentParser(description="Agregado mensal de gastos")
+    parser.add_argument("--user-id", type=int, default=None, help="Limita a um usuário")
+    parser.add_argument("--check", action="store_true", help="Apenas verifica a consistência")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.check:
+            mismatches = check_aggregates(db, args.user_id)
+            for mismatch in mismatches:
+                print(
+                    f"Divergência user={mismatch['user_id']} categoria={mismatch['category']!r} "
+                    f"mês={mismatch['month']} tipo={mismatch['type']}: "
+                    f"esperado R${mismatch['expected_total']:.2f} ({mismatch['expected_count']}), "
+                    f"agregado R${mismatch['actual_total']:.2f} ({mismatch['actual_count']})"
+                )
+            if mismatches:
+                print(f"{len(mismatches)} divergências encontradas")
+                sys.exit(1)
+            print("Agregado consistente com as transações")
+        else:
+            written = rebuild_aggregates(db, args.user_id)
+            print(f"Agregado recalculado com sucesso: {written} linhas")
+    except Exception as e:
+        print(f"Erro ao processar agregado: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
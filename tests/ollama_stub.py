@@ -0,0 +1,95 @@
+"""
+Servidor Ollama falso para testes e benchmarks.
+
+Responde /api/generate em NDJSON, com atraso configurável antes do primeiro
+token e entre tokens, e registra conexões TCP, requisições e o pico de
+requisições simultâneas. Simula a avaliação do prompt: cada palavra de
+`system` e `prompt` custa `prompt_eval_delay`, exceto o que já está no
+`context` enviado.
+"""
+
+import asyncio
+import json
+from typing import List, Optional
+
+from aiohttp import web
+
+class OllamaStub:
+    def __init__(
+        self,
+        tokens: Optional[List[str]] = None,
+        first_token_delay: float = 0.0,
+        token_delay: float = 0.0,
+        prompt_eval_delay: float = 0.0
+    ):
+        self.tokens = tokens or ["Ah, ", "claro! ", "Economize ", "dinheiro."]
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.prompt_eval_delay = prompt_eval_delay
+        self.prompt_eval_tokens = 0
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+        self.bodies = []
+        self._transports = set()
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    @property
+    def connections(self) -> int:
+        return len(self._transports)
+
+    async def generate(self, request: web.Request) -> web.StreamResponse:
+        self._transports.add(id(request.transport))
+        self.requests += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            body = await request.json()
+            self.bodies.append(body)
+            if body.get("model") == "missing":
+                return web.json_response({"error": "model 'missing' not found"}, status=404)
+
+            context = body.get("context") or []
+            evaluated = len(body.get("prompt", "").split())
+            if not context:
+                evaluated += len((body.get("system") or "").split())
+            self.prompt_eval_tokens += evaluated
+
+            response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+            await response.prepare(request)
+            await asyncio.sleep(self.first_token_delay + evaluated * self.prompt_eval_delay)
+            for index, token in enumerate(self.tokens):
+                if index:
+                    await asyncio.sleep(self.token_delay)
+                chunk = {"model": body.get("model"), "response": token, "done": False}
+                await response.write((json.dumps(chunk) + "\n").encode())
+            final = {
+                "model": body.get("model"),
+                "response": "",
+                "done": True,
+                "context": context + list(range(evaluated + len(self.tokens))),
+                "prompt_eval_count": evaluated,
+                "prompt_eval_duration": int(evaluated * self.prompt_eval_delay * 1e9),
+                "eval_count": len(self.tokens)
+            }
+            await response.write((json.dumps(final) + "\n").encode())
+            await response.write_eof()
+            return response
+        finally:
+            self.active -= 1
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_post("/api/generate", self.generate)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
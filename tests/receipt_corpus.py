@@ -0,0 +1,71 @@
+"""
+Gerador de textos sintéticos de OCR de comprovantes, com os valores esperados.
+
+Usado pelo teste de acurácia do motor de extração e por
+scripts/bench_receipt_parser.py.
+"""
+
+import random
+from datetime import date, timedelta
+from typing import Iterator, Tuple
+
+MERCHANTS = [
+    "SUPERMERCADO BOM PRECO LTDA", "FARMACIA CENTRAL", "PADARIA PAO QUENTE",
+    "POSTO AVENIDA", "RESTAURANTE SABOR CASEIRO", "LOJAS CENTRO"
+]
+ITEMS = ["ARROZ 5KG", "FEIJAO", "CAFE", "LEITE INTEGRAL", "PAO FRANCES", "DIPIRONA", "GASOLINA"]
+TOTAL_LABELS = ["TOTAL", "VALOR TOTAL", "TOTAL R$", "VALOR A PAGAR", "Total:"]
+
+def format_brl(value: float, thousands: bool = True) -> str:
+    reais, cents = divmod(round(value * 100), 100)
+    reais_text = f"{reais:,}".replace(",", ".") if thousands else str(reais)
+    return f"{reais_text},{cents:02d}"
+
+def format_date(value: date, rng: random.Random) -> str:
+    separator = rng.choice("/-.")
+    year = value.strftime("%Y") if rng.random() < 0.8 else value.strftime("%y")
+    return f"{value:%d}{separator}{value:%m}{separator}{year}"
+
+def synthetic_receipt_text(rng: random.Random) -> Tuple[str, float, str]:
+    """
+    Gera um texto de comprovante.
+
+    Returns:
+        (texto, valor total esperado, data esperada em DD/MM/AAAA)
+    """
+    issued = date(2023, 1, 1) + timedelta(days=rng.randint(0, 700))
+    items = [(rng.choice(ITEMS), rng.randint(50, 250000) / 100) for _ in range(rng.randint(1, 6))]
+    subtotal = sum(value for _, value in items)
+    discount = round(subtotal * rng.choice([0, 0, 0.05, 0.1]), 2)
+    total = round(subtotal - discount, 2)
+
+    lines = [rng.choice(MERCHANTS), "CNPJ 12.345.678/0001-90"]
+    if rng.random() < 0.3:
+        lines.append(f"VALIDADE {format_date(issued + timedelta(days=30), rng)}")
+    lines.append(f"{rng.choice(['DATA', 'EMISSAO', 'Data:'])} {format_date(issued, rng)} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}")
+    for name, value in items:
+        lines.append(f"{name}  {rng.randint(1, 3)} UN  {format_brl(value, rng.random() < 0.5)}")
+    lines.append(f"SUBTOTAL {format_brl(subtotal)}")
+    if discount:
+        lines.append(f"DESCONTO -{format_brl(discount)}")
+
+    label = rng.choice(TOTAL_LABELS)
+    amount = format_brl(total, rng.random() < 0.7)
+    prefix = "R$ " if rng.random() < 0.6 and "R$" not in label else ""
+    if rng.random() < 0.2:
+        lines.extend([label, f"{prefix}{amount}"])
+    else:
+        lines.append(f"{label} {prefix}{amount}")
+
+    if rng.random() < 0.4:
+        received = total + rng.randint(1, 100)
+        lines.append(f"VALOR RECEBIDO R$ {format_brl(received)}")
+        lines.append(f"TROCO R$ {format_brl(received - total)}")
+    lines.append("OBRIGADO PELA PREFERENCIA")
+
+    return "\n".join(lines), total, issued.strftime("%d/%m/%Y")
+
+def corpus(size: int, seed: int = 7) -> Iterator[Tuple[str, float, str]]:
+    rng = random.Random(seed)
+    for _ in range(size):
+        yield synthetic_receipt_text(rng)
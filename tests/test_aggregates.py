@@ -0,0 +1,64 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.db.models import Base, SpendingAggregate, Transaction
+from app.services.aggregates import (
+    check_aggregates,
+    get_category_totals,
+    get_month_total,
+    get_monthly_totals,
+    rebuild_aggregates,
+)
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+def add(db, amount, category="food", date=datetime(2024, 3, 10), type="expense"):
+    transaction = Transaction(user_id=1, amount=amount, category=category, date=date, type=type)
+    db.add(transaction)
+    db.commit()
+    return transaction
+
+def test_rollup_follows_insert_update_delete(db):
+    first = add(db, 100.0)
+    add(db, 50.0)
+    add(db, 30.0, category="transport")
+    assert get_month_total(db, 1, "food", when=datetime(2024, 3, 1)) == 150.0
+
+    first.amount = 120.0
+    first.category = "transport"
+    db.commit()
+    assert get_month_total(db, 1, "food", when=datetime(2024, 3, 1)) == 50.0
+    assert get_month_total(db, 1, "transport", when=datetime(2024, 3, 1)) == 150.0
+
+    db.delete(first)
+    db.commit()
+    assert get_month_total(db, 1, "transport", when=datetime(2024, 3, 1)) == 30.0
+    assert check_aggregates(db) == []
+
+def test_readers_match_raw_sums(db):
+    add(db, 10.0, date=datetime(2024, 1, 20))
+    add(db, 20.0, date=datetime(2024, 2, 5))
+    add(db, 40.0, date=datetime(2024, 3, 2))
+    add(db, 999.0, date=datetime(2024, 2, 6), type="income")
+
+    totals = get_category_totals(db, 1, datetime(2024, 1, 15), datetime(2024, 3, 1, 12))
+    assert totals == {"food": 30.0}
+    monthly = get_monthly_totals(db, 1, datetime(2024, 1, 1), datetime(2024, 3, 31))
+    assert [total for _, total in monthly] == [10.0, 20.0, 40.0]
+
+def test_rebuild_and_consistency_check(db):
+    add(db, 10.0)
+    add(db, 5.0, category=None)
+    db.query(SpendingAggregate).delete()
+    db.commit()
+    assert len(check_aggregates(db)) == 2
+
+    assert rebuild_aggregates(db) == 2
+    assert check_aggregates(db) == []
@@ -0,0 +1,99 @@
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+import pytest
+from app.services import ai
+from app.services.ai_cache import SemanticCache, normalize_question
+from app.services.conversation_store import ConversationStore
+from app.services.ollama_client import OllamaClient
+from tests.ollama_stub import OllamaStub
+
+def make_cache(**kwargs):
+    options = dict(max_entries=100, ttl=60, threshold=0.7, num_perm=64, bands=16, min_words=2, enabled=True)
+    options.update(kwargs)
+    return SemanticCache(**options)
+
+def test_normalize_question():
+    assert normalize_question("Julius, como eu faço pra ECONOMIZAR dinheiro??") == "como faco economizar dinheiro"
+
+def test_exact_and_near_duplicate_hits():
+    cache = make_cache()
+    cache.set("Como eu faço para economizar dinheiro?", "Pare de gastar!", generation_time=2.0)
+    assert cache.get("como faço pra economizar dinheiro") == "Pare de gastar!"
+    assert cache.get("Como economizar dinheiro?") == "Pare de gastar!"
+    assert cache.get("Como investir dinheiro?") is None
+    assert cache.get("oi") is None
+
+    stats = cache.stats()
+    assert (stats["hits_exact"], stats["hits_similar"], stats["misses"]) == (1, 1, 1)
+    assert stats["hit_ratio"] == pytest.approx(2 / 3)
+    assert stats["latency_saved"] == pytest.approx(4.0)
+
+def test_negated_questions_do_not_share_answers():
+    cache = make_cache()
+    cache.set("Devo investir em ações agora?", "SIM")
+    assert cache.get("devo investir em acoes agora") == "SIM"
+    assert cache.get("Não devo investir em ações agora?") is None
+    assert cache.get("Nunca devo investir em ações agora?") is None
+
+    cache.set("Não devo investir em ações agora?", "NÃO")
+    assert cache.get("nao devo investir em acoes agora") == "NÃO"
+    assert cache.get("Devo investir em ações agora?") == "SIM"
+
+def test_ttl_and_size_bounds():
+    cache = make_cache(max_entries=2, ttl=0.05)
+    cache.set("como economizar dinheiro", "a")
+    cache.set("vale a pena parcelar tv", "b")
+    cache.set("devo pagar cartao primeiro", "c")
+    assert len(cache) == 2
+    assert cache.get("como economizar dinheiro") is None
+    time.sleep(0.06)
+    assert cache.get("devo pagar cartao primeiro") is None
+    assert len(cache) == 1
+
+@pytest.fixture
+async def stub():
+    stub = OllamaStub(first_token_delay=0.05)
+    await stub.start()
+    yield stub
+    await stub.stop()
+
+async def test_get_ai_response_uses_cache_unless_user_opted_out(stub):
+    client = OllamaClient(base_url=stub.url, model="gemma")
+    cache = make_cache()
+    users = [SimpleNamespace(id=i, first_name="Chris", username=None, created_at=None) for i in range(3)]
+    with patch.object(ai, "ollama_client", client), \
+         patch.object(ai, "conversation_store", ConversationStore()), \
+         patch.object(ai, "ai_cache", cache):
+        first = await ai.get_ai_response("Como economizar dinheiro?", users[0])
+        assert await ai.get_ai_response("como eu faço pra economizar dinheiro", users[1]) == first
+        chunks = [chunk async for chunk in ai.stream_ai_response("Como economizar dinheiro?", users[1])]
+        assert chunks == [first]
+        await ai.get_ai_response("Como economizar dinheiro?", users[2], use_cache=False)
+    await client.close()
+
+    assert stub.requests == 2
+    assert cache.stats()["hits_exact"] + cache.stats()["hits_similar"] == 2
+    assert cache.stats()["latency_saved"] > 0
+
+async def test_cached_answers_are_not_personalized_and_skip_conversations(stub):
+    client = OllamaClient(base_url=stub.url, model="gemma")
+    cache = make_cache()
+    store = ConversationStore()
+    users = [SimpleNamespace(id=i, first_name=f"Nome{i}", username=f"user{i}", created_at=None) for i in range(2)]
+    with patch.object(ai, "ollama_client", client), \
+         patch.object(ai, "conversation_store", store), \
+         patch.object(ai, "ai_cache", cache):
+        first = await ai.get_ai_response("Como economizar dinheiro?", users[0])
+        # users[0] já está numa conversa: a pergunta vai ao modelo com o context
+        assert await ai.get_ai_response("Como economizar dinheiro?", users[0])
+        assert await ai.get_ai_response("Como economizar dinheiro?", users[1]) == first
+        # Sem cache, a persona leva os dados do usuário
+        await ai.get_ai_response("Vale a pena parcelar?", users[1], use_cache=False)
+    await client.close()
+
+    assert stub.bodies[0]["system"] == ai.JULIUS_SYSTEM_PROMPT
+    assert "Nome0" not in stub.bodies[0]["system"]
+    assert "context" in stub.bodies[1]
+    assert "Nome1" in stub.bodies[2]["system"]
+    assert stub.requests == 3
@@ -0,0 +1,194 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+import pytest
+from app.services import ai
+from app.services.ai_cache import SemanticCache
+from app.services.ai_scheduler import PRIORITY_CHAT, PRIORITY_COMMAND, AIScheduler
+from app.services.conversation_store import ConversationStore
+from app.services.ollama_client import OllamaClient
+from tests.ollama_stub import OllamaStub
+
+async def test_priority_lanes_and_per_user_round_robin():
+    scheduler = AIScheduler(max_in_flight=1)
+    order = []
+    gate = asyncio.Event()
+
+    async def job(name, user_id, priority):
+        async with scheduler.slot(user_id, priority):
+            order.append(name)
+            if name == "first":
+                await gate.wait()
+
+    tasks = [asyncio.create_task(job("first", "x", PRIORITY_CHAT))]
+    await asyncio.sleep(0)
+    for name, user_id, priority in [
+        ("a1", "a", PRIORITY_CHAT), ("a2", "a", PRIORITY_CHAT), ("a3", "a", PRIORITY_CHAT),
+        ("b1", "b", PRIORITY_CHAT), ("cmd", "c", PRIORITY_COMMAND)
+    ]:
+        tasks.append(asyncio.create_task(job(name, user_id, priority)))
+        await asyncio.sleep(0)
+
+    assert scheduler.stats()["queue_depth_by_lane"] == [1, 4]
+    gate.set()
+    await asyncio.gather(*tasks)
+    assert order == ["first", "cmd", "a1", "b1", "a2", "a3"]
+    assert scheduler.stats()["in_flight"] == 0
+
+async def test_identical_requests_are_coalesced():
+    scheduler = AIScheduler(max_in_flight=2)
+    calls = 0
+
+    async def generate():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "resposta"
+
+    results = await asyncio.gather(*(scheduler.run("mesmo", i, PRIORITY_CHAT, generate) for i in range(5)))
+    assert results == ["resposta"] * 5
+    assert calls == 1
+    assert scheduler.stats()["coalesced"] == 4
+
+async def test_cancelling_the_leader_keeps_coalesced_requests():
+    scheduler = AIScheduler(max_in_flight=1)
+    calls = 0
+
+    async def generate():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "resposta"
+
+    leader = asyncio.create_task(scheduler.run("mesmo", 1, PRIORITY_CHAT, generate))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(scheduler.run("mesmo", 2, PRIORITY_CHAT, generate))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+    assert await follower == "resposta"
+    assert leader.cancelled() and calls == 1
+
+    # Sem ninguém aguardando, a geração é cancelada e a vaga liberada
+    alone = asyncio.create_task(scheduler.run("outro", 1, PRIORITY_CHAT, generate))
+    await asyncio.sleep(0.01)
+    alone.cancel()
+    await asyncio.sleep(0.01)
+    assert scheduler.in_flight == 0 and not scheduler._coalesced
+
+async def test_new_request_does_not_join_a_cancelled_generation():
+    scheduler = AIScheduler(max_in_flight=1)
+    started = asyncio.Event()
+
+    async def generate():
+        started.set()
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            # A geração demora a terminar depois de cancelada
+            await asyncio.sleep(0.02)
+            raise
+        return "antiga"
+
+    alone = asyncio.create_task(scheduler.run("mesmo", 1, PRIORITY_CHAT, generate))
+    await started.wait()
+    alone.cancel()
+    await asyncio.sleep(0)
+
+    async def fresh():
+        return "nova"
+
+    assert await asyncio.wait_for(scheduler.run("mesmo", 2, PRIORITY_CHAT, fresh), 1) == "nova"
+    assert scheduler.stats()["coalesced"] == 0
+
+async def test_identical_streams_are_coalesced():
+    scheduler = AIScheduler(max_in_flight=2)
+    calls = 0
+
+    async def generate():
+        nonlocal calls
+        calls += 1
+        for chunk in ("a", "b", "c"):
+            await asyncio.sleep(0.01)
+            yield chunk
+
+    async def read(user_id):
+        return [chunk async for chunk in scheduler.stream("mesmo", user_id, PRIORITY_CHAT, generate)]
+
+    leader = asyncio.create_task(read(1))
+    await asyncio.sleep(0.015)
+    # Quem chega no meio recebe os trechos já gerados e os seguintes
+    assert await asyncio.gather(leader, read(2), read(3)) == [["a", "b", "c"]] * 3
+    assert calls == 1
+    assert scheduler.stats()["coalesced"] == 2
+    assert scheduler.in_flight == 0 and not scheduler._streams
+
+    # Quando todos desistem, a geração é cancelada e a vaga liberada
+    reader = asyncio.create_task(read(1))
+    await asyncio.sleep(0.015)
+    reader.cancel()
+    await asyncio.sleep(0.01)
+    assert scheduler.in_flight == 0 and not scheduler._streams
+
+async def test_identical_streamed_answers_share_one_generation():
+    stub = OllamaStub(first_token_delay=0.05)
+    await stub.start()
+    client = OllamaClient(base_url=stub.url, model="gemma")
+    user = SimpleNamespace(id=1, first_name="Chris", username=None, created_at=None)
+
+    async def ask():
+        return "".join([chunk async for chunk in ai.stream_ai_response("saldo?", user, use_cache=False)])
+
+    with patch.object(ai, "ollama_client", client), \
+         patch.object(ai, "ai_scheduler", AIScheduler(max_in_flight=2)), \
+         patch.object(ai, "conversation_store", ConversationStore()):
+        first, second = await asyncio.gather(ask(), ask())
+    await client.close()
+    await stub.stop()
+
+    assert first == second and first
+    assert stub.requests == 1
+
+async def test_cancelled_waiter_does_not_leak_slot():
+    scheduler = AIScheduler(max_in_flight=1)
+    await scheduler.acquire("a")
+    waiting = asyncio.create_task(scheduler.acquire("b"))
+    await asyncio.sleep(0)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    scheduler.release()
+    await asyncio.wait_for(scheduler.acquire("c"), 1)
+    assert scheduler.in_flight == 1
+
+async def test_load_against_slow_stub():
+    stub = OllamaStub(first_token_delay=0.05, token_delay=0.02)
+    await stub.start()
+    client = OllamaClient(base_url=stub.url, model="gemma", config={"max_concurrency": 8})
+    scheduler = AIScheduler(max_in_flight=2)
+    users = [SimpleNamespace(id=i, first_name=f"User {i}", username=None, created_at=None) for i in range(4)]
+
+    with patch.object(ai, "ollama_client", client), \
+         patch.object(ai, "ai_scheduler", scheduler), \
+         patch.object(ai, "conversation_store", ConversationStore()), \
+         patch.object(ai, "ai_cache", SemanticCache(enabled=False)):
+        chats = [
+            asyncio.create_task(ai.get_ai_response(f"pergunta longa {i}", users[i % 4], use_cache=False))
+            for i in range(12)
+        ]
+        await asyncio.sleep(0.01)
+        depth = scheduler.stats()["queue_depth"]
+        command = asyncio.create_task(
+            ai.get_ai_response("saldo?", users[0], use_cache=False, priority=PRIORITY_COMMAND)
+        )
+        await command
+        pending_chats = sum(not task.done() for task in chats)
+        await asyncio.gather(*chats)
+    await client.close()
+    await stub.stop()
+
+    assert stub.max_active == 2
+    assert depth == 10
+    assert pending_chats >= 6
+    stats = scheduler.stats()
+    assert stats["granted"] == 13
+    assert stats["max_wait_time"] > stats["avg_wait_time"] > 0
@@ -0,0 +1,212 @@
+from datetime import datetime
+import fakeredis
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.db.models import Alert, Base, Transaction, TransactionCategory, User
+from app.services.aggregates import month_start, register_commit_listener, unregister_commit_listener
+from app.services import alerts
+from app.services.alerts import AlertEngine, check_alerts, check_alerts_async
+from app.services.redis_client import AsyncRedisClient
+
+class FakeNotifier:
+    def __init__(self):
+        self.sent = []
+
+    async def __call__(self, telegram_id, text, dedup_key=None):
+        self.sent.append((telegram_id, text))
+        return True
+
+async def make_db(alerts):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with Session() as db:
+        db.add(User(id=1, telegram_id=1001, first_name="Ana", is_active=True))
+        for category, threshold in alerts:
+            db.add(Alert(user_id=1, type="limit", category=category, threshold=threshold, is_active=True))
+        await db.commit()
+    return engine, Session
+
+def make_engine(Session, server=None, notifier=None):
+    client = AsyncRedisClient(client=fakeredis.aioredis.FakeRedis(server=server or fakeredis.FakeServer()))
+    return AlertEngine(Session, notifier or FakeNotifier(), async_client=client, index_ttl=60, enabled=True)
+
+async def test_commit_fires_crossed_alerts_once():
+    db_engine, Session = await make_db([
+        (TransactionCategory.FOOD, 100.0), (TransactionCategory.FOOD, 200.0),
+        (TransactionCategory.FOOD, 300.0), (TransactionCategory.TRANSPORT, 50.0)
+    ])
+    notifier = FakeNotifier()
+    engine = make_engine(Session, notifier=notifier)
+    register_commit_listener(engine.on_commit, with_totals=True)
+
+    async def spend(amount, category=TransactionCategory.FOOD):
+        async with Session() as db:
+            db.add(Transaction(user_id=1, amount=amount, category=category, type="expense", date=datetime.now()))
+            await db.commit()
+        await engine.join()
+
+    try:
+        await spend(150.0)
+        assert notifier.sent == [(1001, "🔔 Alerta: Limite de gastos atingido em food!\nGasto: R$150.00 / Limite: R$100.00")]
+        await spend(60.0)
+        await spend(10.0)
+        assert [text.rsplit("R$", 1)[1] for _, text in notifier.sent] == ["100.00", "200.00"]
+
+        # Outra categoria sem alertas cruzados não dispara nada
+        await spend(20.0, TransactionCategory.TRANSPORT)
+        assert len(notifier.sent) == 2
+
+        stats = engine.stats()
+        assert stats["fired"] == 2 and stats["index_loads"] == 1 and stats["dropped"] == 0
+    finally:
+        unregister_commit_listener(engine.on_commit)
+        await engine.close()
+        await db_engine.dispose()
+
+def test_sync_commit_without_event_loop_evaluates_alerts(tmp_path):
+    sync_engine = create_engine(f"sqlite:///{tmp_path / 'alerts.db'}")
+    Base.metadata.create_all(sync_engine)
+    Session = sessionmaker(bind=sync_engine)
+    db = Session()
+    db.add(User(id=1, telegram_id=1001, first_name="Ana", is_active=True))
+    db.add_all([
+        Alert(user_id=1, type="limit", category=TransactionCategory.FOOD, threshold=threshold, is_active=True)
+        for threshold in (100.0, 200.0)
+    ])
+    db.commit()
+
+    sent = []
+    # Sem event loop, usa só a sessão, o Redis e o notifier síncronos
+    engine = AlertEngine(
+        session_factory=lambda: pytest.fail("sessão assíncrona usada fora do event loop"),
+        notifier=FakeNotifier(),
+        async_client=AsyncRedisClient(client=object()),
+        redis_client=fakeredis.FakeRedis(),
+        sync_session_factory=Session,
+        sync_notifier=lambda telegram_id, text, dedup_key=None: sent.append((telegram_id, text, dedup_key)),
+        index_ttl=60,
+        enabled=True
+    )
+    register_commit_listener(engine.on_commit, with_totals=True)
+    try:
+        for amount in (150.0, 60.0, 10.0):
+            db.add(Transaction(user_id=1, amount=amount, category=TransactionCategory.FOOD, type="expense", date=datetime.now()))
+            db.commit()
+    finally:
+        unregister_commit_listener(engine.on_commit)
+        db.close()
+    month = datetime.now().strftime("%Y-%m")
+    assert [(text.rsplit("R$", 1)[1], key) for _, text, key in sent] == [
+        ("100.00", f"alert:1:{month}"), ("200.00", f"alert:2:{month}")
+    ]
+    stats = engine.stats()
+    assert stats["events"] == 3 and stats["fired"] == 2 and stats["dropped"] == 0 and stats["index_loads"] == 1
+
+async def test_dedup_per_period_and_invalidation():
+    db_engine, Session = await make_db([(TransactionCategory.FOOD, 100.0)])
+    server = fakeredis.FakeServer()
+    month = month_start(datetime.now())
+    engine = make_engine(Session, server)
+
+    assert [a["threshold"] for a in await engine.evaluate(1, "food", month, 120.0)] == [100.0]
+    # Outro processo (mesmo Redis) não dispara de novo no mesmo mês
+    assert await make_engine(Session, server).evaluate(1, "food", month, 130.0) == []
+    # Mês seguinte é outro período
+    assert len(await engine.evaluate(1, "food", month.replace(year=month.year + 1), 120.0)) == 1
+
+    async with Session() as db:
+        db.add(Alert(user_id=1, type="limit", category=TransactionCategory.FOOD, threshold=110.0, is_active=True))
+        await db.commit()
+    assert await engine.evaluate(1, "food", month, 125.0) == []
+    engine.invalidate(1)
+    assert [a["threshold"] for a in await engine.evaluate(1, "food", month, 125.0)] == [110.0]
+
+    # Alterar o limite libera o alerta para disparar de novo no mês
+    async with Session() as db:
+        alert = await db.get(Alert, 1)
+        alert.threshold = 200.0
+        await db.commit()
+    engine.invalidate(1, 1)
+    await engine.join()
+    assert await engine.evaluate(1, "food", month, 150.0) == []
+    assert [a["threshold"] for a in await engine.evaluate(1, "food", month, 210.0)] == [200.0]
+    await engine.close()
+    await db_engine.dispose()
+
+async def test_evaluation_touches_only_crossed_alerts():
+    db_engine, Session = await make_db(
+        [(TransactionCategory.FOOD, float(i)) for i in range(10, 5010, 10)]
+        + [(TransactionCategory.HOUSING, float(i)) for i in range(1, 300)]
+    )
+    engine = make_engine(Session)
+    claims = []
+    claim = engine._claim
+
+    async def counting_claim(alert_id, month):
+        claims.append(alert_id)
+        return await claim(alert_id, month)
+
+    engine._claim = counting_claim
+    month = month_start(datetime.now())
+    assert len(await engine.evaluate(1, "food", month, 55.0)) == 5
+    assert len(await engine.evaluate(1, "food", month, 81.0)) == 3
+    assert await engine.evaluate(1, "food", month, 70.0) == []
+    assert len(claims) == 8
+    assert engine.stats()["index_loads"] == 1
+    await engine.close()
+    await db_engine.dispose()
+
+def test_check_alerts_reads_month_totals():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add(User(id=1, telegram_id=1001, first_name="Ana", balance=20.0))
+    db.add_all([
+        Alert(user_id=1, type="limit", category=TransactionCategory.FOOD, threshold=50.0, is_active=True),
+        Alert(user_id=1, type="limit", category=TransactionCategory.HEALTH, threshold=50.0, is_active=True),
+        Alert(user_id=1, type="low_balance", threshold=100.0, is_active=True),
+        Transaction(user_id=1, amount=80.0, category=TransactionCategory.FOOD, type="expense", date=datetime.now())
+    ])
+    db.commit()
+    assert check_alerts(db, 1) == [
+        {"type": "limit", "category": "food", "current": 80.0, "threshold": 50.0},
+        {"type": "low_balance", "current": 20.0, "threshold": 100.0}
+    ]
+    db.close()
+
+def test_check_alerts_notifies_low_balance_once_per_month(monkeypatch):
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add(User(id=1, telegram_id=1001, first_name="Ana", balance=20.0))
+    db.add(Alert(id=1, user_id=1, type="low_balance", threshold=100.0, is_active=True))
+    db.commit()
+
+    sent = []
+    monkeypatch.setattr(alerts, "alert_engine", AlertEngine(redis_client=fakeredis.FakeRedis(), enabled=True))
+    monkeypatch.setattr(alerts, "send_telegram_notification", lambda *notification: sent.append(notification))
+    assert check_alerts(db, 1) == [{"type": "low_balance", "current": 20.0, "threshold": 100.0}]
+    assert check_alerts(db, 1) == [{"type": "low_balance", "current": 20.0, "threshold": 100.0}]
+    assert sent == [(1001, "🔔 Alerta: Seu saldo está baixo!\nSaldo atual: R$20.00 / Limite: R$100.00", f"alert:1:{datetime.now():%Y-%m}")]
+    db.close()
+
+async def test_check_alerts_async_notifies_low_balance(monkeypatch):
+    db_engine, Session = await make_db([])
+    async with Session() as db:
+        user = await db.get(User, 1)
+        user.balance = 50.0
+        db.add(Alert(user_id=1, type="low_balance", threshold=80.0, is_active=True))
+        await db.commit()
+
+    notifier = FakeNotifier()
+    monkeypatch.setattr(alerts, "alert_engine", make_engine(Session))
+    monkeypatch.setattr(alerts, "send_telegram_notification_async", notifier)
+    async with Session() as db:
+        assert len(await check_alerts_async(db, 1)) == 1
+        assert len(await check_alerts_async(db, 1)) == 1
+    assert notifier.sent == [(1001, "🔔 Alerta: Seu saldo está baixo!\nSaldo atual: R$50.00 / Limite: R$80.00")]
+    await db_engine.dispose()
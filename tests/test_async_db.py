@@ -0,0 +1,30 @@
+import pytest
+from types import SimpleNamespace
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from app.db.database import get_async_database_url
+from app.db.models import Base
+from app.services.user import get_or_create_user_async, deactivate_user_async
+
+@pytest.fixture
+async def async_db():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with Session() as db:
+        yield db
+    await engine.dispose()
+
+def test_async_database_url():
+    assert get_async_database_url("postgresql://u:p@localhost:5432/db") == "postgresql+asyncpg://u:p@localhost:5432/db"
+    assert get_async_database_url("postgresql+psycopg2://u:p@localhost/db") == "postgresql+asyncpg://u:p@localhost/db"
+    assert get_async_database_url("sqlite:///test.db") == "sqlite+aiosqlite:///test.db"
+
+@pytest.mark.asyncio
+async def test_get_or_create_user_async(async_db):
+    telegram_user = SimpleNamespace(id=123, username="test_user", first_name="Test", last_name="User")
+    user = await get_or_create_user_async(async_db, telegram_user)
+    same_user = await get_or_create_user_async(async_db, telegram_user)
+    assert user.id == same_user.id
+    assert await deactivate_user_async(async_db, 123)
+    assert not await deactivate_user_async(async_db, 456)
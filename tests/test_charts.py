@@ -0,0 +1,28 @@
+from concurrent.futures import ThreadPoolExecutor
+from app.services.chart_renderer import ChartRenderer, as_photo
+
+PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+
+def test_render_returns_png_bytes():
+    renderer = ChartRenderer()
+    bar = renderer.render_bar({"Jan/2024": 10.0, "Feb/2024": 20.0}, "Tendência", "Mês", "Valor")
+    pie = renderer.render_pie({"food": 10.0, "transport": 5.0}, "Categorias")
+    assert bar.startswith(PNG_MAGIC)
+    assert pie.startswith(PNG_MAGIC)
+    assert as_photo(pie).getvalue() == pie
+
+def test_pie_groups_small_slices():
+    renderer = ChartRenderer(max_pie_slices=3)
+    labels, values = renderer.prepare_pie_data({"a": 1.0, "b": 5.0, "c": 3.0, "d": 2.0, "e": 0.0})
+    assert list(labels) == ["b", "c", "Outros"]
+    assert list(values) == [5.0, 3.0, 3.0]
+
+def test_render_from_thread_pool():
+    renderer = ChartRenderer()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        charts = list(pool.map(
+            lambda i: renderer.render_pie({"food": float(i + 1), "bills": 2.0}, f"Relatório {i}"),
+            range(16)
+        ))
+    assert all(chart.startswith(PNG_MAGIC) for chart in charts)
+    assert renderer.render_pie({}, "Vazio").startswith(PNG_MAGIC)
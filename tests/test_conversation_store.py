@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+import pytest
+from app.services import ai
+from app.services.ai_cache import SemanticCache
+from app.services.conversation_store import ConversationStore
+from app.services.ollama_client import OllamaClient
+from tests.ollama_stub import OllamaStub
+
+def test_store_bounds_and_eviction():
+    store = ConversationStore(max_users=2, ttl=60, max_context_tokens=5)
+    assert store.get_context(1) is None
+    store.update(1, [1, 2, 3])
+    store.update(2, [4])
+    store.update(3, [5])
+    assert store.get_context(1) is None
+    assert store.get_context(3) == [5]
+
+    store.update(3, list(range(10)))
+    assert store.get_context(3) is None
+    assert store.stats()["truncated"] == 1
+    assert store.stats()["evictions"] == 1
+
+@pytest.fixture
+async def stub():
+    stub = OllamaStub(prompt_eval_delay=0.001)
+    await stub.start()
+    yield stub
+    await stub.stop()
+
+async def test_persona_is_evaluated_once_per_conversation(stub):
+    client = OllamaClient(base_url=stub.url, model="gemma")
+    store = ConversationStore(max_users=10, ttl=60)
+    users = [SimpleNamespace(id=i, first_name=f"User {i}", username=None, created_at=None) for i in range(3)]
+
+    with patch.object(ai, "ollama_client", client), patch.object(ai, "conversation_store", store), \
+         patch.object(ai, "ai_cache", SemanticCache(enabled=False)):
+        for _ in range(4):
+            for user in users:
+                assert await ai.get_ai_response("Posso comprar um tênis novo?", user)
+    await client.close()
+
+    first_turns = [body for body in stub.bodies if "system" in body]
+    follow_ups = [body for body in stub.bodies if "context" in body]
+    assert len(first_turns) == 3 and len(follow_ups) == 9
+    assert all(body["system"].startswith(ai.JULIUS_SYSTEM_PROMPT) for body in first_turns)
+    assert all(body["prompt"] == "Posso comprar um tênis novo?" for body in stub.bodies)
+
+    persona_tokens = len(ai.build_system_prompt(users[0]).split())
+    message_tokens = len("Posso comprar um tênis novo?".split())
+    assert stub.prompt_eval_tokens == 3 * persona_tokens + 12 * message_tokens
+    assert client.stats()["prompt_eval_tokens"] == stub.prompt_eval_tokens
+    assert store.stats()["reused"] == 9
@@ -0,0 +1,132 @@
+import asyncio
+import random
+import time
+from collections import defaultdict
+from telegram import Bot, Update
+from telegram.ext import ApplicationBuilder
+from app.bot.dispatcher import PerChatUpdateProcessor, chat_key, setup_dispatcher
+
+BOT = Bot("123:abc")
+
+def make_update(update_id, chat_id):
+    return Update.de_json({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Test"},
+            "text": "oi"
+        }
+    }, BOT)
+
+def synthetic_trace(chats, updates_per_chat, seed=7):
+    """Updates de vários chats intercalados em ordem aleatória, com atraso por handler."""
+    rng = random.Random(seed)
+    queues = {chat_id: updates_per_chat for chat_id in range(1, chats + 1)}
+    trace = []
+    while queues:
+        chat_id = rng.choice(list(queues))
+        trace.append((make_update(len(trace), chat_id), rng.uniform(0.005, 0.02)))
+        queues[chat_id] -= 1
+        if not queues[chat_id]:
+            del queues[chat_id]
+    return trace
+
+async def replay(processor, trace):
+    """Entrega o trace como o Application do PTB: uma task por update, na ordem de chegada."""
+    seen = defaultdict(list)
+    running = 0
+    peak = 0
+
+    async def handler(update, delay):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(delay)
+        seen[update.effective_chat.id].append(update.update_id)
+        running -= 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        asyncio.create_task(processor.process_update(update, handler(update, delay)))
+        for update, delay in trace
+    ))
+    return seen, peak, time.perf_counter() - start
+
+async def test_replay_keeps_chat_order_and_runs_chats_in_parallel():
+    trace = synthetic_trace(chats=20, updates_per_chat=10)
+    processor = PerChatUpdateProcessor(max_concurrent=8)
+    seen, peak, elapsed = await replay(processor, trace)
+
+    expected = defaultdict(list)
+    for update, _ in trace:
+        expected[update.effective_chat.id].append(update.update_id)
+    assert seen == expected
+    assert peak == 8
+    # Em série o trace levaria a soma dos atrasos; com 8 vagas, bem menos
+    serial = sum(delay for _, delay in trace)
+    assert elapsed < serial / 4
+    assert processor.stats()["processed"] == len(trace)
+    assert processor.stats()["active_chats"] == 0
+
+async def test_busy_chat_does_not_take_slots_from_other_chats():
+    processor = PerChatUpdateProcessor(max_concurrent=2)
+    finished = []
+
+    async def handler(update, delay):
+        await asyncio.sleep(delay)
+        finished.append(update.effective_chat.id)
+
+    tasks = [asyncio.create_task(processor.process_update(make_update(i, 1), handler(make_update(i, 1), 0.02))) for i in range(10)]
+    tasks += [asyncio.create_task(processor.process_update(make_update(10 + i, 2 + i), handler(make_update(10 + i, 2 + i), 0.001))) for i in range(5)]
+    await asyncio.sleep(0)
+    assert processor.chat_pending(1) == 10
+    assert processor.stats()["in_flight"] == 2 and processor.stats()["waiting"] == 13
+    await asyncio.gather(*tasks)
+    # Os outros chats terminam enquanto o chat 1 ainda processa sua fila
+    last_other = max(finished.index(chat_id) for chat_id in range(2, 7))
+    assert last_other < [i for i, chat_id in enumerate(finished) if chat_id == 1][1]
+    assert processor.chat_pending(1) == 0
+
+async def test_in_flight_counts():
+    processor = PerChatUpdateProcessor(max_concurrent=4)
+    release = asyncio.Event()
+
+    async def handler():
+        await release.wait()
+
+    tasks = [asyncio.create_task(processor.process_update(make_update(i, i % 3), handler())) for i in range(6)]
+    await asyncio.sleep(0)
+    stats = processor.stats()
+    assert stats["in_flight"] == 3 and stats["waiting"] == 3
+    assert stats["active_chats"] == 3 and processor.chat_pending(0) == 2
+    release.set()
+    await asyncio.gather(*tasks)
+    assert processor.stats()["in_flight"] == 0 and processor.stats()["waiting"] == 0
+
+async def test_cancelled_update_is_discarded():
+    processor = PerChatUpdateProcessor(max_concurrent=1)
+    release = asyncio.Event()
+
+    async def handler():
+        await release.wait()
+
+    first = asyncio.create_task(processor.process_update(make_update(1, 1), handler()))
+    second = asyncio.create_task(processor.process_update(make_update(2, 1), handler()))
+    await asyncio.sleep(0)
+    second.cancel()
+    await asyncio.gather(second, return_exceptions=True)
+    assert processor.stats()["waiting"] == 0 and processor.chat_pending(1) == 1
+    release.set()
+    await first
+    assert processor.stats()["processed"] == 1
+
+def test_chat_key_and_setup_dispatcher():
+    assert chat_key(make_update(1, 42)) == 42
+    assert chat_key(object()) is None
+    processor = PerChatUpdateProcessor(max_concurrent=4, max_pending=100)
+    application = setup_dispatcher(ApplicationBuilder().token("123:abc"), processor)
+    assert application.update_processor is processor
+    assert application.concurrent_updates == 100
+    assert application.handlers[0]
@@ -0,0 +1,120 @@
+import smtplib
+import threading
+import pytest
+from app.services.email import EmailQueueFullError, EmailService, SMTPPool
+
+class FakeSMTPServer:
+    """Registra conexões, logins e mensagens; levanta os erros programados em ordem."""
+    def __init__(self, errors=None):
+        self.errors = list(errors or [])
+        self.connects = 0
+        self.logins = 0
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def __call__(self, host, port, timeout=None):
+        with self.lock:
+            self.connects += 1
+        return FakeSMTP(self)
+
+class FakeSMTP:
+    def __init__(self, server):
+        self.server = server
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        with self.server.lock:
+            self.server.logins += 1
+
+    def send_message(self, msg):
+        with self.server.lock:
+            if self.server.errors:
+                raise self.server.errors.pop(0)
+            self.server.sent.append((msg["To"], msg["Subject"], msg))
+
+    def quit(self):
+        pass
+
+def make_service(server, **kwargs):
+    pool = SMTPPool(
+        host="smtp.test", port=587, username="bot@test", password="x",
+        size=kwargs.pop("size", 2), factory=server
+    )
+    options = {"workers": 2, "retry_base_delay": 0.001, "digest_window": 0.05, **kwargs}
+    return EmailService(pool, **options)
+
+def test_sessions_are_reused_across_messages():
+    server = FakeSMTPServer()
+    service = make_service(server)
+    futures = [service.submit(f"user{i}@test", "Assunto", "corpo") for i in range(50)]
+    assert all(future.result(2) for future in futures)
+    service.close()
+
+    assert len(server.sent) == 50
+    # Uma conexão (e um login) por sessão do pool, não por mensagem
+    assert server.connects == server.logins <= 2
+    assert service.stats()["sent"] == 50
+
+def test_digest_groups_messages_per_recipient():
+    server = FakeSMTPServer()
+    service = make_service(server)
+    futures = [
+        service.submit("admin@test", "Alerta de CPU", "cpu alta", "<html><body><p>cpu</p></body></html>", digest_key="monitoring"),
+        service.submit("admin@test", "Alerta de Disco", "disco cheio", digest_key="monitoring"),
+        service.submit("admin@test", "Alerta de Memória", "memória alta", "<p>memória</p>", digest_key="monitoring"),
+        service.submit("other@test", "Alerta de CPU", "cpu alta", digest_key="monitoring")
+    ]
+    assert all(future.result(2) for future in futures)
+    service.close()
+
+    sent = sorted((to, subject) for to, subject, _ in server.sent)
+    assert sent == [("admin@test", "Alerta de CPU (+2)"), ("other@test", "Alerta de CPU")]
+    combined = next(msg for to, _, msg in server.sent if to == "admin@test")
+    plain, html = [part.get_payload(decode=True).decode() for part in combined.get_payload()]
+    assert "cpu alta" in plain and "disco cheio" in plain
+    # Um único documento com o conteúdo de cada mensagem
+    assert html == "<html><body><p>cpu</p><hr><pre>disco cheio</pre><hr><p>memória</p></body></html>"
+    assert service.stats()["digested"] == 4
+
+def test_digest_parts_count_towards_the_queue_limit():
+    server = FakeSMTPServer()
+    service = make_service(server, max_queue=2, digest_window=60)
+    futures = [service.submit("admin@test", f"Alerta {i}", "corpo", digest_key="monitoring") for i in range(2)]
+    with pytest.raises(EmailQueueFullError):
+        service.submit("admin@test", "Alerta 2", "corpo", digest_key="monitoring")
+    with pytest.raises(EmailQueueFullError):
+        service.submit("other@test", "Assunto", "corpo")
+    assert service.stats()["rejected"] == 2
+
+    service.close()
+    assert all(future.result(2) for future in futures)
+    assert [subject for _, subject, _ in server.sent] == ["Alerta 0 (+1)"]
+
+def test_transient_errors_are_retried_and_permanent_ones_are_not():
+    server = FakeSMTPServer([
+        smtplib.SMTPServerDisconnected("conexão perdida"),
+        smtplib.SMTPResponseException(451, b"tente mais tarde")
+    ])
+    service = make_service(server, workers=1, max_retries=2)
+    assert service.send("a@test", "Assunto", "corpo", timeout=2)
+
+    server.errors = [smtplib.SMTPResponseException(550, b"caixa inexistente")]
+    assert not service.send("b@test", "Assunto", "corpo", timeout=2)
+
+    server.errors = [ConnectionResetError()] * 3
+    assert not service.send("c@test", "Assunto", "corpo", timeout=2)
+    service.close()
+
+    assert [to for to, _, _ in server.sent] == ["a@test"]
+    stats = service.stats()
+    assert (stats["sent"], stats["failed"], stats["retries"]) == (1, 2, 4)
+    # Só as sessões com erro de conexão são descartadas e refeitas
+    assert server.connects == stats["pool"]["discarded"] == 4
+
+def test_missing_settings_fail_without_connecting():
+    server = FakeSMTPServer()
+    service = EmailService(SMTPPool(host="smtp.test", port=587, username="", password="", factory=server))
+    assert not service.send("a@test", "Assunto", "corpo")
+    assert server.connects == 0
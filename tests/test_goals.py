@@ -0,0 +1,110 @@
+from datetime import date
+from types import SimpleNamespace
+import fakeredis
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.db.models import Base, FinancialGoal, User
+from app.services.fanout import MessageFanout
+from app.services.goals import (
+    STATUS_LABELS,
+    create_goal,
+    get_goal_progress,
+    get_user_goals,
+    goal_progress_arrays,
+    render_goal_digest,
+    update_goal_progress,
+)
+from app.services.redis_client import AsyncRedisClient
+from app.services.reminders import GoalDigestJob, ReminderCheckpoint
+
+TODAY = date(2024, 3, 1)
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text):
+        self.sent.append((chat_id, text))
+
+def test_progress_metrics():
+    metrics = goal_progress_arrays(
+        [1000.0, 1000.0, 1000.0, 0.0, 500.0],
+        [850.0, 500.0, 100.0, 0.0, 600.0],
+        [date(2024, 3, 11).toordinal(), date(2024, 4, 1).toordinal(), date(2024, 2, 20).toordinal(),
+         date(2024, 3, 5).toordinal(), date(2024, 3, 2).toordinal()],
+        TODAY
+    )
+    assert metrics["progress"].tolist() == [85.0, 50.0, 10.0, 100.0, 120.0]
+    assert metrics["remaining"].tolist() == [150.0, 500.0, 900.0, 0.0, 0.0]
+    assert metrics["days_left"].tolist() == [10, 31, -10, 4, 1]
+    assert np.allclose(metrics["daily_needed"], [15.0, 500 / 31, 900.0, 0.0, 0.0])
+    assert [STATUS_LABELS[i] for i in metrics["status"]] == ["🎯 QUASE LÁ", "👍 NO CAMINHO", "⚠️ ATRASADA", "🎯 QUASE LÁ", "🎯 QUASE LÁ"]
+
+    goal = SimpleNamespace(target_amount=1000.0, current_amount=850.0, deadline=date(2024, 3, 11))
+    assert get_goal_progress(goal, TODAY) == {
+        "progress": 85.0, "remaining": 150.0, "days_left": 10, "daily_needed": 15.0, "status": 2
+    }
+
+def test_goal_crud():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    goal = create_goal(db, 1, "Viagem", 1000.0, date(2024, 12, 1))
+    assert update_goal_progress(db, goal.id, 1, 400.0).current_amount == 400.0
+    assert [g.name for g in get_user_goals(db, 1)] == ["Viagem"]
+    assert update_goal_progress(db, goal.id, 1, 600.0).is_completed
+    assert get_user_goals(db, 1) == []
+    assert update_goal_progress(db, goal.id, 2, 1.0) is None
+    db.close()
+
+def test_render_matches_digest_format():
+    rows = [
+        (1, 1001, "Ana", "Viagem", 1000.0, 850.0, date(2024, 3, 11)),
+        (1, 1001, "Ana", "Carro", 1000.0, 100.0, date(2024, 2, 20)),
+        (2, 1002, "Bia", "Reserva", 200.0, 0.0, date(2024, 5, 1)),
+    ]
+    messages = render_goal_digest(rows, TODAY)
+    assert [(user_id, chat_id) for user_id, chat_id, _ in messages] == [(1, 1001), (2, 1002)]
+    assert messages[0][2] == (
+        "📊 Ana, aqui está o progresso das suas metas:\n\n"
+        "🎯 QUASE LÁ - Viagem\n"
+        "Meta: R$1000.00\n"
+        "Atual: R$850.00 (85.0%)\n"
+        "Faltam: R$150.00 em 10 dias\n"
+        "Necessário por dia: R$15.00\n\n"
+        "⚠️ ATRASADA - Carro\n"
+        "Meta: R$1000.00\n"
+        "Atual: R$100.00 (10.0%)\n"
+        "Faltam: R$900.00 em -10 dias\n"
+        "Necessário por dia: R$900.00\n\n"
+        "Use /goals para mais detalhes."
+    )
+    assert render_goal_digest([], TODAY) == []
+
+async def test_digest_job_sends_one_message_per_user():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with Session() as db:
+        for i in range(1, 6):
+            db.add(User(id=i, telegram_id=2000 + i, first_name=f"U{i}", is_active=i != 5))
+            for j in range(3):
+                db.add(FinancialGoal(user_id=i, name=f"Meta {j}", target_amount=100.0, current_amount=10.0 * j,
+                                     deadline=date(2024, 6, 1), is_completed=(i == 4)))
+        await db.commit()
+
+    checkpoint = ReminderCheckpoint("goals", async_client=AsyncRedisClient(
+        client=fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+    ))
+    job = GoalDigestJob(Session, MessageFanout(global_rate=10000, per_chat_interval=0), checkpoint, chunk_size=2)
+    bot = FakeBot()
+    summary = await job.run(bot, TODAY)
+
+    # Usuário 4 só tem metas concluídas e o 5 está inativo
+    assert [chat_id for chat_id, _ in sorted(bot.sent)] == [2001, 2002, 2003]
+    assert all(text.count("Meta: R$100.00") == 3 for _, text in bot.sent)
+    assert summary["chunks"] == 2 and summary["sent"] == 3
+    await engine.dispose()
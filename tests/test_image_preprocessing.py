@@ -0,0 +1,38 @@
+import io
+import numpy as np
+from PIL import Image
+from app.services.image_preprocessing import ImagePreprocessor, detect_receipt_region, otsu_threshold
+
+def receipt_photo(size=(2000, 3000), box=(500, 400, 1400, 2600)):
+    photo = np.full((size[1], size[0]), 50, dtype=np.uint8)
+    left, top, right, bottom = box
+    photo[top:bottom, left:right] = 230
+    photo[top + 100:top + 140, left + 100:right - 100] = 10
+    return photo
+
+def test_otsu_separates_paper_from_background():
+    threshold = otsu_threshold(receipt_photo())
+    assert 50 <= threshold < 230
+
+def test_detect_receipt_region():
+    assert detect_receipt_region(receipt_photo(), margin=5) == (495, 395, 1405, 2605)
+    assert detect_receipt_region(np.full((100, 100), 200, dtype=np.uint8)) is None
+
+def test_preprocess_crops_downscales_and_binarizes():
+    preprocessor = ImagePreprocessor({"target_dpi": 300, "receipt_width_mm": 50.8, "crop_margin": 0})
+    image = preprocessor.preprocess(Image.fromarray(receipt_photo()).convert("RGB"))
+    assert image.mode == "L"
+    assert image.width == 600
+    assert abs(image.height - round(2200 * 600 / 900)) <= 1
+    assert set(np.unique(np.asarray(image))) <= {0, 255}
+
+def test_preprocess_applies_exif_orientation_and_can_be_disabled():
+    buffer = io.BytesIO()
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    Image.new("RGB", (300, 100), "white").save(buffer, format="JPEG", exif=exif)
+    image = ImagePreprocessor({"crop": False, "binarize": False}).open(buffer.getvalue())
+    assert image.size == (100, 300)
+
+    original = Image.new("RGB", (3000, 100), "white")
+    assert ImagePreprocessor({"enabled": False}).preprocess(original) is original
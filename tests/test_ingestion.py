@@ -0,0 +1,42 @@
+import asyncio
+import pytest
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from app.db.models import Base, Transaction
+from app.services.ingestion import TransactionIngestor
+
+@pytest.fixture
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(bind=engine, expire_on_commit=False)
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_group_commit(session_factory):
+    ingestor = TransactionIngestor(session_factory, max_batch_size=50, max_delay_ms=20)
+    ids = await asyncio.gather(*(
+        ingestor.submit(1, float(i), "food") for i in range(120)
+    ))
+    await ingestor.close()
+
+    assert len(set(ids)) == 120
+    async with session_factory() as db:
+        total = await db.scalar(select(func.count(Transaction.id)))
+    assert total == 120
+
+@pytest.mark.asyncio
+async def test_failed_row_only_fails_its_caller(session_factory):
+    ingestor = TransactionIngestor(session_factory, max_batch_size=10, max_delay_ms=20)
+    results = await asyncio.gather(
+        ingestor.submit(1, 10.0, "food"),
+        ingestor.submit(object(), 20.0, "food"),
+        ingestor.submit(1, 30.0, "food"),
+        return_exceptions=True
+    )
+    await ingestor.close()
+
+    assert isinstance(results[0], int)
+    assert isinstance(results[1], Exception)
+    assert isinstance(results[2], int)
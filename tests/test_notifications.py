@@ -0,0 +1,107 @@
+import asyncio
+import json
+import fakeredis
+import redis
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
+from app.services.notifications import NotificationOutbox
+from app.services.redis_client import AsyncRedisClient
+
+class FakeBot:
+    """send_message que levanta os erros programados para cada chat, em ordem."""
+    def __init__(self, errors=None):
+        self.errors = {chat_id: list(chat_errors) for chat_id, chat_errors in (errors or {}).items()}
+        self.sent = []
+
+    async def send_message(self, chat_id, text):
+        pending = self.errors.get(chat_id)
+        if pending:
+            raise pending.pop(0)
+        self.sent.append((chat_id, text))
+
+def make_outbox(bot, server=None, **kwargs):
+    options = {
+        "global_rate": 10000, "per_chat_interval": 0, "retry_base_delay": 0.001, "poll_interval": 0.01,
+        "batch_size": 10, "workers": 2, **kwargs
+    }
+    client = AsyncRedisClient(client=fakeredis.aioredis.FakeRedis(server=server or fakeredis.FakeServer()))
+    return NotificationOutbox(async_client=client, bot=bot, **options)
+
+async def wait_for(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+async def test_workers_deliver_queued_notifications_once():
+    bot = FakeBot()
+    outbox = make_outbox(bot)
+    await outbox.start()
+
+    assert await outbox.enqueue(1, "oi", dedup_key="alert:1:2024-03")
+    assert not await outbox.enqueue(1, "oi", dedup_key="alert:1:2024-03")
+    counts = await outbox.enqueue_many([(chat_id, f"msg {chat_id}", f"bills:{chat_id}") for chat_id in range(2, 30)]
+                                       + [(2, "repetida", "bills:2")])
+    assert counts == {"queued": 28, "duplicates": 1}
+
+    await wait_for(lambda: len(bot.sent) == 29)
+    await outbox.stop()
+    assert sorted(chat_id for chat_id, _ in bot.sent) == list(range(1, 30))
+    assert await outbox.backlog() == {"ready": 0, "delayed": 0, "inflight": 0, "dead": 0, "local": 0}
+    stats = outbox.stats()
+    assert stats["sent"] == 29 and stats["duplicates"] == 2 and stats["batches"] >= 3
+
+async def test_retries_flood_control_and_failures():
+    bot = FakeBot({
+        1: [NetworkError("timeout"), NetworkError("timeout")],
+        2: [RetryAfter(0.05)],
+        3: [BadRequest("chat not found")],
+        4: [Forbidden("bot was blocked by the user")],
+        5: [NetworkError("down")] * 3
+    })
+    outbox = make_outbox(bot, max_attempts=3)
+    await outbox.enqueue_many([(chat_id, "oi", None) for chat_id in range(1, 6)])
+    await outbox.start()
+    await wait_for(lambda: outbox.stats()["failed"] == 2 and len(bot.sent) == 2)
+    await outbox.stop()
+
+    assert sorted(chat_id for chat_id, _ in bot.sent) == [1, 2]
+    stats = outbox.stats()
+    assert (stats["retries"], stats["flood_waits"], stats["blocked"]) == (5, 1, 1)
+    backlog = await outbox.backlog()
+    assert (backlog["ready"], backlog["delayed"], backlog["inflight"], backlog["dead"]) == (0, 0, 0, 2)
+    dead = [json.loads(p) for p in await outbox.async_redis.client.lrange(outbox.dead_key, 0, -1)]
+    assert sorted((m["chat_id"], m["attempts"]) for m in dead) == [(3, 1), (5, 3)]
+
+async def test_unacknowledged_batch_is_redelivered_after_lease():
+    server = fakeredis.FakeServer()
+    crashed = make_outbox(FakeBot(), server, lease=0.05)
+    await crashed.enqueue_many([(1, "a", None), (2, "b", None)])
+    batch, local = await crashed._claim()
+    assert len(batch) == 2 and not local
+    # O worker caiu antes de concluir o lote
+    bot = FakeBot()
+    other = make_outbox(bot, server, lease=0.05)
+    assert await other.process_batch() == 0
+    await asyncio.sleep(0.06)
+    assert await other.process_batch() == 2
+    assert sorted(bot.sent) == [(1, "a"), (2, "b")]
+    assert (await other.backlog())["inflight"] == 0
+
+async def test_local_queue_when_redis_is_down():
+    server = fakeredis.FakeServer()
+    server.connected = False
+    bot = FakeBot()
+    outbox = make_outbox(bot, server)
+    assert await outbox.enqueue(1, "oi", dedup_key="k")
+    assert not await outbox.enqueue(1, "oi", dedup_key="k")
+    assert outbox.stats()["local_fallbacks"] == 2
+    assert await outbox.process_batch() == 1
+    assert bot.sent == [(1, "oi")]
+
+def test_submit_without_redis_or_workers_is_not_counted_as_queued():
+    # Processo sem workers (ex.: scripts/monitor.py): a fila local nunca seria drenada
+    down = redis.Redis(port=1, socket_connect_timeout=0.1)
+    outbox = make_outbox(FakeBot(), redis_client=down)
+    assert not outbox.submit(1, "alerta")
+    assert outbox.stats()["lost"] == 1 and outbox.stats()["queued"] == 0
+    assert not outbox._local
@@ -0,0 +1,72 @@
+import io
+from unittest.mock import patch
+from PIL import Image, ImageDraw
+from app.services import receipt
+from app.services.ocr_cache import OCRCache, dhash
+
+def receipt_image(fmt="PNG", quality=95, total="12,50"):
+    image = Image.new("L", (400, 600), 240)
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((40, 80, 360, 120), fill=20)
+    draw.text((60, 300), f"TOTAL R$ {total}", fill=0)
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt, quality=quality)
+    return buffer.getvalue()
+
+RESULT = {"amount": 12.5, "date": "01/02/2024", "description": "Padaria", "raw_text": "Padaria R$ 12,50"}
+
+def test_lookup_by_file_id_hash_and_dhash():
+    cache = OCRCache(max_entries=16, ttl=60, enabled=True, perceptual=True)
+    image = receipt_image()
+    assert cache.get(image, "unique-1") is None
+    cache.set(RESULT, image, "unique-1")
+
+    assert cache.get(file_unique_id="unique-1") == RESULT
+    assert cache.get(image, "unique-2") == RESULT
+    assert cache.get(receipt_image("JPEG", 70), "unique-3") == RESULT
+    # O hit pelo sha256 preencheu a chave do novo file_unique_id
+    assert cache.get(file_unique_id="unique-2") == RESULT
+
+    stats = cache.stats()
+    assert stats["hits_by_key"] == {"file_id": 2, "sha256": 1, "dhash": 1}
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.8
+
+def test_entries_are_scoped_by_user_and_perceptual_hits_confirmed():
+    cache = OCRCache(max_entries=16, ttl=60, enabled=True, perceptual=True)
+    image = receipt_image()
+    cache.set(RESULT, image, "unique-1", user_id=1)
+    assert cache.get(image, "unique-1", user_id=2) is None
+    assert cache.get(image, "unique-1", user_id=1) == RESULT
+
+    # Mesmo modelo de comprovante, outro valor: o dHash curto colide, o fino não
+    other = receipt_image(total="98,10")
+    assert dhash(other) == dhash(image)
+    assert cache.get(other, "unique-2", user_id=1) is None
+    assert cache.stats()["unconfirmed"] == 1
+
+def test_returns_copies_and_skips_errors():
+    cache = OCRCache(max_entries=16, ttl=60, enabled=True, perceptual=False)
+    cache.set({"error": "falhou"}, b"img", "unique-err")
+    assert cache.get(b"img", "unique-err") is None
+
+    cache.set(RESULT, b"img")
+    cached = cache.get(b"img")
+    cached["amount"] = 0
+    assert cache.get(b"img")["amount"] == 12.5
+
+def test_dhash_ignores_undecodable_bytes():
+    assert dhash(b"not an image") is None
+    assert len(dhash(receipt_image())) == 16
+
+def test_process_receipt_image_runs_tesseract_once():
+    cache = OCRCache(max_entries=16, ttl=60, enabled=True, perceptual=False)
+    image = receipt_image()
+    with patch.object(receipt, "ocr_cache", cache), \
+         patch.object(receipt.pytesseract, "image_to_string", return_value="Padaria R$ 12,50 01/02/2024") as ocr:
+        first = receipt.process_receipt_image(image, "unique-1")
+        second = receipt.process_receipt_image(image, "unique-1")
+    assert first == second
+    assert first["amount"] == 12.5
+    assert ocr.call_count == 1
+    assert cache.stats()["hits"] == 1
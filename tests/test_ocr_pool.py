@@ -0,0 +1,64 @@
+import asyncio
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+import pytest
+from app.services.ocr_pool import OCRWorkerPool, OCRQueueFullError
+
+def fake_ocr(image_data, tesseract_cmd, lang, timeout):
+    if image_data == b"crash":
+        # Simula um Tesseract que derruba o processo (segfault, OOM)
+        os._exit(1)
+    time.sleep(float(image_data.decode()))
+    return f"TOTAL R$ 10,00 ({lang})"
+
+@pytest.fixture
+def pool():
+    pool = OCRWorkerPool(max_workers=2, max_pending=2, timeout=5, worker=fake_ocr)
+    yield pool
+    pool.shutdown()
+
+@pytest.mark.asyncio
+async def test_submit_runs_in_worker_process(pool):
+    assert await pool.submit(b"0") == "TOTAL R$ 10,00 (por)"
+    assert pool.stats()["completed"] == 1
+
+@pytest.mark.asyncio
+async def test_backpressure_when_queue_is_full(pool):
+    running = [asyncio.create_task(pool.submit(b"0.5")) for _ in range(2)]
+    await asyncio.sleep(0.05)
+    with pytest.raises(OCRQueueFullError):
+        await pool.submit(b"0")
+    waiting = asyncio.create_task(pool.submit(b"0", wait=True))
+    await asyncio.gather(*running, waiting)
+    assert pool.stats()["rejected"] == 1
+
+@pytest.mark.asyncio
+async def test_job_timeout(pool):
+    with pytest.raises(asyncio.TimeoutError):
+        await pool.submit(b"1", timeout=0.1)
+    assert pool.stats()["timed_out"] == 1
+    # O processo continua rodando o job: a vaga só volta quando ele termina
+    assert pool.pending == 1
+    await asyncio.sleep(1.2)
+    assert pool.pending == 0
+
+@pytest.mark.asyncio
+async def test_timed_out_jobs_keep_their_slots(pool):
+    for _ in range(2):
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.submit(b"1", timeout=0.1)
+    with pytest.raises(OCRQueueFullError):
+        await pool.submit(b"0")
+    assert await pool.submit(b"0", wait=True) == "TOTAL R$ 10,00 (por)"
+
+@pytest.mark.asyncio
+async def test_crashed_worker_is_replaced(pool):
+    with pytest.raises(BrokenProcessPool):
+        await pool.submit(b"crash")
+    # O pool quebrado é descartado: a vaga volta e o próximo job roda em um pool novo
+    for _ in range(3):
+        assert await pool.submit(b"0") == "TOTAL R$ 10,00 (por)"
+    await asyncio.sleep(0)
+    assert pool.pending == 0
+    assert pool.stats()["failed"] == 1
@@ -0,0 +1,96 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+import pytest
+from app.bot.streaming import stream_to_message
+from app.services import ai
+from app.services.ai_cache import SemanticCache
+from app.services.conversation_store import ConversationStore
+from app.services.ollama_client import OllamaClient, OllamaError
+from tests.ollama_stub import OllamaStub
+
+@pytest.fixture
+async def stub():
+    stub = OllamaStub(first_token_delay=0.05, token_delay=0.05)
+    await stub.start()
+    yield stub
+    await stub.stop()
+
+def make_client(stub, **config):
+    return OllamaClient(base_url=stub.url, model="gemma", config=config)
+
+async def test_stream_yields_tokens_before_generation_ends(stub):
+    client = make_client(stub)
+    start = time.perf_counter()
+    arrivals = []
+    async for chunk in client.stream("Olá"):
+        arrivals.append((chunk, time.perf_counter() - start))
+    await client.close()
+
+    assert "".join(chunk for chunk, _ in arrivals) == "Ah, claro! Economize dinheiro."
+    time_to_first_token = arrivals[0][1]
+    total = arrivals[-1][1]
+    assert time_to_first_token < total - 0.1
+    assert stub.bodies[0]["stream"] is True
+    assert client.last_stats["eval_count"] == 4
+
+async def test_connections_are_reused_and_concurrency_is_limited(stub):
+    stub.first_token_delay = stub.token_delay = 0.01
+    client = make_client(stub, max_concurrency=2, max_connections=2)
+    start = time.perf_counter()
+    responses = await asyncio.gather(*(client.generate(f"pergunta {i}") for i in range(20)))
+    elapsed = time.perf_counter() - start
+    await client.close()
+
+    assert all(response == "Ah, claro! Economize dinheiro." for response in responses)
+    assert stub.max_active <= 2
+    assert stub.connections <= 2
+    print(f"requisições/s: {len(responses) / elapsed:.1f}, conexões: {stub.connections}")
+
+async def test_errors_and_timeouts(stub):
+    with pytest.raises(OllamaError):
+        await OllamaClient(base_url=stub.url, model="missing").generate("Olá")
+
+    stub.first_token_delay = 1
+    client = make_client(stub, read_timeout=0.1)
+    with pytest.raises(asyncio.TimeoutError):
+        await client.generate("Olá")
+    await client.close()
+    assert client.stats()["errors"] == 1
+
+async def test_get_ai_response_and_streamed_edits(stub):
+    user = SimpleNamespace(id=1, first_name="Chris", username="chris", created_at=None)
+    client = make_client(stub)
+    with patch.object(ai, "ollama_client", client), patch.object(ai, "conversation_store", ConversationStore()), \
+         patch.object(ai, "ai_cache", SemanticCache(enabled=False)):
+        assert await ai.get_ai_response("Posso comprar?", user) == "Ah, claro! Economize dinheiro."
+
+        bot = SimpleNamespace(
+            send_message=AsyncMock(return_value=SimpleNamespace(message_id=10)),
+            edit_message_text=AsyncMock()
+        )
+        text = await stream_to_message(bot, 1, ai.stream_ai_response("Posso comprar?", user), min_interval=0)
+    await client.close()
+
+    assert text == "Ah, claro! Economize dinheiro."
+    assert bot.send_message.await_count == 1
+    assert bot.edit_message_text.await_count >= 2
+    assert bot.edit_message_text.await_args.kwargs["text"] == text
+
+async def test_chunk_over_two_messages_is_split_within_the_limit():
+    async def chunks():
+        yield "a" * 4096 + "b" * 4096 + "c" * 808
+
+    bot = SimpleNamespace(
+        send_message=AsyncMock(return_value=SimpleNamespace(message_id=10)),
+        edit_message_text=AsyncMock()
+    )
+    text = await stream_to_message(bot, 1, chunks(), min_interval=0)
+
+    sent = [call.kwargs["text"] for call in bot.send_message.await_args_list]
+    edited = [call.kwargs["text"] for call in bot.edit_message_text.await_args_list]
+    assert all(len(message) <= 4096 for message in sent + edited)
+    assert sent == ["…", "b" * 4096, "c" * 808]
+    assert edited == ["a" * 4096]
+    assert text == "a" * 4096 + "b" * 4096 + "c" * 808
@@ -0,0 +1,158 @@
+"""
+Regressão de planos de consulta da tabela de transações.
+
+Carrega um volume sintético (QUERY_PLAN_ROWS, padrão 20 mil linhas; use
+QUERY_PLAN_ROWS=1000000 para a verificação com volume de produção),
+executa as consultas dos serviços capturando o SQL emitido e roda EXPLAIN
+em cada uma, falhando se alguma tabela grande for lida por varredura
+sequencial. Por padrão usa SQLite; defina QUERY_PLAN_DATABASE_URL para
+rodar contra um PostgreSQL descartável.
+"""
+import os
+import random
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Alert, Base, Receipt, Transaction, TransactionCategory, User
+from app.services import alerts, charts, receipt
+from app.services.aggregates import get_month_total, rebuild_aggregates
+
+ROWS = int(os.getenv("QUERY_PLAN_ROWS", "20000"))
+USERS = max(ROWS // 100, 1)
+LARGE_TABLES = {"transactions", "spending_aggregates", "receipts"}
+TARGET_USER = 1
+NOW = datetime.now()
+
+def _load_dataset(engine):
+    rng = random.Random(42)
+    categories = [category.value for category in TransactionCategory]
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"id": i, "telegram_id": 100000 + i, "first_name": f"User {i}", "balance": 100.0}
+            for i in range(1, USERS + 1)
+        ])
+        batch = []
+        for i in range(ROWS):
+            batch.append({
+                "user_id": rng.randint(1, USERS),
+                "amount": round(rng.uniform(1, 500), 2),
+                "category": rng.choice(categories),
+                "type": "income" if rng.random() < 0.1 else "expense",
+                "date": NOW - timedelta(minutes=rng.randint(0, 60 * 24 * 730))
+            })
+            if len(batch) == 50000:
+                conn.execute(Transaction.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(Transaction.__table__.insert(), batch)
+
+        conn.execute(Receipt.__table__.insert(), [
+            {
+                "user_id": rng.randint(1, USERS),
+                "file_id": f"file-{i}",
+                "amount": 10.0,
+                "date": NOW - timedelta(minutes=rng.randint(0, 60 * 24 * 730))
+            }
+            for i in range(max(ROWS // 10, 1))
+        ])
+        conn.execute(Alert.__table__.insert(), [
+            {"user_id": TARGET_USER, "type": "limit", "category": "FOOD", "threshold": 10 ** 9, "is_active": True},
+            {"user_id": TARGET_USER, "type": "low_balance", "category": None, "threshold": -1.0, "is_active": True},
+        ])
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    url = os.getenv("QUERY_PLAN_DATABASE_URL")
+    if url is None:
+        url = f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}"
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    _load_dataset(engine)
+
+    db = sessionmaker(bind=engine)()
+    rebuild_aggregates(db)
+    db.close()
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    yield engine
+    if os.getenv("QUERY_PLAN_DATABASE_URL"):
+        Base.metadata.drop_all(engine)
+    engine.dispose()
+
+def _capture(engine, func):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    db = sessionmaker(bind=engine)()
+    try:
+        func(db)
+    finally:
+        db.close()
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    assert statements, "nenhuma consulta capturada"
+    return statements
+
+def _sqlite_seq_scans(conn, statement, parameters):
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    scans = []
+    for row in rows:
+        detail = row[-1]
+        # Só SEARCH ... USING ... é busca por índice; SCAN t USING (COVERING) INDEX
+        # percorre o índice inteiro
+        match = re.match(r"SCAN (\w+)", detail)
+        if match and match.group(1) in LARGE_TABLES:
+            scans.append(detail)
+    return scans
+
+def _postgres_seq_scans(conn, statement, parameters):
+    plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+    scans = []
+
+    def walk(node):
+        if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") in LARGE_TABLES:
+            scans.append(node["Relation Name"])
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan[0]["Plan"])
+    return scans
+
+def _seq_scans(engine, statements):
+    found = []
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            if engine.dialect.name == "postgresql":
+                scans = _postgres_seq_scans(conn, statement, parameters)
+            else:
+                scans = _sqlite_seq_scans(conn, statement, parameters)
+            found.extend((statement, scan) for scan in scans)
+    return found
+
+SERVICE_QUERIES = {
+    "charts.get_category_spending": lambda db: charts.get_category_spending(
+        db, TARGET_USER, NOW - timedelta(days=75), NOW
+    ),
+    "charts.get_monthly_spending": lambda db: charts.get_monthly_spending(db, TARGET_USER),
+    "charts.get_spending_trend": lambda db: charts.get_spending_trend(
+        db, TARGET_USER, TransactionCategory.FOOD
+    ),
+    "aggregates.get_month_total": lambda db: get_month_total(db, TARGET_USER, "food"),
+    "alerts.check_alerts": lambda db: alerts.check_alerts(db, TARGET_USER),
+    "receipt.get_user_receipts": lambda db: receipt.get_user_receipts(db, TARGET_USER),
+}
+
+@pytest.mark.parametrize("name", sorted(SERVICE_QUERIES))
+def test_service_query_uses_index(engine, name):
+    statements = _capture(engine, SERVICE_QUERIES[name])
+    seq_scans = _seq_scans(engine, statements)
+    assert not seq_scans, f"{name} usa varredura sequencial: {seq_scans}"
@@ -0,0 +1,182 @@
+import asyncio
+import os
+import threading
+import time
+from types import SimpleNamespace
+import fakeredis
+import pytest
+import redis
+from app.core.rate_limiter import RateLimiter as ApiRateLimiter, rate_limit
+from app.services.rate_limit import LocalTokenBuckets, RateLimiter, TwoTierRateLimiter
+from app.services.redis_client import AsyncRedisClient
+
+pytest.importorskip("lupa")
+
+@pytest.fixture
+def fake_server():
+    return fakeredis.FakeServer()
+
+@pytest.fixture
+def redis_client(fake_server):
+    # REDIS_TEST_URL aponta para um Redis real; sem ele, usa o fakeredis (com Lua via lupa)
+    url = os.getenv("REDIS_TEST_URL")
+    client = redis.Redis.from_url(url) if url else fakeredis.FakeRedis(server=fake_server)
+    client.flushdb()
+    yield client
+    client.flushdb()
+
+@pytest.fixture
+def async_client(redis_client, fake_server):
+    url = os.getenv("REDIS_TEST_URL")
+    return AsyncRedisClient(url=url) if url else AsyncRedisClient(client=fakeredis.aioredis.FakeRedis(server=fake_server))
+
+@pytest.mark.parametrize("mode", ["sliding_window", "token_bucket"])
+def test_allows_up_to_limit_and_reports_state(redis_client, mode):
+    limiter = RateLimiter("test", 3, 60, mode=mode, redis_client=redis_client)
+
+    results = [limiter.check(1) for _ in range(4)]
+    assert [result.allowed for result in results] == [True, True, True, False]
+    assert [result.remaining for result in results[:3]] == [2, 1, 0]
+    assert results[0].retry_after == 0
+    assert 0 < results[3].retry_after <= 60
+    assert 0 < results[3].reset_after <= 60
+
+    assert limiter.get_remaining(1) == 0
+    assert limiter.get_remaining(2) == 3
+    assert limiter.get_reset_time(2) is None
+    assert limiter.get_reset_time(1) is not None
+    assert limiter.is_allowed(2)
+
+def test_sliding_window_frees_slots_as_entries_expire(redis_client):
+    limiter = RateLimiter("test", 2, 0.3, mode="sliding_window", redis_client=redis_client)
+    assert limiter.is_allowed(1)
+    time.sleep(0.15)
+    assert limiter.is_allowed(1)
+    assert not limiter.is_allowed(1)
+
+    # Só a primeira entrada saiu da janela: abre uma vaga, não duas
+    time.sleep(0.2)
+    assert limiter.is_allowed(1)
+    assert not limiter.is_allowed(1)
+
+def test_token_bucket_refills_gradually(redis_client):
+    limiter = RateLimiter("test", 4, 0.4, mode="token_bucket", redis_client=redis_client)
+    assert all(limiter.is_allowed(1) for _ in range(4))
+    denied = limiter.check(1)
+    assert not denied.allowed and 0 < denied.retry_after <= 0.1
+
+    time.sleep(0.25)
+    assert limiter.check(1, cost=0).remaining == 2
+
+def test_cost_larger_than_limit_is_never_allowed(redis_client):
+    limiter = RateLimiter("test", 2, 60, redis_client=redis_client)
+    result = limiter.check(1, cost=3)
+    assert not result.allowed and result.retry_after == -1
+    assert limiter.get_remaining(1) == 2
+
+@pytest.mark.parametrize("mode", ["sliding_window", "token_bucket"])
+def test_concurrent_checks_never_exceed_limit(redis_client, mode):
+    limit = 50
+    limiter = RateLimiter("burst", limit, 60, mode=mode, redis_client=redis_client)
+    allowed = []
+    barrier = threading.Barrier(16)
+
+    def worker():
+        barrier.wait()
+        allowed.extend(limiter.is_allowed(7) for _ in range(20))
+
+    threads = [threading.Thread(target=worker) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(allowed) == 320
+    assert sum(allowed) == limit
+
+def test_fails_open_when_redis_is_unavailable():
+    limiter = RateLimiter("test", 1, 60, redis_client=redis.Redis(port=1, socket_connect_timeout=0.1))
+    result = limiter.check(1)
+    assert result.allowed and result.remaining == 1
+
+def test_api_limiter_uses_atomic_script(redis_client):
+    limiter = ApiRateLimiter(redis_client, max_requests=2, time_window=60)
+    assert [limiter.is_rate_limited("user:1") for _ in range(3)] == [False, False, True]
+    assert not limiter.is_rate_limited("user:2")
+
+async def test_rate_limit_decorator_checks_without_blocking_the_loop(redis_client, async_client):
+    limiter = ApiRateLimiter(redis_client, max_requests=1, time_window=60, async_client=async_client)
+    limiter.is_rate_limited = None  # o caminho síncrono não pode ser usado no event loop
+
+    @rate_limit(limiter)
+    async def handler(request):
+        return request.user.id
+
+    request = SimpleNamespace(user=SimpleNamespace(id=7))
+    assert await handler(request) == 7
+    with pytest.raises(Exception, match="Limite de requisições excedido"):
+        await handler(request)
+
+def test_rate_limit_decorator_keeps_sync_functions_sync(redis_client):
+    limiter = ApiRateLimiter(redis_client, max_requests=1, time_window=60)
+
+    @rate_limit(limiter)
+    def handler(request):
+        return request.user.id
+
+    request = SimpleNamespace(user=SimpleNamespace(id=7))
+    assert handler(request) == 7
+    with pytest.raises(Exception, match="Limite de requisições excedido"):
+        handler(request)
+
+def two_tier(redis_client, async_client, limit=5, **kwargs):
+    remote = RateLimiter("tier", limit, 60, mode="token_bucket", redis_client=redis_client, async_client=async_client)
+    return TwoTierRateLimiter("tier", limit, 60, redis_limiter=remote, sync_interval=60, **kwargs)
+
+async def test_two_tier_decides_locally_and_syncs_in_batches(redis_client, async_client):
+    first, second = two_tier(redis_client, async_client), two_tier(redis_client, async_client)
+    assert all(first.is_allowed(1) for _ in range(4))
+    assert first.is_allowed(2)
+    assert await first.sync() == 2
+    assert RateLimiter("tier", 5, 60, mode="token_bucket", redis_client=redis_client).get_remaining(1) == 1
+
+    # O outro processo só descobre o consumo global ao sincronizar a mesma chave
+    assert second.is_allowed(1)
+    await second.sync()
+    assert not second.is_allowed(1)
+    assert second.stats()["syncs"] == 1
+    await first.close()
+    await second.close()
+
+async def test_two_tier_enforces_local_limit_without_redis():
+    unreachable = AsyncRedisClient(url="redis://localhost:1", config={"connect_timeout": 0.1})
+    limiter = two_tier(redis.Redis(port=1, socket_connect_timeout=0.1), unreachable, limit=3)
+    assert [limiter.is_allowed(1) for _ in range(4)] == [True, True, True, False]
+    await limiter.sync()
+    assert not limiter.redis_available and limiter.stats()["sync_errors"] == 1
+    assert not limiter.is_allowed(1)
+    await limiter.close()
+
+async def test_two_tier_background_sync(redis_client, async_client):
+    remote = RateLimiter("tier", 5, 60, mode="token_bucket", redis_client=redis_client, async_client=async_client)
+    limiter = TwoTierRateLimiter("tier", 5, 60, redis_limiter=remote, sync_interval=0.02)
+    assert limiter.is_allowed(1)
+    await asyncio.sleep(0.1)
+    assert limiter.stats()["syncs"] == 1
+    assert remote.get_remaining(1) == 4
+    await limiter.close()
+
+def test_local_buckets_evict_full_buckets_first():
+    buckets = LocalTokenBuckets(capacity=2, time_window=60, max_keys=10)
+    buckets.consume("busy")
+    for key in range(20):
+        buckets.consume(key, cost=0)
+    assert len(buckets) <= 10 and buckets.evictions >= 10
+    allowed, tokens = buckets.consume("busy")
+    assert allowed and tokens < 1
+
+async def test_async_check_matches_sync_script(redis_client, async_client):
+    limiter = RateLimiter("async", 2, 60, redis_client=redis_client, async_client=async_client)
+    results = [await limiter.check_async(1) for _ in range(3)]
+    assert [result.allowed for result in results] == [True, True, False]
+    assert limiter.get_remaining(1) == 0
@@ -0,0 +1,52 @@
+import pytest
+from app.services import ocr
+from app.services.receipt import parse_receipt_text
+from app.services.receipt_parser import parse_brl, parse_receipt
+from tests.receipt_corpus import corpus
+
+def test_parse_brl_formats():
+    assert parse_brl("1.234", "56") == pytest.approx(1234.56)
+    assert parse_brl("1234", "56") == pytest.approx(1234.56)
+    assert parse_brl("0", "99") == pytest.approx(0.99)
+
+def test_total_line_wins_over_items_and_change():
+    text = "\n".join([
+        "PADARIA PAO QUENTE",
+        "DATA 05/03/2024",
+        "VALIDADE 05/04/2024",
+        "BOLO  2 UN  1.500,00",
+        "SUBTOTAL 1.510,00",
+        "TOTAL",
+        "R$ 1.234,56",
+        "VALOR RECEBIDO R$ 2.000,00",
+    ])
+    extraction = parse_receipt(text)
+    assert extraction.amount == pytest.approx(1234.56)
+    assert extraction.amount_text == "1.234,56"
+    assert extraction.from_total
+    assert extraction.date == "05/03/2024"
+    assert extraction.dates == ["05/03/2024", "05/04/2024"]
+    assert extraction.description == "PADARIA PAO QUENTE"
+
+def test_without_total_uses_currency_amount_and_label():
+    result = parse_receipt_text("Padaria R$ 12,50\nem 01-02-24")
+    assert result["amount"] == pytest.approx(12.5)
+    assert result["date"] == "01/02/2024"
+    assert result["description"] == "Padaria"
+    assert parse_receipt("sem valores").amount is None
+
+def test_ocr_entry_points_share_the_engine():
+    text = "LOJAS CENTRO\n31.12.2023\nTOTAL R$ 99,90"
+    assert ocr.extract_amount(text) == "99,90"
+    assert ocr.extract_date(text) == "31/12/2023"
+    assert ocr.extract_description(text) == "LOJAS CENTRO"
+
+def test_synthetic_corpus_accuracy():
+    samples = list(corpus(3000))
+    amount_hits = date_hits = 0
+    for text, amount, receipt_date in samples:
+        extraction = parse_receipt(text)
+        amount_hits += extraction.amount == pytest.approx(amount)
+        date_hits += extraction.date == receipt_date
+    assert amount_hits / len(samples) >= 0.99
+    assert date_hits / len(samples) >= 0.99
@@ -0,0 +1,83 @@
+import asyncio
+import gc
+import socket
+import threading
+import time
+import fakeredis
+import pytest
+import redis
+from app.services.redis_client import AsyncRedisClient
+
+def fake_client():
+    return AsyncRedisClient(client=fakeredis.aioredis.FakeRedis())
+
+async def test_pool_is_created_lazily_once_per_loop():
+    facade = AsyncRedisClient(url="redis://localhost:1")
+    assert facade._client is None
+    client = facade.client
+    assert facade.client is client
+    assert facade.stats()["max_connections"] == 50
+    await facade.close()
+    assert facade._client is None
+
+def test_pool_of_a_finished_loop_is_closed_when_replaced():
+    server = socket.create_server(("127.0.0.1", 0))
+    closed = threading.Event()
+
+    def serve():
+        conn, _ = server.accept()
+        with conn:
+            while conn.recv(1024):
+                conn.sendall(b"+PONG\r\n")
+        closed.set()
+
+    threading.Thread(target=serve, daemon=True).start()
+    facade = AsyncRedisClient(url=f"redis://127.0.0.1:{server.getsockname()[1]}")
+
+    async def ping():
+        return await facade.client.ping()
+
+    async def replace():
+        client = facade.client
+        await asyncio.sleep(0)
+        return client
+
+    assert asyncio.run(ping())
+    assert not closed.is_set()
+    stats = facade.stats()
+    assert stats["connections_in_use"] == 0 and stats["connections_idle"] == 1
+    # O loop anterior terminou: o novo pool substitui o antigo e fecha suas conexões
+    old = facade._client
+    assert asyncio.run(replace()) is not old
+    del old
+    gc.collect()
+    assert closed.wait(2)
+    server.close()
+
+async def test_execute_many_runs_commands_in_one_pipeline():
+    facade = fake_client()
+    results = await facade.execute_many([("incr", ["a"]), ("incrby", ["a", 5]), ("get", ["a"])])
+    assert results == [1, 6, b"6"]
+
+async def test_scripts_are_registered_once():
+    facade = fake_client()
+    script = facade.script("return tonumber(ARGV[1]) * 2")
+    assert facade.script("return tonumber(ARGV[1]) * 2") is script
+    assert await script(args=[21]) == 42
+
+async def test_health_check_reports_state():
+    facade = fake_client()
+    assert await facade.health_check()
+    assert facade.healthy and facade.latency is not None
+
+@pytest.mark.skipif(
+    tuple(int(part) for part in redis.__version__.split(".")[:3]) < (5, 0, 2),
+    reason="BlockingConnectionPool do redis-py < 5.0.2 conecta dentro do lock e só falha no timeout do pool"
+)
+async def test_unreachable_redis_fails_fast():
+    facade = AsyncRedisClient(url="redis://localhost:1", config={"connect_timeout": 0.2, "pool_timeout": 5})
+    start = time.perf_counter()
+    assert not await facade.health_check(timeout=3)
+    assert time.perf_counter() - start < 1
+    assert facade.stats()["connections_in_use"] == 0
+    await facade.close()
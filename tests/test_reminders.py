@@ -0,0 +1,153 @@
+import asyncio
+import time
+from datetime import date
+import fakeredis
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from telegram.error import Forbidden, RetryAfter, TimedOut
+from app.db.models import Base, FixedBill, User
+from app.services.fanout import MessageFanout
+from app.services.notifications import NotificationOutbox
+from app.services.redis_client import AsyncRedisClient
+from app.services.reminders import BillReminderJob, ChunkedReminderJob, ReminderCheckpoint, render_bill_reminders
+
+TODAY = date(2024, 3, 10)
+
+class Crash(BaseException):
+    """Simula a queda do processo no meio do job."""
+
+class FakeBot:
+    def __init__(self, errors=None):
+        self.sent = []
+        self.errors = errors or {}
+
+    async def send_message(self, chat_id, text):
+        errors = self.errors.get(chat_id)
+        if errors:
+            raise errors.pop(0)
+        await asyncio.sleep(0)
+        self.sent.append((chat_id, text))
+
+@pytest.fixture
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with Session() as db:
+        for i in range(1, 8):
+            db.add(User(id=i, telegram_id=1000 + i, first_name=f"U{i}", is_active=i != 7))
+            db.add(FixedBill(user_id=i, name="Luz", amount=100.0 + i, due_day=15))
+            db.add(FixedBill(user_id=i, name="Água", amount=50.0, due_day=12))
+        # Contas vencidas ou inativas não entram; o usuário 8 não tem contas a vencer
+        db.add(User(id=8, telegram_id=1008, first_name="U8"))
+        db.add(FixedBill(user_id=8, name="Internet", amount=99.0, due_day=5))
+        db.add(FixedBill(user_id=1, name="Antiga", amount=10.0, due_day=20, is_active=False))
+        await db.commit()
+    yield Session
+    await engine.dispose()
+
+@pytest.fixture
+def checkpoint():
+    client = AsyncRedisClient(client=fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer()))
+    return ReminderCheckpoint("bills", async_client=client)
+
+def make_job(session_factory, checkpoint, chunk_size=2, **fanout):
+    fanout = {"global_rate": 10000, "per_chat_interval": 0, "retry_base_delay": 0.01, **fanout}
+    return BillReminderJob(session_factory, MessageFanout(**fanout), checkpoint, chunk_size=chunk_size)
+
+def test_render_matches_reminder_format():
+    rows = [(1, 1001, "Ana", "Água", 50.0, 12), (1, 1001, "Ana", "Luz", 120.5, 15), (2, 1002, "Bia", "Gás", 30.0, 20)]
+    messages = render_bill_reminders(rows)
+    assert [(user_id, chat_id) for user_id, chat_id, _ in messages] == [(1, 1001), (2, 1002)]
+    assert messages[0][2] == (
+        "🚨 Ei, Ana! Você tem contas pra vencer!\n\n"
+        "Total a pagar: R$170.50\n\n"
+        "Detalhes:\n"
+        "- Água: R$50.00 (dia 12)\n"
+        "- Luz: R$120.50 (dia 15)\n"
+        "\nUse /bills para ver mais detalhes."
+    )
+
+async def test_sends_one_reminder_per_user_in_chunks(session_factory, checkpoint):
+    job = make_job(session_factory, checkpoint)
+    bot = FakeBot()
+    summary = await job.run(bot, TODAY)
+
+    assert sorted(chat_id for chat_id, _ in bot.sent) == [1001, 1002, 1003, 1004, 1005, 1006]
+    assert summary["users"] == 6 and summary["sent"] == 6 and summary["chunks"] == 3
+    assert "Total a pagar: R$151.00" in dict(bot.sent)[1001]
+    # Job do dia concluído: uma nova execução não reenvia
+    assert (await job.run(FakeBot(), TODAY))["sent"] == 0
+
+async def test_resumes_from_checkpoint_after_crash(session_factory, checkpoint):
+    job = make_job(session_factory, checkpoint)
+    with pytest.raises(Crash):
+        await job.run(FakeBot(errors={1005: [Crash()]}), TODAY)
+    assert await checkpoint.load(TODAY) == (4, False)
+
+    bot = FakeBot()
+    summary = await job.resume(bot, TODAY)
+    assert sorted(chat_id for chat_id, _ in bot.sent) == [1005, 1006]
+    assert summary["resumed_after"] == 4
+    assert await checkpoint.load(TODAY) == (0, True)
+    assert await job.resume(FakeBot(), TODAY) is None
+
+async def test_retry_after_pauses_and_blocked_chats_are_skipped(session_factory, checkpoint):
+    job = make_job(session_factory, checkpoint, chunk_size=10)
+    bot = FakeBot(errors={1001: [RetryAfter(0.2)], 1002: [Forbidden("bot was blocked by the user")], 1003: [TimedOut()]})
+    start = time.perf_counter()
+    summary = await job.run(bot, TODAY)
+
+    assert time.perf_counter() - start >= 0.2
+    assert summary["sent"] == 5 and summary["blocked"] == 1 and summary["failed"] == 0
+    assert job.fanout.stats()["flood_waits"] == 1 and job.fanout.stats()["retries"] == 2
+
+async def test_fanout_respects_global_and_per_chat_limits():
+    bot = FakeBot()
+    fanout = MessageFanout(global_rate=100, per_chat_interval=0.1, concurrency=10)
+    start = time.perf_counter()
+    await fanout.send_all(bot, [(chat_id, "oi") for chat_id in range(20)])
+    # 20 mensagens a 100/s: ao menos ~0.19s
+    assert time.perf_counter() - start >= 0.18
+
+    start = time.perf_counter()
+    await fanout.send_all(bot, [(1, str(i)) for i in range(3)])
+    assert time.perf_counter() - start >= 0.19
+    assert [text for chat_id, text in bot.sent if chat_id == 1] == ["oi", "0", "1", "2"]
+
+async def test_gives_up_after_max_retries():
+    bot = FakeBot(errors={1: [TimedOut()] * 5})
+    fanout = MessageFanout(global_rate=1000, per_chat_interval=0, max_retries=2, retry_base_delay=0.001)
+    assert await fanout.send_all(bot, [(1, "oi"), (2, "oi")]) == {"sent": 1, "failed": 1, "blocked": 0}
+    assert fanout.stats()["retries"] == 2
+
+async def test_job_enqueues_into_outbox_once_per_user_and_day(session_factory, checkpoint):
+    outbox = NotificationOutbox(
+        async_client=AsyncRedisClient(client=fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())),
+        global_rate=10000, per_chat_interval=0
+    )
+    job = BillReminderJob(session_factory, checkpoint=checkpoint, chunk_size=2, outbox=outbox)
+    summary = await job.run(FakeBot(), TODAY)
+    assert (summary["queued"], summary["duplicates"], summary["sent"]) == (6, 0, 0)
+
+    # Um lote reprocessado (ex.: checkpoint perdido) não gera mensagens repetidas
+    await checkpoint.async_redis.client.flushall()
+    assert (await job.run(FakeBot(), TODAY))["duplicates"] == 6
+
+    bot = FakeBot()
+    outbox.bot = bot
+    while await outbox.process_batch():
+        pass
+    assert sorted(chat_id for chat_id, _ in bot.sent) == [1001, 1002, 1003, 1004, 1005, 1006]
+
+def test_job_without_render_fails_on_creation():
+    class Incomplete(ChunkedReminderJob):
+        name = "incompleto"
+
+        def query(self, today, after_user_id, limit):
+            return select(User.id)
+
+    with pytest.raises(TypeError):
+        Incomplete()
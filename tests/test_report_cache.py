@@ -0,0 +1,80 @@
+import fakeredis
+from datetime import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.db.models import Base, Transaction
+from app.services.aggregates import register_commit_listener, unregister_commit_listener
+from app.services.redis_client import AsyncRedisClient
+from app.services.report_cache import ReportCache
+
+def make_cache(**kwargs):
+    return ReportCache(redis_client=fakeredis.FakeRedis(), local_max_entries=8, ttl=60, enabled=True, **kwargs)
+
+def fake_report(calls):
+    def render():
+        calls.append(1)
+        return {"category_chart": b"\x89PNG-a", "trend_chart": b"\x89PNG-b", "total": 10.0}
+    return render
+
+def test_hit_miss_and_redis_tier():
+    cache = make_cache()
+    calls = []
+    first = cache.get_or_render(1, "month", {"type": "bar"}, fake_report(calls))
+    second = cache.get_or_render(1, "month", {"type": "bar"}, fake_report(calls))
+    assert first == second
+    assert len(calls) == 1
+    # O chamador recebe uma cópia: alterá-la não corrompe o cache
+    second["total"] = 0.0
+    assert cache.get_or_render(1, "month", {"type": "bar"}, fake_report(calls))["total"] == 10.0
+
+    cache.local.clear()
+    from_redis = cache.get_or_render(1, "month", {"type": "bar"}, fake_report(calls))
+    assert from_redis["category_chart"] == b"\x89PNG-a"
+    assert len(calls) == 1
+
+    stats = cache.stats()
+    assert (stats["hits_local"], stats["hits_redis"], stats["misses"]) == (2, 1, 1)
+
+def test_preferences_are_part_of_the_key():
+    cache = make_cache()
+    calls = []
+    cache.get_or_render(1, "month", {"type": "bar"}, fake_report(calls))
+    cache.get_or_render(1, "month", {"type": "pie"}, fake_report(calls))
+    cache.get_or_render(1, "week", {"type": "bar"}, fake_report(calls))
+    assert len(calls) == 3
+
+def test_transaction_commit_invalidates_report():
+    cache = make_cache()
+    listener = lambda deltas: cache.bump_versions(key[0] for key in deltas)
+    register_commit_listener(listener)
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+
+    try:
+        calls = []
+        cache.get_or_render(1, "month", None, fake_report(calls))
+        db.add(Transaction(user_id=2, amount=5.0, category="food", date=datetime.now()))
+        db.commit()
+        cache.get_or_render(1, "month", None, fake_report(calls))
+        assert len(calls) == 1
+
+        db.add(Transaction(user_id=1, amount=5.0, category="food", date=datetime.now()))
+        db.commit()
+        cache.get_or_render(1, "month", None, fake_report(calls))
+        assert len(calls) == 2
+    finally:
+        unregister_commit_listener(listener)
+
+async def test_bump_inside_event_loop_uses_async_client():
+    server = fakeredis.FakeServer()
+    cache = ReportCache(
+        redis_client=fakeredis.FakeRedis(server=server),
+        async_client=AsyncRedisClient(client=fakeredis.aioredis.FakeRedis(server=server)),
+        local_max_entries=8, ttl=60, enabled=True
+    )
+    before = cache.data_version(1)
+    cache.bump_versions([1, 2])
+    await cache.join()
+    assert cache.data_version(1) != before
+    assert cache.data_version(2) == "1.0"
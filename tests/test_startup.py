@@ -2,6 +2,9 @@ import os
 import pytest
 from unittest import mock
 from app.core.startup_checks import check_required_env, check_tesseract, check_redis, check_postgres, setup_logging, validate_env_vars
+import redis
+from app.core.redis import get_redis
+from app.services import redis_client
 from app.services.redis_client import get_redis_connection
 from app.services import ocr
 import subprocess
@@ -28,19 +31,13 @@ def test_dependencias_externas_ausentes(func, cmd):
         with pytest.raises(SystemExit):
             func()
 
-# 3. Teste de retry no Redis (simulando falha temporária)
-def test_redis_retry(monkeypatch):
-    call_count = {"count": 0}
-    def fail_then_succeed(*args, **kwargs):
-        call_count["count"] += 1
-        if call_count["count"] < 3:
-            raise Exception("Redis down")
-        import redis
-        return mock.Mock(spec=redis.Redis)
-    with mock.patch("redis.Redis.from_url", side_effect=fail_then_succeed):
-        conn = get_redis_connection()
-        assert conn is not None
-        assert call_count["count"] == 3
+# 3. Teste do cliente Redis compartilhado (um único pool por processo)
+def test_redis_clients_share_one_pool(monkeypatch):
+    monkeypatch.setattr(redis_client, "_sync_client", None)
+    conn = get_redis_connection()
+    assert isinstance(conn.connection_pool, redis.BlockingConnectionPool)
+    assert get_redis_connection() is conn
+    assert get_redis() is conn
 
 # 4. Teste de fallback do OCR (simulando falha do Tesseract)
 def test_ocr_retry(monkeypatch):
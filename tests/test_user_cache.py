@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+import fakeredis
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.db.models import Base
+from app.services import user as user_service
+from app.services import user_cache as user_cache_module
+from app.services.preferences import update_user_preferences_async
+from app.services.redis_client import AsyncRedisClient
+from app.services.user import deactivate_user_async, get_user_identity_async, update_user_async
+from app.services.user_cache import UserCache, UserIdentity
+
+def telegram_user(first_name="Test"):
+    return SimpleNamespace(id=123, username="test_user", first_name=first_name, last_name="User")
+
+def no_database():
+    raise AssertionError("o banco não deveria ser consultado")
+
+@pytest.fixture
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(bind=engine, expire_on_commit=False)
+    await engine.dispose()
+
+@pytest.fixture
+def cache():
+    server = fakeredis.FakeServer()
+    cache = UserCache(
+        redis_client=fakeredis.FakeRedis(server=server),
+        async_client=AsyncRedisClient(client=fakeredis.aioredis.FakeRedis(server=server)),
+        local_max_entries=16, local_ttl=60, ttl=60, enabled=True
+    )
+    with patch.object(user_cache_module, "user_cache", cache), patch.object(user_service, "user_cache", cache):
+        yield cache
+
+async def test_read_through_skips_database_on_hit(session_factory, cache):
+    identity = await get_user_identity_async(telegram_user(), session_factory)
+    assert identity.telegram_id == 123 and identity.is_active and identity.ai_cache_enabled
+
+    cached = await get_user_identity_async(telegram_user(), no_database)
+    assert cached == identity
+
+    other_process = UserCache(redis_client=cache.redis, local_max_entries=16, local_ttl=60, ttl=60, enabled=True)
+    assert other_process.get(123) == identity
+    assert other_process.stats()["hits_redis"] == 1
+    assert cache.stats()["misses"] == 1
+
+async def test_invalidated_on_user_and_preference_changes(session_factory, cache):
+    identity = await get_user_identity_async(telegram_user(), session_factory)
+
+    async with session_factory() as db:
+        await update_user_async(db, telegram_user("Renamed"))
+    assert await cache.get_async(123) is None
+    await cache.wait_invalidations()
+    assert cache.get(123) is None
+    assert (await get_user_identity_async(telegram_user(), session_factory)).first_name == "Renamed"
+
+    async with session_factory() as db:
+        await update_user_preferences_async(db, identity.id, ai_cache_enabled=False)
+    assert not (await get_user_identity_async(telegram_user(), session_factory)).ai_cache_enabled
+
+    async with session_factory() as db:
+        assert await deactivate_user_async(db, 123)
+    assert not (await get_user_identity_async(telegram_user(), session_factory)).is_active
+    assert cache.stats()["invalidations"] == 3
+
+def test_stale_write_is_dropped_after_invalidation(cache):
+    generation = cache.generation()
+    cache.invalidate([123])
+    cache.set(UserIdentity(id=1, telegram_id=123), generation)
+    assert cache.get(123) is None
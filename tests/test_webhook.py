@@ -0,0 +1,122 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+import httpx
+import pytest
+from fastapi import FastAPI
+from telegram import Bot
+from app.bot import webhook
+from app.bot.dispatcher import PerChatUpdateProcessor
+from app.bot.webhook import WebhookUpdateQueue, verify_secret
+from app.core.config import settings
+
+PATH = settings.WEBHOOK_CONFIG["path"]
+SECRET = {"X-Telegram-Bot-Api-Secret-Token": "s3cret"}
+
+def make_update(update_id, chat_id=1):
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Test"},
+            "text": "oi"
+        }
+    }
+
+@pytest.fixture
+async def setup(monkeypatch):
+    monkeypatch.setattr(settings, "TELEGRAM_WEBHOOK_SECRET", "s3cret")
+    processed = []
+    release = asyncio.Event()
+    release.set()
+
+    async def process_update(update):
+        await release.wait()
+        processed.append(update.update_id)
+
+    application = SimpleNamespace(bot=Bot("123:abc"), process_update=process_update)
+    queue = WebhookUpdateQueue(max_size=2, workers=1)
+    app = FastAPI()
+    app.include_router(webhook.router)
+    with patch.object(webhook, "webhook_queue", queue):
+        await queue.start(application)
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            yield client, queue, processed, release
+        release.set()
+        await queue.stop()
+
+def test_verify_secret():
+    assert verify_secret("abc", "abc")
+    assert not verify_secret("abd", "abc")
+    assert not verify_secret(None, "abc")
+    assert not verify_secret("", "")
+
+async def test_updates_are_queued_and_processed(setup):
+    client, queue, processed, _ = setup
+    for update_id in (1, 2):
+        response = await client.post(PATH, json=make_update(update_id), headers=SECRET)
+        assert response.status_code == 200
+    await asyncio.wait_for(queue._queue.join(), 1)
+    assert processed == [1, 2]
+    assert queue.stats()["processed"] == 2
+
+async def test_rejects_wrong_secret_and_invalid_payload(setup):
+    client, queue, processed, _ = setup
+    assert (await client.post(PATH, json=make_update(1))).status_code == 403
+    assert (await client.post(PATH, json=make_update(1), headers={"X-Telegram-Bot-Api-Secret-Token": "x"})).status_code == 403
+    assert (await client.post(PATH, content=b"not json", headers=SECRET)).status_code == 400
+    assert queue.stats()["received"] == 0
+
+async def test_full_queue_returns_503(setup):
+    client, queue, processed, release = setup
+    release.clear()
+    statuses = [(await client.post(PATH, json=make_update(0), headers=SECRET)).status_code]
+    while queue._queue.qsize():
+        await asyncio.sleep(0)
+    statuses += [(await client.post(PATH, json=make_update(i), headers=SECRET)).status_code for i in range(1, 5)]
+    # Um update no worker, dois na fila, o resto é recusado para o Telegram reenviar
+    assert statuses.count(200) == 3 and statuses.count(503) == 2
+    release.set()
+    await asyncio.wait_for(queue._queue.join(), 1)
+    assert processed == [0, 1, 2]
+    assert queue.stats()["rejected"] == 2
+
+async def test_slow_chat_does_not_stall_other_chats():
+    release = asyncio.Event()
+    processed = []
+
+    async def process_update(update):
+        if update.effective_chat.id == 1:
+            await release.wait()
+        processed.append(update.update_id)
+
+    processor = PerChatUpdateProcessor(max_concurrent=2, max_pending=10)
+    application = SimpleNamespace(bot=Bot("123:abc"), process_update=process_update, update_processor=processor)
+    queue = WebhookUpdateQueue(max_size=10, workers=2)
+    await queue.start(application)
+    try:
+        # Mais updates do chat lento do que workers
+        for update_id in (1, 2, 3):
+            queue.submit(make_update(update_id, chat_id=1))
+        queue.submit(make_update(4, chat_id=2))
+        for _ in range(100):
+            if processed:
+                break
+            await asyncio.sleep(0.01)
+        assert processed == [4]
+
+        release.set()
+        await asyncio.wait_for(queue._queue.join(), 1)
+        assert processed == [4, 1, 2, 3]
+    finally:
+        release.set()
+        await queue.stop()
+
+async def test_not_found_when_webhook_is_not_running():
+    app = FastAPI()
+    app.include_router(webhook.router)
+    with patch.object(webhook, "webhook_queue", WebhookUpdateQueue()):
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            assert (await client.post(PATH, json=make_update(1), headers=SECRET)).status_code == 404